@@ -32,6 +32,9 @@ try:
         get_sqlite_tables,
         get_sqlite_data,
         get_sqlite_stats,
+        get_sqlite_space,
+        run_sqlite_maintenance,
+        search_sqlite_data,
         export_sqlite_data,
         export_sqlite_data_as_json,
         get_table_configs,
@@ -39,12 +42,14 @@ try:
         get_task,
         update_task_status,
         get_all_tasks,
-        delete_task as db_delete_task
+        delete_task as db_delete_task,
+        sqlite_manager
     )
     from .extra_mysql_api import (
         get_mysql_tables,
         get_mysql_data,
         get_mysql_stats,
+        search_mysql_data,
         export_mysql_data,
         export_mysql_data_as_json,
         get_mysql_table_configs,
@@ -61,6 +66,9 @@ except ImportError:
         get_sqlite_tables,
         get_sqlite_data,
         get_sqlite_stats,
+        get_sqlite_space,
+        run_sqlite_maintenance,
+        search_sqlite_data,
         export_sqlite_data,
         export_sqlite_data_as_json,
         get_table_configs,
@@ -68,12 +76,14 @@ except ImportError:
         get_task,
         update_task_status,
         get_all_tasks,
-        delete_task as db_delete_task
+        delete_task as db_delete_task,
+        sqlite_manager
     )
     from extra_mysql_api import (
         get_mysql_tables,
         get_mysql_data,
         get_mysql_stats,
+        search_mysql_data,
         export_mysql_data,
         export_mysql_data_as_json,
         get_mysql_table_configs,
@@ -729,6 +739,22 @@ async def health_check():
     """健康检查接口"""
     return {"status": "healthy", "message": "API服务运行正常"}
 
+# 全文检索API路由
+@api_router.get("/search", summary="全文检索内容和评论")
+async def api_search(
+    q: str = Query(..., min_length=1, description="检索关键词"),
+    db_type: str = Query("sqlite", description="数据库类型 (sqlite/mysql)"),
+    tables: Optional[str] = Query(None, description="检索的数据表，多个用逗号分隔，默认检索全部内容表和评论表"),
+    task_times_id: Optional[str] = Query(None, description="任务ID筛选"),
+    cursor: Optional[str] = Query(None, description="游标分页：上一页返回的next_cursor"),
+    page_size: int = Query(30, ge=1, le=1000, description="每页数量")
+):
+    """按相关性检索内容表和评论表的标题、描述、正文"""
+    table_list = [table.strip() for table in tables.split(",") if table.strip()] if tables else None
+    if db_type == "mysql":
+        return await search_mysql_data(q, table_list, task_times_id, cursor, page_size)
+    return await search_sqlite_data(q, table_list, task_times_id, cursor, page_size)
+
 # SQLite数据API路由
 @api_router.get("/sqlite/tables", summary="获取SQLite数据表列表")
 async def api_get_sqlite_tables():
@@ -740,16 +766,32 @@ async def api_get_sqlite_data(
     table: str = Query(..., description="表名"),
     page: int = Query(1, ge=1, description="页码"),
     page_size: int = Query(30, ge=1, le=1000, description="每页数量"),
-    task_times_id: Optional[str] = Query(None, description="任务ID筛选")
+    task_times_id: Optional[str] = Query(None, description="任务ID筛选"),
+    cursor: Optional[str] = Query(None, description="游标分页：上一页返回的next_cursor"),
+    keyset: bool = Query(False, description="使用游标分页，第一页不传cursor")
 ):
     """获取SQLite表格数据"""
-    return await get_sqlite_data(table, page, page_size, task_times_id)
+    return await get_sqlite_data(table, page, page_size, task_times_id, cursor, keyset)
 
 @api_router.get("/sqlite/stats", summary="获取SQLite数据统计")
 async def api_get_sqlite_stats():
     """获取SQLite数据统计信息"""
     return await get_sqlite_stats()
 
+@api_router.get("/sqlite/maintenance/space", summary="获取SQLite数据库空间占用")
+async def api_get_sqlite_space():
+    """获取SQLite数据库文件大小和空闲页占用"""
+    return await get_sqlite_space()
+
+@api_router.post("/sqlite/maintenance", summary="执行SQLite数据库维护")
+async def api_run_sqlite_maintenance(
+    archive_days: Optional[float] = Query(None, gt=0, description="归档创建时间超过该天数的任务，不传则不归档"),
+    vacuum: bool = Query(True, description="是否增量回收空闲页"),
+    analyze: bool = Query(True, description="是否执行 ANALYZE 和 PRAGMA optimize")
+):
+    """归档过期任务、回收空闲页、更新统计信息，返回回收的空间"""
+    return await run_sqlite_maintenance(archive_days, vacuum, analyze)
+
 @api_router.get("/sqlite/export", summary="导出SQLite表格数据")
 async def api_export_sqlite_data(
     table_name: str = Query(..., description="表名"),
@@ -782,10 +824,13 @@ async def api_get_mysql_data(
     table: str = Query(..., description="表名"),
     page: int = Query(1, ge=1, description="页码"),
     page_size: int = Query(30, ge=1, le=1000, description="每页数量"),
-    task_times_id: Optional[str] = Query(None, description="任务ID筛选")
+    task_times_id: Optional[str] = Query(None, description="任务ID筛选"),
+    cursor: Optional[str] = Query(None, description="游标分页：上一页返回的next_cursor"),
+    keyset: bool = Query(False, description="使用游标分页，第一页不传cursor"),
+    approximate_count: bool = Query(False, description="返回估算的总数，大表上比精确计数快")
 ):
     """获取MySQL表格数据"""
-    return await get_mysql_data(table, page, page_size, task_times_id)
+    return await get_mysql_data(table, page, page_size, task_times_id, cursor, keyset, approximate_count)
 
 @api_router.get("/mysql/stats", summary="获取MySQL数据统计")
 async def api_get_mysql_stats():
@@ -853,10 +898,18 @@ async def api_delete_mysql_task(task_times_id: str):
 # 将API路由器添加到基础应用
 base_app.include_router(api_router)
 
+# 应用启动时按配置开启SQLite定时维护
+@base_app.on_event("startup")
+async def startup_event():
+    """应用启动时开启定时维护"""
+    if sqlite_manager.start_maintenance_scheduler():
+        print("SQLite定时维护已开启")
+
 # 应用关闭时清理资源
 @base_app.on_event("shutdown")
 async def shutdown_event():
     """应用关闭时清理资源"""
+    await sqlite_manager.stop_maintenance_scheduler()
     try:
         await cleanup_mysql_connections()
         print("MySQL连接已清理")
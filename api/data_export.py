@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+数据导出的流式编码
+
+数据源以 (列名列表, 行列表) 的形式分批产出数据，这里逐批编码为CSV/JSON字节块，
+导出时内存占用只与单批行数有关，与表的大小无关。
+"""
+
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+
+# 每批从数据库读取的行数
+EXPORT_FETCH_SIZE = 1000
+
+RowChunks = AsyncIterator[Tuple[List[str], Sequence[Sequence[Any]]]]
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode('utf-8', errors='replace')
+    return str(value)
+
+
+async def iter_csv_export(chunks: RowChunks, with_bom: bool = False,
+                          format_value: Optional[Callable[[Any], Any]] = None) -> AsyncIterator[bytes]:
+    """
+    将分批产出的数据逐批编码为CSV
+
+    Args:
+        chunks: 分批产出 (列名列表, 行列表) 的异步迭代器，第一批可以只带列名
+        with_bom: 是否写入BOM，便于Excel正确识别中文
+        format_value: 单元格值的转换函数
+
+    Returns:
+        CSV字节块的异步迭代器
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    header_written = False
+    if with_bom:
+        buffer.write('\ufeff')
+
+    async for columns, rows in chunks:
+        if not header_written:
+            writer.writerow(columns)
+            header_written = True
+        for row in rows:
+            writer.writerow([format_value(value) for value in row] if format_value else row)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+async def iter_json_export(chunks: RowChunks, meta: Dict[str, Any], records_key: str,
+                           wrapper: Optional[Dict[str, Any]] = None) -> AsyncIterator[bytes]:
+    """
+    将分批产出的数据逐批编码为JSON对象，记录数组之后追加 total_count 字段
+
+    Args:
+        chunks: 分批产出 (列名列表, 行列表) 的异步迭代器
+        meta: 导出的元数据字段，如表名、任务ID、导出时间
+        records_key: 记录数组的字段名
+        wrapper: 外层字段（如 success/message），传入时元数据和记录放在外层的 data 字段中
+
+    Returns:
+        JSON字节块的异步迭代器
+    """
+    dumps = lambda obj: json.dumps(obj, ensure_ascii=False, default=_json_default)
+    head = dumps(meta)[:-1] + f', {dumps(records_key)}: ['
+    if wrapper is not None:
+        head = dumps(wrapper)[:-1] + ', "data": ' + head
+    yield head.encode('utf-8')
+
+    total_count = 0
+    async for columns, rows in chunks:
+        if not rows:
+            continue
+        chunk = ','.join(dumps(dict(zip(columns, row))) for row in rows)
+        yield (chunk if total_count == 0 else ',' + chunk).encode('utf-8')
+        total_count += len(rows)
+
+    tail = f'], "total_count": {total_count}}}'
+    if wrapper is not None:
+        tail += '}'
+    yield tail.encode('utf-8')
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+数据浏览接口的游标分页与行数缓存
+
+游标分页按 (时间字段, id) 倒序排列，下一页的条件由上一页最后一行的 (时间字段值, id) 生成，
+翻到任意深度都只扫描一页的数据。SQLite分库合并查询时各库的id互相独立，排序和游标在id之前加上数据来源字段。行数缓存以表的最大id作为版本号，有新数据写入时自动失效，
+删除数据时由调用方主动失效，另有过期时间兜底其他进程的删除操作。
+全文检索按 (相关性分值, 表名, 数据来源, id) 排序，同样使用游标分页。
+"""
+
+import base64
+import json
+import time
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+# 行数缓存的过期时间（秒）
+COUNT_CACHE_TTL = 300
+
+
+def encode_cursor(time_value: Any, row_id: int, shard: Optional[str] = None) -> str:
+    """
+    将一行的 (时间字段值, id, 数据来源) 编码为游标字符串
+
+    Args:
+        time_value: 时间字段值
+        row_id: 行id
+        shard: 分库合并查询时行的数据来源，不分库时为 None
+
+    Returns:
+        URL安全的游标字符串
+    """
+    if isinstance(time_value, (datetime, date)):
+        time_value = str(time_value)
+    values = [time_value, row_id] if shard is None else [time_value, row_id, shard]
+    raw = json.dumps(values, ensure_ascii=False, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, int, Optional[str]]:
+    """
+    解析游标字符串
+
+    Args:
+        cursor: encode_cursor 生成的游标字符串
+
+    Returns:
+        (时间字段值, id, 数据来源)，游标中没有数据来源时为 None
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+        time_value, row_id, *rest = json.loads(raw)
+        if len(rest) > 1:
+            raise ValueError(cursor)
+        return time_value, int(row_id), str(rest[0]) if rest else None
+    except Exception:
+        raise HTTPException(status_code=400, detail=f"无效的分页游标: {cursor}")
+
+
+def build_keyset_condition(time_field: str, cursor: Optional[str], placeholder: str = '?',
+                           shard_field: Optional[str] = None) -> Tuple[str, List[Any]]:
+    """
+    生成游标分页的WHERE条件，时间字段为空的行排在最后
+
+    Args:
+        time_field: 时间字段名
+        cursor: 上一页返回的游标，为空时表示第一页
+        placeholder: SQL参数占位符，SQLite为 ?，MySQL为 %s
+        shard_field: 分库合并查询时的数据来源字段，时间相同的行按 (数据来源, id) 排序
+
+    Returns:
+        (条件语句, 参数列表)，第一页时条件语句为空字符串
+    """
+    if not cursor:
+        return "", []
+    time_value, row_id, shard = decode_cursor(cursor)
+    if shard_field and shard is not None:
+        tie_condition = f"(`{shard_field}` < {placeholder} OR (`{shard_field}` = {placeholder} AND `id` < {placeholder}))"
+        tie_params = [shard, shard, row_id]
+    else:
+        tie_condition = f"`id` < {placeholder}"
+        tie_params = [row_id]
+    if time_value is None:
+        return f"(`{time_field}` IS NULL AND {tie_condition})", tie_params
+    condition = (f"(`{time_field}` < {placeholder} OR (`{time_field}` = {placeholder} AND {tie_condition}) "
+                 f"OR `{time_field}` IS NULL)")
+    return condition, [time_value, time_value] + tie_params
+
+
+def build_keyset_order(time_field: str, shard_field: Optional[str] = None) -> str:
+    """游标分页使用的排序语句"""
+    if shard_field:
+        return f"ORDER BY `{time_field}` DESC, `{shard_field}` DESC, `id` DESC"
+    return f"ORDER BY `{time_field}` DESC, `id` DESC"
+
+
+def build_keyset_page(rows: List[Dict[str, Any]], page_size: int, time_field: str,
+                      shard_field: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    根据多查询一行的结果截取当前页，并生成下一页的游标
+
+    Args:
+        rows: 按 page_size + 1 查询得到的行
+        page_size: 每页数量
+        time_field: 时间字段名
+        shard_field: 分库合并查询时的数据来源字段
+
+    Returns:
+        (当前页数据, 下一页游标)，没有下一页时游标为 None
+    """
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    last_row = rows[-1]
+    return rows, encode_cursor(last_row.get(time_field), last_row['id'], last_row[shard_field] if shard_field else None)
+
+
+class CountCache:
+    """按 (表名, 任务ID) 缓存的行数，以表的最大id作为版本号"""
+
+    def __init__(self, ttl: float = COUNT_CACHE_TTL):
+        self._ttl = ttl
+        self._entries: Dict[Tuple[str, Optional[str]], Tuple[Any, int, float]] = {}
+
+    def get(self, table_name: str, task_times_id: Optional[str], version: Any) -> Optional[int]:
+        """
+        获取缓存的行数，版本号不一致或已过期时返回 None
+
+        Args:
+            table_name: 表名
+            task_times_id: 任务ID，为空时表示整表
+            version: 当前版本号（表的最大id）
+
+        Returns:
+            缓存的行数
+        """
+        entry = self._entries.get((table_name, task_times_id))
+        if entry is None:
+            return None
+        cached_version, count, cached_at = entry
+        if cached_version != version or time.monotonic() - cached_at > self._ttl:
+            return None
+        return count
+
+    def set(self, table_name: str, task_times_id: Optional[str], version: Any, count: int):
+        self._entries[(table_name, task_times_id)] = (version, count, time.monotonic())
+
+    def invalidate(self, table_name: Optional[str] = None, task_times_id: Optional[str] = None):
+        """
+        删除数据后使缓存失效
+
+        Args:
+            table_name: 表名，为空时清空全部表
+            task_times_id: 任务ID，为空时失效该表的全部缓存；否则失效该任务和整表的缓存
+
+        Returns:
+
+        """
+        if table_name is None:
+            self._entries.clear()
+            return
+        for key in list(self._entries):
+            if key[0] != table_name:
+                continue
+            if task_times_id is None or key[1] in (task_times_id, None):
+                del self._entries[key]
+
+
+def encode_search_cursor(score: float, table_name: str, row_id: int, shard: Optional[str] = None) -> str:
+    """将检索结果一行的 (分值, 表名, id, 数据来源) 编码为游标字符串，不分库时没有数据来源"""
+    values = [score, table_name, row_id] if shard is None else [score, table_name, row_id, shard]
+    raw = json.dumps(values, ensure_ascii=False, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_search_cursor(cursor: str) -> Tuple[float, str, int, Optional[str]]:
+    """解析全文检索的游标字符串，返回 (分值, 表名, id, 数据来源)"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+        score, table_name, row_id, *rest = json.loads(raw)
+        if len(rest) > 1:
+            raise ValueError(cursor)
+        return float(score), str(table_name), int(row_id), str(rest[0]) if rest else None
+    except Exception:
+        raise HTTPException(status_code=400, detail=f"无效的分页游标: {cursor}")
+
+
+def build_search_cursor_condition(table_name: str, cursor: Optional[str], placeholder: str = '?',
+                                  shard_field: Optional[str] = None) -> Tuple[str, List[Any]]:
+    """
+    生成全文检索游标分页的条件，多表结果按 (_score, 表名, 数据来源, id) 升序合并
+
+    Args:
+        table_name: 当前检索的表名
+        cursor: 上一页返回的游标，为空时表示第一页
+        placeholder: SQL参数占位符
+        shard_field: 分库合并查询时的数据来源字段
+
+    Returns:
+        (条件语句, 参数列表)
+    """
+    if not cursor:
+        return "", []
+    score, cursor_table, row_id, shard = decode_search_cursor(cursor)
+    if table_name > cursor_table:
+        return f"_score >= {placeholder}", [score]
+    if table_name < cursor_table:
+        return f"_score > {placeholder}", [score]
+    if shard_field and shard is not None:
+        return (f"(_score > {placeholder} OR (_score = {placeholder} AND ({shard_field} > {placeholder} "
+                f"OR ({shard_field} = {placeholder} AND id > {placeholder}))))", [score, score, shard, shard, row_id])
+    return f"(_score > {placeholder} OR (_score = {placeholder} AND id > {placeholder}))", [score, score, row_id]
+
+
+def merge_search_results(results: Dict[str, List[Dict[str, Any]]], page_size: int,
+                         shard_field: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    合并各表的检索结果（每张表最多 page_size + 1 行），截取当前页并生成下一页的游标
+
+    Args:
+        results: 表名到检索结果的映射，结果中包含 _score 和 id 字段
+        page_size: 每页数量
+        shard_field: 分库合并查询时的数据来源字段，该字段不在结果中的表视为不分库
+
+    Returns:
+        (当前页数据, 下一页游标)，每行附带 table_name 字段
+    """
+    merged = []
+    for table_name, rows in results.items():
+        for row in rows:
+            row['table_name'] = table_name
+            row['_score'] = float(row['_score'] or 0)
+            merged.append(row)
+
+    def shard_of(row: Dict[str, Any]) -> Optional[str]:
+        return row.get(shard_field) if shard_field else None
+
+    merged.sort(key=lambda row: (row['_score'], row['table_name'], shard_of(row) or '', row['id']))
+    if len(merged) <= page_size:
+        return merged, None
+    merged = merged[:page_size]
+    last_row = merged[-1]
+    return merged, encode_search_cursor(last_row['_score'], last_row['table_name'], last_row['id'], shard_of(last_row))
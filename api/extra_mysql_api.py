@@ -9,8 +9,6 @@
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
 
 import asyncio
-import csv
-import io
 import json
 import os
 from datetime import datetime
@@ -27,14 +25,39 @@ if sys_path not in os.sys.path:
 
 from config.db_config import (
     MYSQL_DB_HOST, MYSQL_DB_PORT, MYSQL_DB_USER, MYSQL_DB_PWD, MYSQL_DB_NAME,
+    MYSQL_POOL_MINSIZE, MYSQL_POOL_MAXSIZE, MYSQL_POOL_RECYCLE,
     AsyncMysqlDB
 )
 from dp_op.db_tables_mapping import (
     get_all_detailed_table_configs,
     get_detailed_table_config,
     is_valid_table,
-    get_table_display_name
+    get_table_display_name,
+    get_table_time_field
 )
+from dp_op.table_stats import STATS_TABLES, TABLE_STATS_TABLE, build_stats_summary_sql
+from dp_op.search_index import build_search_sql, get_search_tables
+from dp_op.task_purger import TaskDataPurger
+try:
+    from .data_export import EXPORT_FETCH_SIZE, iter_csv_export, iter_json_export
+except ImportError:
+    from data_export import EXPORT_FETCH_SIZE, iter_csv_export, iter_json_export
+try:
+    from .data_paging import (CountCache, build_keyset_condition, build_keyset_order, build_keyset_page,
+                              build_search_cursor_condition, merge_search_results)
+except ImportError:
+    from data_paging import (CountCache, build_keyset_condition, build_keyset_order, build_keyset_page,
+                             build_search_cursor_condition, merge_search_results)
+
+
+def format_csv_value(value: Any) -> str:
+    """CSV导出时的单元格格式：时间转为ISO格式，空值转为空字符串"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if value is None:
+        return ''
+    return str(value)
+
 
 class MySQLDataManager:
     """MySQL数据管理器"""
@@ -45,6 +68,10 @@ class MySQLDataManager:
         
         # 从统一配置模块获取表格配置信息
         self.table_configs = get_all_detailed_table_configs()
+        
+        # 按 (表名, 任务ID) 缓存的行数
+        self.count_cache = CountCache()
+        self._purger: Optional[TaskDataPurger] = None
     
     async def get_connection(self) -> AsyncMysqlDB:
         """获取数据库连接"""
@@ -58,8 +85,9 @@ class MySQLDataManager:
                     db=MYSQL_DB_NAME,
                     charset='utf8mb4',
                     autocommit=True,
-                    maxsize=10,
-                    minsize=1
+                    maxsize=MYSQL_POOL_MAXSIZE,
+                    minsize=MYSQL_POOL_MINSIZE,
+                    pool_recycle=MYSQL_POOL_RECYCLE
                 )
                 self.db = AsyncMysqlDB(self.pool)
             except Exception as e:
@@ -113,26 +141,52 @@ class MySQLDataManager:
             raise HTTPException(status_code=500, detail=f"获取表列表失败: {str(e)}")
     
     async def get_table_data(self, table_name: str, page: int = 1, page_size: int = 30, 
-                           task_times_id: Optional[str] = None) -> Dict[str, Any]:
-        """获取表格数据"""
+                           task_times_id: Optional[str] = None, cursor: Optional[str] = None,
+                           keyset: bool = False, approximate_count: bool = False) -> Dict[str, Any]:
+        """获取表格数据，keyset为True或传入cursor时使用游标分页，approximate_count为True时返回估算的总数"""
+        if (keyset or cursor) and not is_valid_table(table_name):
+            raise HTTPException(status_code=400, detail=f"不支持的数据表: {table_name}")
+        
         db = await self.get_connection()
         
         try:
             # 构建基础查询
             base_query = f"SELECT * FROM `{table_name}`"
-            count_query = f"SELECT COUNT(*) as total FROM `{table_name}`"
             
             # 添加任务ID筛选条件
-            where_clause = ""
+            where_conditions = []
             query_params = []
             
             if task_times_id:
-                where_clause = " WHERE task_times_id = %s"
+                where_conditions.append("task_times_id = %s")
                 query_params = [task_times_id]
             
+            where_clause = f" WHERE {' AND '.join(where_conditions)}" if where_conditions else ""
+            
             # 获取总数
-            total_result = await db.get_first(count_query + where_clause, *query_params)
-            total = total_result['total'] if total_result else 0
+            if approximate_count:
+                total = await self.estimate_rows(db, table_name, where_clause, query_params)
+            else:
+                total = await self.count_rows(db, table_name, task_times_id, where_clause, query_params)
+            
+            if keyset or cursor:
+                # 游标分页：按 (时间字段, id) 倒序，从上一页最后一行之后继续读取
+                time_field = get_table_time_field(table_name)
+                keyset_condition, keyset_params = build_keyset_condition(time_field, cursor, placeholder='%s')
+                if keyset_condition:
+                    where_conditions.append(keyset_condition)
+                where_clause = f" WHERE {' AND '.join(where_conditions)}" if where_conditions else ""
+                data_query = base_query + where_clause + f" {build_keyset_order(time_field)} LIMIT %s"
+                data = await db.query(data_query, *(query_params + keyset_params + [page_size + 1]))
+                data, next_cursor = build_keyset_page(data, page_size, time_field)
+                return {
+                    "data": self.format_rows(data),
+                    "total": total,
+                    "total_is_approximate": approximate_count,
+                    "page_size": page_size,
+                    "next_cursor": next_cursor,
+                    "has_more": next_cursor is not None
+                }
             
             # 计算分页
             offset = (page - 1) * page_size
@@ -144,33 +198,115 @@ class MySQLDataManager:
             # 获取数据
             data = await db.query(data_query, *data_params)
             
-            # 处理数据格式
-            processed_data = []
-            for row in data:
-                processed_row = {}
-                for key, value in row.items():
-                    if isinstance(value, datetime):
-                        processed_row[key] = value.isoformat()
-                    else:
-                        processed_row[key] = value
-                processed_data.append(processed_row)
-            
             return {
-                "data": processed_data,
+                "data": self.format_rows(data),
                 "total": total,
+                "total_is_approximate": approximate_count,
                 "page": page,
                 "page_size": page_size,
                 "total_pages": (total + page_size - 1) // page_size
             }
         
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"获取表格数据失败: {str(e)}")
     
+    async def search_data(self, keyword: str, tables: Optional[List[str]] = None,
+                          task_times_id: Optional[str] = None, cursor: Optional[str] = None,
+                          page_size: int = 30) -> Dict[str, Any]:
+        """全文检索内容表和评论表，按相关性排序，使用游标分页"""
+        keyword = (keyword or '').strip()
+        if not keyword:
+            raise HTTPException(status_code=400, detail="检索关键词不能为空")
+        search_tables = get_search_tables(tables)
+        if not search_tables:
+            raise HTTPException(status_code=400, detail=f"不支持检索的数据表: {tables}")
+        
+        db = await self.get_connection()
+        try:
+            tables_result = await db.query("SHOW TABLES")
+            existing_tables = {list(table_row.values())[0] for table_row in tables_result}
+            
+            results = {}
+            for table_name in search_tables:
+                if table_name not in existing_tables:
+                    continue
+                cursor_condition, cursor_params = build_search_cursor_condition(table_name, cursor, placeholder='%s')
+                query, params = build_search_sql(table_name, True, keyword, task_times_id, cursor_condition)
+                results[table_name] = await db.query(query, *(params + cursor_params + [page_size + 1]))
+            
+            data, next_cursor = merge_search_results(results, page_size)
+            return {
+                "data": self.format_rows(data),
+                "page_size": page_size,
+                "next_cursor": next_cursor,
+                "has_more": next_cursor is not None,
+                # ngram全文索引支持任意长度的关键词，不会退化为LIKE匹配
+                "fallback_tables": [],
+                "keyword": keyword,
+                "task_times_id": task_times_id
+            }
+        
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"检索失败: {str(e)}")
+    
+    @staticmethod
+    def format_rows(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """处理数据格式，时间转为ISO格式"""
+        processed_data = []
+        for row in rows:
+            processed_row = {}
+            for key, value in row.items():
+                if isinstance(value, datetime):
+                    processed_row[key] = value.isoformat()
+                else:
+                    processed_row[key] = value
+            processed_data.append(processed_row)
+        return processed_data
+    
+    async def count_rows(self, db: AsyncMysqlDB, table_name: str, task_times_id: Optional[str],
+                         where_clause: str, query_params: List[Any]) -> int:
+        """获取行数，以表的最大id判断是否有新数据写入，没有时使用缓存的行数"""
+        version_result = await db.get_first(f"SELECT MAX(id) AS version FROM `{table_name}`")
+        version = version_result['version'] if version_result else None
+        total = self.count_cache.get(table_name, task_times_id, version)
+        if total is None:
+            total_result = await db.get_first(
+                f"SELECT COUNT(*) as total FROM `{table_name}`" + where_clause, *query_params)
+            total = total_result['total'] if total_result else 0
+            self.count_cache.set(table_name, task_times_id, version, total)
+        return total
+    
+    async def estimate_rows(self, db: AsyncMysqlDB, table_name: str, where_clause: str,
+                            query_params: List[Any]) -> int:
+        """估算行数：整表使用information_schema中的统计值，带筛选条件时使用EXPLAIN的预估行数"""
+        if not where_clause:
+            result = await db.get_first(
+                "SELECT TABLE_ROWS AS total FROM information_schema.tables "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                table_name
+            )
+        else:
+            result = await db.get_first(f"EXPLAIN SELECT * FROM `{table_name}`" + where_clause, *query_params)
+            result = {"total": result.get("rows")} if result else None
+        return int(result["total"] or 0) if result else 0
+    
     async def get_data_statistics(self) -> Dict[str, Any]:
         """获取数据统计信息"""
         db = await self.get_connection()
         
         try:
+            # 优先读取由触发器维护的行数汇总表，一次查询得到全部统计
+            stats_exists = await db.get_first(
+                "SELECT COUNT(*) AS count FROM information_schema.tables WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                TABLE_STATS_TABLE
+            )
+            if stats_exists and stats_exists['count']:
+                return await self.get_data_statistics_from_summary(db)
+            
             # 获取所有表
             tables = await self.get_available_tables()
             
@@ -226,6 +362,48 @@ class MySQLDataManager:
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"获取统计信息失败: {str(e)}")
     
+    async def get_data_statistics_from_summary(self, db: AsyncMysqlDB) -> Dict[str, Any]:
+        """
+        从行数汇总表读取统计信息
+        汇总表按记录的添加时间（add_ts）分天统计，今日新增和最新更新时间都以 add_ts 为准；
+        不由汇总表维护的表（如任务表）直接计数，没有今日新增和最新更新时间
+        """
+        tables_result = await db.query("SHOW TABLES")
+        table_names = [list(table_row.values())[0] for table_row in tables_result]
+        summary = {
+            row['table_name']: row
+            for row in await db.query(build_stats_summary_sql('%s'), datetime.now().strftime('%Y-%m-%d'))
+        }
+        
+        total_records = 0
+        table_stats = []
+        for table_name in table_names:
+            if table_name == TABLE_STATS_TABLE:
+                continue
+            table_config = self.table_configs.get(table_name, {"name": table_name})
+            if table_name in STATS_TABLES:
+                row = summary.get(table_name, {})
+                record_count = int(row.get('total') or 0)
+            else:
+                row = {}
+                count_result = await db.get_first(f"SELECT COUNT(*) AS count FROM `{table_name}`")
+                record_count = int(count_result['count']) if count_result else 0
+            last_add_ts = row.get('last_add_ts')
+            total_records += record_count
+            table_stats.append({
+                "table_name": table_name,
+                "display_name": table_config["name"],
+                "record_count": record_count,
+                "today_count": int(row.get('today') or 0),
+                "latest_update": datetime.fromtimestamp(last_add_ts / 1000).isoformat() if last_add_ts else None
+            })
+        
+        return {
+            "total_records": total_records,
+            "table_count": len(table_stats),
+            "tables": table_stats
+        }
+    
     async def create_task(self, task_times_id: str, task_data: Dict[str, Any]):
         """创建任务记录"""
         db = await self.get_connection()
@@ -365,175 +543,101 @@ class MySQLDataManager:
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"获取任务列表失败: {str(e)}")
     
+    async def delete_tasks(self, task_ids: List[str]) -> Dict[str, int]:
+        """
+        批量删除多个任务及其关联的所有数据，每张表一条分块的 DELETE ... IN (...)
+        
+        Returns:
+            表名到删除记录数的映射
+        """
+        db = await self.get_connection()
+        if self._purger is None:
+            self._purger = TaskDataPurger(db)
+        stats = await self._purger.purge(task_ids)
+        # 删除数据不会改变表的最大id，需要主动失效行数缓存
+        self.count_cache.invalidate()
+        return stats
+    
     async def delete_task(self, task_times_id: str):
         """删除任务及其关联的所有数据"""
-        db = await self.get_connection()
-        
         try:
-            # 定义所有包含task_times_id字段的表
-            tables_with_task_id = [
-                'bilibili_video',
-                'bilibili_video_comment', 
-                'bilibili_up_info',
-                'bilibili_contact_info',
-                'bilibili_up_dynamic',
-                'douyin_aweme',
-                'douyin_aweme_comment',
-                'dy_creator',
-                'kuaishou_video',
-                'kuaishou_video_comment',
-                'weibo_note',
-                'weibo_note_comment',
-                'weibo_creator',
-                'xhs_note',
-                'xhs_note_comment',
-                'xhs_creator',
-                'tieba_note',
-                'tieba_comment',
-                'tieba_creator',
-                'zhihu_content',
-                'zhihu_comment',
-                'zhihu_creator'
-            ]
-            
-            # 删除所有关联数据表中的记录
-            for table in tables_with_task_id:
-                try:
-                    # 检查表是否存在
-                    table_check_result = await db.query(
-                        "SELECT COUNT(*) as count FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s",
-                        table
-                    )
-                    
-                    if table_check_result and table_check_result[0]['count'] > 0:
-                        # 检查表是否有task_times_id字段
-                        column_check_result = await db.query(
-                            "SELECT COUNT(*) as count FROM information_schema.columns WHERE table_schema = DATABASE() AND table_name = %s AND column_name = 'task_times_id'",
-                            table
-                        )
-                        
-                        if column_check_result and column_check_result[0]['count'] > 0:
-                            await db.execute(
-                                f"DELETE FROM `{table}` WHERE task_times_id = %s",
-                                task_times_id
-                            )
-                            print(f"已删除表 {table} 中task_times_id为 {task_times_id} 的记录")
-                except Exception as table_error:
-                    print(f"删除表 {table} 中的数据时出错: {table_error}")
-                    # 继续删除其他表，不因单个表的错误而中断
-                    continue
-            
-            # 最后删除任务记录
-            await db.execute(
-                "DELETE FROM crawler_tasks WHERE task_times_id = %s",
-                task_times_id
-            )
-            print(f"成功删除任务 {task_times_id} 及其所有关联数据")
+            stats = await self.delete_tasks([task_times_id])
+            print(f"成功删除任务 {task_times_id} 及其所有关联数据: {stats}")
         
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"删除任务失败: {str(e)}")
     
+    def build_export_query(self, table_name: str, task_id: Optional[str] = None):
+        """构建导出查询语句和参数"""
+        if not is_valid_table(table_name):
+            raise HTTPException(status_code=400, detail=f"不支持的数据表: {table_name}")
+        
+        query = f"SELECT * FROM `{table_name}`"
+        params = []
+        
+        if task_id:
+            query += " WHERE task_times_id = %s"
+            params.append(task_id)
+        
+        query += " ORDER BY id DESC"
+        return query, params
+    
+    async def iter_export_rows(self, query: str, params: List[Any]):
+        """使用无缓冲的SSCursor分批读取导出数据，产出 (列名列表, 行列表)"""
+        await self.get_connection()
+        async with self.pool.acquire() as conn:
+            async with conn.cursor(aiomysql.SSCursor) as cur:
+                await cur.execute(query, params)
+                columns = [description[0] for description in cur.description]
+                yield columns, []
+                while True:
+                    rows = await cur.fetchmany(EXPORT_FETCH_SIZE)
+                    if not rows:
+                        break
+                    yield columns, rows
+    
     async def export_table_data(self, table_name: str, task_id: Optional[str] = None) -> StreamingResponse:
-        """导出表格数据为CSV"""
+        """导出表格数据为CSV，逐批读取并编码，内存占用与表大小无关"""
         db = await self.get_connection()
+        query, params = self.build_export_query(table_name, task_id)
         
         try:
-            # 构建查询
-            query = f"SELECT * FROM `{table_name}`"
-            params = []
-            
-            if task_id:
-                query += " WHERE task_times_id = %s"
-                params.append(task_id)
-            
-            query += " ORDER BY id DESC"
-            
-            # 获取数据
-            data = await db.query(query, *params)
-            
-            if not data:
+            # 先确认有数据，流式响应开始后无法再返回错误状态码
+            exists_query = f"SELECT 1 FROM `{table_name}`" + (" WHERE task_times_id = %s" if task_id else "") + " LIMIT 1"
+            if not await db.get_first(exists_query, *params):
                 raise HTTPException(status_code=404, detail="没有找到数据")
-            
-            # 创建CSV内容
-            output = io.StringIO()
-            
-            # 写入BOM以支持Excel正确显示中文
-            output.write('\ufeff')
-            
-            writer = csv.DictWriter(output, fieldnames=data[0].keys())
-            writer.writeheader()
-            
-            for row in data:
-                # 处理特殊字段
-                processed_row = {}
-                for key, value in row.items():
-                    if isinstance(value, datetime):
-                        processed_row[key] = value.isoformat()
-                    elif value is None:
-                        processed_row[key] = ''
-                    else:
-                        processed_row[key] = str(value)
-                writer.writerow(processed_row)
-            
-            # 准备响应
-            output.seek(0)
-            content = output.getvalue()
-            output.close()
-            
-            # 生成文件名
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{table_name}_{timestamp}.csv"
-            if task_id:
-                filename = f"{table_name}_{task_id}_{timestamp}.csv"
-            
-            return StreamingResponse(
-                io.BytesIO(content.encode('utf-8')),
-                media_type="text/csv",
-                headers={"Content-Disposition": f"attachment; filename={filename}"}
-            )
-        
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"导出数据失败: {str(e)}")
-    
-    async def export_table_data_as_json(self, table_name: str, task_id: Optional[str] = None) -> Dict[str, Any]:
-        """导出表格数据为JSON"""
-        db = await self.get_connection()
         
-        try:
-            # 构建查询
-            query = f"SELECT * FROM `{table_name}`"
-            params = []
-            
-            if task_id:
-                query += " WHERE task_times_id = %s"
-                params.append(task_id)
-            
-            query += " ORDER BY id DESC"
-            
-            # 获取数据
-            data = await db.query(query, *params)
-            
-            # 处理数据格式
-            processed_data = []
-            for row in data:
-                processed_row = {}
-                for key, value in row.items():
-                    if isinstance(value, datetime):
-                        processed_row[key] = value.isoformat()
-                    else:
-                        processed_row[key] = value
-                processed_data.append(processed_row)
-            
-            return {
-                "table_name": table_name,
-                "task_id": task_id,
-                "export_time": datetime.now().isoformat(),
-                "total_count": len(processed_data),
-                "data": processed_data
-            }
+        # 生成文件名
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"{table_name}_{timestamp}.csv"
+        if task_id:
+            filename = f"{table_name}_{task_id}_{timestamp}.csv"
         
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"导出JSON数据失败: {str(e)}")
+        # 写入BOM以支持Excel正确显示中文
+        return StreamingResponse(
+            iter_csv_export(self.iter_export_rows(query, params), with_bom=True, format_value=format_csv_value),
+            media_type="text/csv",
+            headers={"Content-Disposition": f"attachment; filename={filename}"}
+        )
+    
+    async def export_table_data_as_json(self, table_name: str, task_id: Optional[str] = None) -> StreamingResponse:
+        """导出表格数据为JSON，逐批读取并编码，内存占用与表大小无关"""
+        await self.get_connection()
+        query, params = self.build_export_query(table_name, task_id)
+        
+        meta = {
+            "table_name": table_name,
+            "task_id": task_id,
+            "export_time": datetime.now().isoformat(),
+        }
+        return StreamingResponse(
+            iter_json_export(self.iter_export_rows(query, params), meta, records_key="data"),
+            media_type="application/json"
+        )
 
 # 创建全局数据管理器实例
 mysql_data_manager = MySQLDataManager()
@@ -553,7 +657,8 @@ async def get_mysql_tables():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取数据表列表失败: {str(e)}")
 
-async def get_mysql_data(table: str, page: int = 1, page_size: int = 30, task_times_id: Optional[str] = None):
+async def get_mysql_data(table: str, page: int = 1, page_size: int = 30, task_times_id: Optional[str] = None,
+                         cursor: Optional[str] = None, keyset: bool = False, approximate_count: bool = False):
     """获取MySQL表格数据"""
     try:
         if page < 1:
@@ -561,7 +666,8 @@ async def get_mysql_data(table: str, page: int = 1, page_size: int = 30, task_ti
         if page_size < 1 or page_size > 1000:
             page_size = 30
             
-        data = await mysql_data_manager.get_table_data(table, page, page_size, task_times_id)
+        data = await mysql_data_manager.get_table_data(table, page, page_size, task_times_id, cursor, keyset,
+                                                       approximate_count)
         return {
             "success": True,
             "message": "获取数据成功",
@@ -572,6 +678,23 @@ async def get_mysql_data(table: str, page: int = 1, page_size: int = 30, task_ti
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取数据失败: {str(e)}")
 
+async def search_mysql_data(keyword: str, tables: Optional[List[str]] = None, task_times_id: Optional[str] = None,
+                            cursor: Optional[str] = None, page_size: int = 30):
+    """全文检索MySQL内容和评论"""
+    try:
+        if page_size < 1 or page_size > 1000:
+            page_size = 30
+        data = await mysql_data_manager.search_data(keyword, tables, task_times_id, cursor, page_size)
+        return {
+            "success": True,
+            "message": "检索成功",
+            "data": data
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"检索失败: {str(e)}")
+
 async def get_mysql_stats():
     """获取MySQL数据统计"""
     try:
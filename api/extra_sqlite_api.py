@@ -11,11 +11,10 @@
 
 import asyncio
 import aiosqlite
-import csv
-import io
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from fastapi import HTTPException
 from fastapi.responses import StreamingResponse
 
@@ -23,7 +22,9 @@ from fastapi.responses import StreamingResponse
 import sys
 PROJECT_ROOT = Path(__file__).parent.parent
 sys.path.append(str(PROJECT_ROOT))
-from config.db_config import SQLITE_DB_PATH
+from config.db_config import (DB_ARCHIVE_AFTER_DAYS, DB_ARCHIVE_DIR, DB_MAINTENANCE_INTERVAL_HOURS,
+                              DB_VACUUM_MAX_PAGES, SEARCH_LIKE_SCAN_ROWS, SQLITE_DB_PATH, SQLITE_SHARD_ATTACH_LIMIT,
+                              SQLITE_SHARD_DIR, SQLITE_SHARD_MODE)
 
 
 # 数据库路径
@@ -39,6 +40,26 @@ from dp_op.db_tables_mapping import (
     get_table_time_field,
     get_table_display_fields
 )
+from dp_op.table_stats import STATS_TABLES, TABLE_STATS_TABLE, build_stats_summary_sql
+from dp_op.search_index import (SQLITE_SHORT_TERMS_LIMIT, SQLITE_TRIGRAM_MIN_LENGTH, build_search_sql,
+                                build_short_terms_sql, get_fts_table_name, get_search_tables,
+                                get_short_fts_table_name)
+from dp_op.async_sqlite_db import AsyncSqliteDB
+from dp_op.task_purger import TaskDataPurger
+from dp_op.db_maintenance import DatabaseMaintainer, MaintenanceScheduler
+from dp_op.sqlite_shards import (MAIN_SHARD_NAME, SHARD_FIELD, SHARD_MODE_NONE, SHARD_MODE_PLATFORM, SHARD_MODE_TASK, attach_shards,
+                                 get_shard_path, get_version_view_name, list_shard_paths, remove_shard)
+
+try:
+    from .data_export import EXPORT_FETCH_SIZE, iter_csv_export, iter_json_export
+except ImportError:
+    from data_export import EXPORT_FETCH_SIZE, iter_csv_export, iter_json_export
+try:
+    from .data_paging import (CountCache, build_keyset_condition, build_keyset_order, build_keyset_page,
+                              build_search_cursor_condition, merge_search_results)
+except ImportError:
+    from data_paging import (CountCache, build_keyset_condition, build_keyset_order, build_keyset_page,
+                             build_search_cursor_condition, merge_search_results)
 
 # 获取数据表配置
 TABLE_CONFIGS = get_all_base_table_configs()
@@ -46,13 +67,21 @@ TABLE_CONFIGS = get_all_base_table_configs()
 class SQLiteDataManager:
     """SQLite数据管理器"""
     
-    def __init__(self, db_path: str = None):
+    def __init__(self, db_path: str = None, shard_mode: str = None, shard_dir: str = None):
         # 使用配置文件中的路径，确保路径格式正确
         if db_path:
             self.db_path = str(Path(db_path).resolve())
         else:
             # 确保从配置文件获取的路径格式正确
             self.db_path = str(Path(DB_PATH).resolve())
+        # 分库模式下爬取数据保存在分库文件中，读取时 ATTACH 合并查询
+        self.shard_mode = shard_mode or SQLITE_SHARD_MODE
+        self.shard_dir = shard_dir or SQLITE_SHARD_DIR
+        # 按 (表名, 任务ID) 缓存的行数
+        self.count_cache = CountCache()
+        self._purger: Optional[TaskDataPurger] = None
+        self._maintainer: Optional[DatabaseMaintainer] = None
+        self._maintenance_scheduler: Optional[MaintenanceScheduler] = None
     
     def get_connection(self):
         """获取数据库连接"""
@@ -61,70 +90,106 @@ class SQLiteDataManager:
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"数据库连接失败: {str(e)}")
     
+    @property
+    def sharded(self) -> bool:
+        return self.shard_mode != SHARD_MODE_NONE
+    
+    def list_read_shards(self, task_times_id: str = None) -> List[str]:
+        """列出读取数据时需要合并的全部分库文件，按任务分库且指定了任务时只读取该任务的文件"""
+        if not self.sharded:
+            return []
+        if task_times_id and self.shard_mode == SHARD_MODE_TASK:
+            path = get_shard_path(self.shard_mode, self.shard_dir, task_id=task_times_id)
+            return [path] if path and Path(path).exists() else []
+        return list_shard_paths(self.shard_dir)
+    
+    def get_read_shards(self, task_times_id: str = None) -> List[str]:
+        """获取单个连接上合并查询的分库文件，数量超过ATTACH上限时只保留最近写入的分库"""
+        return self.list_read_shards(task_times_id)[:SQLITE_SHARD_ATTACH_LIMIT]
+    
+    def count_omitted_shards(self, task_times_id: str = None) -> int:
+        """获取因ATTACH上限未参与合并查询的分库数量，浏览和检索结果中不包含这些分库的数据"""
+        omitted = max(len(self.list_read_shards(task_times_id)) - SQLITE_SHARD_ATTACH_LIMIT, 0)
+        if omitted:
+            print(f"分库数量超过合并查询上限 {SQLITE_SHARD_ATTACH_LIMIT}，{omitted} 个较早写入的分库未参与查询，"
+                  f"可按任务筛选查看其中的数据")
+        return omitted
+    
+    @asynccontextmanager
+    async def get_read_connection(self, task_times_id: str = None):
+        """获取读取数据的连接，分库模式下 ATTACH 分库文件，数据表名对应合并各库数据的临时视图"""
+        async with self.get_connection() as db:
+            shard_paths = self.get_read_shards(task_times_id)
+            if shard_paths:
+                await attach_shards(db, shard_paths)
+            yield db
+    
     async def get_available_tables(self) -> List[str]:
         """获取可用的数据表列表"""
-        async with self.get_connection() as db:
+        async with self.get_read_connection() as db:
             cursor = await db.execute(
-                "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'"
+                "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' "
+                "UNION SELECT name FROM sqlite_temp_master WHERE type='view'"
             )
             tables = await cursor.fetchall()
             return [table[0] for table in tables if table[0] in TABLE_CONFIGS]
     
-    async def get_table_data(self, table_name: str, page: int = 1, page_size: int = 30, task_times_id: str = None) -> Dict[str, Any]:
-        """获取表格数据"""
+    async def get_table_data(self, table_name: str, page: int = 1, page_size: int = 30, task_times_id: str = None,
+                             cursor: str = None, keyset: bool = False) -> Dict[str, Any]:
+        """获取表格数据，keyset为True或传入cursor时使用游标分页"""
         if table_name not in TABLE_CONFIGS:
             raise HTTPException(status_code=400, detail=f"不支持的数据表: {table_name}")
         
         offset = (page - 1) * page_size
         
-        async with self.get_connection() as db:
+        async with self.get_read_connection(task_times_id) as db:
             # 构建WHERE条件
             where_conditions = []
             params = []
             
             # 如果指定了任务ID，添加筛选条件
             if task_times_id:
-                # 对于爬虫任务表，使用task_times_id字段
-                if table_name == 'crawler_tasks':
-                    where_conditions.append("task_times_id = ?")
-                else:
-                    # 对于数据表，使用task_times_id字段
-                    where_conditions.append("task_times_id = ?")
+                where_conditions.append("task_times_id = ?")
                 params.append(task_times_id)
             
             where_clause = f"WHERE {' AND '.join(where_conditions)}" if where_conditions else ""
             
-            # 获取总数
-            count_query = f"SELECT COUNT(*) FROM {table_name} {where_clause}"
-            count_cursor = await db.execute(count_query, params)
-            total_result = await count_cursor.fetchone()
-            total = total_result[0] if total_result else 0
+            # 获取总数，表中没有新数据时直接使用缓存
+            total = await self.count_rows(db, table_name, task_times_id, where_clause, params)
             
             # 获取数据
             config = TABLE_CONFIGS[table_name]
             time_field = config.get('time_field', 'create_time')
+            shard_field = await self._get_shard_field(db, table_name)
+            
+            if keyset or cursor:
+                # 游标分页：按 (时间字段, id) 倒序，从上一页最后一行之后继续读取
+                keyset_condition, keyset_params = build_keyset_condition(time_field, cursor, shard_field=shard_field)
+                if keyset_condition:
+                    where_conditions.append(keyset_condition)
+                    params.extend(keyset_params)
+                where_clause = f"WHERE {' AND '.join(where_conditions)}" if where_conditions else ""
+                query = f"SELECT * FROM {table_name} {where_clause} {build_keyset_order(time_field, shard_field)} LIMIT ?"
+                data = await self._fetch_dicts(db, query, params + [page_size + 1])
+                data, next_cursor = build_keyset_page(data, page_size, time_field, shard_field)
+                return {
+                    'data': data,
+                    'total': total,
+                    'page_size': page_size,
+                    'next_cursor': next_cursor,
+                    'has_more': next_cursor is not None,
+                    'shards_omitted': self.count_omitted_shards(task_times_id),
+                    'task_times_id': task_times_id
+                }
             
             # 构建查询语句，按时间倒序排列
             query = f"""
                 SELECT * FROM {table_name} 
                 {where_clause}
-                ORDER BY {time_field} DESC 
+                {build_keyset_order(time_field, shard_field)} 
                 LIMIT {page_size} OFFSET {offset}
             """
-            
-            # 为分页查询添加参数
-            data_params = params.copy()
-            data_cursor = await db.execute(query, data_params)
-            columns = [description[0] for description in data_cursor.description]
-            rows = await data_cursor.fetchall()
-            
-            # 转换为字典列表
-            data = []
-            for row in rows:
-                row_dict = {}
-                for i, value in enumerate(row):
-                    row_dict[columns[i]] = value
-                data.append(row_dict)
+            data = await self._fetch_dicts(db, query, params)
             
             return {
                 'data': data,
@@ -132,11 +197,141 @@ class SQLiteDataManager:
                 'page': page,
                 'page_size': page_size,
                 'total_pages': (total + page_size - 1) // page_size,
+                'shards_omitted': self.count_omitted_shards(task_times_id),
                 'task_times_id': task_times_id  # 返回当前筛选的任务ID
             }
     
+    async def search_data(self, keyword: str, tables: List[str] = None, task_times_id: str = None,
+                          cursor: str = None, page_size: int = 30) -> Dict[str, Any]:
+        """
+        全文检索内容表和评论表，按相关性排序，使用游标分页
+        分库模式下各库的全文索引只对应本库的记录，每个库分别检索后合并；
+        无法走索引的关键词使用 LIKE 匹配，最多扫描 SEARCH_LIKE_SCAN_ROWS 行，这些表在结果的 fallback_tables 中列出
+        """
+        keyword = (keyword or '').strip()
+        if not keyword:
+            raise HTTPException(status_code=400, detail="检索关键词不能为空")
+        search_tables = get_search_tables(tables)
+        if not search_tables:
+            raise HTTPException(status_code=400, detail=f"不支持检索的数据表: {tables}")
+        
+        results = {}
+        fallback_tables = []
+        async with self.get_connection() as db:
+            shard_paths = self.get_read_shards(task_times_id)
+            if shard_paths:
+                sources = await attach_shards(db, shard_paths)
+                # 与合并视图的数据来源字段取值一致
+                shard_names = {f"shard_{index}": Path(path).name for index, path in enumerate(shard_paths)}
+                shard_names["main"] = MAIN_SHARD_NAME
+            for table_name in search_tables:
+                if shard_paths:
+                    targets = [(schema, shard_names[schema]) for schema in sources.get(table_name, [])]
+                elif await self._has_table(db, table_name):
+                    targets = [("main", None)]
+                else:
+                    continue
+                rows = []
+                for schema, shard_name in targets:
+                    schema_rows, fallback = await self._search_schema(db, table_name, keyword, task_times_id, cursor,
+                                                                      page_size, schema, shard_name)
+                    rows += schema_rows
+                    if fallback and table_name not in fallback_tables:
+                        fallback_tables.append(table_name)
+                results[table_name] = rows
+        
+        data, next_cursor = merge_search_results(results, page_size, SHARD_FIELD)
+        if fallback_tables:
+            print(f"检索关键词 {keyword} 无法使用全文索引，{fallback_tables} 使用 LIKE 匹配，"
+                  f"只检索每个库最近写入的 {SEARCH_LIKE_SCAN_ROWS or '全部'} 条记录")
+        return {
+            'data': data,
+            'page_size': page_size,
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None,
+            'shards_omitted': self.count_omitted_shards(task_times_id),
+            'fallback_tables': fallback_tables,
+            'like_scan_rows': SEARCH_LIKE_SCAN_ROWS,
+            'keyword': keyword,
+            'task_times_id': task_times_id
+        }
+    
+    async def _search_schema(self, db, table_name: str, keyword: str, task_times_id: Optional[str],
+                             cursor: Optional[str], page_size: int, schema: str,
+                             shard_name: Optional[str]) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        检索单个库中的一张表，返回 (检索结果, 是否退化为LIKE匹配)
+        不足3个字的关键词先从短关键词索引的词表中展开trigram，展开数量超过上限时才使用 LIKE 匹配
+        """
+        shard_field = SHARD_FIELD if shard_name else None
+        cursor_condition, cursor_params = build_search_cursor_condition(table_name, cursor, shard_field=shard_field)
+        use_index = await self._has_table(db, get_fts_table_name(table_name), schema)
+        short_terms = None
+        if len(keyword) < SQLITE_TRIGRAM_MIN_LENGTH and await self._has_table(
+                db, get_short_fts_table_name(table_name), schema):
+            terms_sql, terms_params = build_short_terms_sql(table_name, keyword, schema)
+            terms_cursor = await db.execute(terms_sql, terms_params)
+            terms = [row[0] for row in await terms_cursor.fetchall()]
+            if not terms:
+                # 词表中没有以关键词开头的trigram，该库中没有匹配的记录
+                return [], False
+            if len(terms) <= SQLITE_SHORT_TERMS_LIMIT:
+                short_terms = terms
+        fallback = not short_terms and (not use_index or len(keyword) < SQLITE_TRIGRAM_MIN_LENGTH)
+        query, params = build_search_sql(
+            table_name, False, keyword, task_times_id, cursor_condition, use_index=use_index,
+            shard_field=shard_field, short_terms=short_terms, schema=schema, shard_name=shard_name,
+            like_scan_limit=SEARCH_LIKE_SCAN_ROWS
+        )
+        return await self._fetch_dicts(db, query, params + cursor_params + [page_size + 1]), fallback
+    
+    async def _has_table(self, db, table_name: str, schema: str = None) -> bool:
+        """检查数据表（或分库模式下合并数据的临时视图）是否存在，指定库名时只检查该库中的数据表"""
+        if schema:
+            cursor = await db.execute(f"SELECT name FROM {schema}.sqlite_master WHERE type='table' AND name=?",
+                                      (table_name,))
+            return await cursor.fetchone() is not None
+        cursor = await db.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name=? "
+            "UNION SELECT name FROM sqlite_temp_master WHERE type='view' AND name=?", (table_name, table_name))
+        return await cursor.fetchone() is not None
+    
+    async def _get_shard_field(self, db, table_name: str) -> Optional[str]:
+        """数据表为合并各库数据的临时视图时返回数据来源字段，各库的id可能重复，排序和游标需要带上该字段"""
+        if await self._has_table(db, get_version_view_name(table_name)):
+            return SHARD_FIELD
+        return None
+    
+    async def _fetch_dicts(self, db, query: str, params: List[Any]) -> List[Dict[str, Any]]:
+        """执行查询并将结果转换为字典列表"""
+        data_cursor = await db.execute(query, params)
+        columns = [description[0] for description in data_cursor.description]
+        rows = await data_cursor.fetchall()
+        return [dict(zip(columns, row)) for row in rows]
+    
+    async def count_rows(self, db, table_name: str, task_times_id: Optional[str], where_clause: str,
+                         params: List[Any]) -> int:
+        """获取行数，以表的最大id判断是否有新数据写入，没有时使用缓存的行数"""
+        if await self._has_table(db, get_version_view_name(table_name)):
+            # 合并查询时各库的id互相独立，使用各库最大id之和
+            version_cursor = await db.execute(f"SELECT version FROM {get_version_view_name(table_name)}")
+        else:
+            version_cursor = await db.execute(f"SELECT MAX(id) FROM {table_name}")
+        version = (await version_cursor.fetchone())[0]
+        total = self.count_cache.get(table_name, task_times_id, version)
+        if total is None:
+            count_cursor = await db.execute(f"SELECT COUNT(*) FROM {table_name} {where_clause}", params)
+            total_result = await count_cursor.fetchone()
+            total = total_result[0] if total_result else 0
+            self.count_cache.set(table_name, task_times_id, version, total)
+        return total
+    
     async def get_data_statistics(self) -> Dict[str, Any]:
-        """获取数据统计信息"""
+        """
+        获取数据统计信息，分库数量超过ATTACH上限时分批统计全部分库
+        存在行数汇总表时，今日新增和最新更新时间按记录的添加时间（add_ts）统计，而不是各表的时间字段；
+        没有汇总表时仍按各表的时间字段统计
+        """
         stats = {
             'total': 0,
             'tables': 0,
@@ -145,58 +340,112 @@ class SQLiteDataManager:
         }
         
         try:
-            async with self.get_connection() as db:
-                # 获取表数量
-                tables = await self.get_available_tables()
-                stats['tables'] = len(tables)
-                
-                # 计算总数据量和今日新增
-                today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-                today_timestamp = int(today.timestamp())
-                
-                total_count = 0
-                today_count = 0
-                latest_time = None
-                
-                for table in tables:
-                    config = TABLE_CONFIGS.get(table, {})
-                    time_field = config.get('time_field', 'create_time')
-                    
-                    # 总数量
-                    count_cursor = await db.execute(f"SELECT COUNT(*) FROM {table}")
-                    count_result = await count_cursor.fetchone()
-                    if count_result:
-                        total_count += count_result[0]
-                    
-                    # 今日新增
-                    today_cursor = await db.execute(
-                        f"SELECT COUNT(*) FROM {table} WHERE {time_field} >= ?",
-                        (today_timestamp,)
-                    )
-                    today_result = await today_cursor.fetchone()
-                    if today_result:
-                        today_count += today_result[0]
-                    
-                    # 最新更新时间
-                    time_cursor = await db.execute(
-                        f"SELECT MAX({time_field}) FROM {table}"
-                    )
-                    time_result = await time_cursor.fetchone()
-                    if time_result and time_result[0]:
-                        table_latest = time_result[0]
-                        if latest_time is None or table_latest > latest_time:
-                            latest_time = table_latest
-                
-                stats['total'] = total_count
-                stats['today'] = today_count
-                if latest_time:
-                    stats['lastUpdate'] = datetime.fromtimestamp(latest_time).isoformat()
+            # 获取表数量
+            tables = await self.get_available_tables()
+            stats['tables'] = len(tables)
+            
+            # 每批最多 ATTACH SQLITE_SHARD_ATTACH_LIMIT 个分库，主库只在第一批中统计
+            shard_paths = self.list_read_shards()
+            batches = [shard_paths[i:i + SQLITE_SHARD_ATTACH_LIMIT]
+                       for i in range(0, len(shard_paths), SQLITE_SHARD_ATTACH_LIMIT)] or [[]]
+            latest_update = None
+            for index, batch in enumerate(batches):
+                async with self.get_connection() as db:
+                    batch_tables = tables
+                    if batch:
+                        sources = await attach_shards(db, batch, include_main=index == 0)
+                        if index > 0:
+                            batch_tables = [table for table in tables if table in sources]
+                    if index == 0:
+                        has_summary = await self._has_table(db, TABLE_STATS_TABLE)
+                    else:
+                        has_summary = TABLE_STATS_TABLE in sources
+                    total, today, last_update = await self._collect_statistics(db, batch_tables, has_summary)
+                stats['total'] += total
+                stats['today'] += today
+                if last_update and (latest_update is None or last_update > latest_update):
+                    latest_update = last_update
+            if latest_update:
+                stats['lastUpdate'] = latest_update.isoformat()
                 
         except Exception as e:
             print(f"获取数据统计失败: {e}")
         
         return stats
     
+    async def _collect_statistics(self, db, tables: List[str], has_summary: bool):
+        """
+        统计连接上各表的总数据量、今日新增和最新更新时间
+        
+        Args:
+            db: 数据库连接
+            tables: 需要统计的数据表
+            has_summary: 是否存在由触发器维护的行数汇总表
+        
+        Returns:
+            (总数据量, 今日新增, 最新更新时间)
+        """
+        # 优先读取由触发器维护的行数汇总表，一次查询得到全部统计
+        if has_summary:
+            summary_cursor = await db.execute(
+                build_stats_summary_sql(), (datetime.now().strftime('%Y-%m-%d'),))
+            total_count = 0
+            today_count = 0
+            latest_add_ts = None
+            for table_name, total, today, last_add_ts in await summary_cursor.fetchall():
+                if table_name not in tables:
+                    continue
+                total_count += total or 0
+                today_count += today or 0
+                if last_add_ts and (latest_add_ts is None or last_add_ts > latest_add_ts):
+                    latest_add_ts = last_add_ts
+            # 汇总表只维护爬取数据表，其余的表（如任务表）直接计数
+            for table in tables:
+                if table not in STATS_TABLES:
+                    count_cursor = await db.execute(f"SELECT COUNT(*) FROM {table}")
+                    count_result = await count_cursor.fetchone()
+                    total_count += count_result[0] if count_result else 0
+            return total_count, today_count, datetime.fromtimestamp(latest_add_ts / 1000) if latest_add_ts else None
+        
+        # 计算总数据量和今日新增
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        today_timestamp = int(today.timestamp())
+        
+        total_count = 0
+        today_count = 0
+        latest_time = None
+        
+        for table in tables:
+            config = TABLE_CONFIGS.get(table, {})
+            time_field = config.get('time_field', 'create_time')
+            
+            # 总数量
+            count_cursor = await db.execute(f"SELECT COUNT(*) FROM {table}")
+            count_result = await count_cursor.fetchone()
+            if count_result:
+                total_count += count_result[0]
+            
+            # 今日新增
+            today_cursor = await db.execute(
+                f"SELECT COUNT(*) FROM {table} WHERE {time_field} >= ?",
+                (today_timestamp,)
+            )
+            today_result = await today_cursor.fetchone()
+            if today_result:
+                today_count += today_result[0]
+            
+            # 最新更新时间
+            time_cursor = await db.execute(
+                f"SELECT MAX({time_field}) FROM {table}"
+            )
+            time_result = await time_cursor.fetchone()
+            if time_result and time_result[0]:
+                table_latest = time_result[0]
+                if latest_time is None or table_latest > latest_time:
+                    latest_time = table_latest
+        
+        return total_count, today_count, datetime.fromtimestamp(latest_time) if latest_time else None
+    
     # 任务管理方法
     async def create_task(self, task_times_id: str, task_data: Dict[str, Any]) -> str:
         """创建新任务"""
@@ -327,124 +576,142 @@ class SQLiteDataManager:
             
             return tasks
     
+    def get_purger(self) -> TaskDataPurger:
+        """获取按任务删除数据的执行器，表结构信息在执行器内缓存"""
+        if self._purger is None:
+            self._purger = TaskDataPurger(AsyncSqliteDB(self.db_path))
+        return self._purger
+    
+    async def delete_tasks(self, task_ids: List[str]) -> Dict[str, int]:
+        """
+        批量删除多个任务及其关联的所有数据，每张表一条分块的 DELETE ... IN (...)
+        
+        Returns:
+            表名到删除记录数的映射
+        """
+        stats = await self.get_purger().purge(task_ids)
+        if self.shard_mode == SHARD_MODE_TASK:
+            # 按任务分库时删除任务即删除文件，不需要逐表DELETE
+            removed = [task_id for task_id in task_ids
+                       if remove_shard(get_shard_path(self.shard_mode, self.shard_dir, task_id=task_id))]
+            if removed:
+                stats['shard_files'] = len(removed)
+        elif self.shard_mode == SHARD_MODE_PLATFORM:
+            for shard_path in list_shard_paths(self.shard_dir):
+                for table_name, deleted in (await TaskDataPurger(AsyncSqliteDB(shard_path)).purge(task_ids)).items():
+                    stats[table_name] = stats.get(table_name, 0) + deleted
+        # 删除数据不会改变表的最大id，需要主动失效行数缓存
+        self.count_cache.invalidate()
+        return stats
+    
+    def get_maintainer(self) -> DatabaseMaintainer:
+        """获取数据库维护对象"""
+        if self._maintainer is None:
+            self._maintainer = DatabaseMaintainer(AsyncSqliteDB(self.db_path), DB_ARCHIVE_DIR,
+                                                  shard_mode=self.shard_mode, shard_dir=self.shard_dir)
+        return self._maintainer
+    
+    async def run_maintenance(self, archive_days: Optional[float] = None, vacuum: bool = True,
+                              analyze: bool = True) -> Dict[str, Any]:
+        """执行一次数据库维护：归档过期任务、回收空闲页、更新统计信息"""
+        report = await self.get_maintainer().run(archive_days, vacuum=vacuum, analyze=analyze,
+                                                 max_vacuum_pages=DB_VACUUM_MAX_PAGES or None)
+        if report['archived_tasks']:
+            self.count_cache.invalidate()
+        return report
+    
+    def start_maintenance_scheduler(self) -> bool:
+        """按配置的间隔定时执行数据库维护，间隔为0时不启动"""
+        if DB_MAINTENANCE_INTERVAL_HOURS <= 0 or self._maintenance_scheduler is not None:
+            return False
+        self._maintenance_scheduler = MaintenanceScheduler(
+            self.get_maintainer(), DB_MAINTENANCE_INTERVAL_HOURS * 3600, archive_days=DB_ARCHIVE_AFTER_DAYS or None,
+            max_vacuum_pages=DB_VACUUM_MAX_PAGES or None)
+        self._maintenance_scheduler.start()
+        return True
+    
+    async def stop_maintenance_scheduler(self):
+        """停止定时维护"""
+        if self._maintenance_scheduler is not None:
+            await self._maintenance_scheduler.stop()
+            self._maintenance_scheduler = None
+    
     async def delete_task(self, task_times_id: str) -> bool:
         """删除任务及其关联的所有数据"""
         try:
-            async with self.get_connection() as db:
-                # 定义所有包含task_times_id字段的表
-                tables_with_task_id = [
-                    'bilibili_video',
-                    'bilibili_video_comment', 
-                    'bilibili_up_info',
-                    'bilibili_contact_info',
-                    'bilibili_up_dynamic',
-                    'douyin_aweme',
-                    'douyin_aweme_comment',
-                    'dy_creator',
-                    'kuaishou_video',
-                    'kuaishou_video_comment',
-                    'weibo_note',
-                    'weibo_note_comment',
-                    'weibo_creator',
-                    'xhs_note',
-                    'xhs_note_comment',
-                    'xhs_creator',
-                    'tieba_note',
-                    'tieba_comment',
-                    'tieba_creator',
-                    'zhihu_content',
-                    'zhihu_comment',
-                    'zhihu_creator'
-                ]
-                
-                # 删除所有关联数据表中的记录
-                for table in tables_with_task_id:
-                    try:
-                        # 检查表是否存在
-                        cursor = await db.execute(
-                            "SELECT name FROM sqlite_master WHERE type='table' AND name=?", 
-                            (table,)
-                        )
-                        table_exists = await cursor.fetchone()
-                        
-                        if table_exists:
-                            # 检查表是否有task_times_id字段
-                            cursor = await db.execute(f"PRAGMA table_info({table})")
-                            columns = await cursor.fetchall()
-                            has_task_times_id = any(col[1] == 'task_times_id' for col in columns)
-                            
-                            if has_task_times_id:
-                                await db.execute(f"DELETE FROM {table} WHERE task_times_id = ?", (task_times_id,))
-                                print(f"已删除表 {table} 中task_times_id为 {task_times_id} 的记录")
-                    except Exception as table_error:
-                        print(f"删除表 {table} 中的数据时出错: {table_error}")
-                        # 继续删除其他表，不因单个表的错误而中断
-                        continue
-                
-                # 最后删除任务记录
-                await db.execute("DELETE FROM crawler_tasks WHERE task_times_id = ?", (task_times_id,))
-                await db.commit()
-                print(f"成功删除任务 {task_times_id} 及其所有关联数据")
-                return True
+            stats = await self.delete_tasks([task_times_id])
+            print(f"成功删除任务 {task_times_id} 及其所有关联数据: {stats}")
+            return True
         except Exception as e:
             print(f"删除任务失败: {e}")
             return False
     
-    async def export_table_data(self, table_name: str, task_id: str = None) -> StreamingResponse:
-        """导出表格数据为CSV"""
+    def build_export_query(self, table_name: str, task_id: str = None):
+        """构建导出查询语句和参数"""
         if table_name not in TABLE_CONFIGS:
             raise HTTPException(status_code=400, detail=f"不支持的数据表: {table_name}")
         
-        async with self.get_connection() as db:
-            # 构建WHERE条件
-            where_conditions = []
-            params = []
-            
-            # 如果指定了任务ID，添加筛选条件
-            if task_id:
-                if table_name == 'crawler_tasks':
-                    where_conditions.append("task_times_id = ?")
-                else:
-                    where_conditions.append("task_times_id = ?")
-                params.append(task_id)
-            
-            where_clause = f"WHERE {' AND '.join(where_conditions)}" if where_conditions else ""
-            
-            # 获取数据
-            config = TABLE_CONFIGS[table_name]
-            time_field = config.get('time_field', 'create_time')
-            
-            query = f"SELECT * FROM {table_name} {where_clause} ORDER BY {time_field} DESC"
-            
-            cursor = await db.execute(query, params)
-            columns = [description[0] for description in cursor.description]
-            rows = await cursor.fetchall()
-            
-            # 创建CSV内容
-            output = io.StringIO()
-            writer = csv.writer(output)
-            
-            # 写入表头
-            writer.writerow(columns)
-            
-            # 写入数据
-            for row in rows:
-                writer.writerow(row)
-            
-            # 准备响应
-            output.seek(0)
-            csv_content = output.getvalue()
-            output.close()
-            
-            # 创建文件名
-            filename = f"{table_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-            
-            # 返回流式响应
-            return StreamingResponse(
-                io.StringIO(csv_content),
-                media_type="text/csv",
-                headers={"Content-Disposition": f"attachment; filename={filename}"}
-            )
+        # 构建WHERE条件
+        where_conditions = []
+        params = []
+        
+        # 如果指定了任务ID，添加筛选条件
+        if task_id:
+            where_conditions.append("task_times_id = ?")
+            params.append(task_id)
+        
+        where_clause = f"WHERE {' AND '.join(where_conditions)}" if where_conditions else ""
+        
+        config = TABLE_CONFIGS[table_name]
+        time_field = config.get('time_field', 'create_time')
+        
+        query = f"SELECT * FROM {table_name} {where_clause} ORDER BY {time_field} DESC"
+        return query, params
+    
+    async def iter_export_rows(self, query: str, params: List[Any], task_id: str = None):
+        """使用fetchmany分批读取导出数据，产出 (列名列表, 行列表)"""
+        async with self.get_read_connection(task_id) as db:
+            async with db.execute(query, params) as cursor:
+                columns = [description[0] for description in cursor.description]
+                yield columns, []
+                while True:
+                    rows = await cursor.fetchmany(EXPORT_FETCH_SIZE)
+                    if not rows:
+                        break
+                    yield columns, rows
+    
+    async def export_table_data(self, table_name: str, task_id: str = None) -> StreamingResponse:
+        """导出表格数据为CSV，逐批读取并编码，内存占用与表大小无关"""
+        query, params = self.build_export_query(table_name, task_id)
+        
+        # 创建文件名
+        filename = f"{table_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        
+        # 返回流式响应
+        return StreamingResponse(
+            iter_csv_export(self.iter_export_rows(query, params, task_id)),
+            media_type="text/csv",
+            headers={"Content-Disposition": f"attachment; filename={filename}"}
+        )
+    
+    async def export_table_data_as_json(self, table_name: str, task_id: str = None) -> StreamingResponse:
+        """导出表格数据为JSON，逐批读取并编码，内存占用与表大小无关"""
+        query, params = self.build_export_query(table_name, task_id)
+        
+        meta = {
+            "table_name": table_name,
+            "task_id_filter": task_id,
+            "export_time": datetime.now().isoformat(),
+        }
+        return StreamingResponse(
+            iter_json_export(
+                self.iter_export_rows(query, params, task_id),
+                meta,
+                records_key="records",
+                wrapper={"success": True, "message": "导出JSON数据成功"}
+            ),
+            media_type="application/json"
+        )
 
 # 创建全局实例
 sqlite_manager = SQLiteDataManager()
@@ -462,7 +729,8 @@ async def get_sqlite_tables():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取数据表列表失败: {str(e)}")
 
-async def get_sqlite_data(table: str, page: int = 1, page_size: int = 30, task_times_id: str = None):
+async def get_sqlite_data(table: str, page: int = 1, page_size: int = 30, task_times_id: str = None,
+                          cursor: str = None, keyset: bool = False):
     """获取SQLite表格数据"""
     try:
         if page < 1:
@@ -470,7 +738,7 @@ async def get_sqlite_data(table: str, page: int = 1, page_size: int = 30, task_t
         if page_size < 1 or page_size > 1000:
             page_size = 30
             
-        data = await sqlite_manager.get_table_data(table, page, page_size, task_times_id)
+        data = await sqlite_manager.get_table_data(table, page, page_size, task_times_id, cursor, keyset)
         return {
             "success": True,
             "message": "获取数据成功",
@@ -481,6 +749,23 @@ async def get_sqlite_data(table: str, page: int = 1, page_size: int = 30, task_t
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取数据失败: {str(e)}")
 
+async def search_sqlite_data(keyword: str, tables: List[str] = None, task_times_id: str = None,
+                             cursor: str = None, page_size: int = 30):
+    """全文检索SQLite内容和评论"""
+    try:
+        if page_size < 1 or page_size > 1000:
+            page_size = 30
+        data = await sqlite_manager.search_data(keyword, tables, task_times_id, cursor, page_size)
+        return {
+            "success": True,
+            "message": "检索成功",
+            "data": data
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"检索失败: {str(e)}")
+
 async def get_sqlite_stats():
     """获取SQLite数据统计"""
     try:
@@ -493,6 +778,28 @@ async def get_sqlite_stats():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取统计数据失败: {str(e)}")
 
+async def get_sqlite_space():
+    """获取SQLite数据库文件的空间占用"""
+    try:
+        return {
+            "success": True,
+            "message": "获取空间占用成功",
+            "data": await sqlite_manager.get_maintainer().get_space_info()
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取空间占用失败: {str(e)}")
+
+async def run_sqlite_maintenance(archive_days: Optional[float] = None, vacuum: bool = True, analyze: bool = True):
+    """执行一次SQLite数据库维护"""
+    try:
+        return {
+            "success": True,
+            "message": "数据库维护完成",
+            "data": await sqlite_manager.run_maintenance(archive_days, vacuum=vacuum, analyze=analyze)
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"数据库维护失败: {str(e)}")
+
 async def export_sqlite_data(table_name: str, task_id: str = None):
     """导出SQLite表格数据"""
     try:
@@ -505,53 +812,7 @@ async def export_sqlite_data(table_name: str, task_id: str = None):
 async def export_sqlite_data_as_json(table_name: str, task_id: str = None):
     """导出SQLite表格数据为JSON格式"""
     try:
-        if table_name not in TABLE_CONFIGS:
-            raise HTTPException(status_code=400, detail=f"不支持的数据表: {table_name}")
-        
-        async with sqlite_manager.get_connection() as db:
-            # 构建WHERE条件
-            where_conditions = []
-            params = []
-            
-            # 如果指定了任务ID，添加筛选条件
-            if task_id:
-                if table_name == 'crawler_tasks':
-                    where_conditions.append("task_times_id = ?")
-                else:
-                    where_conditions.append("task_times_id = ?")
-                params.append(task_id)
-            
-            where_clause = f"WHERE {' AND '.join(where_conditions)}" if where_conditions else ""
-            
-            # 获取数据
-            config = TABLE_CONFIGS[table_name]
-            time_field = config.get('time_field', 'create_time')
-            
-            query = f"SELECT * FROM {table_name} {where_clause} ORDER BY {time_field} DESC"
-            
-            cursor = await db.execute(query, params)
-            columns = [description[0] for description in cursor.description]
-            rows = await cursor.fetchall()
-            
-            # 转换为字典列表
-            data = []
-            for row in rows:
-                row_dict = {}
-                for i, value in enumerate(row):
-                    row_dict[columns[i]] = value
-                data.append(row_dict)
-            
-            return {
-                "success": True,
-                "message": "导出JSON数据成功",
-                "data": {
-                    "table_name": table_name,
-                    "total_count": len(data),
-                    "task_id_filter": task_id,
-                    "export_time": datetime.now().isoformat(),
-                    "records": data
-                }
-            }
+        return await sqlite_manager.export_table_data_as_json(table_name, task_id)
     except HTTPException:
         raise
     except Exception as e:
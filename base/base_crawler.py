@@ -10,10 +10,13 @@
 
 
 from abc import ABC, abstractmethod
-from typing import Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 from playwright.async_api import BrowserContext, BrowserType, Playwright
 
+from tools.http_client_pool import HttpClientPool
+from var import crawl_checkpoint_var
+
 
 class AbstractCrawler(ABC):
     @abstractmethod
@@ -100,10 +103,56 @@ class AbstractStoreImage(ABC):
 
 
 class AbstractApiClient(ABC):
+    _http_pool: Optional[HttpClientPool] = None
+
     @abstractmethod
     async def request(self, method, url, **kwargs):
         pass
 
+    @property
+    def http_pool(self) -> HttpClientPool:
+        """
+        客户端长期持有的连接池，请求复用 keep-alive 连接，代理变化时重建
+        """
+        if self._http_pool is None:
+            self._http_pool = HttpClientPool()
+        return self._http_pool
+
+    async def close(self):
+        """
+        关闭连接池
+        """
+        if self._http_pool is not None:
+            await self._http_pool.aclose()
+            self._http_pool = None
+
     @abstractmethod
     async def update_cookies(self, browser_context: BrowserContext):
         pass
+
+    @staticmethod
+    def get_checkpoint(entity: str, cursor: Any = None) -> Tuple[Any, int, bool]:
+        """
+        获取翻页断点，未开启续爬或没有断点时从第一页开始
+        :param entity: 翻页实体，如 xhs:comments:笔记ID
+        :param cursor: 第一页的游标
+        :return: (下一页的游标, 已获取的数量, 是否已完成)
+        """
+        checkpoint = crawl_checkpoint_var.get()
+        saved = checkpoint.get(entity) if checkpoint else None
+        if saved is None:
+            return cursor, 0, False
+        return saved
+
+    @staticmethod
+    async def save_checkpoint(entity: str, cursor: Any, item_count: int, done: bool = False):
+        """
+        记录翻页断点，没有任务ID时不记录
+        :param entity: 翻页实体
+        :param cursor: 下一页的游标
+        :param item_count: 已获取的数量
+        :param done: 是否已翻页完成
+        """
+        checkpoint = crawl_checkpoint_var.get()
+        if checkpoint:
+            await checkpoint.save(entity, cursor, item_count, done)
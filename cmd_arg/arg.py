@@ -38,12 +38,18 @@ async def parse_cmd():
                         help='''whether to crawl level one comment, supported values case insensitive ('yes', 'true', 't', 'y', '1', 'no', 'false', 'f', 'n', '0')''', default=config.ENABLE_GET_COMMENTS)
     parser.add_argument('--get_sub_comment', type=str2bool,
                         help=''''whether to crawl level two comment, supported values case insensitive ('yes', 'true', 't', 'y', '1', 'no', 'false', 'f', 'n', '0')''', default=config.ENABLE_GET_SUB_COMMENTS)
+    parser.add_argument('--seen_index', type=str2bool,
+                        help='''whether to skip contents fully crawled within the freshness window by previous runs, supported values case insensitive ('yes', 'true', 't', 'y', '1', 'no', 'false', 'f', 'n', '0')''', default=config.ENABLE_SEEN_INDEX)
+    parser.add_argument('--seen_index_hours', type=float,
+                        help='freshness window of the seen index in hours', default=config.SEEN_INDEX_FRESHNESS_HOURS)
     parser.add_argument('--storage_type', type=str,
                         help='storage type (sqlite | mysql)', choices=["sqlite", "mysql"], default="sqlite")
     parser.add_argument('--cookies', type=str,
                         help='cookies used for cookie login type', default=config.COOKIES)
     parser.add_argument('--task_id', type=str,
                         help='task ID for tracking crawled data', default=None)
+    parser.add_argument('--resume', action='store_true',
+                        help='resume the task given by --task_id from its last pagination checkpoints')
 
     args = parser.parse_args()
 
@@ -56,10 +62,15 @@ async def parse_cmd():
     config.KEYWORDS = args.keywords
     config.ENABLE_GET_COMMENTS = args.get_comment
     config.ENABLE_GET_SUB_COMMENTS = args.get_sub_comment
+    config.ENABLE_SEEN_INDEX = args.seen_index
+    config.SEEN_INDEX_FRESHNESS_HOURS = args.seen_index_hours
     config.SAVE_DATA_OPTION = "db"  # 默认保存到数据库
     config.DB_TYPE = args.storage_type  # 根据用户选择设置数据库类型
     config.COOKIES = args.cookies
     config.TASK_ID = args.task_id  # 设置任务ID
+    config.RESUME_TASK = args.resume
+    if args.resume and not args.task_id:
+        parser.error('--resume requires --task_id')
     
     # 处理动态ID列表参数
     if args.specified_ids:
@@ -77,6 +77,12 @@ AUTO_CLOSE_BROWSER = True
 # 数据保存类型选项配置,支持三种类型：csv、db、json, 最好保存到DB，有排重的功能。 （for cmd）
 SAVE_DATA_OPTION = "db"  # csv or db or json
 
+# JSON存储是否使用追加写入模式，每条记录追加一行到.jsonl文件，避免每条记录都重写整个JSON文件
+JSON_APPEND_MODE = True
+
+# 追加写入模式下，程序结束时是否将.jsonl文件转换为JSON数组文件(.json)，供需要JSON数组的下游使用
+JSON_FINALIZE_TO_ARRAY = True
+
 # 数据库类型配置，支持mysql和sqlite
 DB_TYPE = "sqlite"  # mysql or sqlite
 
@@ -95,6 +101,36 @@ MAX_CONCURRENCY_NUM = 1
 # 是否开启爬图片模式, 默认不开启爬图片
 ENABLE_GET_IMAGES = False
 
+# 图片/视频按内容哈希去重保存的目录，笔记目录下的文件是指向该目录中文件的硬链接，已保存过的媒体不再重复下载
+MEDIA_STORE_PATH = "data/media"
+
+# 图片/视频下载队列同时进行的下载数上限，下载在后台进行，不阻塞翻页和评论的爬取
+MEDIA_DOWNLOAD_CONCURRENCY = 8
+
+# 同一个媒体域名同时进行的下载数上限
+MEDIA_DOWNLOAD_PER_HOST_CONCURRENCY = 4
+
+# 平台接口客户端长期持有的连接池：连接数上限、保持的空闲连接数上限、空闲连接保持时间（秒）
+HTTP_POOL_MAX_CONNECTIONS = 20
+HTTP_POOL_MAX_KEEPALIVE = 10
+HTTP_KEEPALIVE_EXPIRY = 30
+
+# 平台接口请求是否启用HTTP/2，需要安装 h2（pip install httpx[http2]），未安装时使用HTTP/1.1
+HTTP_ENABLE_HTTP2 = False
+
+# 抖音、知乎JS签名的常驻 node 进程数，以及单次签名的超时时间（秒）
+JS_SIGN_WORKERS = 2
+JS_SIGN_TIMEOUT = 10
+
+# 小红书请求头签名使用的页面数，同时发起的签名合并为一次页面调用并分摊到这些页面上
+XHS_SIGN_PAGE_COUNT = 1
+
+# 小红书一次页面调用中最多的签名数
+XHS_SIGN_BATCH_SIZE = 16
+
+# 小红书签名用到的 localStorage 值（如 b1）的缓存时间（秒）
+XHS_LOCAL_STORAGE_TTL = 300
+
 # 是否开启爬评论模式, 默认开启爬评论
 ENABLE_GET_COMMENTS = True
 
@@ -105,6 +141,13 @@ CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES = 10
 # 老版本项目使用了 db, 则需参考 schema/mysql_tables.sql line 287 增加表字段
 ENABLE_GET_SUB_COMMENTS = False
 
+# 是否启用跨任务的已爬取索引（仅数据库存储模式），重复执行相同任务时新鲜期内的内容跳过详情和评论的抓取，
+# 新鲜期内互动数据有变化的内容只刷新详情，不重新抓取评论
+ENABLE_SEEN_INDEX = False
+
+# 已爬取索引的新鲜期（小时）
+SEEN_INDEX_FRESHNESS_HOURS = 24
+
 # 已废弃⚠️⚠️⚠️指定小红书需要爬虫的笔记ID列表
 # 已废弃⚠️⚠️⚠️ 指定笔记ID笔记列表会因为缺少xsec_token和xsec_source参数导致爬取失败
 # XHS_SPECIFIED_ID_LIST = [
@@ -210,6 +253,15 @@ CUSTOM_WORDS = {
     "高频词": "专业术语",  # 示例自定义词
 }
 
+# 词云增量统计：每累计多少条新记录提交一次分词
+WORDCLOUD_SEGMENT_BATCH_SIZE = 50
+
+# 词云增量统计：词频文件的写入间隔（秒），词云图只在程序结束时或按需生成
+WORDCLOUD_FREQ_FLUSH_INTERVAL = 30
+
+# 分词进程池的进程数，为0时在线程中分词
+WORDCLOUD_PROCESS_WORKERS = 2
+
 
 
 # 爬取开始的天数，仅支持 bilibili 关键字搜索，YYYY-MM-DD 格式，若为 None 则表示不设置时间范围，按照默认关键字最多返回 1000 条视频的结果处理
@@ -223,6 +275,9 @@ END_DAY = "2024-01-01"
 # 若为 True，则按照 START_DAY 至 END_DAY 按照每一天进行筛选，这样能够突破 1000 条视频的限制，最大程度爬取该关键词下的所有视频
 ALL_DAY = False
 
+# B站 wbi 签名密钥（img_key / sub_key）的缓存时间（秒），过期后继续使用旧密钥并在后台刷新，签名被拒绝时立即刷新
+BILI_WBI_KEY_TTL = 6 * 3600
+
 #!!! 下面仅支持 bilibili creator搜索
 # 爬取评论creator主页还是爬取creator动态和关系列表(True为前者)
 CREATOR_MODE = True
@@ -239,6 +294,9 @@ CRAWLER_MAX_DYNAMICS_COUNT_SINGLENOTES = 50
 # 任务ID配置，用于跟踪爬取的数据
 TASK_ID = None
 
+# 是否从任务ID对应的翻页断点续爬（仅数据库存储模式），搜索、创作者、评论的翻页从最后提交的游标继续
+RESUME_TASK = False
+
 #################################################################
 # 停用(禁用)词文件路径
 STOP_WORDS_FILE = "./config/hit_stopwords.txt"
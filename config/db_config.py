@@ -17,6 +17,10 @@ MYSQL_DB_USER = os.getenv("MYSQL_DB_USER", "root")
 MYSQL_DB_HOST = os.getenv("MYSQL_DB_HOST", "localhost")
 MYSQL_DB_PORT = os.getenv("MYSQL_DB_PORT", 3306)
 MYSQL_DB_NAME = os.getenv("MYSQL_DB_NAME", "visual_mediacrawler")
+MYSQL_POOL_MINSIZE = int(os.getenv("MYSQL_POOL_MINSIZE", 1))  # 连接池最小连接数
+MYSQL_POOL_MAXSIZE = int(os.getenv("MYSQL_POOL_MAXSIZE", 10))  # 连接池最大连接数
+MYSQL_POOL_RECYCLE = int(os.getenv("MYSQL_POOL_RECYCLE", 3600))  # 连接回收时间（秒），需小于服务端 wait_timeout，-1表示不回收
+MYSQL_INSERT_CHUNK_SIZE = int(os.getenv("MYSQL_INSERT_CHUNK_SIZE", 500))  # 多行INSERT每条语句包含的最大行数
 
 
 # redis config
@@ -32,13 +36,47 @@ CACHE_TYPE_MEMORY = "memory"
 # sqlite3 config
 SQLITE_DB_PATH = os.getenv("SQLITE_DB_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), "schema", "sqlite_tables.db"))
 
+# sqlite长连接模式：一个写连接由独立任务持有，读操作走只读连接池，避免每次操作都新建连接
+SQLITE_PERSISTENT_CONNECTION = os.getenv("SQLITE_PERSISTENT_CONNECTION", "true").lower() in ("1", "true", "yes")
+SQLITE_READER_POOL_SIZE = int(os.getenv("SQLITE_READER_POOL_SIZE", 4))  # 只读连接池大小
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")  # 日志模式，WAL模式下读写互不阻塞
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")  # OFF | NORMAL | FULL
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", -64000))  # 页缓存大小，负数表示KiB
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", 268435456))  # 内存映射大小（字节），0表示关闭
+
+# sqlite分库：none 所有数据写入主库 | task 每个任务写入独立的文件，删除任务即删除文件 | platform 每个平台一个文件
+# 任务记录和已爬取索引始终保存在主库中，数据浏览接口 ATTACH 分库文件合并查询
+SQLITE_SHARD_MODE = os.getenv("SQLITE_SHARD_MODE", "none").lower()
+SQLITE_SHARD_DIR = os.getenv("SQLITE_SHARD_DIR", os.path.join(os.path.dirname(SQLITE_DB_PATH), "shards"))
+SQLITE_SHARD_ATTACH_LIMIT = int(os.getenv("SQLITE_SHARD_ATTACH_LIMIT", 10))  # 不按任务筛选时合并查询的分库数量上限，不能超过SQLite的ATTACH上限
+
+# sqlite数据库维护：定时增量回收空闲页、更新统计信息，并把过期任务归档为压缩文件后删除
+DB_MAINTENANCE_INTERVAL_HOURS = float(os.getenv("DB_MAINTENANCE_INTERVAL_HOURS", 0))  # 数据浏览服务中定时维护的间隔（小时），0表示不定时执行
+DB_ARCHIVE_AFTER_DAYS = float(os.getenv("DB_ARCHIVE_AFTER_DAYS", 0))  # 归档创建时间超过该天数的任务，0表示不归档
+DB_ARCHIVE_DIR = os.getenv("DB_ARCHIVE_DIR", os.path.join(os.path.dirname(SQLITE_DB_PATH), "archive"))  # 任务归档文件目录
+DB_VACUUM_MAX_PAGES = int(os.getenv("DB_VACUUM_MAX_PAGES", 0))  # 每次维护最多回收的页数，0表示全部回收
+
+# sqlite全文检索：单字等无法走索引的关键词退化为 LIKE 匹配，每张表（分库模式下每个库）只扫描最近写入的行数，0表示全表扫描
+SEARCH_LIKE_SCAN_ROWS = int(os.getenv("SEARCH_LIKE_SCAN_ROWS", 100000))
+
+# 数据库批量写入配置：存储层先把记录写入内存缓冲区，按表批量写入数据库
+ENABLE_DB_BATCH_WRITE = os.getenv("ENABLE_DB_BATCH_WRITE", "true").lower() in ("1", "true", "yes")
+DB_BATCH_SIZE = int(os.getenv("DB_BATCH_SIZE", 200))  # 单表缓冲记录数达到该值时立即写入
+DB_BATCH_FLUSH_INTERVAL = float(os.getenv("DB_BATCH_FLUSH_INTERVAL", 2.0))  # 定时写入间隔（秒）
+
 # database operation modules
 from dp_op import AsyncMysqlDB, AsyncSqliteDB
 
 __all__ = [
     'MYSQL_DB_PWD', 'MYSQL_DB_USER', 'MYSQL_DB_HOST', 'MYSQL_DB_PORT', 'MYSQL_DB_NAME',
+    'MYSQL_POOL_MINSIZE', 'MYSQL_POOL_MAXSIZE', 'MYSQL_POOL_RECYCLE', 'MYSQL_INSERT_CHUNK_SIZE',
     'REDIS_DB_HOST', 'REDIS_DB_PWD', 'REDIS_DB_PORT', 'REDIS_DB_NUM',
     'CACHE_TYPE_REDIS', 'CACHE_TYPE_MEMORY',
-    'SQLITE_DB_PATH',
+    'SQLITE_DB_PATH', 'SQLITE_PERSISTENT_CONNECTION', 'SQLITE_READER_POOL_SIZE',
+    'SQLITE_JOURNAL_MODE', 'SQLITE_SYNCHRONOUS', 'SQLITE_CACHE_SIZE', 'SQLITE_MMAP_SIZE',
+    'SQLITE_SHARD_MODE', 'SQLITE_SHARD_DIR', 'SQLITE_SHARD_ATTACH_LIMIT',
+    'DB_MAINTENANCE_INTERVAL_HOURS', 'DB_ARCHIVE_AFTER_DAYS', 'DB_ARCHIVE_DIR', 'DB_VACUUM_MAX_PAGES',
+    'SEARCH_LIKE_SCAN_ROWS',
+    'ENABLE_DB_BATCH_WRITE', 'DB_BATCH_SIZE', 'DB_BATCH_FLUSH_INTERVAL',
     'AsyncMysqlDB', 'AsyncSqliteDB'
 ]
\ No newline at end of file
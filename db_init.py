@@ -30,14 +30,39 @@ except ImportError:
 import config
 from config.db_config import AsyncMysqlDB, AsyncSqliteDB
 from tools import utils
-from var import db_conn_pool_var, media_crawler_db_var
+from dp_op.batch_writer import AsyncBatchWriter
+from dp_op.db_migrations import ensure_query_indexes, migrate_unique_keys
+from dp_op.search_index import ensure_search_index
+from dp_op.table_stats import ensure_table_stats, rebuild_table_stats
+from dp_op.crawl_checkpoint import CrawlCheckpoint
+from dp_op.seen_index import SeenIndex
+from dp_op.sqlite_shards import ensure_shard_schema, get_shard_path
+from var import crawl_checkpoint_var, db_batch_writer_var, db_conn_pool_var, media_crawler_db_var, seen_index_var
 
 
-async def init_mediacrawler_db(db_type: str = None):
+def get_crawler_shard_path(db_type: str) -> str:
+    """
+    获取爬取数据写入的SQLite分库文件路径，未开启分库时返回 None
+    Args:
+        db_type: 数据库类型
+    Returns:
+
+    """
+    if db_type != 'sqlite':
+        return None
+    return get_shard_path(config.SQLITE_SHARD_MODE, config.SQLITE_SHARD_DIR, config.PLATFORM, config.TASK_ID)
+
+
+async def init_mediacrawler_db(db_type: str = None, pool_minsize: int = None, pool_maxsize: int = None,
+                               pool_recycle: int = None, use_shard: bool = False):
     """
     初始化数据库链接池对象，并将该对象塞给media_crawler_db_var上下文变量
     Args:
         db_type: 数据库类型，可选值为 'sqlite' 或 'mysql'，默认从配置文件读取
+        pool_minsize: MySQL连接池最小连接数，默认从配置文件读取
+        pool_maxsize: MySQL连接池最大连接数，默认从配置文件读取
+        pool_recycle: MySQL连接回收时间（秒），默认从配置文件读取
+        use_shard: 开启SQLite分库时是否连接当前任务/平台的分库文件，爬取时使用
     Returns:
 
     """
@@ -54,8 +79,11 @@ async def init_mediacrawler_db(db_type: str = None):
             password=config.MYSQL_DB_PWD,
             db=config.MYSQL_DB_NAME,
             autocommit=True,
+            minsize=pool_minsize if pool_minsize is not None else config.MYSQL_POOL_MINSIZE,
+            maxsize=pool_maxsize if pool_maxsize is not None else config.MYSQL_POOL_MAXSIZE,
+            pool_recycle=pool_recycle if pool_recycle is not None else config.MYSQL_POOL_RECYCLE,
         )
-        async_db_obj = AsyncMysqlDB(pool)
+        async_db_obj = AsyncMysqlDB(pool, insert_chunk_size=config.MYSQL_INSERT_CHUNK_SIZE)
         # 将连接池对象和封装的CRUD sql接口对象放到上下文变量中
         db_conn_pool_var.set(pool)
         media_crawler_db_var.set(async_db_obj)
@@ -63,19 +91,40 @@ async def init_mediacrawler_db(db_type: str = None):
         if AsyncSqliteDB is None:
             raise ImportError("SQLite support is not available. Please install aiosqlite: pip install aiosqlite")
         
-        # 确保SQLite数据库目录存在
-        db_path = config.SQLITE_DB_PATH
+        # 确保SQLite数据库目录存在，开启分库时爬取数据写入当前任务/平台的分库文件
+        shard_path = get_crawler_shard_path(db_type) if use_shard else None
+        db_path = shard_path or config.SQLITE_DB_PATH
         db_dir = os.path.dirname(db_path)
         if not os.path.exists(db_dir):
             os.makedirs(db_dir, exist_ok=True)
         
-        async_db_obj = AsyncSqliteDB(db_path)
-        # SQLite不需要连接池，直接设置数据库对象
+        async_db_obj = AsyncSqliteDB(
+            db_path,
+            persistent=config.SQLITE_PERSISTENT_CONNECTION,
+            reader_pool_size=config.SQLITE_READER_POOL_SIZE,
+            journal_mode=config.SQLITE_JOURNAL_MODE,
+            synchronous=config.SQLITE_SYNCHRONOUS,
+            cache_size=config.SQLITE_CACHE_SIZE,
+            mmap_size=config.SQLITE_MMAP_SIZE,
+        )
+        if shard_path:
+            await ensure_shard_schema(async_db_obj)
+            utils.logger.info(f"[init_mediacrawler_db] write crawled data to sqlite shard: {shard_path}")
+        # SQLite不需要连接池，直接设置数据库对象（长连接模式下由对象自身管理写连接和只读连接池）
         db_conn_pool_var.set(None)
         media_crawler_db_var.set(async_db_obj)
     else:
         raise ValueError(f"Unsupported database type: {db_type}")
 
+    if config.ENABLE_DB_BATCH_WRITE:
+        batch_writer = AsyncBatchWriter(
+            async_db_obj,
+            batch_size=config.DB_BATCH_SIZE,
+            flush_interval=config.DB_BATCH_FLUSH_INTERVAL,
+        )
+        batch_writer.start()
+        db_batch_writer_var.set(batch_writer)
+
 
 async def init_db(db_type: str = None):
     """
@@ -89,7 +138,39 @@ async def init_db(db_type: str = None):
         utils.logger.info(f"[init_db] start init mediacrawler {db_type} db connect object")
     else:
         utils.logger.info("[init_db] start init mediacrawler db connect object")
-    await init_mediacrawler_db(db_type)
+    await init_mediacrawler_db(db_type, use_shard=True)
+    # 为已有数据库补齐唯一索引，存储层依赖唯一索引执行upsert
+    await migrate_unique_keys(media_crawler_db_var.get())
+    # 补齐数据浏览接口按任务筛选、按时间排序所依赖的复合索引
+    try:
+        await ensure_query_indexes(media_crawler_db_var.get())
+    except Exception as e:
+        utils.logger.error(f"[init_db] ensure query indexes failed: {e}")
+    # 创建行数汇总表及其维护触发器，统计接口只读取汇总表
+    try:
+        await ensure_table_stats(media_crawler_db_var.get())
+    except Exception as e:
+        utils.logger.error(f"[init_db] ensure table stats failed: {e}")
+    # 创建内容和评论的全文检索索引
+    try:
+        await ensure_search_index(media_crawler_db_var.get())
+    except Exception as e:
+        utils.logger.error(f"[init_db] ensure search index failed: {e}")
+    # 加载当前平台的已爬取索引
+    if config.ENABLE_SEEN_INDEX:
+        # 已爬取索引跨任务使用，开启分库时保存在主库中
+        seen_index_db = media_crawler_db_var.get()
+        if get_crawler_shard_path(db_type or getattr(config, 'DB_TYPE', 'sqlite').lower()):
+            seen_index_db = AsyncSqliteDB(config.SQLITE_DB_PATH)
+        seen_index = SeenIndex(seen_index_db, config.PLATFORM,
+                               freshness_seconds=int(config.SEEN_INDEX_FRESHNESS_HOURS * 3600))
+        await seen_index.load()
+        seen_index_var.set(seen_index)
+    # 有任务ID时记录翻页断点，续爬时从断点继续
+    if config.TASK_ID:
+        checkpoint = CrawlCheckpoint(media_crawler_db_var.get(), config.TASK_ID, resume=config.RESUME_TASK)
+        await checkpoint.load()
+        crawl_checkpoint_var.set(checkpoint)
     utils.logger.info("[init_db] end init mediacrawler db connect object")
 
 
@@ -102,6 +183,14 @@ async def close(db_type: str = None):
 
     """
     utils.logger.info("[close] close mediacrawler db pool")
+    # 先写入缓冲区中剩余的记录，再关闭连接
+    batch_writer = db_batch_writer_var.get()
+    if batch_writer is not None:
+        await batch_writer.close()
+        db_batch_writer_var.set(None)
+    seen_index_var.set(None)
+    crawl_checkpoint_var.set(None)
+
     if db_type is None:
         db_type = getattr(config, 'DB_TYPE', 'sqlite').lower()
     else:
@@ -294,6 +383,10 @@ async def main():
                        help='初始化数据库表结构')
     parser.add_argument('--init-connection', action='store_true',
                        help='仅初始化数据库连接')
+    parser.add_argument('--migrate', action='store_true',
+                       help='迁移已有数据库：清理重复数据并创建唯一索引，补齐查询所需的复合索引，不会删除其他数据')
+    parser.add_argument('--rebuild-stats', action='store_true',
+                       help='根据现有数据重新生成行数汇总表（table_stats）及其维护触发器')
     parser.add_argument('--force', action='store_true',
                        help='强制初始化，即使数据库已存在')
     parser.add_argument('--interactive', action='store_true',
@@ -319,6 +412,31 @@ async def main():
             db_type = getattr(config, 'DB_TYPE', 'sqlite').lower()
             print(f"使用配置文件默认数据库类型: {db_type}")
         
+        if args.migrate:
+            print(f"\n开始迁移 {db_type.upper()} 数据库唯一索引...")
+            await init_mediacrawler_db(db_type)
+            try:
+                result = await migrate_unique_keys(media_crawler_db_var.get())
+                created_indexes = await ensure_query_indexes(media_crawler_db_var.get())
+            finally:
+                await close(db_type)
+            removed = sum(result.values())
+            print(f"✅ {db_type.upper()} 数据库迁移完成，共检查 {len(result)} 张表，清理重复记录 {removed} 条，"
+                  f"新建查询索引 {len(created_indexes)} 个")
+            return
+
+        if args.rebuild_stats:
+            print(f"\n开始重新生成 {db_type.upper()} 数据库行数汇总表...")
+            await init_mediacrawler_db(db_type)
+            try:
+                async_db_obj = media_crawler_db_var.get()
+                await ensure_table_stats(async_db_obj)
+                result = await rebuild_table_stats(async_db_obj)
+            finally:
+                await close(db_type)
+            print(f"✅ {db_type.upper()} 行数汇总表生成完成，共汇总 {len(result)} 张表，{sum(result.values())} 条记录")
+            return
+
         # 检查数据库是否已存在
         force_init = args.force
         if not force_init:
@@ -31,6 +31,7 @@ sys.path.insert(0, str(project_root))
 # 导入删除器类
 try:
     from delete_task_data import TaskDataDeleter
+    from dp_op.task_purger import DELETE_CHUNK_SIZE
 except ImportError:
     print("错误: 无法导入 TaskDataDeleter 类")
     print("请确保 delete_task_data.py 文件存在且可访问")
@@ -122,34 +123,15 @@ def parse_arguments():
     )
     
     parser.add_argument(
-        '--max-concurrent', 
+        '--chunk-size', 
         type=int,
-        default=3,
-        help='最大并发删除数量 (默认: 3)'
+        default=DELETE_CHUNK_SIZE,
+        help=f'每条DELETE语句包含的任务ID数量 (默认: {DELETE_CHUNK_SIZE})'
     )
     
     return parser.parse_args()
 
 
-async def process_single_task(deleter: TaskDataDeleter, db_type: str, task_id: str, dry_run: bool, semaphore):
-    """处理单个任务的删除"""
-    async with semaphore:
-        try:
-            print(f"\n开始处理任务: {task_id}")
-            
-            if db_type == 'sqlite':
-                await deleter.delete_task_data_sqlite(task_id, dry_run)
-            else:
-                await deleter.delete_task_data_mysql(task_id, dry_run)
-            
-            print(f"任务 {task_id} 处理完成")
-            return True
-            
-        except Exception as e:
-            print(f"处理任务 {task_id} 时出错: {e}")
-            return False
-
-
 async def main():
     """主函数"""
     try:
@@ -177,59 +159,38 @@ async def main():
                 print("操作已取消")
                 return
         
-        # 创建信号量控制并发数
-        semaphore = asyncio.Semaphore(args.max_concurrent)
-        
-        # 批量处理
+        # 批量处理：所有任务在每张表上合并为分块的 DELETE ... IN (...)，每张表一个事务
         print(f"\n{'=' * 60}")
         print(f"开始批量处理 - 数据库: {args.db.upper()}, 模式: {'预览' if dry_run else '删除'}")
         print(f"{'=' * 60}")
         
-        # 为每个任务创建删除器实例（避免统计数据混乱）
-        tasks = []
-        deleters = []
-        
-        for task_id in task_ids:
-            deleter = TaskDataDeleter()
-            deleters.append(deleter)
-            task = process_single_task(deleter, args.db, task_id, dry_run, semaphore)
-            tasks.append(task)
-        
-        # 等待所有任务完成
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # 统计结果
-        success_count = sum(1 for result in results if result is True)
-        failed_count = len(results) - success_count
+        deleter = TaskDataDeleter()
+        try:
+            await deleter.delete_tasks(args.db, task_ids, dry_run, args.chunk_size)
+        except Exception as e:
+            print(f"批量处理任务时出错: {e}")
+            sys.exit(1)
         
         print(f"\n{'=' * 60}")
         print("批量处理完成")
         print(f"{'=' * 60}")
         print(f"总任务数: {len(task_ids)}")
-        print(f"成功: {success_count}")
-        print(f"失败: {failed_count}")
         
         # 汇总统计信息
-        if success_count > 0:
-            print(f"\n{'=' * 60}")
-            print("汇总统计信息")
-            print(f"{'=' * 60}")
-            
-            total_stats = {}
-            for deleter in deleters:
-                for table, count in deleter.deletion_stats.items():
-                    total_stats[table] = total_stats.get(table, 0) + count
+        print(f"\n{'=' * 60}")
+        print("汇总统计信息")
+        print(f"{'=' * 60}")
+        
+        if deleter.deletion_stats:
+            grand_total = 0
+            for table, count in sorted(deleter.deletion_stats.items()):
+                print(f"{table:<30} {count:>6} 条")
+                grand_total += count
             
-            if total_stats:
-                grand_total = 0
-                for table, count in sorted(total_stats.items()):
-                    print(f"{table:<30} {count:>6} 条")
-                    grand_total += count
-                
-                print(f"{'-' * 60}")
-                print(f"{'总计':<30} {grand_total:>6} 条")
-            else:
-                print("没有找到相关数据")
+            print(f"{'-' * 60}")
+            print(f"{'总计':<30} {grand_total:>6} 条")
+        else:
+            print("没有找到相关数据")
         
     except KeyboardInterrupt:
         print("\n操作已取消")
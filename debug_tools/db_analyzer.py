@@ -3,14 +3,42 @@
 """
 数据库分析工具
 用于分析SQLite数据库结构并导出为SQL文件和数据模型文件
+索引顾问：对数据浏览接口的每一类查询执行 EXPLAIN QUERY PLAN（SQLite）/ EXPLAIN（MySQL），
+标记全表扫描和临时B树排序（filesort），并给出缺少的索引
+
+使用方法:
+    python db_analyzer.py                          # 导出数据库结构
+    python db_analyzer.py --advise                 # SQLite索引顾问
+    python db_analyzer.py --advise --db-type mysql # MySQL索引顾问
 """
 
+import argparse
+import asyncio
+import re
 import sqlite3
 import os
+import sys
 from datetime import datetime
-from typing import List, Dict, Any, Tuple
+from pathlib import Path
+from typing import List, Dict, Any, Tuple, Union
 import json
 
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from api.data_paging import build_keyset_condition, build_keyset_order, encode_cursor
+from config.db_config import SQLITE_DB_PATH
+from dp_op.async_mysql_db import AsyncMysqlDB
+from dp_op.async_sqlite_db import AsyncSqliteDB
+from dp_op.db_migrations import find_missing_query_indexes, get_query_index_name
+from dp_op.db_tables_mapping import BASE_TABLE_CONFIGS
+from dp_op.search_index import build_search_sql, get_fts_table_name, get_search_tables
+from dp_op.table_stats import TABLE_STATS_TABLE, build_stats_summary_sql
+
+# SQLite查询计划中的全表扫描，如 "SCAN xhs_note" 或旧版本的 "SCAN TABLE xhs_note"，不含 USING INDEX 的扫描
+SQLITE_FULL_SCAN_PATTERN = re.compile(r"^SCAN (TABLE )?\S+( AS \S+)?$")
+
 
 class SQLiteAnalyzer:
     """SQLite数据库分析器"""
@@ -338,10 +366,201 @@ class SQLiteAnalyzer:
         print("✅ JSON文件导出完成")
 
 
+def build_api_queries(tables: List[str], is_mysql: bool) -> List[Dict[str, Any]]:
+    """
+    生成数据浏览接口对各表发出的查询，与 api/extra_sqlite_api.py 和 api/extra_mysql_api.py 的查询保持一致
+    
+    Args:
+        tables: 数据库中存在的表名列表
+        is_mysql: 是否为MySQL
+        
+    Returns:
+        查询列表，每项包含 table、name、sql、params 以及 ordered（是否应由索引提供排序）
+    """
+    placeholder = '%s' if is_mysql else '?'
+    task_id = 'advisor'
+    queries = []
+    
+    def add(table: str, name: str, sql: str, params: List[Any], ordered: bool = True):
+        queries.append({'table': table, 'name': name, 'sql': sql, 'params': params, 'ordered': ordered})
+    
+    for table, config in BASE_TABLE_CONFIGS.items():
+        if table not in tables:
+            continue
+        time_field = config['time_field']
+        order = build_keyset_order(time_field)
+        task_filter = f"task_times_id = {placeholder}"
+        keyset_condition, keyset_params = build_keyset_condition(time_field, encode_cursor(0, 1), placeholder)
+        
+        add(table, '按任务浏览（首页）', f"SELECT * FROM `{table}` WHERE {task_filter} {order} LIMIT {placeholder}",
+            [task_id, 31])
+        add(table, '按任务浏览（游标翻页）',
+            f"SELECT * FROM `{table}` WHERE {task_filter} AND {keyset_condition} {order} LIMIT {placeholder}",
+            [task_id] + keyset_params + [31])
+        add(table, '全表浏览（首页）', f"SELECT * FROM `{table}` {order} LIMIT {placeholder}", [31])
+        add(table, '按任务统计行数', f"SELECT COUNT(*) FROM `{table}` WHERE {task_filter}", [task_id], ordered=False)
+        add(table, '行数缓存版本号', f"SELECT MAX(id) FROM `{table}`", [], ordered=False)
+        if is_mysql:
+            add(table, '按任务浏览（页码分页）',
+                f"SELECT * FROM `{table}` WHERE {task_filter} ORDER BY id DESC LIMIT {placeholder} OFFSET {placeholder}",
+                [task_id, 30, 0])
+            add(table, '按任务导出', f"SELECT * FROM `{table}` WHERE {task_filter} ORDER BY id DESC", [task_id])
+        else:
+            add(table, '按任务导出', f"SELECT * FROM `{table}` WHERE {task_filter} ORDER BY `{time_field}` DESC",
+                [task_id])
+    
+    if 'crawler_tasks' in tables:
+        add('crawler_tasks', '任务详情', f"SELECT * FROM crawler_tasks WHERE task_times_id = {placeholder}",
+            [task_id], ordered=False)
+        add('crawler_tasks', '任务列表', "SELECT * FROM crawler_tasks ORDER BY created_at DESC", [])
+    
+    if TABLE_STATS_TABLE in tables:
+        add(TABLE_STATS_TABLE, '数据统计', build_stats_summary_sql(placeholder), [datetime.now().strftime('%Y-%m-%d')],
+            ordered=False)
+    
+    # 全文检索按相关性排序，排序无法由索引提供，只检查是否走了检索索引
+    for table in get_search_tables():
+        if table not in tables:
+            continue
+        sql, params = build_search_sql(table, is_mysql, '检索关键词', task_id,
+                                       use_index=is_mysql or get_fts_table_name(table) in tables)
+        add(table, '全文检索', sql, params + [31], ordered=False)
+    return queries
+
+
+class QueryPlanAdvisor:
+    """索引顾问：检查数据浏览接口每一类查询的执行计划"""
+    
+    def __init__(self, db: Union[AsyncMysqlDB, AsyncSqliteDB]):
+        """
+        初始化索引顾问
+        
+        Args:
+            db: 数据库操作对象
+        """
+        self.db = db
+        self.is_mysql = isinstance(db, AsyncMysqlDB)
+    
+    async def get_tables(self) -> List[str]:
+        """获取数据库中的表名列表"""
+        if self.is_mysql:
+            rows = await self.db.query(
+                "SELECT TABLE_NAME AS name FROM information_schema.tables WHERE TABLE_SCHEMA = DATABASE()")
+        else:
+            rows = await self.db.query("SELECT name FROM sqlite_master WHERE type = 'table'")
+        return [row['name'] for row in rows]
+    
+    async def explain(self, sql: str, params: List[Any]) -> Tuple[List[str], List[str]]:
+        """
+        获取查询的执行计划并检查问题
+        
+        Args:
+            sql: 查询语句
+            params: 查询参数
+            
+        Returns:
+            (执行计划的描述列表, 问题列表)，问题包括 full_scan（全表扫描）和 temp_sort（临时B树排序/filesort）
+        """
+        plan, issues = [], []
+        if self.is_mysql:
+            for row in await self.db.query(f"EXPLAIN {sql}", *params):
+                extra = row.get('Extra') or ''
+                plan.append(f"table={row.get('table')} type={row.get('type')} key={row.get('key')} extra={extra}")
+                if row.get('type') == 'ALL':
+                    issues.append('full_scan')
+                if 'Using filesort' in extra or 'Using temporary' in extra:
+                    issues.append('temp_sort')
+        else:
+            for row in await self.db.query(f"EXPLAIN QUERY PLAN {sql}", *params):
+                detail = row['detail']
+                plan.append(detail)
+                if SQLITE_FULL_SCAN_PATTERN.match(detail):
+                    issues.append('full_scan')
+                if detail.startswith('USE TEMP B-TREE'):
+                    issues.append('temp_sort')
+        return plan, list(dict.fromkeys(issues))
+    
+    async def advise(self) -> Dict[str, Any]:
+        """
+        检查全部查询的执行计划，并给出缺少的索引
+        
+        Returns:
+            包含 findings（有问题的查询）、checked（检查的查询数量）和 suggestions（建议创建的索引语句）的字典
+        """
+        tables = await self.get_tables()
+        findings = []
+        queries = build_api_queries(tables, self.is_mysql)
+        for query in queries:
+            try:
+                plan, issues = await self.explain(query['sql'], query['params'])
+            except Exception as e:
+                plan, issues = [str(e)], ['error']
+            if not query['ordered']:
+                issues = [issue for issue in issues if issue != 'temp_sort']
+            if issues:
+                findings.append({**query, 'plan': plan, 'issues': issues})
+        
+        suggestions = []
+        for table, index_specs in (await find_missing_query_indexes(self.db)).items():
+            for key_fields in index_specs:
+                columns = ', '.join(f'`{field}`' for field in key_fields)
+                suggestions.append(
+                    f"CREATE INDEX `{get_query_index_name(table, key_fields)}` ON `{table}` ({columns});")
+        return {'findings': findings, 'checked': len(queries), 'suggestions': suggestions}
+
+
+def print_advice(advice: Dict[str, Any]):
+    """打印索引顾问的检查结果"""
+    issue_names = {'full_scan': '全表扫描', 'temp_sort': '临时排序', 'error': '执行失败'}
+    print(f"🔍 共检查 {advice['checked']} 条查询，发现 {len(advice['findings'])} 条存在问题")
+    for finding in advice['findings']:
+        issues = '、'.join(issue_names[issue] for issue in finding['issues'])
+        print(f"\n⚠️  [{finding['table']}] {finding['name']}: {issues}")
+        print(f"   SQL: {finding['sql']}")
+        for line in finding['plan']:
+            print(f"   PLAN: {line}")
+    if advice['suggestions']:
+        print("\n💡 建议创建以下索引（可执行 python db_init.py --migrate 自动创建）:")
+        for sql in advice['suggestions']:
+            print(f"   {sql}")
+    else:
+        print("\n✅ 数据浏览接口所需的索引均已存在")
+
+
+async def run_advisor(db_type: str, db_path: str):
+    """运行索引顾问"""
+    if db_type == 'mysql':
+        import aiomysql
+        from config.db_config import MYSQL_DB_HOST, MYSQL_DB_NAME, MYSQL_DB_PORT, MYSQL_DB_PWD, MYSQL_DB_USER
+        pool = await aiomysql.create_pool(host=MYSQL_DB_HOST, port=MYSQL_DB_PORT, user=MYSQL_DB_USER,
+                                          password=MYSQL_DB_PWD, db=MYSQL_DB_NAME, autocommit=True)
+        try:
+            print_advice(await QueryPlanAdvisor(AsyncMysqlDB(pool)).advise())
+        finally:
+            pool.close()
+            await pool.wait_closed()
+    else:
+        db = AsyncSqliteDB(db_path)
+        try:
+            print_advice(await QueryPlanAdvisor(db).advise())
+        finally:
+            await db.close()
+
+
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description='数据库分析工具')
+    parser.add_argument('--advise', action='store_true', help='运行索引顾问，检查数据浏览接口查询的执行计划')
+    parser.add_argument('--db-type', choices=['sqlite', 'mysql'], default='sqlite', help='索引顾问的数据库类型')
+    parser.add_argument('--db-path', default=SQLITE_DB_PATH, help='SQLite数据库文件路径，默认使用配置中的 SQLITE_DB_PATH')
+    args = parser.parse_args()
+    
     # 数据库路径
-    db_path = "d:/A_work/A_trae_alter/MediaCrawler-main/data/mc.db"
+    db_path = args.db_path
+    
+    if args.advise:
+        asyncio.run(run_advisor(args.db_type, db_path))
+        return
     
     # 输出目录
     output_dir = "./output"
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQLite数据库维护工具
+归档超过保留天数的任务（压缩的 JSON Lines 文件）并删除其数据，增量回收空闲页，更新查询统计信息，报告回收的空间
+
+使用方法:
+    python db_maintenance.py --space                    # 查看空间占用
+    python db_maintenance.py                            # 回收空闲页并更新统计信息
+    python db_maintenance.py --archive-days 90          # 同时归档90天前的任务
+    python db_maintenance.py --enable-incremental       # 已有数据库切换为增量回收模式（执行一次完整VACUUM）
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+from typing import Any, Dict
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from config.db_config import DB_ARCHIVE_DIR, DB_VACUUM_MAX_PAGES, SQLITE_DB_PATH, SQLITE_SHARD_DIR, SQLITE_SHARD_MODE
+from dp_op.async_sqlite_db import AsyncSqliteDB
+from dp_op.db_maintenance import AUTO_VACUUM_INCREMENTAL, DatabaseMaintainer
+
+
+def format_bytes(size: float) -> str:
+    """格式化字节数"""
+    for unit in ('B', 'KB', 'MB'):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def print_space(info: Dict[str, int]):
+    """打印空间占用"""
+    mode = '增量回收' if info['auto_vacuum'] == AUTO_VACUUM_INCREMENTAL else '未开启增量回收'
+    print(f"📦 文件大小: {format_bytes(info['size_bytes'])}，空闲页: {info['freelist_count']} 页 "
+          f"({format_bytes(info['free_bytes'])})，{mode}")
+
+
+def print_report(report: Dict[str, Any]):
+    """打印维护报告"""
+    for task_id, counts in report['archived_tasks'].items():
+        print(f"🗄️  已归档任务 {task_id}: {sum(counts.values())} 条记录")
+    print("维护前:", end=" ")
+    print_space(report['before'])
+    print("维护后:", end=" ")
+    print_space(report['after'])
+    print(f"✅ 回收空闲页 {report['vacuumed_pages']} 页，释放空间 {format_bytes(report['reclaimed_bytes'])}，"
+          f"耗时 {report['elapsed_seconds']} 秒")
+
+
+async def run(args):
+    """执行维护"""
+    maintainer = DatabaseMaintainer(AsyncSqliteDB(args.db_path), args.archive_dir,
+                                    shard_mode=SQLITE_SHARD_MODE, shard_dir=SQLITE_SHARD_DIR)
+    if args.space:
+        print_space(await maintainer.get_space_info())
+        return
+    if args.enable_incremental:
+        if await maintainer.enable_incremental_vacuum():
+            print("✅ 已切换为增量回收模式")
+        else:
+            print("数据库已经是增量回收模式")
+    report = await maintainer.run(args.archive_days, vacuum=not args.no_vacuum, analyze=not args.no_analyze,
+                                  max_vacuum_pages=args.max_pages or None)
+    print_report(report)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='SQLite数据库维护工具')
+    parser.add_argument('--db-path', default=SQLITE_DB_PATH, help='SQLite数据库文件路径')
+    parser.add_argument('--archive-dir', default=DB_ARCHIVE_DIR, help='任务归档文件目录')
+    parser.add_argument('--archive-days', type=float, default=None, help='归档创建时间超过该天数的任务')
+    parser.add_argument('--max-pages', type=int, default=DB_VACUUM_MAX_PAGES, help='最多回收的页数，0表示全部回收')
+    parser.add_argument('--no-vacuum', action='store_true', help='不回收空闲页')
+    parser.add_argument('--no-analyze', action='store_true', help='不更新统计信息')
+    parser.add_argument('--enable-incremental', action='store_true',
+                        help='切换为增量回收模式（执行一次完整VACUUM，期间阻塞写入）')
+    parser.add_argument('--space', action='store_true', help='只查看空间占用')
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,7 @@ import asyncio
 import sys
 import os
 from pathlib import Path
+from typing import Dict, List
 
 # 添加项目根目录到Python路径
 project_root = Path(__file__).parent.parent
@@ -31,43 +32,19 @@ except ImportError:
 
 from config.base_config import *
 from config.db_config import *
+from dp_op.async_mysql_db import AsyncMysqlDB
+from dp_op.async_sqlite_db import AsyncSqliteDB
+from dp_op.task_purger import DELETE_CHUNK_SIZE, TaskDataPurger
 
 
 class TaskDataDeleter:
     """任务数据删除器"""
     
     def __init__(self):
-        # 定义所有包含task_times_id字段的表
-        self.tables_with_task_id = [
-            'bilibili_video',
-            'bilibili_video_comment', 
-            'bilibili_up_info',
-            'bilibili_contact_info',
-            'bilibili_up_dynamic',
-            'douyin_aweme',
-            'douyin_aweme_comment',
-            'dy_creator',
-            'kuaishou_video',
-            'kuaishou_video_comment',
-            'weibo_note',
-            'weibo_note_comment',
-            'weibo_creator',
-            'xhs_note',
-            'xhs_note_comment',
-            'xhs_creator',
-            'tieba_note',
-            'tieba_comment',
-            'tieba_creator',
-            'zhihu_content',
-            'zhihu_comment',
-            'zhihu_creator',
-            'crawler_tasks'
-        ]
-        
         self.deletion_stats = {}
     
-    async def get_sqlite_connection(self):
-        """获取SQLite数据库连接"""
+    def find_sqlite_db_path(self) -> Path:
+        """查找SQLite数据库文件"""
         # 尝试多个可能的数据库路径
         possible_paths = [
             project_root / "schema" / "sqlite_tables.db",  # 配置文件中的默认路径
@@ -79,7 +56,7 @@ class TaskDataDeleter:
         for db_path in possible_paths:
             if db_path.exists():
                 print(f"✓ 找到数据库文件: {db_path}")
-                return await aiosqlite.connect(str(db_path))
+                return db_path
         
         # 如果都没找到，显示详细的错误信息
         error_msg = f"SQLite数据库文件未找到，已尝试以下路径:\n"
@@ -88,174 +65,67 @@ class TaskDataDeleter:
         error_msg += "\n请确保数据库文件存在，或运行爬虫程序生成数据库文件。"
         raise FileNotFoundError(error_msg)
     
-    async def get_mysql_connection(self):
-        """获取MySQL数据库连接"""
+    async def get_db(self, db_type: str):
+        """获取数据库操作对象"""
+        if db_type == 'sqlite':
+            return AsyncSqliteDB(str(self.find_sqlite_db_path()))
         try:
-            connection = await aiomysql.connect(
+            pool = await aiomysql.create_pool(
                 host=MYSQL_DB_HOST,
                 port=MYSQL_DB_PORT,
                 user=MYSQL_DB_USER,
                 password=MYSQL_DB_PWD,
                 db=MYSQL_DB_NAME,
-                charset='utf8mb4'
+                charset='utf8mb4',
+                autocommit=True
             )
-            return connection
         except Exception as e:
             raise ConnectionError(f"MySQL连接失败: {e}")
+        return AsyncMysqlDB(pool)
     
-    async def count_records_sqlite(self, db, table: str, task_times_id: str) -> int:
-        """统计SQLite表中的记录数"""
-        try:
-            # 检查表是否存在
-            cursor = await db.execute(
-                "SELECT name FROM sqlite_master WHERE type='table' AND name=?", 
-                (table,)
-            )
-            table_exists = await cursor.fetchone()
-            
-            if not table_exists:
-                return 0
-            
-            # 检查表是否有task_times_id字段
-            cursor = await db.execute(f"PRAGMA table_info({table})")
-            columns = await cursor.fetchall()
-            has_task_times_id = any(col[1] == 'task_times_id' for col in columns)
-            
-            if not has_task_times_id:
-                return 0
-            
-            # 统计记录数
-            cursor = await db.execute(
-                f"SELECT COUNT(*) FROM {table} WHERE task_times_id = ?", 
-                (task_times_id,)
-            )
-            result = await cursor.fetchone()
-            return result[0] if result else 0
-            
-        except Exception as e:
-            print(f"统计表 {table} 记录数时出错: {e}")
-            return 0
-    
-    async def count_records_mysql(self, cursor, table: str, task_times_id: str) -> int:
-        """统计MySQL表中的记录数"""
-        try:
-            # 检查表是否存在
-            await cursor.execute(
-                "SELECT COUNT(*) as count FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s",
-                (table,)
-            )
-            table_check_result = await cursor.fetchone()
-            
-            if not table_check_result or table_check_result['count'] == 0:
-                return 0
-            
-            # 检查表是否有task_times_id字段
-            await cursor.execute(
-                "SELECT COUNT(*) as count FROM information_schema.columns WHERE table_schema = DATABASE() AND table_name = %s AND column_name = 'task_times_id'",
-                (table,)
-            )
-            column_check_result = await cursor.fetchone()
-            
-            if not column_check_result or column_check_result['count'] == 0:
-                return 0
-            
-            # 统计记录数
-            await cursor.execute(
-                f"SELECT COUNT(*) as count FROM `{table}` WHERE task_times_id = %s",
-                (task_times_id,)
-            )
-            result = await cursor.fetchone()
-            return result['count'] if result else 0
-            
-        except Exception as e:
-            print(f"统计表 {table} 记录数时出错: {e}")
-            return 0
-    
-    async def delete_task_data_sqlite(self, task_times_id: str, dry_run: bool = False):
-        """删除SQLite中的任务数据"""
-        db = await self.get_sqlite_connection()
+    async def delete_tasks(self, db_type: str, task_ids: List[str], dry_run: bool = False,
+                           chunk_size: int = DELETE_CHUNK_SIZE) -> Dict[str, int]:
+        """批量删除（或预览）多个任务的数据，每张表只执行分块的 DELETE ... IN (...)"""
+        db = await self.get_db(db_type)
         
         try:
             print(f"\n{'=' * 50}")
-            print(f"SQLite数据库 - 任务ID: {task_times_id}")
+            print(f"{'SQLite' if db_type == 'sqlite' else 'MySQL'}数据库 - 任务数: {len(task_ids)}")
             print(f"{'=' * 50}")
             
-            total_records = 0
+            purger = TaskDataPurger(db, chunk_size=chunk_size)
+            stats = await purger.count(task_ids) if dry_run else await purger.purge(task_ids)
             
-            # 统计和删除数据
-            for table in self.tables_with_task_id:
-                count = await self.count_records_sqlite(db, table, task_times_id)
-                
-                if count > 0:
-                    self.deletion_stats[table] = count
-                    total_records += count
-                    
-                    if not dry_run:
-                        try:
-                            await db.execute(
-                                f"DELETE FROM {table} WHERE task_times_id = ?", 
-                                (task_times_id,)
-                            )
-                            print(f"✓ 已删除表 {table:<25} 记录数: {count:>6}")
-                        except Exception as e:
-                            print(f"✗ 删除表 {table} 失败: {e}")
-                    else:
-                        print(f"○ 预览表 {table:<25} 记录数: {count:>6}")
+            for table, count in stats.items():
+                self.deletion_stats[table] = self.deletion_stats.get(table, 0) + count
+                if dry_run:
+                    print(f"○ 预览表 {table:<25} 记录数: {count:>6}")
+                else:
+                    print(f"✓ 已删除表 {table:<25} 记录数: {count:>6}")
             
+            total_records = sum(stats.values())
             if not dry_run:
-                await db.commit()
                 print(f"\n✓ 删除完成! 总计删除 {total_records} 条记录")
             else:
                 print(f"\n○ 预览完成! 总计将删除 {total_records} 条记录")
-            
-        except Exception as e:
-            print(f"删除SQLite数据时出错: {e}")
+            return stats
+        
         finally:
             await db.close()
     
+    async def delete_task_data_sqlite(self, task_times_id: str, dry_run: bool = False):
+        """删除SQLite中的任务数据"""
+        try:
+            await self.delete_tasks('sqlite', [task_times_id], dry_run)
+        except Exception as e:
+            print(f"删除SQLite数据时出错: {e}")
+    
     async def delete_task_data_mysql(self, task_times_id: str, dry_run: bool = False):
         """删除MySQL中的任务数据"""
-        connection = await self.get_mysql_connection()
-        
         try:
-            cursor = await connection.cursor(aiomysql.DictCursor)
-            
-            print(f"\n{'=' * 50}")
-            print(f"MySQL数据库 - 任务ID: {task_times_id}")
-            print(f"{'=' * 50}")
-            
-            total_records = 0
-            
-            # 统计和删除数据
-            for table in self.tables_with_task_id:
-                count = await self.count_records_mysql(cursor, table, task_times_id)
-                
-                if count > 0:
-                    self.deletion_stats[table] = count
-                    total_records += count
-                    
-                    if not dry_run:
-                        try:
-                            await cursor.execute(
-                                f"DELETE FROM `{table}` WHERE task_times_id = %s", 
-                                (task_times_id,)
-                            )
-                            print(f"✓ 已删除表 {table:<25} 记录数: {count:>6}")
-                        except Exception as e:
-                            print(f"✗ 删除表 {table} 失败: {e}")
-                    else:
-                        print(f"○ 预览表 {table:<25} 记录数: {count:>6}")
-            
-            if not dry_run:
-                await connection.commit()
-                print(f"\n✓ 删除完成! 总计删除 {total_records} 条记录")
-            else:
-                print(f"\n○ 预览完成! 总计将删除 {total_records} 条记录")
-            
+            await self.delete_tasks('mysql', [task_times_id], dry_run)
         except Exception as e:
             print(f"删除MySQL数据时出错: {e}")
-        finally:
-            connection.close()
     
     def print_summary(self):
         """打印删除统计摘要"""
@@ -13,14 +13,27 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2024/4/6 14:21
 # @Desc    : 异步Aiomysql的增删改查封装
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, List, Tuple, Union
 
 import aiomysql
 
+from .db_tables_mapping import INSERT_ONLY_FIELDS
+
+# 多行 INSERT 每条语句包含的最大行数
+INSERT_CHUNK_SIZE = 500
+
 
 class AsyncMysqlDB:
-    def __init__(self, pool: aiomysql.Pool) -> None:
+    # SQL参数占位符
+    placeholder = "%s"
+
+    def __init__(self, pool: aiomysql.Pool, insert_chunk_size: int = INSERT_CHUNK_SIZE) -> None:
+        """
+        :param pool: aiomysql连接池
+        :param insert_chunk_size: 多行 INSERT 每条语句包含的最大行数
+        """
         self.__pool = pool
+        self._insert_chunk_size = max(1, insert_chunk_size)
 
     async def query(self, sql: str, *args: Union[str, int]) -> List[Dict[str, Any]]:
         """
@@ -67,6 +80,38 @@ class AsyncMysqlDB:
                 lastrowid = cur.lastrowid
                 return lastrowid
 
+    async def items_to_table(self, table_name: str, items: List[Dict[str, Any]]) -> int:
+        """
+        表中批量插入数据，生成分块的多行 INSERT ... VALUES (...),(...) 语句，在同一个事务中执行
+        :param table_name: 表名
+        :param items: 记录的字典信息列表
+        :return: 影响的行数
+        """
+        if not items:
+            return 0
+        return await self.execute_batch(self.build_insert_statements(table_name, items))
+
+    def build_insert_statements(self, table_name: str, items: List[Dict[str, Any]]) -> List[Tuple[str, List[tuple]]]:
+        """
+        按字段集合分组生成多行 INSERT 语句，每条语句最多 insert_chunk_size 行，行数相同的分块共用一条语句
+        :param table_name: 表名
+        :param items: 记录的字典信息列表
+        :return: (SQL语句, 参数列表) 的列表
+        """
+        groups: Dict[Tuple[str, ...], List[tuple]] = {}
+        for item in items:
+            groups.setdefault(tuple(item.keys()), []).append(tuple(item.values()))
+
+        statements: Dict[str, List[tuple]] = {}
+        for fields, rows in groups.items():
+            fieldstr = ','.join(f'`{field}`' for field in fields)
+            rowstr = '(' + ','.join(['%s'] * len(fields)) + ')'
+            for i in range(0, len(rows), self._insert_chunk_size):
+                chunk = rows[i:i + self._insert_chunk_size]
+                sql = f"INSERT INTO `{table_name}` ({fieldstr}) VALUES {','.join([rowstr] * len(chunk))}"
+                statements.setdefault(sql, []).append(tuple(value for row in chunk for value in row))
+        return list(statements.items())
+
     async def update_table(self, table_name: str, updates: Dict[str, Any], field_where: str,
                            value_where: Union[str, int, float]) -> int:
         """
@@ -77,22 +122,70 @@ class AsyncMysqlDB:
         :param value_where: update 语句 where 条件中的字段值
         :return:
         """
-        upsets = []
-        values = []
-        for k, v in updates.items():
-            s = '`%s`=%%s' % k
-            upsets.append(s)
-            values.append(v)
-        upsets = ','.join(upsets)
-        sql = 'UPDATE %s SET %s WHERE %s="%s"' % (
-            table_name,
-            upsets,
-            field_where, value_where,
-        )
-        async with self.__pool.acquire() as conn:
-            async with conn.cursor() as cur:
-                rows = await cur.execute(sql, values)
-                return rows
+        sql = self.build_update_sql(table_name, list(updates.keys()), field_where)
+        return await self.execute(sql, *updates.values(), value_where)
+
+    def build_update_sql(self, table_name: str, fields: List[str], field_where: str) -> str:
+        """
+        生成参数化的 UPDATE 语句，where 条件的字段值作为最后一个参数
+        :param table_name: 表名
+        :param fields: 需要更新的字段列表
+        :param field_where: where 条件中的字段名
+        :return:
+        """
+        upsets = ','.join(f'`{field}`=%s' for field in fields)
+        return f"UPDATE `{table_name}` SET {upsets} WHERE `{field_where}`=%s"
+
+    async def update_items(self, table_name: str, items: List[Dict[str, Any]], field_where: str) -> int:
+        """
+        批量更新记录，按字段集合分组后使用同一条参数化语句，在同一个事务中执行
+        :param table_name: 表名
+        :param items: 记录的字典信息列表，每条记录都需要包含 field_where 字段
+        :param field_where: where 条件中的字段名
+        :return: 影响的行数
+        """
+        groups: Dict[Tuple[str, ...], List[tuple]] = {}
+        for item in items:
+            fields = tuple(field for field in item.keys() if field != field_where)
+            groups.setdefault(fields, []).append(tuple(item[field] for field in fields) + (item[field_where],))
+        if not groups:
+            return 0
+        return await self.execute_batch(
+            [(self.build_update_sql(table_name, list(fields), field_where), args_list)
+             for fields, args_list in groups.items()])
+
+    def build_upsert_sql(self, table_name: str, fields: List[str], key_fields: Tuple[str, ...],
+                         insert_only_fields: Tuple[str, ...] = INSERT_ONLY_FIELDS) -> str:
+        """
+        生成 INSERT ... ON DUPLICATE KEY UPDATE 语句，依赖表上 key_fields 对应的唯一索引
+        :param table_name: 表名
+        :param fields: 插入的字段列表
+        :param key_fields: 唯一键字段，冲突时不更新
+        :param insert_only_fields: 仅新增时写入的字段，冲突时不更新
+        :return:
+        """
+        fieldstr = ','.join(f'`{field}`' for field in fields)
+        valstr = ','.join(['%s'] * len(fields))
+        update_fields = [f for f in fields if f not in key_fields and f not in insert_only_fields]
+        if update_fields:
+            updatestr = ','.join(f'`{field}`=VALUES(`{field}`)' for field in update_fields)
+        else:
+            updatestr = f'`{key_fields[0]}`=`{key_fields[0]}`'
+        # VALUES 与括号之间保留空格，aiomysql 的 executemany 据此把多组参数改写为一条多行 INSERT
+        return f"INSERT INTO `{table_name}` ({fieldstr}) VALUES ({valstr}) ON DUPLICATE KEY UPDATE {updatestr}"
+
+    async def upsert_item(self, table_name: str, item: Dict[str, Any], key_fields: Tuple[str, ...],
+                          insert_only_fields: Tuple[str, ...] = INSERT_ONLY_FIELDS) -> int:
+        """
+        插入一条记录，唯一键冲突时更新已有记录，单条SQL完成
+        :param table_name: 表名
+        :param item: 一条记录的字典信息
+        :param key_fields: 唯一键字段
+        :param insert_only_fields: 仅新增时写入的字段
+        :return: 影响的行数
+        """
+        sql = self.build_upsert_sql(table_name, list(item.keys()), key_fields, insert_only_fields)
+        return await self.execute(sql, *item.values())
 
     async def execute(self, sql: str, *args: Union[str, int]) -> int:
         """
@@ -106,6 +199,37 @@ class AsyncMysqlDB:
                 rows = await cur.execute(sql, args)
                 return rows
 
+    async def execute_many(self, sql: str, args_list: List[tuple]) -> int:
+        """
+        批量执行SQL语句
+        :param sql: SQL语句
+        :param args_list: 参数列表
+        :return: 影响的行数
+        """
+        async with self.__pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                rows = await cur.executemany(sql, args_list)
+                return rows
+
+    async def execute_batch(self, statements: List[Tuple[str, List[tuple]]]) -> int:
+        """
+        在同一个事务中依次批量执行多条SQL语句
+        :param statements: (SQL语句, 参数列表) 的列表
+        :return: 影响的行数
+        """
+        async with self.__pool.acquire() as conn:
+            await conn.begin()
+            try:
+                rows = 0
+                async with conn.cursor() as cur:
+                    for sql, args_list in statements:
+                        rows += await cur.executemany(sql, args_list) or 0
+                await conn.commit()
+                return rows
+            except Exception:
+                await conn.rollback()
+                raise
+
     async def close(self):
         """
         关闭MySQL连接池
@@ -15,22 +15,207 @@
 # @Desc    : 异步SQLite的增删改查封装
 import asyncio
 import sqlite3
-from typing import Any, Dict, List, Union
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
 
 try:
     import aiosqlite
 except ImportError:
     aiosqlite = None
 
+from tools import utils
+
+from .db_tables_mapping import INSERT_ONLY_FIELDS
+
+
+def split_sql_statements(sql: str) -> List[str]:
+    """
+    将包含多条语句的SQL分割为单条语句，触发器等语句体内的分号不会被当作语句结束
+    :param sql: SQL文本
+    :return: 语句列表
+    """
+    statements = []
+    current = ""
+    for part in sql.split(';'):
+        current += part + ';'
+        if sqlite3.complete_statement(current):
+            statement = current.strip().rstrip(';').strip()
+            if statement:
+                statements.append(statement)
+            current = ""
+    if current.strip().rstrip(';').strip():
+        statements.append(current.strip().rstrip(';').strip())
+    return statements
+
 
 class AsyncSqliteDB:
-    def __init__(self, db_path: str) -> None:
+    # SQL参数占位符
+    placeholder = "?"
+
+    def __init__(self, db_path: str, persistent: bool = False, reader_pool_size: int = 4,
+                 journal_mode: str = "WAL", synchronous: str = "NORMAL", cache_size: int = -64000,
+                 mmap_size: int = 268435456, busy_timeout: int = 5000) -> None:
+        """
+        :param db_path: 数据库文件路径
+        :param persistent: 是否启用长连接模式（单写连接 + 只读连接池），关闭时每次操作都会新建连接
+        :param reader_pool_size: 长连接模式下只读连接池的大小
+        :param journal_mode: 长连接模式下的日志模式，默认WAL，读写互不阻塞
+        :param synchronous: PRAGMA synchronous，WAL模式下NORMAL即可保证一致性
+        :param cache_size: PRAGMA cache_size，负数表示KiB
+        :param mmap_size: PRAGMA mmap_size，单位字节，0表示关闭内存映射
+        :param busy_timeout: PRAGMA busy_timeout，单位毫秒
+        """
         if aiosqlite is None:
             raise ImportError("aiosqlite is required for SQLite support. Please install it with: pip install aiosqlite")
         
         self.__db_path = db_path
         self._lock = asyncio.Lock()
 
+        # 长连接模式相关
+        self._persistent = persistent
+        self._reader_pool_size = max(1, reader_pool_size)
+        self._journal_mode = journal_mode
+        self._synchronous = synchronous
+        self._cache_size = cache_size
+        self._mmap_size = mmap_size
+        self._busy_timeout = busy_timeout
+        self._start_lock = asyncio.Lock()
+        self._started = False
+        self._writer_queue: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        self._writer_stopped = False
+        self._writer_ready: Optional[asyncio.Future] = None
+        self._readers: Optional[asyncio.Queue] = None
+        self._reader_conns: List["aiosqlite.Connection"] = []
+
+    @property
+    def persistent(self) -> bool:
+        return self._persistent
+
+    async def _apply_pragmas(self, conn: "aiosqlite.Connection", writer: bool):
+        """
+        为长连接设置PRAGMA，journal_mode只需要写连接设置一次（持久化在数据库文件中）
+        """
+        if writer and self._journal_mode:
+            await conn.execute(f"PRAGMA journal_mode={self._journal_mode}")
+        await conn.execute(f"PRAGMA busy_timeout={int(self._busy_timeout)}")
+        await conn.execute(f"PRAGMA synchronous={self._synchronous}")
+        await conn.execute(f"PRAGMA cache_size={int(self._cache_size)}")
+        await conn.execute(f"PRAGMA mmap_size={int(self._mmap_size)}")
+
+    async def _ensure_started(self):
+        """
+        懒启动长连接：先启动写任务（写连接负责创建数据库文件并切换WAL），再打开只读连接池
+        """
+        if self._started:
+            return
+        async with self._start_lock:
+            if self._started:
+                return
+            loop = asyncio.get_running_loop()
+            self._writer_queue = asyncio.Queue()
+            self._writer_stopped = False
+            self._writer_ready = loop.create_future()
+            self._writer_task = asyncio.create_task(self._writer_loop())
+            await self._writer_ready
+
+            self._readers = asyncio.Queue()
+            read_uri = f"{Path(self.__db_path).resolve().as_uri()}?mode=ro"
+            for _ in range(self._reader_pool_size):
+                conn = await aiosqlite.connect(read_uri, uri=True)
+                conn.row_factory = aiosqlite.Row
+                await self._apply_pragmas(conn, writer=False)
+                self._reader_conns.append(conn)
+                self._readers.put_nowait(conn)
+            self._started = True
+
+    async def _writer_loop(self):
+        """
+        写任务：独占唯一的写连接，按提交顺序串行执行写操作，每个操作一个事务
+        """
+        try:
+            conn = await aiosqlite.connect(self.__db_path)
+            await self._apply_pragmas(conn, writer=True)
+        except Exception as e:
+            self._writer_ready.set_exception(e)
+            return
+        self._writer_ready.set_result(True)
+
+        try:
+            while True:
+                job = await self._writer_queue.get()
+                if job is None:
+                    break
+                func, future = job
+                if future.cancelled():
+                    continue
+                try:
+                    result = await func(conn)
+                    await conn.commit()
+                    future.set_result(result)
+                except Exception as e:
+                    try:
+                        await conn.rollback()
+                    except Exception as rollback_error:
+                        utils.logger.error(f"[AsyncSqliteDB._writer_loop] rollback failed: {rollback_error}")
+                    if not future.done():
+                        future.set_exception(e)
+        except Exception as e:
+            utils.logger.error(f"[AsyncSqliteDB._writer_loop] sqlite writer stopped: {e}")
+        finally:
+            # 写任务退出后不再接收写操作，队列中等待的写操作全部失败，避免调用方一直等待
+            self._writer_stopped = True
+            while not self._writer_queue.empty():
+                job = self._writer_queue.get_nowait()
+                if job is not None and not job[1].done():
+                    job[1].set_exception(RuntimeError("sqlite writer is stopped"))
+            try:
+                await conn.close()
+            except Exception as e:
+                utils.logger.error(f"[AsyncSqliteDB._writer_loop] close writer connection failed: {e}")
+
+    async def _submit_write(self, func: Callable[["aiosqlite.Connection"], Awaitable[Any]]) -> Any:
+        """
+        将写操作提交给写任务执行，并等待其结果
+        """
+        await self._ensure_started()
+        if self._writer_stopped or self._writer_task.done():
+            raise RuntimeError("sqlite writer is stopped")
+        future = asyncio.get_running_loop().create_future()
+        self._writer_queue.put_nowait((func, future))
+        return await future
+
+    @asynccontextmanager
+    async def _read_connection(self):
+        """
+        获取一个只读连接：长连接模式下从连接池借出，否则新建连接并串行化
+        """
+        if self._persistent:
+            await self._ensure_started()
+            conn = await self._readers.get()
+            try:
+                yield conn
+            finally:
+                self._readers.put_nowait(conn)
+        else:
+            async with self._lock:
+                async with aiosqlite.connect(self.__db_path) as conn:
+                    conn.row_factory = aiosqlite.Row
+                    yield conn
+
+    async def _write(self, func: Callable[["aiosqlite.Connection"], Awaitable[Any]]) -> Any:
+        """
+        执行一个写操作：长连接模式下交给写任务，否则新建连接执行并提交
+        """
+        if self._persistent:
+            return await self._submit_write(func)
+        async with self._lock:
+            async with aiosqlite.connect(self.__db_path) as conn:
+                result = await func(conn)
+                await conn.commit()
+                return result
+
     async def query(self, sql: str, *args: Union[str, int]) -> List[Dict[str, Any]]:
         """
         从给定的 SQL 中查询记录，返回的是一个列表
@@ -38,12 +223,10 @@ class AsyncSqliteDB:
         :param args: sql中传递动态参数列表
         :return:
         """
-        async with self._lock:
-            async with aiosqlite.connect(self.__db_path) as conn:
-                conn.row_factory = aiosqlite.Row
-                async with conn.execute(sql, args) as cursor:
-                    rows = await cursor.fetchall()
-                    return [dict(row) for row in rows] if rows else []
+        async with self._read_connection() as conn:
+            async with conn.execute(sql, args) as cursor:
+                rows = await cursor.fetchall()
+                return [dict(row) for row in rows] if rows else []
 
     async def get_first(self, sql: str, *args: Union[str, int]) -> Union[Dict[str, Any], None]:
         """
@@ -52,12 +235,10 @@ class AsyncSqliteDB:
         :param args:sql中传递动态参数列表
         :return:
         """
-        async with self._lock:
-            async with aiosqlite.connect(self.__db_path) as conn:
-                conn.row_factory = aiosqlite.Row
-                async with conn.execute(sql, args) as cursor:
-                    row = await cursor.fetchone()
-                    return dict(row) if row else None
+        async with self._read_connection() as conn:
+            async with conn.execute(sql, args) as cursor:
+                row = await cursor.fetchone()
+                return dict(row) if row else None
 
     async def item_to_table(self, table_name: str, item: Dict[str, Any]) -> int:
         """
@@ -72,12 +253,31 @@ class AsyncSqliteDB:
         fieldstr = ','.join(fields)
         valstr = ','.join(['?' for _ in range(len(item))])
         sql = f"INSERT INTO {table_name} ({fieldstr}) VALUES({valstr})"
-        
-        async with self._lock:
-            async with aiosqlite.connect(self.__db_path) as conn:
-                async with conn.execute(sql, values) as cursor:
-                    await conn.commit()
-                    return cursor.lastrowid
+
+        async def _insert(conn):
+            async with conn.execute(sql, values) as cursor:
+                return cursor.lastrowid
+
+        return await self._write(_insert)
+
+    async def items_to_table(self, table_name: str, items: List[Dict[str, Any]]) -> int:
+        """
+        表中批量插入数据，按字段集合分组后 executemany，在同一个事务中执行
+        :param table_name: 表名
+        :param items: 记录的字典信息列表
+        :return: 影响的行数
+        """
+        groups: Dict[Tuple[str, ...], List[tuple]] = {}
+        for item in items:
+            groups.setdefault(tuple(item.keys()), []).append(tuple(item.values()))
+        if not groups:
+            return 0
+        statements = []
+        for fields, args_list in groups.items():
+            fieldstr = ','.join(f'`{field}`' for field in fields)
+            valstr = ','.join(['?'] * len(fields))
+            statements.append((f"INSERT INTO `{table_name}` ({fieldstr}) VALUES({valstr})", args_list))
+        return await self.execute_batch(statements)
 
     async def update_table(self, table_name: str, updates: Dict[str, Any], field_where: str,
                            value_where: Union[str, int, float]) -> int:
@@ -98,12 +298,66 @@ class AsyncSqliteDB:
         upsets = ','.join(upsets)
         values.append(value_where)
         sql = f'UPDATE {table_name} SET {upsets} WHERE {field_where}=?'
-        
-        async with self._lock:
-            async with aiosqlite.connect(self.__db_path) as conn:
-                cursor = await conn.execute(sql, values)
-                await conn.commit()
-                return cursor.rowcount
+
+        async def _update(conn):
+            cursor = await conn.execute(sql, values)
+            return cursor.rowcount
+
+        return await self._write(_update)
+
+    async def update_items(self, table_name: str, items: List[Dict[str, Any]], field_where: str) -> int:
+        """
+        批量更新记录，按字段集合分组后使用同一条参数化语句，在同一个事务中执行
+        :param table_name: 表名
+        :param items: 记录的字典信息列表，每条记录都需要包含 field_where 字段
+        :param field_where: where 条件中的字段名
+        :return: 影响的行数
+        """
+        groups: Dict[Tuple[str, ...], List[tuple]] = {}
+        for item in items:
+            fields = tuple(field for field in item.keys() if field != field_where)
+            groups.setdefault(fields, []).append(tuple(item[field] for field in fields) + (item[field_where],))
+        if not groups:
+            return 0
+        statements = []
+        for fields, args_list in groups.items():
+            upsets = ','.join(f'`{field}`=?' for field in fields)
+            statements.append((f"UPDATE `{table_name}` SET {upsets} WHERE `{field_where}`=?", args_list))
+        return await self.execute_batch(statements)
+
+    def build_upsert_sql(self, table_name: str, fields: List[str], key_fields: Tuple[str, ...],
+                         insert_only_fields: Tuple[str, ...] = INSERT_ONLY_FIELDS) -> str:
+        """
+        生成 INSERT ... ON CONFLICT DO UPDATE 语句，依赖表上 key_fields 对应的唯一索引（SQLite >= 3.24）
+        :param table_name: 表名
+        :param fields: 插入的字段列表
+        :param key_fields: 唯一键字段，冲突时不更新
+        :param insert_only_fields: 仅新增时写入的字段，冲突时不更新
+        :return:
+        """
+        fieldstr = ','.join(f'`{field}`' for field in fields)
+        valstr = ','.join(['?'] * len(fields))
+        conflictstr = ','.join(f'`{field}`' for field in key_fields)
+        update_fields = [f for f in fields if f not in key_fields and f not in insert_only_fields]
+        if update_fields:
+            updatestr = ','.join(f'`{field}`=excluded.`{field}`' for field in update_fields)
+            action = f"DO UPDATE SET {updatestr}"
+        else:
+            action = "DO NOTHING"
+        return f"INSERT INTO `{table_name}` ({fieldstr}) VALUES({valstr}) ON CONFLICT({conflictstr}) {action}"
+
+    async def upsert_item(self, table_name: str, item: Dict[str, Any], key_fields: Tuple[str, ...],
+                          insert_only_fields: Tuple[str, ...] = INSERT_ONLY_FIELDS) -> int:
+        """
+        插入一条记录，唯一键冲突时更新已有记录，单条SQL完成
+        :param table_name: 表名
+        :param item: 一条记录的字典信息
+        :param key_fields: 唯一键字段
+        :param insert_only_fields: 仅新增时写入的字段
+        :return: 影响的行数
+        """
+        sql = self.build_upsert_sql(table_name, list(item.keys()), key_fields, insert_only_fields)
+        return await self.execute(sql, *item.values())
 
     async def execute(self, sql: str, *args: Union[str, int]) -> int:
         """
@@ -112,22 +366,37 @@ class AsyncSqliteDB:
         :param args:
         :return:
         """
-        async with self._lock:
-            async with aiosqlite.connect(self.__db_path) as conn:
-                # 如果SQL包含多个语句，需要分别执行
-                if ';' in sql and not args:
-                    # 分割SQL语句并逐个执行
-                    statements = [stmt.strip() for stmt in sql.split(';') if stmt.strip()]
-                    total_rowcount = 0
-                    for statement in statements:
-                        cursor = await conn.execute(statement)
-                        total_rowcount += cursor.rowcount
-                    await conn.commit()
-                    return total_rowcount
-                else:
-                    cursor = await conn.execute(sql, args)
-                    await conn.commit()
-                    return cursor.rowcount
+        async def _execute(conn):
+            # 如果SQL包含多个语句，需要分别执行
+            if ';' in sql and not args:
+                # 分割SQL语句并逐个执行
+                statements = split_sql_statements(sql)
+                total_rowcount = 0
+                for statement in statements:
+                    cursor = await conn.execute(statement)
+                    total_rowcount += cursor.rowcount
+                return total_rowcount
+            else:
+                cursor = await conn.execute(sql, args)
+                return cursor.rowcount
+
+        return await self._write(_execute)
+
+    async def execute_fetchall(self, sql: str, *args: Union[str, int]) -> List[Dict[str, Any]]:
+        """
+        在写连接上执行语句并读取全部结果，用于需要逐步执行到结束才生效的维护语句，
+        如 PRAGMA incremental_vacuum（每读取一步释放一页）、PRAGMA optimize
+        :param sql:
+        :param args:
+        :return:
+        """
+        async def _execute_fetchall(conn):
+            async with conn.execute(sql, args) as cursor:
+                rows = await cursor.fetchall()
+                columns = [description[0] for description in cursor.description or []]
+                return [dict(zip(columns, row)) for row in rows]
+
+        return await self._write(_execute_fetchall)
 
     async def execute_many(self, sql: str, args_list: List[tuple]) -> int:
         """
@@ -136,14 +405,40 @@ class AsyncSqliteDB:
         :param args_list: 参数列表
         :return: 影响的行数
         """
-        async with self._lock:
-            async with aiosqlite.connect(self.__db_path) as conn:
+        async def _execute_many(conn):
+            cursor = await conn.executemany(sql, args_list)
+            return cursor.rowcount
+
+        return await self._write(_execute_many)
+
+    async def execute_batch(self, statements: List[Tuple[str, List[tuple]]]) -> int:
+        """
+        在同一个事务中依次批量执行多条SQL语句
+        :param statements: (SQL语句, 参数列表) 的列表
+        :return: 影响的行数
+        """
+        async def _execute_batch(conn):
+            total_rowcount = 0
+            for sql, args_list in statements:
                 cursor = await conn.executemany(sql, args_list)
-                await conn.commit()
-                return cursor.rowcount
+                total_rowcount += cursor.rowcount
+            return total_rowcount
+
+        return await self._write(_execute_batch)
 
     async def close(self):
         """
-        关闭数据库连接（SQLite不需要显式关闭连接池）
+        关闭数据库连接：非长连接模式下无需处理；长连接模式下等待写队列排空后关闭所有连接
         """
-        pass
\ No newline at end of file
+        if not self._persistent or not self._started:
+            return
+        self._writer_queue.put_nowait(None)
+        # 写任务可能已经异常退出
+        await asyncio.gather(self._writer_task, return_exceptions=True)
+        for conn in self._reader_conns:
+            await conn.close()
+        self._reader_conns = []
+        self._readers = None
+        self._writer_task = None
+        self._writer_queue = None
+        self._started = False
@@ -0,0 +1,263 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 数据库写入缓冲区，按表收集记录，达到数量或时间阈值后在一个事务内批量写入
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from tools import utils
+
+from .async_mysql_db import AsyncMysqlDB
+from .async_sqlite_db import AsyncSqliteDB
+from .db_tables_mapping import INSERT_ONLY_FIELDS
+
+
+class BatchWriteError(Exception):
+    """部分记录写入失败，记录已放回缓冲区等待下次写入"""
+
+
+class AsyncBatchWriter:
+    def __init__(self, db: Union[AsyncMysqlDB, AsyncSqliteDB], batch_size: int = 200,
+                 flush_interval: float = 2.0, max_retries: int = 3) -> None:
+        """
+        :param db: 数据库操作对象
+        :param batch_size: 单表缓冲记录数达到该值时立即写入
+        :param flush_interval: 定时写入的时间间隔（秒）
+        :param max_retries: 写入失败的记录放回缓冲区重试的次数，超过后丢弃
+        """
+        self._db = db
+        self._batch_size = max(1, batch_size)
+        self._flush_interval = flush_interval
+        # table -> (key_fields, {key: item})
+        self._buffers: Dict[str, Tuple[Tuple[str, ...], Dict[Tuple, Dict[str, Any]]]] = {}
+        self._max_retries = max(0, max_retries)
+        # (table, key) -> 已失败的写入次数
+        self._retries: Dict[Tuple[str, Tuple], int] = {}
+        # 在其他表全部写入成功后才写入的表，如分页断点
+        self._commit_last_tables = set()
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._closed = False
+        self.stats = {
+            "flush_count": 0,
+            "row_count": 0,
+            "total_latency_ms": 0.0,
+            "max_latency_ms": 0.0,
+        }
+
+    def start(self):
+        """
+        启动定时写入任务
+        """
+        if self._flush_task is None and self._flush_interval > 0:
+            self._flush_task = asyncio.create_task(self._flush_periodically())
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                utils.logger.error(f"[AsyncBatchWriter._flush_periodically] flush error: {e}")
+
+    @property
+    def db(self) -> Union[AsyncMysqlDB, AsyncSqliteDB]:
+        return self._db
+
+    def pending_count(self) -> int:
+        return sum(len(rows) for _, rows in self._buffers.values())
+
+    async def add(self, table_name: str, item: Dict[str, Any], key_fields: Tuple[str, ...],
+                  commit_last: bool = False):
+        """
+        添加一条记录到缓冲区，同一主键的记录只保留最新的一条
+        :param table_name: 表名
+        :param item: 一条记录的字典信息
+        :param key_fields: 用于判断记录是否已存在的字段
+        :param commit_last: 该表的记录在同一次写入中最后写入，且只在之前加入的其他表记录全部写入成功后写入，
+                            用于分页断点与该页数据一起提交
+        :return:
+        """
+        if self._closed:
+            raise RuntimeError("AsyncBatchWriter is closed")
+        if commit_last:
+            self._commit_last_tables.add(table_name)
+        key_fields = tuple(key_fields)
+        _, rows = self._buffers.setdefault(table_name, (key_fields, {}))
+        key = tuple(item.get(field) for field in key_fields)
+        if key in rows:
+            # 保留首次出现时的仅新增字段
+            for field in INSERT_ONLY_FIELDS:
+                if field in rows[key]:
+                    item[field] = rows[key][field]
+        rows[key] = item
+        if len(rows) >= self._batch_size:
+            try:
+                # 最后写入的表依赖其他表的数据，需要整体写入
+                await self.flush(None if table_name in self._commit_last_tables else table_name)
+            except BatchWriteError as e:
+                # 失败的记录已放回缓冲区，由下次写入重试
+                utils.logger.error(f"[AsyncBatchWriter.add] {e}")
+
+    async def flush(self, table_name: Optional[str] = None):
+        """
+        写入缓冲区中的记录，写入失败的记录放回缓冲区，超过重试次数后才丢弃；
+        写入所有表时，最后写入的表（commit_last）在其他表全部写入成功后才写入
+        :param table_name: 表名，为空时写入所有表
+        :return:
+        :raises BatchWriteError: 有记录未写入
+        """
+        async with self._flush_lock:
+            if table_name:
+                tables = [table_name]
+                last_buffers = {}
+            else:
+                # 先取出最后写入的表，写入期间新加入的记录可能对应还未写入的数据，留到下次写入
+                tables = [table for table in self._buffers if table not in self._commit_last_tables]
+                last_buffers = {table: self._buffers.pop(table) for table in list(self._buffers)
+                                if table in self._commit_last_tables}
+            failed_tables = []
+            for table in tables:
+                buffer = self._buffers.pop(table, None)
+                if not buffer or not buffer[1]:
+                    continue
+                if not await self._write_buffer(table, buffer):
+                    failed_tables.append(table)
+            for table, buffer in last_buffers.items():
+                if failed_tables:
+                    self._restore(table, buffer[0], buffer[1], count_retry=False)
+                elif buffer[1] and not await self._write_buffer(table, buffer):
+                    failed_tables.append(table)
+            if failed_tables:
+                raise BatchWriteError(f"batch write failed for tables: {failed_tables}")
+
+    async def _write_buffer(self, table_name: str, buffer: Tuple[Tuple[str, ...], Dict[Tuple, Dict[str, Any]]]) -> bool:
+        """写入一张表取出的缓冲区，失败的记录放回缓冲区，返回是否全部写入"""
+        key_fields, rows = buffer
+        try:
+            failed = await self._flush_table(table_name, key_fields, rows)
+        except Exception as e:
+            utils.logger.error(f"[AsyncBatchWriter.flush] write {table_name} failed: {e}")
+            failed = rows
+        if failed:
+            self._restore(table_name, key_fields, failed)
+            return False
+        return True
+
+    def _restore(self, table_name: str, key_fields: Tuple[str, ...], failed: Dict[Tuple, Dict[str, Any]],
+                 count_retry: bool = True):
+        """把写入失败（或未写入）的记录放回缓冲区，写入期间新加入的同主键记录优先"""
+        _, rows = self._buffers.setdefault(table_name, (key_fields, {}))
+        for key, item in failed.items():
+            if not count_retry:
+                rows.setdefault(key, item)
+                continue
+            retry_key = (table_name, key)
+            attempts = self._retries.get(retry_key, 0) + 1
+            if attempts > self._max_retries:
+                self._retries.pop(retry_key, None)
+                utils.logger.error(
+                    f"[AsyncBatchWriter._restore] drop {table_name} row {key} after {attempts} failed writes")
+                continue
+            self._retries[retry_key] = attempts
+            if key in rows:
+                for field in INSERT_ONLY_FIELDS:
+                    if field in item:
+                        rows[key][field] = item[field]
+            else:
+                rows[key] = item
+
+    async def _flush_table(self, table_name: str, key_fields: Tuple[str, ...],
+                           rows: Dict[Tuple, Dict[str, Any]]) -> Dict[Tuple, Dict[str, Any]]:
+        """
+        写入一张表的记录
+        :return: 写入失败的记录
+        """
+        start = time.perf_counter()
+        statements = self._build_statements(table_name, key_fields, rows)
+        failed = {}
+        try:
+            await self._db.execute_batch([(sql, [args for _, args in keyed_args]) for sql, keyed_args in statements])
+        except Exception as e:
+            utils.logger.error(
+                f"[AsyncBatchWriter._flush_table] batch write {table_name} failed: {e}, retry row by row")
+            failed_keys = await self._execute_row_by_row(table_name, statements)
+            failed = {key: rows[key] for key in failed_keys}
+        if self._retries:
+            for key in rows:
+                if key not in failed:
+                    self._retries.pop((table_name, key), None)
+
+        written = len(rows) - len(failed)
+        latency_ms = (time.perf_counter() - start) * 1000
+        self.stats["flush_count"] += 1
+        self.stats["row_count"] += written
+        self.stats["total_latency_ms"] += latency_ms
+        self.stats["max_latency_ms"] = max(self.stats["max_latency_ms"], latency_ms)
+        utils.logger.info(
+            f"[AsyncBatchWriter._flush_table] table: {table_name}, rows: {written}, failed: {len(failed)}, "
+            f"latency: {latency_ms:.1f}ms")
+        return failed
+
+    async def _execute_row_by_row(self, table_name: str, statements: List[Tuple[str, List[Tuple]]]) -> List[Tuple]:
+        """
+        批量写入失败时逐条重试，避免一条脏数据导致整批数据丢失
+        :return: 写入失败的记录主键
+        """
+        failed_keys = []
+        for sql, keyed_args in statements:
+            for key, args in keyed_args:
+                try:
+                    await self._db.execute_batch([(sql, [args])])
+                except Exception as e:
+                    failed_keys.append(key)
+                    utils.logger.error(f"[AsyncBatchWriter._execute_row_by_row] write {table_name} error: {e}, args: {args}")
+        return failed_keys
+
+    def _build_statements(self, table_name: str, key_fields: Tuple[str, ...],
+                          rows: Dict[Tuple, Dict[str, Any]]) -> List[Tuple[str, List[Tuple[Tuple, tuple]]]]:
+        """
+        按字段集合分组生成 upsert 的executemany语句，由唯一索引处理新增与更新，
+        每组参数附带记录主键，便于定位写入失败的记录
+        """
+        groups: Dict[Tuple[str, ...], List[Tuple[Tuple, tuple]]] = {}
+        for key, item in rows.items():
+            fields = tuple(item.keys())
+            groups.setdefault(fields, []).append((key, tuple(item[f] for f in fields)))
+
+        return [
+            (self._db.build_upsert_sql(table_name, list(fields), key_fields, INSERT_ONLY_FIELDS), keyed_args)
+            for fields, keyed_args in groups.items()
+        ]
+
+    async def close(self):
+        """
+        停止定时任务并写入剩余的全部记录
+        """
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        try:
+            await self.flush()
+        except BatchWriteError as e:
+            utils.logger.error(f"[AsyncBatchWriter.close] {e}, {self.pending_count()} rows not written")
+        self._closed = True
+        if self.stats["flush_count"]:
+            avg_latency = self.stats["total_latency_ms"] / self.stats["flush_count"]
+            utils.logger.info(
+                f"[AsyncBatchWriter.close] flushes: {self.stats['flush_count']}, rows: {self.stats['row_count']}, "
+                f"avg latency: {avg_latency:.1f}ms, max latency: {self.stats['max_latency_ms']:.1f}ms")
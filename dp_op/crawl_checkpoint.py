@@ -0,0 +1,129 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 分页断点：长时间的搜索、创作者、评论翻页在每一页处理完成后记录 (任务, 实体, 游标, 已获取数量)，
+#            任务中断后以相同的任务ID续爬时，从最后提交的游标继续，已完成的实体直接跳过
+import json
+import time
+from typing import Any, Dict, Optional, Tuple, Union
+
+from tools import utils
+from var import db_batch_writer_var
+
+from .async_mysql_db import AsyncMysqlDB
+from .async_sqlite_db import AsyncSqliteDB
+
+CHECKPOINT_TABLE = "crawl_checkpoints"
+
+_SQLITE_CREATE_TABLE = f"""
+CREATE TABLE IF NOT EXISTS `{CHECKPOINT_TABLE}` (
+    `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `task_times_id` TEXT NOT NULL,
+    `entity` TEXT NOT NULL,
+    `cursor` TEXT DEFAULT NULL,
+    `item_count` INTEGER NOT NULL DEFAULT 0,
+    `done` INTEGER NOT NULL DEFAULT 0,
+    `last_modify_ts` INTEGER NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `idx_crawl_checkpoints_task_entity`
+    ON `{CHECKPOINT_TABLE}` (`task_times_id`, `entity`)
+"""
+
+_MYSQL_CREATE_TABLE = f"""
+CREATE TABLE IF NOT EXISTS `{CHECKPOINT_TABLE}`
+(
+    `id`             int          NOT NULL AUTO_INCREMENT COMMENT '自增ID',
+    `task_times_id`  varchar(64)  NOT NULL COMMENT '任务时间ID',
+    `entity`         varchar(255) NOT NULL COMMENT '翻页实体，如 xhs:comments:笔记ID',
+    `cursor`         text         DEFAULT NULL COMMENT '下一页的游标（JSON）',
+    `item_count`     int          NOT NULL DEFAULT 0 COMMENT '已获取的数量',
+    `done`           tinyint      NOT NULL DEFAULT 0 COMMENT '是否已翻页完成',
+    `last_modify_ts` bigint       NOT NULL COMMENT '最后更新时间戳',
+    PRIMARY KEY (`id`),
+    UNIQUE KEY `idx_crawl_checkpoints_task_entity` (`task_times_id`, `entity`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='分页断点'
+"""
+
+
+class CrawlCheckpoint:
+    def __init__(self, db: Union[AsyncMysqlDB, AsyncSqliteDB], task_id: str, resume: bool = False):
+        """
+        :param db: 数据库操作对象
+        :param task_id: 任务ID
+        :param resume: 是否从已有的断点续爬，为否时只记录断点
+        """
+        self._db = db
+        self._is_mysql = isinstance(db, AsyncMysqlDB)
+        self._task_id = task_id
+        self._resume = resume
+        self._checkpoints: Dict[str, Tuple[Any, int, bool]] = {}
+
+    @property
+    def task_id(self) -> str:
+        return self._task_id
+
+    async def load(self) -> int:
+        """
+        创建断点表，续爬时加载当前任务已有的断点
+        Returns:
+            加载的断点数量
+        """
+        await self._db.execute(_MYSQL_CREATE_TABLE if self._is_mysql else _SQLITE_CREATE_TABLE)
+        if not self._resume:
+            return 0
+        rows = await self._db.query(
+            f"SELECT `entity`, `cursor`, `item_count`, `done` FROM `{CHECKPOINT_TABLE}` "
+            f"WHERE `task_times_id` = {self._db.placeholder}", self._task_id)
+        for row in rows:
+            cursor = json.loads(row["cursor"]) if row["cursor"] else None
+            self._checkpoints[row["entity"]] = (cursor, int(row["item_count"]), bool(row["done"]))
+        utils.logger.info(f"[CrawlCheckpoint.load] task: {self._task_id}, loaded {len(rows)} checkpoints")
+        return len(rows)
+
+    def get(self, entity: str) -> Optional[Tuple[Any, int, bool]]:
+        """
+        获取续爬时加载的实体断点，本次运行中记录的断点不会返回
+        Args:
+            entity: 翻页实体
+
+        Returns:
+            (下一页的游标, 已获取的数量, 是否已完成)，没有断点时返回 None
+        """
+        return self._checkpoints.get(entity)
+
+    async def save(self, entity: str, cursor: Any, item_count: int, done: bool = False):
+        """
+        记录实体的断点，在一页数据处理完成后调用；使用批量写入时断点加入缓冲区，
+        与该页数据在同一次写入中提交，数据写入失败时不写入断点，续爬时重新获取该页
+        Args:
+            entity: 翻页实体
+            cursor: 下一页的游标，需要可以JSON序列化
+            item_count: 已获取的数量
+            done: 是否已翻页完成
+
+        Returns:
+
+        """
+        item = {
+            "task_times_id": self._task_id,
+            "entity": entity,
+            "cursor": json.dumps(cursor, ensure_ascii=False),
+            "item_count": item_count,
+            "done": int(done),
+            "last_modify_ts": int(time.time() * 1000),
+        }
+        batch_writer = db_batch_writer_var.get()
+        if batch_writer is not None:
+            await batch_writer.add(CHECKPOINT_TABLE, item, key_fields=("task_times_id", "entity"), commit_last=True)
+            return
+        sql = self._db.build_upsert_sql(CHECKPOINT_TABLE, list(item), ("task_times_id", "entity"), ())
+        await self._db.execute(sql, *item.values())
@@ -0,0 +1,294 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : SQLite 数据库维护：增量回收空闲页（PRAGMA incremental_vacuum）、更新统计信息（ANALYZE / PRAGMA optimize），
+#            把超过保留天数的任务数据归档为压缩的 JSON Lines 文件后删除，并报告回收的空间；可由调度器定时执行。
+#            开启分库时任务数据从分库文件中归档，回收空闲页和更新统计信息同样作用于各分库
+import asyncio
+import gzip
+import json
+import os
+import re
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from tools import utils
+
+from .async_sqlite_db import AsyncSqliteDB
+from .sqlite_shards import (SHARD_MODE_NONE, SHARD_MODE_PLATFORM, SHARD_MODE_TASK, get_shard_path, list_shard_paths,
+                            remove_shard)
+from .task_purger import TASK_TABLE, TaskDataPurger
+
+# 归档时每次读取的行数
+ARCHIVE_FETCH_SIZE = 1000
+
+# 这些状态的任务仍在执行，不归档
+ACTIVE_TASK_STATUSES = ("pending", "running")
+
+# PRAGMA auto_vacuum 的取值
+AUTO_VACUUM_INCREMENTAL = 2
+
+_UNSAFE_CHARS = re.compile(r"[^0-9A-Za-z_.-]")
+
+
+class DatabaseMaintainer:
+    def __init__(self, db: AsyncSqliteDB, archive_dir: str, shard_mode: str = SHARD_MODE_NONE,
+                 shard_dir: Optional[str] = None):
+        """
+        :param db: SQLite数据库操作对象（主库）
+        :param archive_dir: 任务归档文件目录
+        :param shard_mode: 分库方式，与写入时的 SQLITE_SHARD_MODE 一致
+        :param shard_dir: 分库文件目录
+        """
+        self._db = db
+        self._archive_dir = archive_dir
+        self._purger = TaskDataPurger(db)
+        self._shard_mode = shard_mode if shard_dir else SHARD_MODE_NONE
+        self._shard_dir = shard_dir
+
+    def get_task_shards(self, task_id: str) -> List[str]:
+        """
+        获取可能保存了任务数据的分库文件
+        Args:
+            task_id: task_times_id
+
+        Returns:
+            按任务分库时为该任务的文件，按平台分库时为全部平台文件，不分库时为空
+        """
+        if self._shard_mode == SHARD_MODE_TASK:
+            path = get_shard_path(self._shard_mode, self._shard_dir, task_id=task_id)
+            return [path] if path and os.path.exists(path) else []
+        if self._shard_mode == SHARD_MODE_PLATFORM:
+            return list_shard_paths(self._shard_dir)
+        return []
+
+    def get_shard_paths(self) -> List[str]:
+        """获取全部分库文件，不分库时为空"""
+        if self._shard_mode == SHARD_MODE_NONE:
+            return []
+        return list_shard_paths(self._shard_dir)
+
+    async def _pragma(self, name: str, db: Optional[AsyncSqliteDB] = None) -> int:
+        row = await (db or self._db).get_first(f"PRAGMA {name}")
+        return int(list(row.values())[0]) if row else 0
+
+    async def get_space_info(self, db: Optional[AsyncSqliteDB] = None) -> Dict[str, int]:
+        """
+        获取数据库文件的空间占用
+        Args:
+            db: 数据库操作对象，为空时为主库
+
+        Returns:
+            page_size、page_count、freelist_count、auto_vacuum，以及 size_bytes（文件大小）、free_bytes（空闲页大小）
+        """
+        info = {name: await self._pragma(name, db)
+                for name in ("page_size", "page_count", "freelist_count", "auto_vacuum")}
+        info["size_bytes"] = info["page_size"] * info["page_count"]
+        info["free_bytes"] = info["page_size"] * info["freelist_count"]
+        return info
+
+    async def enable_incremental_vacuum(self) -> bool:
+        """
+        把数据库切换为增量回收模式，已有数据库需要执行一次完整的 VACUUM（耗时与文件大小成正比，期间阻塞写入）
+        Returns:
+            是否执行了切换
+        """
+        if await self._pragma("auto_vacuum") == AUTO_VACUUM_INCREMENTAL:
+            return False
+        # 两条语句需要在同一个连接上执行，设置才会在 VACUUM 重建文件时生效
+        await self._db.execute("PRAGMA auto_vacuum = INCREMENTAL; VACUUM")
+        utils.logger.info("[DatabaseMaintainer.enable_incremental_vacuum] auto_vacuum switched to INCREMENTAL")
+        return True
+
+    async def incremental_vacuum(self, max_pages: Optional[int] = None, db: Optional[AsyncSqliteDB] = None) -> int:
+        """
+        把空闲页归还给文件系统，每次最多回收 max_pages 页，避免长时间持有写锁
+        Args:
+            max_pages: 最多回收的页数，为空时回收全部空闲页
+            db: 数据库操作对象，为空时为主库
+
+        Returns:
+            回收的页数
+        """
+        db = db or self._db
+        if await self._pragma("auto_vacuum", db) != AUTO_VACUUM_INCREMENTAL:
+            utils.logger.warning("[DatabaseMaintainer.incremental_vacuum] auto_vacuum is not INCREMENTAL, "
+                                 "run enable_incremental_vacuum once to reclaim free pages")
+            return 0
+        before = await self._pragma("freelist_count", db)
+        pages = f"({int(max_pages)})" if max_pages else ""
+        await db.execute_fetchall(f"PRAGMA incremental_vacuum{pages}")
+        # WAL模式下截断日志文件，释放的空间才会体现在磁盘上
+        await db.execute_fetchall("PRAGMA wal_checkpoint(TRUNCATE)")
+        return before - await self._pragma("freelist_count", db)
+
+    async def analyze(self, db: Optional[AsyncSqliteDB] = None):
+        """更新查询优化器使用的统计信息"""
+        db = db or self._db
+        await db.execute("ANALYZE")
+        await db.execute_fetchall("PRAGMA optimize")
+
+    async def find_archivable_tasks(self, older_than_days: float) -> List[str]:
+        """
+        查找创建时间超过保留天数且已结束的任务
+        Args:
+            older_than_days: 保留天数
+
+        Returns:
+            task_times_id 列表
+        """
+        cutoff = (datetime.now() - timedelta(days=older_than_days)).isoformat()
+        placeholders = ", ".join("?" * len(ACTIVE_TASK_STATUSES))
+        rows = await self._db.query(
+            f"SELECT task_times_id FROM `{TASK_TABLE}` WHERE created_at < ? "
+            f"AND (status IS NULL OR status NOT IN ({placeholders})) ORDER BY created_at",
+            cutoff, *ACTIVE_TASK_STATUSES)
+        return [row["task_times_id"] for row in rows]
+
+    def get_archive_path(self, task_id: str) -> str:
+        return os.path.join(self._archive_dir, f"task_{_UNSAFE_CHARS.sub('_', task_id)}.jsonl.gz")
+
+    async def archive_task(self, task_id: str) -> Dict[str, int]:
+        """
+        把任务在各表中的数据写入压缩文件（每行一个 {"table": 表名, "row": 记录}），写入完成后删除数据库中的数据；
+        开启分库时同时归档分库文件中的数据，按任务分库时删除任务的分库文件，按平台分库时删除各平台文件中该任务的数据
+        Args:
+            task_id: task_times_id
+
+        Returns:
+            表名到归档记录数的映射
+        """
+        os.makedirs(self._archive_dir, exist_ok=True)
+        archive_path = self.get_archive_path(task_id)
+        tmp_path = f"{archive_path}.{uuid.uuid4().hex}.tmp"
+        shard_purgers = [TaskDataPurger(AsyncSqliteDB(path)) for path in self.get_task_shards(task_id)]
+        counts = {}
+        try:
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                # 任务记录表在主库中，最后写入
+                for purger in shard_purgers + [self._purger]:
+                    await self._archive_rows(f, purger, task_id, counts)
+            # 归档文件完整写入后才删除数据
+            os.replace(tmp_path, archive_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        if self._shard_mode == SHARD_MODE_TASK:
+            for path in self.get_task_shards(task_id):
+                remove_shard(path)
+        else:
+            for purger in shard_purgers:
+                await purger.purge([task_id])
+        # 主库中的任务记录最后删除，分库数据删除失败时下次维护仍会归档该任务
+        await self._purger.purge([task_id])
+        utils.logger.info(f"[DatabaseMaintainer.archive_task] task {task_id} archived to {archive_path}: {counts}")
+        return counts
+
+    async def _archive_rows(self, f, purger: TaskDataPurger, task_id: str, counts: Dict[str, int]):
+        db = purger.db
+        for table in await purger.get_task_tables():
+            last_id = 0
+            while True:
+                rows = await db.query(
+                    f"SELECT * FROM `{table}` WHERE task_times_id = ? AND id > ? ORDER BY id LIMIT ?",
+                    task_id, last_id, ARCHIVE_FETCH_SIZE)
+                if not rows:
+                    break
+                lines = "".join(json.dumps({"table": table, "row": row}, ensure_ascii=False) + "\n"
+                                for row in rows)
+                await asyncio.to_thread(f.write, lines)
+                counts[table] = counts.get(table, 0) + len(rows)
+                last_id = rows[-1]["id"]
+
+    async def run(self, archive_days: Optional[float] = None, vacuum: bool = True, analyze: bool = True,
+                  max_vacuum_pages: Optional[int] = None) -> Dict[str, Any]:
+        """
+        执行一次维护：归档过期任务、回收空闲页、更新统计信息，回收空闲页和更新统计信息同时作用于各分库
+        Args:
+            archive_days: 归档创建时间超过该天数的任务，为空或0时不归档
+            vacuum: 是否回收空闲页
+            analyze: 是否更新统计信息
+            max_vacuum_pages: 每次最多回收的页数
+
+        Returns:
+            维护报告，包含维护前后主库的空间占用和回收的字节数，vacuumed_pages 为主库和各分库回收的页数之和
+        """
+        start = time.time()
+        before = await self.get_space_info()
+        archived = {}
+        if archive_days:
+            for task_id in await self.find_archivable_tasks(archive_days):
+                try:
+                    archived[task_id] = await self.archive_task(task_id)
+                except Exception as e:
+                    utils.logger.error(f"[DatabaseMaintainer.run] archive task {task_id} failed: {e}")
+        vacuumed_pages = 0
+        for db in [self._db] + [AsyncSqliteDB(path) for path in self.get_shard_paths()]:
+            if vacuum:
+                vacuumed_pages += await self.incremental_vacuum(max_vacuum_pages, db)
+            if analyze:
+                await self.analyze(db)
+        after = await self.get_space_info()
+        report = {
+            "before": before,
+            "after": after,
+            "archived_tasks": archived,
+            "vacuumed_pages": vacuumed_pages,
+            "reclaimed_bytes": before["size_bytes"] - after["size_bytes"],
+            "elapsed_seconds": round(time.time() - start, 3),
+        }
+        utils.logger.info(
+            f"[DatabaseMaintainer.run] archived {len(archived)} tasks, vacuumed {vacuumed_pages} pages, "
+            f"reclaimed {report['reclaimed_bytes']} bytes")
+        return report
+
+
+class MaintenanceScheduler:
+    def __init__(self, maintainer: DatabaseMaintainer, interval_seconds: float, archive_days: Optional[float] = None,
+                 max_vacuum_pages: Optional[int] = None):
+        """
+        :param maintainer: 数据库维护对象
+        :param interval_seconds: 执行间隔（秒）
+        :param archive_days: 归档创建时间超过该天数的任务，为空或0时不归档
+        :param max_vacuum_pages: 每次最多回收的页数
+        """
+        self._maintainer = maintainer
+        self._interval = interval_seconds
+        self._archive_days = archive_days
+        self._max_vacuum_pages = max_vacuum_pages
+        self._task: Optional[asyncio.Task] = None
+        self.last_report: Optional[Dict[str, Any]] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self._interval)
+            try:
+                self.last_report = await self._maintainer.run(self._archive_days,
+                                                              max_vacuum_pages=self._max_vacuum_pages)
+            except Exception as e:
+                utils.logger.error(f"[MaintenanceScheduler] maintenance failed: {e}")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
@@ -0,0 +1,181 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 数据库结构迁移，为已有数据库补齐唯一索引（先清理重复数据，再创建唯一索引），
+#            以及数据浏览接口的查询所依赖的复合索引
+from typing import Dict, List, Tuple, Union
+
+from tools import utils
+
+from .async_mysql_db import AsyncMysqlDB
+from .async_sqlite_db import AsyncSqliteDB
+from .db_tables_mapping import TABLE_QUERY_INDEXES, TABLE_UNIQUE_KEYS
+
+
+async def _sqlite_indexes(db: AsyncSqliteDB, table_name: str) -> List[Tuple[str, bool, Tuple[str, ...]]]:
+    indexes = []
+    for index in await db.query(f"PRAGMA index_list(`{table_name}`)"):
+        columns = await db.query(f"PRAGMA index_info(`{index['name']}`)")
+        columns = tuple(col["name"] for col in sorted(columns, key=lambda c: c["seqno"]))
+        indexes.append((index["name"], bool(index["unique"]), columns))
+    return indexes
+
+
+async def _mysql_indexes(db: AsyncMysqlDB, table_name: str) -> List[Tuple[str, bool, Tuple[str, ...]]]:
+    rows = await db.query(
+        "SELECT INDEX_NAME AS index_name, NON_UNIQUE AS non_unique, COLUMN_NAME AS column_name "
+        "FROM information_schema.statistics WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s "
+        "ORDER BY INDEX_NAME, SEQ_IN_INDEX",
+        table_name,
+    )
+    indexes: Dict[str, Tuple[bool, List[str]]] = {}
+    for row in rows:
+        unique, columns = indexes.setdefault(row["index_name"], (not row["non_unique"], []))
+        columns.append(row["column_name"])
+    return [(name, unique, tuple(columns)) for name, (unique, columns) in indexes.items()]
+
+
+async def _table_columns(db: Union[AsyncMysqlDB, AsyncSqliteDB], table_name: str) -> List[str]:
+    if isinstance(db, AsyncMysqlDB):
+        rows = await db.query(
+            "SELECT COLUMN_NAME AS name FROM information_schema.columns "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            table_name,
+        )
+    else:
+        rows = await db.query(f"PRAGMA table_info(`{table_name}`)")
+    return [row["name"] for row in rows]
+
+
+async def _table_exists(db: Union[AsyncMysqlDB, AsyncSqliteDB], table_name: str) -> bool:
+    if isinstance(db, AsyncMysqlDB):
+        row = await db.get_first(
+            "SELECT COUNT(*) AS cnt FROM information_schema.tables WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            table_name,
+        )
+    else:
+        row = await db.get_first(
+            "SELECT COUNT(*) AS cnt FROM sqlite_master WHERE type = 'table' AND name = ?", table_name)
+    return bool(row and row["cnt"])
+
+
+async def ensure_unique_key(db: Union[AsyncMysqlDB, AsyncSqliteDB], table_name: str,
+                            key_fields: Tuple[str, ...]) -> int:
+    """
+    确保表上存在 key_fields 对应的唯一索引，不存在时删除重复记录（保留id最小的一条）并创建唯一索引
+    :param db: 数据库操作对象
+    :param table_name: 表名
+    :param key_fields: 唯一键字段
+    :return: 删除的重复记录数
+    """
+    is_mysql = isinstance(db, AsyncMysqlDB)
+    indexes = await (_mysql_indexes(db, table_name) if is_mysql else _sqlite_indexes(db, table_name))
+    if any(unique and columns == key_fields for _, unique, columns in indexes):
+        return 0
+
+    # 优先沿用同字段上已有普通索引的名称
+    index_name = next((name for name, _, columns in indexes if columns == key_fields),
+                      f"idx_{table_name}_{'_'.join(key_fields)}")
+    stale_indexes = [name for name, unique, columns in indexes
+                     if not unique and (columns == key_fields or name == index_name)]
+
+    if is_mysql:
+        join_cond = ' AND '.join(f't1.`{field}` = t2.`{field}`' for field in key_fields)
+        deleted = await db.execute(
+            f"DELETE t1 FROM `{table_name}` t1 JOIN `{table_name}` t2 ON {join_cond} AND t1.`id` > t2.`id`")
+    else:
+        not_null = ' AND '.join(f'`{field}` IS NOT NULL' for field in key_fields)
+        group_by = ','.join(f'`{field}`' for field in key_fields)
+        deleted = await db.execute(
+            f"DELETE FROM `{table_name}` WHERE {not_null} AND `id` NOT IN "
+            f"(SELECT MIN(`id`) FROM `{table_name}` WHERE {not_null} GROUP BY {group_by})")
+
+    columns = ','.join(f'`{field}`' for field in key_fields)
+    for name in stale_indexes:
+        if is_mysql:
+            await db.execute(f"ALTER TABLE `{table_name}` DROP INDEX `{name}`")
+        else:
+            await db.execute(f"DROP INDEX IF EXISTS `{name}`")
+    if is_mysql:
+        await db.execute(f"ALTER TABLE `{table_name}` ADD UNIQUE KEY `{index_name}` ({columns})")
+    else:
+        await db.execute(f"CREATE UNIQUE INDEX `{index_name}` ON `{table_name}` ({columns})")
+
+    utils.logger.info(
+        f"[ensure_unique_key] table: {table_name}, unique index: {index_name}, removed duplicates: {deleted}")
+    return deleted or 0
+
+
+async def migrate_unique_keys(db: Union[AsyncMysqlDB, AsyncSqliteDB]) -> Dict[str, int]:
+    """
+    为所有数据表补齐唯一索引，已存在的唯一索引会直接跳过，可重复执行
+    :param db: 数据库操作对象
+    :return: 各表删除的重复记录数
+    """
+    result = {}
+    for table_name, key_fields in TABLE_UNIQUE_KEYS.items():
+        try:
+            if not await _table_exists(db, table_name):
+                continue
+            result[table_name] = await ensure_unique_key(db, table_name, key_fields)
+        except Exception as e:
+            utils.logger.error(f"[migrate_unique_keys] migrate table {table_name} failed: {e}")
+    return result
+
+
+async def find_missing_query_indexes(db: Union[AsyncMysqlDB, AsyncSqliteDB]) -> Dict[str, List[Tuple[str, ...]]]:
+    """
+    查找数据浏览接口的查询缺少的索引，已有索引以所需字段为前缀时视为已覆盖，缺少字段的表跳过
+    :param db: 数据库操作对象
+    :return: 表名到缺少的索引字段列表的映射
+    """
+    is_mysql = isinstance(db, AsyncMysqlDB)
+    result = {}
+    for table_name, index_specs in TABLE_QUERY_INDEXES.items():
+        columns = set(await _table_columns(db, table_name))
+        if not columns:
+            continue
+        indexes = await (_mysql_indexes(db, table_name) if is_mysql else _sqlite_indexes(db, table_name))
+        missing = [spec for spec in index_specs
+                   if set(spec) <= columns and not any(cols[:len(spec)] == spec for _, _, cols in indexes)]
+        if missing:
+            result[table_name] = missing
+    return result
+
+
+def get_query_index_name(table_name: str, key_fields: Tuple[str, ...]) -> str:
+    return f"idx_{table_name}_{'_'.join(key_fields)}"
+
+
+async def ensure_query_indexes(db: Union[AsyncMysqlDB, AsyncSqliteDB]) -> List[str]:
+    """
+    为数据表补齐数据浏览接口所依赖的 (task_times_id, 时间字段) 复合索引和时间字段索引，已覆盖的索引会直接跳过，可重复执行
+    :param db: 数据库操作对象
+    :return: 新建的索引名称列表
+    """
+    is_mysql = isinstance(db, AsyncMysqlDB)
+    created = []
+    for table_name, index_specs in (await find_missing_query_indexes(db)).items():
+        for key_fields in index_specs:
+            index_name = get_query_index_name(table_name, key_fields)
+            columns = ','.join(f'`{field}`' for field in key_fields)
+            try:
+                if is_mysql:
+                    await db.execute(f"ALTER TABLE `{table_name}` ADD KEY `{index_name}` ({columns})")
+                else:
+                    await db.execute(f"CREATE INDEX IF NOT EXISTS `{index_name}` ON `{table_name}` ({columns})")
+                created.append(index_name)
+            except Exception as e:
+                utils.logger.error(f"[ensure_query_indexes] create index {index_name} failed: {e}")
+    if created:
+        utils.logger.info(f"[ensure_query_indexes] created query indexes: {created}")
+    return created
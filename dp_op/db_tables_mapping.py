@@ -9,7 +9,7 @@
 创建时间: 2024
 """
 
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
 
 
 # 基础表配置 - 用于SQLite API的简化配置
@@ -41,7 +41,7 @@ BASE_TABLE_CONFIGS = {
     'bilibili_up_dynamic': {
         'name': 'B站UP主动态',
         'primary_key': 'dynamic_id',
-        'time_field': 'create_time',
+        'time_field': 'pub_ts',
         'display_fields': ['dynamic_id', 'user_id', 'content', 'create_time']
     },
     'douyin_aweme': {
@@ -155,6 +155,62 @@ BASE_TABLE_CONFIGS = {
 }
 
 
+
+# 数据浏览接口的查询所依赖的索引：按任务筛选时为 task_times_id = ? ORDER BY 时间字段 DESC, id DESC，
+# 不筛选时为 ORDER BY 时间字段 DESC, id DESC。索引中隐含主键id，(task_times_id, 时间字段) 可以直接按序读取，无需排序
+TABLE_QUERY_INDEXES = {
+    table_name: ([('task_times_id', config['time_field'])] if table_name != 'crawler_tasks' else [])
+    + [(config['time_field'],)]
+    for table_name, config in BASE_TABLE_CONFIGS.items()
+}
+
+# 各数据表的唯一键，存储层基于该唯一键执行 INSERT ... ON CONFLICT / ON DUPLICATE KEY UPDATE
+TABLE_UNIQUE_KEYS = {
+    'bilibili_video': ('video_id',),
+    'bilibili_video_comment': ('comment_id',),
+    'bilibili_up_info': ('user_id',),
+    'bilibili_contact_info': ('up_id', 'fan_id'),
+    'bilibili_up_dynamic': ('dynamic_id',),
+    'douyin_aweme': ('aweme_id',),
+    'douyin_aweme_comment': ('comment_id',),
+    'dy_creator': ('user_id',),
+    'kuaishou_video': ('video_id',),
+    'kuaishou_video_comment': ('comment_id',),
+    'xhs_note': ('note_id',),
+    'xhs_note_comment': ('comment_id',),
+    'xhs_creator': ('user_id',),
+    'weibo_note': ('note_id',),
+    'weibo_note_comment': ('comment_id',),
+    'weibo_creator': ('user_id',),
+    'tieba_note': ('note_id',),
+    'tieba_comment': ('comment_id',),
+    'tieba_creator': ('user_id',),
+    'zhihu_content': ('content_id',),
+    'zhihu_comment': ('comment_id',),
+    'zhihu_creator': ('user_id',),
+}
+
+# 仅在新增记录时写入的字段，记录已存在时保持原值
+INSERT_ONLY_FIELDS = ('add_ts', 'task_times_id')
+
+# 内容表和评论表中参与全文检索的文本字段
+TABLE_SEARCH_FIELDS = {
+    'bilibili_video': ('title', 'desc'),
+    'bilibili_video_comment': ('content',),
+    'douyin_aweme': ('title', 'desc'),
+    'douyin_aweme_comment': ('content',),
+    'kuaishou_video': ('title', 'desc'),
+    'kuaishou_video_comment': ('content',),
+    'xhs_note': ('title', 'desc'),
+    'xhs_note_comment': ('content',),
+    'weibo_note': ('content',),
+    'weibo_note_comment': ('content',),
+    'tieba_note': ('title', 'desc'),
+    'tieba_comment': ('content',),
+    'zhihu_content': ('title', 'desc', 'content_text'),
+    'zhihu_comment': ('content',),
+}
+
 # 详细表配置 - 用于MySQL API的详细列配置
 DETAILED_TABLE_CONFIGS = {
     "bilibili_video": {
@@ -763,4 +819,30 @@ def get_table_display_fields(table_name: str) -> List[str]:
         显示字段列表，如果表不存在则返回空列表
     """
     config = BASE_TABLE_CONFIGS.get(table_name)
-    return config['display_fields'].copy() if config else []
\ No newline at end of file
+    return config['display_fields'].copy() if config else []
+
+
+def get_table_unique_key(table_name: str) -> Tuple[str, ...]:
+    """
+    获取表的唯一键字段
+    
+    Args:
+        table_name: 表名
+        
+    Returns:
+        唯一键字段元组，如果表没有唯一键则返回空元组
+    """
+    return TABLE_UNIQUE_KEYS.get(table_name, ())
+
+
+def get_table_query_indexes(table_name: str) -> List[Tuple[str, ...]]:
+    """
+    获取数据浏览接口的查询所依赖的索引字段
+    
+    Args:
+        table_name: 表名
+        
+    Returns:
+        索引字段元组的列表，如果表不存在则返回空列表
+    """
+    return list(TABLE_QUERY_INDEXES.get(table_name, []))
@@ -0,0 +1,277 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 内容表和评论表的全文检索索引
+#            SQLite：每张表一个外部内容（content=表名）的FTS5虚拟表，trigram分词以支持中文子串检索，由触发器与原表保持同步；
+#            trigram无法检索不足3个字的关键词，另建一个各字段末尾补两个占位符的trigram表（<表名>_fts_short），
+#            短关键词先在其词表中按前缀找出以该关键词开头的trigram，再用这些trigram的 OR 查询命中记录；
+#            以上索引都不可用或前缀对应的trigram过多时退化为 LIKE 匹配，只扫描最近写入的 like_scan_limit 行
+#            MySQL：每张表一个 ngram 分词的 FULLTEXT 索引，由InnoDB自动维护
+from typing import Dict, List, Tuple, Union
+
+from tools import utils
+
+from .async_mysql_db import AsyncMysqlDB
+from .async_sqlite_db import AsyncSqliteDB
+from .db_tables_mapping import TABLE_SEARCH_FIELDS
+
+# trigram分词最短可走索引的关键词长度，更短的关键词使用短关键词索引
+SQLITE_TRIGRAM_MIN_LENGTH = 3
+# 短关键词展开的trigram数量上限，超过时（如单字关键词）退化为 LIKE 匹配
+SQLITE_SHORT_TERMS_LIMIT = 200
+# 短关键词索引中各字段末尾追加的占位符，使位于字段末尾的1~2个字也能组成trigram
+SQLITE_SHORT_PADDING = "char(1, 1)"
+
+
+def get_fts_table_name(table_name: str) -> str:
+    return f"{table_name}_fts"
+
+
+def get_short_fts_table_name(table_name: str) -> str:
+    return f"{table_name}_fts_short"
+
+
+def get_short_vocab_table_name(table_name: str) -> str:
+    return f"{table_name}_fts_short_vocab"
+
+
+def get_fulltext_index_name(table_name: str) -> str:
+    return f"ft_{table_name}_search"
+
+
+def _columns(fields: Tuple[str, ...], prefix: str = "") -> str:
+    return ", ".join(f"{prefix}`{field}`" for field in fields)
+
+
+def _sqlite_index_sql(table_name: str) -> List[str]:
+    fields = TABLE_SEARCH_FIELDS[table_name]
+    fts = get_fts_table_name(table_name)
+    columns = _columns(fields)
+    new_values = ", ".join(f"NEW.`{field}`" for field in fields)
+    old_values = ", ".join(f"OLD.`{field}`" for field in fields)
+    delete_old = f"INSERT INTO `{fts}` (`{fts}`, rowid, {columns}) VALUES ('delete', OLD.id, {old_values});"
+    insert_new = f"INSERT INTO `{fts}` (rowid, {columns}) VALUES (NEW.id, {new_values});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS `{fts}` USING fts5({columns}, content='{table_name}', "
+        f"content_rowid='id', tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS `trg_{fts}_insert` AFTER INSERT ON `{table_name}` BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS `trg_{fts}_delete` AFTER DELETE ON `{table_name}` BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS `trg_{fts}_update` AFTER UPDATE OF {columns} ON `{table_name}` "
+        f"BEGIN {delete_old} {insert_new} END",
+    ]
+
+
+def _sqlite_short_index_sql(table_name: str) -> List[str]:
+    fields = TABLE_SEARCH_FIELDS[table_name]
+    fts = get_short_fts_table_name(table_name)
+    columns = _columns(fields)
+    new_values = ", ".join(f"NEW.`{field}` || {SQLITE_SHORT_PADDING}" for field in fields)
+    old_values = ", ".join(f"OLD.`{field}` || {SQLITE_SHORT_PADDING}" for field in fields)
+    delete_old = f"INSERT INTO `{fts}` (`{fts}`, rowid, {columns}) VALUES ('delete', OLD.id, {old_values});"
+    insert_new = f"INSERT INTO `{fts}` (rowid, {columns}) VALUES (NEW.id, {new_values});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS `{fts}` USING fts5({columns}, content='{table_name}', "
+        f"content_rowid='id', tokenize='trigram')",
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS `{get_short_vocab_table_name(table_name)}` USING fts5vocab(`{fts}`, 'row')",
+        f"CREATE TRIGGER IF NOT EXISTS `trg_{fts}_insert` AFTER INSERT ON `{table_name}` BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS `trg_{fts}_delete` AFTER DELETE ON `{table_name}` BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS `trg_{fts}_update` AFTER UPDATE OF {columns} ON `{table_name}` "
+        f"BEGIN {delete_old} {insert_new} END",
+    ]
+
+
+async def _fill_short_index(db: AsyncSqliteDB, table_name: str):
+    """短关键词索引的字段值带有占位符，不能使用 rebuild 命令，清空后按原表数据重新写入"""
+    fields = TABLE_SEARCH_FIELDS[table_name]
+    fts = get_short_fts_table_name(table_name)
+    values = ", ".join(f"`{field}` || {SQLITE_SHORT_PADDING}" for field in fields)
+    await db.execute(f"INSERT INTO `{fts}` (`{fts}`) VALUES ('delete-all')")
+    await db.execute(f"INSERT INTO `{fts}` (rowid, {_columns(fields)}) SELECT id, {values} FROM `{table_name}`")
+
+
+async def _sqlite_table_names(db: AsyncSqliteDB) -> List[str]:
+    rows = await db.query("SELECT name FROM sqlite_master WHERE type = 'table'")
+    return [row["name"] for row in rows]
+
+
+async def rebuild_search_index(db: Union[AsyncMysqlDB, AsyncSqliteDB]) -> List[str]:
+    """
+    根据原表数据重建全文检索索引，MySQL的FULLTEXT索引由InnoDB维护，无需重建
+    :param db: 数据库操作对象
+    :return: 重建的表名列表
+    """
+    if isinstance(db, AsyncMysqlDB):
+        return []
+    existing_tables = set(await _sqlite_table_names(db))
+    rebuilt = []
+    for table_name in TABLE_SEARCH_FIELDS:
+        fts = get_fts_table_name(table_name)
+        if fts not in existing_tables:
+            continue
+        await db.execute(f"INSERT INTO `{fts}` (`{fts}`) VALUES ('rebuild')")
+        if get_short_fts_table_name(table_name) in existing_tables:
+            await _fill_short_index(db, table_name)
+        rebuilt.append(table_name)
+    utils.logger.info(f"[rebuild_search_index] rebuild search index for {len(rebuilt)} tables")
+    return rebuilt
+
+
+async def ensure_search_index(db: Union[AsyncMysqlDB, AsyncSqliteDB]) -> List[str]:
+    """
+    为内容表和评论表创建全文检索索引，已存在的索引会直接跳过，可重复执行
+    :param db: 数据库操作对象
+    :return: 新建索引的表名列表
+    """
+    created = []
+    if isinstance(db, AsyncMysqlDB):
+        rows = await db.query(
+            "SELECT DISTINCT TABLE_NAME AS table_name, INDEX_NAME AS index_name FROM information_schema.statistics "
+            "WHERE TABLE_SCHEMA = DATABASE() AND INDEX_TYPE = 'FULLTEXT'")
+        existing_indexes = {(row["table_name"], row["index_name"]) for row in rows}
+        tables = await db.query(
+            "SELECT TABLE_NAME AS name FROM information_schema.tables WHERE TABLE_SCHEMA = DATABASE()")
+        existing_tables = {row["name"] for row in tables}
+        for table_name, fields in TABLE_SEARCH_FIELDS.items():
+            index_name = get_fulltext_index_name(table_name)
+            if table_name not in existing_tables or (table_name, index_name) in existing_indexes:
+                continue
+            try:
+                await db.execute(
+                    f"ALTER TABLE `{table_name}` ADD FULLTEXT INDEX `{index_name}` ({_columns(fields)}) WITH PARSER ngram")
+                created.append(table_name)
+            except Exception as e:
+                utils.logger.error(f"[ensure_search_index] create fulltext index on {table_name} failed: {e}")
+    else:
+        existing_tables = set(await _sqlite_table_names(db))
+        for table_name in TABLE_SEARCH_FIELDS:
+            if table_name not in existing_tables:
+                continue
+            try:
+                fts = get_fts_table_name(table_name)
+                if fts not in existing_tables:
+                    for sql in _sqlite_index_sql(table_name):
+                        await db.execute(sql)
+                    # 新建的FTS表需要根据原表的已有数据建立索引
+                    await db.execute(f"INSERT INTO `{fts}` (`{fts}`) VALUES ('rebuild')")
+                    created.append(table_name)
+                # 短关键词索引单独检查，已有全文索引的库升级后也会补建
+                if get_short_fts_table_name(table_name) not in existing_tables:
+                    for sql in _sqlite_short_index_sql(table_name):
+                        await db.execute(sql)
+                    await _fill_short_index(db, table_name)
+                    if table_name not in created:
+                        created.append(table_name)
+            except Exception as e:
+                utils.logger.error(f"[ensure_search_index] create fts5 index on {table_name} failed: {e}")
+
+    if created:
+        utils.logger.info(f"[ensure_search_index] created search index for tables: {created}")
+    return created
+
+
+def build_short_terms_sql(table_name: str, keyword: str, schema: str = None) -> Tuple[str, List]:
+    """
+    生成查询短关键词索引词表的语句，找出以关键词开头的全部trigram（含字段末尾带占位符的trigram），
+    词表按term有序，前缀范围查询只读取对应的索引段；最多返回 SQLITE_SHORT_TERMS_LIMIT + 1 个
+    :param table_name: 表名
+    :param keyword: 不足3个字的检索关键词
+    :param schema: 分库合并查询时的库名
+    :return: (SQL语句, 参数列表)
+    """
+    # trigram默认不区分大小写，词表中保存的是小写形式
+    prefix = keyword.lower()
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    vocab = f"{schema + '.' if schema else ''}`{get_short_vocab_table_name(table_name)}`"
+    return f"SELECT term FROM {vocab} WHERE term >= ? AND term < ? LIMIT ?", [prefix, upper, SQLITE_SHORT_TERMS_LIMIT + 1]
+
+
+def build_search_sql(table_name: str, is_mysql: bool, keyword: str, task_times_id: str = None,
+                     cursor_condition: str = "", use_index: bool = True,
+                     shard_field: str = None, short_terms: List[str] = None, schema: str = None,
+                     shard_name: str = None, like_scan_limit: int = 0) -> Tuple[str, List]:
+    """
+    生成单表的检索语句，结果包含原表的全部字段以及排序分值 _score（越小越相关），按 (_score, id) 升序排列。
+    SQLite按以下顺序选择检索方式：
+      1. 关键词不少于3个字且FTS表可用时，使用trigram全文索引
+      2. 传入了短关键词展开的trigram时，在短关键词索引中 OR 查询这些trigram
+      3. 否则退化为 LIKE 匹配，所有结果分值相同；like_scan_limit 大于0时只扫描id最大的 like_scan_limit 行，
+         更早写入的记录不会被检索到
+    :param table_name: 表名
+    :param is_mysql: 是否为MySQL
+    :param keyword: 检索关键词
+    :param task_times_id: 任务ID筛选
+    :param cursor_condition: 游标分页条件，作用于 _score 和 id 字段
+    :param use_index: SQLite上FTS表是否可用
+    :param shard_field: SQLite分库合并查询时的数据来源字段，排序为 (_score, 数据来源, id)
+    :param short_terms: build_short_terms_sql 查出的trigram列表，不超过 SQLITE_SHORT_TERMS_LIMIT 个
+    :param schema: SQLite分库合并查询时的库名，各库分别检索后由调用方合并
+    :param shard_name: 与 schema 对应的数据来源，作为 shard_field 字段的值
+    :param like_scan_limit: LIKE 匹配最多扫描的行数，0表示不限制
+    :return: (SQL语句, 参数列表)，LIMIT 的参数由调用方追加
+    """
+    fields = TABLE_SEARCH_FIELDS[table_name]
+    placeholder = "%s" if is_mysql else "?"
+    prefix = f"{schema}." if schema else ""
+    source = ""
+    if shard_name and shard_field:
+        escaped_name = shard_name.replace("'", "''")
+        source = f", '{escaped_name}' AS `{shard_field}`"
+    params: List = []
+    if is_mysql:
+        match_expr = f"MATCH({_columns(fields, 't.')}) AGAINST ({placeholder} IN NATURAL LANGUAGE MODE)"
+        inner = f"SELECT t.*, -{match_expr} AS _score FROM `{table_name}` t WHERE {match_expr}"
+        params += [keyword, keyword]
+    elif use_index and len(keyword) >= SQLITE_TRIGRAM_MIN_LENGTH:
+        fts = get_fts_table_name(table_name)
+        phrase = '"' + keyword.replace('"', '""') + '"'
+        inner = (f"SELECT t.*{source}, bm25(`{fts}`) AS _score FROM {prefix}`{fts}` "
+                 f"JOIN {prefix}`{table_name}` t ON t.id = `{fts}`.rowid WHERE `{fts}` MATCH {placeholder}")
+        params.append(phrase)
+    elif short_terms:
+        fts = get_short_fts_table_name(table_name)
+        terms = " OR ".join('"' + term.replace('"', '""') + '"' for term in short_terms)
+        inner = (f"SELECT t.*{source}, bm25(`{fts}`) AS _score FROM {prefix}`{fts}` "
+                 f"JOIN {prefix}`{table_name}` t ON t.id = `{fts}`.rowid WHERE `{fts}` MATCH {placeholder}")
+        params.append(terms)
+    else:
+        escaped = keyword.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        like_conditions = " OR ".join(f"t.`{field}` LIKE {placeholder} ESCAPE '\\'" for field in fields)
+        inner = f"SELECT t.*{source}, 0.0 AS _score FROM {prefix}`{table_name}` t WHERE ({like_conditions})"
+        params += [f"%{escaped}%"] * len(fields)
+        if like_scan_limit:
+            # 按主键范围只扫描最近写入的记录，避免全表扫描
+            inner += f" AND t.id > (SELECT COALESCE(MAX(id), 0) FROM {prefix}`{table_name}`) - {placeholder}"
+            params.append(like_scan_limit)
+
+    if task_times_id:
+        inner += f" AND t.task_times_id = {placeholder}"
+        params.append(task_times_id)
+
+    sql = f"SELECT * FROM ({inner}) s"
+    if cursor_condition:
+        sql += f" WHERE {cursor_condition}"
+    if shard_field:
+        sql += f" ORDER BY _score ASC, {shard_field} ASC, id ASC LIMIT {placeholder}"
+    else:
+        sql += f" ORDER BY _score ASC, id ASC LIMIT {placeholder}"
+    return sql, params
+
+
+def get_search_tables(tables: List[str] = None) -> Dict[str, Tuple[str, ...]]:
+    """
+    获取参与检索的表及其文本字段
+    :param tables: 指定的表名列表，为空时返回全部支持检索的表
+    :return: 表名到文本字段的映射
+    """
+    if not tables:
+        return dict(TABLE_SEARCH_FIELDS)
+    return {table_name: TABLE_SEARCH_FIELDS[table_name] for table_name in tables if table_name in TABLE_SEARCH_FIELDS}
@@ -0,0 +1,242 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 跨任务的已爬取索引：记录每条内容最近一次完整抓取的时间和互动数据指纹，
+#            重复执行相同的关键词/创作者任务时，新鲜期内的内容可以跳过详情和评论的请求。
+#            索引持久化在数据库表中，启动时把内容ID加载到内存布隆过滤器，未命中的内容不需要查询数据库
+import hashlib
+import math
+import time
+from typing import Any, Dict, Iterable, List, Union
+
+from tools import utils
+from var import db_batch_writer_var
+
+from .async_mysql_db import AsyncMysqlDB
+from .async_sqlite_db import AsyncSqliteDB
+from .batch_writer import BatchWriteError
+
+SEEN_INDEX_TABLE = "crawl_seen_index"
+
+# 抓取方式：完整抓取（详情+评论）、浅刷新（只更新详情）、跳过
+FETCH_FULL = "full"
+FETCH_SHALLOW = "shallow"
+FETCH_SKIP = "skip"
+
+# 每条查询语句中内容ID的数量
+LOOKUP_CHUNK_SIZE = 500
+
+_SQLITE_CREATE_TABLE = f"""
+CREATE TABLE IF NOT EXISTS `{SEEN_INDEX_TABLE}` (
+    `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `platform` TEXT NOT NULL,
+    `content_id` TEXT NOT NULL,
+    `last_fetch_ts` INTEGER NOT NULL,
+    `fingerprint` TEXT DEFAULT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `idx_crawl_seen_index_platform_content`
+    ON `{SEEN_INDEX_TABLE}` (`platform`, `content_id`)
+"""
+
+_MYSQL_CREATE_TABLE = f"""
+CREATE TABLE IF NOT EXISTS `{SEEN_INDEX_TABLE}`
+(
+    `id`            int          NOT NULL AUTO_INCREMENT COMMENT '自增ID',
+    `platform`      varchar(16)  NOT NULL COMMENT '平台名称',
+    `content_id`    varchar(64)  NOT NULL COMMENT '内容ID',
+    `last_fetch_ts` bigint       NOT NULL COMMENT '最近一次完整抓取的时间戳',
+    `fingerprint`   varchar(255) DEFAULT NULL COMMENT '互动数据指纹',
+    PRIMARY KEY (`id`),
+    UNIQUE KEY `idx_crawl_seen_index_platform_content` (`platform`, `content_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='已爬取内容索引'
+"""
+
+
+def build_fingerprint(*values: Any) -> str:
+    """
+    由点赞数、评论数等互动数据生成指纹，互动数据变化说明内容有更新
+    Args:
+        *values: 互动数据
+
+    Returns:
+
+    """
+    return "|".join("" if value is None else str(value) for value in values)
+
+
+class BloomFilter:
+    """基于bytearray的布隆过滤器，使用双重哈希生成多个位置"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        """
+        :param capacity: 预计元素数量
+        :param error_rate: 期望的误判率
+        """
+        capacity = max(1, capacity)
+        self._size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self._hash_count = max(1, round(self._size / capacity * math.log(2)))
+        self._bits = bytearray((self._size + 7) // 8)
+
+    def _positions(self, key: str) -> Iterable[int]:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self._size for i in range(self._hash_count))
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class SeenIndex:
+    def __init__(self, db: Union[AsyncMysqlDB, AsyncSqliteDB], platform: str, freshness_seconds: int,
+                 bloom_capacity: int = 100000):
+        """
+        :param db: 数据库操作对象
+        :param platform: 平台名称
+        :param freshness_seconds: 新鲜期（秒），新鲜期内完整抓取过的内容不再重复抓取
+        :param bloom_capacity: 布隆过滤器的最小容量，实际容量不小于已有索引数量的2倍
+        """
+        self._db = db
+        self._is_mysql = isinstance(db, AsyncMysqlDB)
+        self._platform = platform
+        self._freshness_ms = freshness_seconds * 1000
+        self._bloom_capacity = bloom_capacity
+        self._bloom = BloomFilter(bloom_capacity)
+
+    async def load(self) -> int:
+        """
+        创建索引表，并把当前平台已有的内容ID加载到布隆过滤器
+        Returns:
+            已有的索引数量
+        """
+        await self._db.execute(_MYSQL_CREATE_TABLE if self._is_mysql else _SQLITE_CREATE_TABLE)
+        rows = await self._db.query(
+            f"SELECT `content_id` FROM `{SEEN_INDEX_TABLE}` WHERE `platform` = {self._db.placeholder}",
+            self._platform)
+        self._bloom = BloomFilter(max(self._bloom_capacity, len(rows) * 2))
+        for row in rows:
+            self._bloom.add(row["content_id"])
+        utils.logger.info(f"[SeenIndex.load] platform: {self._platform}, loaded {len(rows)} seen contents")
+        return len(rows)
+
+    async def lookup(self, content_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        查询内容的索引记录，布隆过滤器未命中的内容直接跳过，不查询数据库
+        Args:
+            content_ids: 内容ID列表
+
+        Returns:
+            内容ID到索引记录（last_fetch_ts, fingerprint）的映射
+        """
+        candidates = [content_id for content_id in dict.fromkeys(content_ids) if content_id and content_id in self._bloom]
+        result = {}
+        placeholder = self._db.placeholder
+        for i in range(0, len(candidates), LOOKUP_CHUNK_SIZE):
+            chunk = candidates[i:i + LOOKUP_CHUNK_SIZE]
+            rows = await self._db.query(
+                f"SELECT `content_id`, `last_fetch_ts`, `fingerprint` FROM `{SEEN_INDEX_TABLE}` "
+                f"WHERE `platform` = {placeholder} AND `content_id` IN ({', '.join([placeholder] * len(chunk))})",
+                self._platform, *chunk)
+            for row in rows:
+                result[row["content_id"]] = row
+        return result
+
+    async def classify(self, fingerprints: Dict[str, str]) -> Dict[str, str]:
+        """
+        根据索引记录决定每条内容的抓取方式：
+        新鲜期内抓取过且指纹未变化的内容跳过；新鲜期内抓取过但指纹变化的内容浅刷新；其余内容完整抓取
+        Args:
+            fingerprints: 内容ID到当前互动数据指纹的映射
+
+        Returns:
+            内容ID到抓取方式（FETCH_FULL / FETCH_SHALLOW / FETCH_SKIP）的映射
+        """
+        seen = await self.lookup(list(fingerprints.keys()))
+        now = int(time.time() * 1000)
+        result = {}
+        for content_id, fingerprint in fingerprints.items():
+            row = seen.get(content_id)
+            if row is None or now - int(row["last_fetch_ts"]) > self._freshness_ms:
+                result[content_id] = FETCH_FULL
+            elif row["fingerprint"] == fingerprint:
+                result[content_id] = FETCH_SKIP
+            else:
+                result[content_id] = FETCH_SHALLOW
+        return result
+
+    async def _write(self, items: List[Dict[str, Any]]) -> bool:
+        """
+        写入索引记录，应在该页数据写入之后写入，数据写入失败时不能记录为已抓取：
+        使用批量写入且索引与数据在同一个库中时，索引记录作为最后写入的表与该页数据一起提交；
+        索引单独保存在主库中（分库模式）时，先写入缓冲区中的数据
+        Args:
+            items: 索引记录列表
+
+        Returns:
+            记录是否已写入或加入缓冲区
+        """
+        batch_writer = db_batch_writer_var.get()
+        if batch_writer is not None and batch_writer.db is self._db:
+            for item in items:
+                await batch_writer.add(SEEN_INDEX_TABLE, item, key_fields=("platform", "content_id"), commit_last=True)
+            return True
+        if batch_writer is not None:
+            try:
+                await batch_writer.flush()
+            except BatchWriteError as e:
+                utils.logger.error(f"[SeenIndex._write] skip marking {len(items)} contents, data not written: {e}")
+                return False
+        fields = ["platform", "content_id", "last_fetch_ts", "fingerprint"]
+        sql = self._db.build_upsert_sql(SEEN_INDEX_TABLE, fields, ("platform", "content_id"), ())
+        await self._db.execute_many(sql, [tuple(item[field] for field in fields) for item in items])
+        return True
+
+    async def mark_fetched(self, fingerprints: Dict[str, str]):
+        """
+        记录完整抓取的内容，更新抓取时间和指纹
+        Args:
+            fingerprints: 内容ID到互动数据指纹的映射
+
+        Returns:
+
+        """
+        if not fingerprints:
+            return
+        now = int(time.time() * 1000)
+        items = [{"platform": self._platform, "content_id": content_id, "last_fetch_ts": now,
+                  "fingerprint": fingerprint} for content_id, fingerprint in fingerprints.items()]
+        if await self._write(items):
+            for content_id in fingerprints:
+                self._bloom.add(content_id)
+
+    async def mark_refreshed(self, fingerprints: Dict[str, str]):
+        """
+        记录浅刷新的内容，只更新指纹，不延长新鲜期，新鲜期过后仍会完整抓取一次
+        Args:
+            fingerprints: 内容ID到互动数据指纹的映射
+
+        Returns:
+
+        """
+        if not fingerprints:
+            return
+        # 沿用已有记录的抓取时间，没有索引记录的内容不需要浅刷新
+        seen = await self.lookup(list(fingerprints.keys()))
+        items = [{"platform": self._platform, "content_id": content_id,
+                  "last_fetch_ts": seen[content_id]["last_fetch_ts"], "fingerprint": fingerprint}
+                 for content_id, fingerprint in fingerprints.items() if content_id in seen]
+        if items:
+            await self._write(items)
@@ -0,0 +1,178 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : SQLite 分库：按任务或按平台把爬取数据写入独立的数据库文件，删除任务只需删除文件，
+#            并行的爬取任务不再竞争同一个写锁；数据浏览接口 ATTACH 分库文件，并用同名的临时视图合并各库的数据表，
+#            原有的查询语句不需要修改
+import os
+import re
+from typing import Dict, List, Optional, Sequence
+
+import aiosqlite
+
+from tools import utils
+
+from .async_sqlite_db import AsyncSqliteDB
+from .db_tables_mapping import TABLE_UNIQUE_KEYS
+from .table_stats import TABLE_STATS_TABLE
+
+# 分库方式：不分库、每个任务一个文件、每个平台一个文件
+SHARD_MODE_NONE = "none"
+SHARD_MODE_TASK = "task"
+SHARD_MODE_PLATFORM = "platform"
+
+SHARD_FILE_SUFFIX = ".db"
+
+# 合并视图中标识数据来源的字段，主库为 main，分库为文件名；各库的id互相独立，排序和游标需要带上该字段
+SHARD_FIELD = "_shard"
+MAIN_SHARD_NAME = "main"
+
+# 浏览接口中合并查询的数据表
+SHARD_TABLES: List[str] = list(TABLE_UNIQUE_KEYS.keys()) + [TABLE_STATS_TABLE]
+
+SCHEMA_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "schema", "sqlite_tables.sql")
+
+_UNSAFE_CHARS = re.compile(r"[^0-9A-Za-z_.-]")
+
+
+def get_shard_path(mode: str, shard_dir: str, platform: Optional[str] = None,
+                   task_id: Optional[str] = None) -> Optional[str]:
+    """
+    获取爬取数据写入的分库文件路径
+    Args:
+        mode: 分库方式
+        shard_dir: 分库文件目录
+        platform: 平台
+        task_id: 任务ID
+
+    Returns:
+        分库文件路径，不分库或缺少任务ID/平台时返回 None，此时写入主库
+    """
+    if mode == SHARD_MODE_TASK and task_id:
+        return os.path.join(shard_dir, f"task_{_UNSAFE_CHARS.sub('_', task_id)}{SHARD_FILE_SUFFIX}")
+    if mode == SHARD_MODE_PLATFORM and platform:
+        return os.path.join(shard_dir, f"platform_{_UNSAFE_CHARS.sub('_', platform)}{SHARD_FILE_SUFFIX}")
+    return None
+
+
+def list_shard_paths(shard_dir: str) -> List[str]:
+    """
+    列出目录下的分库文件，最近写入的在前
+    Args:
+        shard_dir: 分库文件目录
+
+    Returns:
+
+    """
+    if not os.path.isdir(shard_dir):
+        return []
+    paths = [os.path.join(shard_dir, name) for name in os.listdir(shard_dir) if name.endswith(SHARD_FILE_SUFFIX)]
+    return sorted(paths, key=_last_write_time, reverse=True)
+
+
+def _last_write_time(path: str) -> float:
+    # WAL模式下的写入先落在 -wal 文件中
+    return max(os.path.getmtime(p) for p in (path, f"{path}-wal") if os.path.exists(p))
+
+
+def remove_shard(path: str) -> bool:
+    """
+    删除分库文件及其 WAL/共享内存文件
+    Args:
+        path: 分库文件路径
+
+    Returns:
+        文件是否存在并已删除
+    """
+    removed = False
+    for file_path in (path, f"{path}-wal", f"{path}-shm"):
+        if os.path.exists(file_path):
+            os.remove(file_path)
+            removed = removed or file_path == path
+    return removed
+
+
+async def ensure_shard_schema(db: AsyncSqliteDB, schema_file: str = SCHEMA_FILE) -> bool:
+    """
+    新建的分库文件中还没有数据表时执行建表脚本
+    Args:
+        db: 分库的数据库操作对象
+        schema_file: 建表脚本路径
+
+    Returns:
+        是否执行了建表脚本
+    """
+    rows = await db.query("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")
+    if rows:
+        return False
+    with open(schema_file, "r", encoding="utf-8") as f:
+        # 建表前设置增量回收，数据库维护时可以回收分库的空闲页
+        await db.execute("PRAGMA auto_vacuum = INCREMENTAL;\n" + f.read())
+    utils.logger.info(f"[ensure_shard_schema] created tables in new shard")
+    return True
+
+
+def get_version_view_name(table_name: str) -> str:
+    return f"{table_name}__shard_version"
+
+
+async def _table_columns(conn: aiosqlite.Connection, schema: str, table_name: str) -> List[str]:
+    cursor = await conn.execute(f"PRAGMA {schema}.table_info(`{table_name}`)")
+    return [row[1] for row in await cursor.fetchall()]
+
+
+async def attach_shards(conn: aiosqlite.Connection, shard_paths: Sequence[str],
+                        tables: Sequence[str] = SHARD_TABLES, include_main: bool = True) -> Dict[str, List[str]]:
+    """
+    在浏览接口的连接上 ATTACH 分库文件，并为每张数据表创建同名的临时视图，合并主库和各分库中的数据；
+    临时视图的名称解析优先于主库，原有的 SELECT 语句不需要修改；视图比原表多一个数据来源字段 _shard。
+    同时为每张表创建 <表名>__shard_version 视图，值为各库最大id之和，任一库写入新数据后都会变化，用于行数缓存
+    Args:
+        conn: 主库连接
+        shard_paths: 分库文件路径，数量不能超过 SQLite 的 ATTACH 上限（默认10）
+        tables: 需要合并的数据表
+        include_main: 视图中是否包含主库的数据，分批统计全部分库时只有第一批包含主库；
+            为 False 时各分库都没有的表不创建视图，表名仍指向主库，调用方应只读取返回值中的表
+
+    Returns:
+        表名到包含该表的库名列表的映射
+    """
+    schemas = ["main"] if include_main else []
+    # 库名随ATTACH顺序变化，数据来源使用固定的文件名，翻页期间有新写入也不影响游标
+    shard_names = {"main": MAIN_SHARD_NAME}
+    for index, path in enumerate(shard_paths):
+        schema = f"shard_{index}"
+        await conn.execute(f"ATTACH DATABASE ? AS {schema}", (path,))
+        schemas.append(schema)
+        shard_names[schema] = os.path.basename(path).replace("'", "''")
+
+    sources = {}
+    for table_name in tables:
+        columns_by_schema = {}
+        for schema in schemas:
+            columns = await _table_columns(conn, schema, table_name)
+            if columns:
+                columns_by_schema[schema] = columns
+        if not columns_by_schema:
+            continue
+        # 各库的表结构可能因迁移进度不同而有差异，缺少的字段补 NULL
+        all_columns = list(dict.fromkeys(column for columns in columns_by_schema.values() for column in columns))
+        selects = []
+        for schema, columns in columns_by_schema.items():
+            fields = ", ".join(f"`{column}`" if column in columns else f"NULL AS `{column}`" for column in all_columns)
+            selects.append(f"SELECT {fields}, '{shard_names[schema]}' AS `{SHARD_FIELD}` FROM {schema}.`{table_name}`")
+        await conn.execute(f"CREATE TEMP VIEW `{table_name}` AS {' UNION ALL '.join(selects)}")
+        version = " + ".join(f"COALESCE((SELECT MAX(id) FROM {schema}.`{table_name}`), 0)"
+                             for schema in columns_by_schema)
+        await conn.execute(f"CREATE TEMP VIEW `{get_version_view_name(table_name)}` AS SELECT {version} AS version")
+        sources[table_name] = list(columns_by_schema)
+    return sources
@@ -0,0 +1,196 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 数据表行数汇总（table_stats），按表、按天（记录添加时间）、按任务统计行数
+#            存储层写入使用upsert，无法区分新增和更新，因此由数据表上的插入/删除触发器增量维护，
+#            统计接口只需读取汇总表
+from typing import Dict, List, Union
+
+from tools import utils
+
+from .async_mysql_db import AsyncMysqlDB
+from .async_sqlite_db import AsyncSqliteDB
+from .db_tables_mapping import TABLE_UNIQUE_KEYS
+
+TABLE_STATS_TABLE = "table_stats"
+
+# 需要汇总行数的数据表
+STATS_TABLES: List[str] = list(TABLE_UNIQUE_KEYS.keys())
+
+_SQLITE_CREATE_TABLE = f"""
+CREATE TABLE IF NOT EXISTS `{TABLE_STATS_TABLE}` (
+    `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `table_name` TEXT NOT NULL,
+    `stat_date` TEXT NOT NULL,
+    `task_times_id` TEXT NOT NULL DEFAULT '',
+    `row_count` INTEGER NOT NULL DEFAULT 0,
+    `last_add_ts` INTEGER DEFAULT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `idx_table_stats_table_date_task`
+    ON `{TABLE_STATS_TABLE}` (`table_name`, `stat_date`, `task_times_id`)
+"""
+
+_MYSQL_CREATE_TABLE = f"""
+CREATE TABLE IF NOT EXISTS `{TABLE_STATS_TABLE}`
+(
+    `id`            int          NOT NULL AUTO_INCREMENT COMMENT '自增ID',
+    `table_name`    varchar(64)  NOT NULL COMMENT '数据表名',
+    `stat_date`     date         NOT NULL COMMENT '统计日期（按记录添加时间）',
+    `task_times_id` varchar(64)  NOT NULL DEFAULT '' COMMENT '任务时间ID',
+    `row_count`     bigint       NOT NULL DEFAULT 0 COMMENT '记录数',
+    `last_add_ts`   bigint       DEFAULT NULL COMMENT '最近一条记录的添加时间戳',
+    PRIMARY KEY (`id`),
+    UNIQUE KEY `idx_table_stats_table_date_task` (`table_name`, `stat_date`, `task_times_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='数据表行数汇总，由触发器增量维护'
+"""
+
+# add_ts 为13位毫秒时间戳，按本地时区换算为日期
+_SQLITE_DATE_EXPR = "date({row}.add_ts / 1000, 'unixepoch', 'localtime')"
+_MYSQL_DATE_EXPR = "DATE(FROM_UNIXTIME({row}.add_ts / 1000))"
+
+
+def _trigger_names(table_name: str) -> Dict[str, str]:
+    return {
+        "insert": f"trg_{table_name}_stats_insert",
+        "delete": f"trg_{table_name}_stats_delete",
+    }
+
+
+def _sqlite_trigger_sql(table_name: str) -> List[str]:
+    names = _trigger_names(table_name)
+    new_date = _SQLITE_DATE_EXPR.format(row="NEW")
+    old_date = _SQLITE_DATE_EXPR.format(row="OLD")
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS `{names['insert']}` AFTER INSERT ON `{table_name}` BEGIN "
+        f"INSERT INTO `{TABLE_STATS_TABLE}` (`table_name`, `stat_date`, `task_times_id`, `row_count`, `last_add_ts`) "
+        f"VALUES ('{table_name}', {new_date}, COALESCE(NEW.task_times_id, ''), 1, NEW.add_ts) "
+        f"ON CONFLICT(`table_name`, `stat_date`, `task_times_id`) DO UPDATE SET "
+        f"`row_count` = `row_count` + 1, `last_add_ts` = MAX(COALESCE(`last_add_ts`, 0), excluded.`last_add_ts`); "
+        f"END",
+        f"CREATE TRIGGER IF NOT EXISTS `{names['delete']}` AFTER DELETE ON `{table_name}` BEGIN "
+        f"UPDATE `{TABLE_STATS_TABLE}` SET `row_count` = `row_count` - 1 "
+        f"WHERE `table_name` = '{table_name}' AND `stat_date` = {old_date} "
+        f"AND `task_times_id` = COALESCE(OLD.task_times_id, ''); "
+        f"END",
+    ]
+
+
+def _mysql_trigger_sql(table_name: str) -> List[str]:
+    names = _trigger_names(table_name)
+    new_date = _MYSQL_DATE_EXPR.format(row="NEW")
+    old_date = _MYSQL_DATE_EXPR.format(row="OLD")
+    return [
+        f"CREATE TRIGGER `{names['insert']}` AFTER INSERT ON `{table_name}` FOR EACH ROW "
+        f"INSERT INTO `{TABLE_STATS_TABLE}` (`table_name`, `stat_date`, `task_times_id`, `row_count`, `last_add_ts`) "
+        f"VALUES ('{table_name}', {new_date}, COALESCE(NEW.task_times_id, ''), 1, NEW.add_ts) "
+        f"ON DUPLICATE KEY UPDATE `row_count` = `row_count` + 1, "
+        f"`last_add_ts` = GREATEST(COALESCE(`last_add_ts`, 0), VALUES(`last_add_ts`))",
+        f"CREATE TRIGGER `{names['delete']}` AFTER DELETE ON `{table_name}` FOR EACH ROW "
+        f"UPDATE `{TABLE_STATS_TABLE}` SET `row_count` = `row_count` - 1 "
+        f"WHERE `table_name` = '{table_name}' AND `stat_date` = {old_date} "
+        f"AND `task_times_id` = COALESCE(OLD.task_times_id, '')",
+    ]
+
+
+async def _existing_tables(db: Union[AsyncMysqlDB, AsyncSqliteDB]) -> List[str]:
+    if isinstance(db, AsyncMysqlDB):
+        rows = await db.query(
+            "SELECT TABLE_NAME AS name FROM information_schema.tables WHERE TABLE_SCHEMA = DATABASE()")
+    else:
+        rows = await db.query("SELECT name FROM sqlite_master WHERE type = 'table'")
+    return [row["name"] for row in rows]
+
+
+async def _existing_triggers(db: Union[AsyncMysqlDB, AsyncSqliteDB]) -> List[str]:
+    if isinstance(db, AsyncMysqlDB):
+        rows = await db.query(
+            "SELECT TRIGGER_NAME AS name FROM information_schema.triggers WHERE TRIGGER_SCHEMA = DATABASE()")
+    else:
+        rows = await db.query("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+    return [row["name"] for row in rows]
+
+
+async def rebuild_table_stats(db: Union[AsyncMysqlDB, AsyncSqliteDB]) -> Dict[str, int]:
+    """
+    根据数据表的现有数据重新生成汇总表，用于已有数据库首次启用或汇总数据不一致时
+    :param db: 数据库操作对象
+    :return: 各表的总行数
+    """
+    is_mysql = isinstance(db, AsyncMysqlDB)
+    date_expr = (_MYSQL_DATE_EXPR if is_mysql else _SQLITE_DATE_EXPR).format(row="t")
+    existing_tables = set(await _existing_tables(db))
+
+    statements = [(f"DELETE FROM `{TABLE_STATS_TABLE}`", [()])]
+    for table_name in STATS_TABLES:
+        if table_name not in existing_tables:
+            continue
+        statements.append((
+            f"INSERT INTO `{TABLE_STATS_TABLE}` (`table_name`, `stat_date`, `task_times_id`, `row_count`, `last_add_ts`) "
+            f"SELECT '{table_name}', {date_expr}, COALESCE(t.task_times_id, ''), COUNT(*), MAX(t.add_ts) "
+            f"FROM `{table_name}` t GROUP BY {date_expr}, COALESCE(t.task_times_id, '')",
+            [()],
+        ))
+    # 在同一个事务中清空并重新汇总，期间的写入不会被重复统计
+    await db.execute_batch(statements)
+
+    rows = await db.query(
+        f"SELECT `table_name`, SUM(`row_count`) AS total FROM `{TABLE_STATS_TABLE}` GROUP BY `table_name`")
+    result = {row["table_name"]: int(row["total"] or 0) for row in rows}
+    utils.logger.info(f"[rebuild_table_stats] rebuild {TABLE_STATS_TABLE} for {len(result)} tables")
+    return result
+
+
+async def ensure_table_stats(db: Union[AsyncMysqlDB, AsyncSqliteDB]) -> bool:
+    """
+    创建汇总表以及各数据表上的维护触发器，有新建的触发器时根据现有数据重新汇总，可重复执行
+    :param db: 数据库操作对象
+    :return: 是否执行了重新汇总
+    """
+    is_mysql = isinstance(db, AsyncMysqlDB)
+    await db.execute(_MYSQL_CREATE_TABLE if is_mysql else _SQLITE_CREATE_TABLE)
+
+    existing_tables = set(await _existing_tables(db))
+    existing_triggers = set(await _existing_triggers(db))
+    created = 0
+    for table_name in STATS_TABLES:
+        if table_name not in existing_tables:
+            continue
+        names = _trigger_names(table_name)
+        trigger_sql = _mysql_trigger_sql(table_name) if is_mysql else _sqlite_trigger_sql(table_name)
+        for name, sql in zip((names["insert"], names["delete"]), trigger_sql):
+            if name in existing_triggers:
+                continue
+            try:
+                await db.execute(sql)
+                created += 1
+            except Exception as e:
+                utils.logger.error(f"[ensure_table_stats] create trigger {name} failed: {e}")
+
+    if created:
+        utils.logger.info(f"[ensure_table_stats] created {created} triggers, rebuilding {TABLE_STATS_TABLE}")
+        await rebuild_table_stats(db)
+        return True
+    return False
+
+
+def build_stats_summary_sql(placeholder: str = "?") -> str:
+    """
+    生成统计接口使用的汇总查询：每张表的总行数、指定日期的新增行数、最近一条记录的添加时间
+    :param placeholder: SQL参数占位符，参数为统计日期（YYYY-MM-DD）
+    :return: SQL语句
+    """
+    return (
+        f"SELECT `table_name`, SUM(`row_count`) AS total, "
+        f"SUM(CASE WHEN `stat_date` = {placeholder} THEN `row_count` ELSE 0 END) AS today, "
+        f"MAX(`last_add_ts`) AS last_add_ts "
+        f"FROM `{TABLE_STATS_TABLE}` GROUP BY `table_name`"
+    )
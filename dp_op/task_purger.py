@@ -0,0 +1,137 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 按任务批量删除数据：表结构信息只查询一次，每张表按 task_times_id IN (...) 分块删除，
+#            每张表一个事务，表与表之间释放写锁
+from typing import Dict, List, Optional, Sequence, Union
+
+from tools import utils
+
+from .async_mysql_db import AsyncMysqlDB
+from .async_sqlite_db import AsyncSqliteDB
+from .crawl_checkpoint import CHECKPOINT_TABLE
+from .db_tables_mapping import TABLE_UNIQUE_KEYS
+
+# 每条 DELETE 语句中 task_times_id 的数量
+DELETE_CHUNK_SIZE = 500
+
+TASK_TABLE = "crawler_tasks"
+
+# 按任务删除的数据表，任务记录表最后删除
+TASK_DATA_TABLES: List[str] = list(TABLE_UNIQUE_KEYS.keys()) + [CHECKPOINT_TABLE, TASK_TABLE]
+
+
+class TaskDataPurger:
+    def __init__(self, db: Union[AsyncMysqlDB, AsyncSqliteDB], chunk_size: int = DELETE_CHUNK_SIZE):
+        """
+        :param db: 数据库操作对象
+        :param chunk_size: 每条 DELETE 语句中 task_times_id 的数量
+        """
+        self._db = db
+        self._is_mysql = isinstance(db, AsyncMysqlDB)
+        self._placeholder = "%s" if self._is_mysql else "?"
+        self._chunk_size = max(1, chunk_size)
+        self._task_tables: Optional[List[str]] = None
+        self._has_table_stats = False
+
+    @property
+    def db(self) -> Union[AsyncMysqlDB, AsyncSqliteDB]:
+        return self._db
+
+    async def get_task_tables(self) -> List[str]:
+        """
+        获取存在 task_times_id 字段的数据表，结果在对象生命周期内缓存，表结构变化后调用 refresh
+        Returns:
+
+        """
+        if self._task_tables is not None:
+            return self._task_tables
+        if self._is_mysql:
+            rows = await self._db.query(
+                "SELECT TABLE_NAME AS name FROM information_schema.columns "
+                "WHERE TABLE_SCHEMA = DATABASE() AND COLUMN_NAME = 'task_times_id'")
+        else:
+            rows = await self._db.query(
+                "SELECT m.name AS name FROM sqlite_master m JOIN pragma_table_info(m.name) p "
+                "WHERE m.type = 'table' AND p.name = 'task_times_id'")
+        columns_tables = {row["name"] for row in rows}
+        self._task_tables = [table for table in TASK_DATA_TABLES if table in columns_tables]
+        # 行数汇总表的计数由触发器扣减，删除任务后一并清理该任务的汇总行
+        self._has_table_stats = "table_stats" in columns_tables
+        return self._task_tables
+
+    def refresh(self):
+        """表结构变化后清空缓存的表结构信息"""
+        self._task_tables = None
+
+    def _chunks(self, task_ids: Sequence[str]) -> List[List[str]]:
+        return [list(task_ids[i:i + self._chunk_size]) for i in range(0, len(task_ids), self._chunk_size)]
+
+    def _in_clause(self, size: int) -> str:
+        return ", ".join([self._placeholder] * size)
+
+    async def count(self, task_ids: Sequence[str]) -> Dict[str, int]:
+        """
+        统计各表中属于指定任务的记录数
+        Args:
+            task_ids: task_times_id 列表
+
+        Returns:
+            表名到记录数的映射，只包含有数据的表
+        """
+        task_ids = list(dict.fromkeys(task_ids))
+        result = {}
+        for table in await self.get_task_tables():
+            total = 0
+            for chunk in self._chunks(task_ids):
+                row = await self._db.get_first(
+                    f"SELECT COUNT(*) AS cnt FROM `{table}` WHERE task_times_id IN ({self._in_clause(len(chunk))})",
+                    *chunk)
+                total += int(row["cnt"]) if row else 0
+            if total:
+                result[table] = total
+        return result
+
+    async def purge(self, task_ids: Sequence[str]) -> Dict[str, int]:
+        """
+        删除指定任务在各表中的全部数据，每张表在一个事务中分块删除
+        Args:
+            task_ids: task_times_id 列表
+
+        Returns:
+            表名到删除记录数的映射，只包含有删除记录的表
+        """
+        task_ids = list(dict.fromkeys(task_ids))
+        if not task_ids:
+            return {}
+        result = {}
+        for table in await self.get_task_tables():
+            try:
+                deleted = await self._db.execute_batch(self._delete_statements(table, task_ids))
+            except Exception as e:
+                utils.logger.error(f"[TaskDataPurger.purge] delete from {table} failed: {e}")
+                continue
+            if deleted:
+                result[table] = deleted
+        if self._has_table_stats:
+            await self._db.execute_batch(self._delete_statements("table_stats", task_ids))
+        utils.logger.info(
+            f"[TaskDataPurger.purge] purge {len(task_ids)} tasks, removed {sum(result.values())} rows: {result}")
+        return result
+
+    def _delete_statements(self, table: str, task_ids: List[str]):
+        # 同样大小的分块共用一条语句，批量执行
+        statements = {}
+        for chunk in self._chunks(task_ids):
+            sql = f"DELETE FROM `{table}` WHERE task_times_id IN ({self._in_clause(len(chunk))})"
+            statements.setdefault(sql, []).append(tuple(chunk))
+        return list(statements.items())
@@ -0,0 +1,49 @@
+// 常驻的签名进程：启动时编译一次签名脚本，之后通过 stdin/stdout 按行收发 JSON 请求
+// 请求: {"id": 1, "fn": "sign_datail", "args": [...]}，健康检查: {"id": 2, "ping": true}
+// 响应: {"id": 1, "result": ...} 或 {"id": 1, "error": "..."}
+// 仅供学习交流使用，严禁用于商业用途
+
+const fs = require('fs');
+const readline = require('readline');
+const vm = require('vm');
+
+const scriptPath = process.argv[2];
+
+// stdout 只用于返回结果，签名脚本中的日志输出到 stderr
+const writeResponse = process.stdout.write.bind(process.stdout);
+for (const level of ['log', 'info', 'warn', 'debug']) {
+    console[level] = (...args) => process.stderr.write(args.join(' ') + '\n');
+}
+
+// 签名脚本按普通脚本执行，顶层函数成为全局函数，脚本中可以使用 require
+global.require = require;
+vm.runInThisContext(fs.readFileSync(scriptPath, 'utf-8').replace(/^\uFEFF/, ''), {filename: scriptPath});
+
+const rl = readline.createInterface({input: process.stdin, crlfDelay: Infinity});
+rl.on('line', (line) => {
+    if (!line) {
+        return;
+    }
+    let request;
+    try {
+        request = JSON.parse(line);
+    } catch (e) {
+        return;
+    }
+    let response;
+    try {
+        if (request.ping) {
+            response = {id: request.id, result: 'pong'};
+        } else {
+            const fn = global[request.fn];
+            if (typeof fn !== 'function') {
+                throw new Error(`function ${request.fn} not found`);
+            }
+            response = {id: request.id, result: fn(...(request.args || []))};
+        }
+    } catch (e) {
+        response = {id: request.id, error: String(e && e.stack || e)};
+    }
+    writeResponse(JSON.stringify(response) + '\n');
+});
+rl.on('close', () => process.exit(0));
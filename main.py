@@ -24,6 +24,13 @@ from media_platform.tieba import TieBaCrawler
 from media_platform.weibo import WeiboCrawler
 from media_platform.xhs import XiaoHongShuCrawler
 from media_platform.zhihu import ZhihuCrawler
+from store.csv_writer import close_all_csv_writers
+from store.media_store import close_media_stores
+from store.ndjson_writer import close_all_ndjson_writers
+from tools.http_client_pool import close_all_http_clients
+from tools.js_sign_pool import close_all_js_sign_pools
+from tools.media_download_queue import close_media_download_queue
+from tools.words import close_all_word_clouds
 
 
 class CrawlerFactory:
@@ -53,11 +60,30 @@ async def main():
     if config.SAVE_DATA_OPTION == "db":
         await db.init_db()
 
-    crawler = CrawlerFactory.create_crawler(platform=config.PLATFORM)
-    await crawler.start()
-
-    if config.SAVE_DATA_OPTION == "db":
-        await db.close()
+    try:
+        crawler = CrawlerFactory.create_crawler(platform=config.PLATFORM)
+        await crawler.start()
+    finally:
+        # 等待后台的图片/视频下载完成
+        await close_media_download_queue()
+        # 关闭媒体去重索引的数据库连接
+        await close_media_stores()
+        # 关闭平台接口客户端的连接池
+        await close_all_http_clients()
+        # 关闭常驻的JS签名进程
+        await close_all_js_sign_pools()
+        # 关闭数据库前会写入批量缓冲区中剩余的数据
+        if config.SAVE_DATA_OPTION == "db":
+            await db.close()
+        # 写入CSV文件中缓冲的记录
+        if config.SAVE_DATA_OPTION == "csv":
+            await close_all_csv_writers()
+        # 写入JSON追加文件中缓冲的记录，并按配置转换为JSON数组文件
+        if config.SAVE_DATA_OPTION == "json":
+            await close_all_ndjson_writers(finalize=config.JSON_FINALIZE_TO_ARRAY)
+            # 词频在运行过程中增量统计，词云图只在结束时生成一次
+            if config.ENABLE_GET_WORDCLOUD:
+                await close_all_word_clouds()
 
     
 
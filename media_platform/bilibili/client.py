@@ -18,17 +18,20 @@ import json
 from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 from urllib.parse import urlencode
 
-import httpx
 from playwright.async_api import BrowserContext, Page
 
 import config
 from base.base_crawler import AbstractApiClient
 from tools import utils
+from tools.media_download_queue import get_media_download_queue
 
-from .exception import DataFetchError
+from .exception import DataFetchError, WbiSignError
 from .field import CommentOrderType, SearchOrderType
 from .help import BilibiliSign
 
+# wbi 签名校验失败或风控校验失败时返回的错误码，刷新密钥后重试一次
+WBI_SIGN_ERROR_CODES = (-403, -352)
+
 
 class BilibiliClient(AbstractApiClient):
     def __init__(
@@ -46,19 +49,21 @@ class BilibiliClient(AbstractApiClient):
         self._host = "https://api.bilibili.com"
         self.playwright_page = playwright_page
         self.cookie_dict = cookie_dict
+        self._wbi_signer: Optional[BilibiliSign] = None
+        self._wbi_keys_ts = 0.0
+        self._wbi_lock = asyncio.Lock()
+        self._wbi_refresh_task: Optional[asyncio.Task] = None
 
     async def request(self, method, url, **kwargs) -> Any:
-        # 修复 httpx 新版本中 proxies 参数的使用方式
-        client_kwargs = {}
-        if self.proxies:
-            client_kwargs["proxies"] = self.proxies
-        
-        async with httpx.AsyncClient(**client_kwargs) as client:
-            response = await client.request(
-                method, url, timeout=self.timeout,
-                **kwargs
-            )
+        # 复用长期持有的连接池，代理变化时重建
+        client = self.http_pool.get(self.proxies)
+        response = await client.request(
+            method, url, timeout=self.timeout,
+            **kwargs
+        )
         data: Dict = response.json()
+        if data.get("code") in WBI_SIGN_ERROR_CODES:
+            raise WbiSignError(data.get("message", "unkonw error"))
         if data.get("code") != 0:
             raise DataFetchError(data.get("message", "unkonw error"))
         else:
@@ -74,17 +79,53 @@ class BilibiliClient(AbstractApiClient):
         """
         if not req_data:
             return {}
-        img_key, sub_key = await self.get_wbi_keys()
-        return BilibiliSign(img_key, sub_key).sign(req_data)
+        wbi_signer = await self.get_wbi_signer()
+        return wbi_signer.sign(req_data)
 
-    async def get_wbi_keys(self) -> Tuple[str, str]:
+    async def get_wbi_signer(self, force_refresh: bool = False) -> BilibiliSign:
+        """
+        获取缓存的 wbi 签名对象，签名只是进程内的哈希计算；
+        缓存超过 BILI_WBI_KEY_TTL 后先继续使用旧密钥，并在后台刷新
+        :param force_refresh: 是否立即刷新密钥，签名被拒绝时使用
+        :return:
+        """
+        if self._wbi_signer is None or force_refresh:
+            return await self._refresh_wbi_signer(force_refresh)
+        expired = asyncio.get_running_loop().time() - self._wbi_keys_ts > config.BILI_WBI_KEY_TTL
+        if expired and (self._wbi_refresh_task is None or self._wbi_refresh_task.done()):
+            self._wbi_refresh_task = asyncio.create_task(self._refresh_wbi_signer(True))
+        return self._wbi_signer
+
+    async def _refresh_wbi_signer(self, force_refresh: bool) -> BilibiliSign:
+        keys_ts = self._wbi_keys_ts
+        async with self._wbi_lock:
+            # 等待锁期间其他请求已经刷新过，直接使用
+            if self._wbi_signer is not None and (not force_refresh or self._wbi_keys_ts != keys_ts):
+                return self._wbi_signer
+            try:
+                # 首次从页面 localStorage 读取，之后的刷新直接请求 nav 接口
+                img_key, sub_key = await self.get_wbi_keys(from_nav=self._wbi_signer is not None)
+            except Exception as e:
+                if self._wbi_signer is None:
+                    raise
+                utils.logger.error(f"[BilibiliClient._refresh_wbi_signer] refresh wbi keys failed, keep old keys: {e}")
+                return self._wbi_signer
+            self._wbi_signer = BilibiliSign(img_key, sub_key)
+            self._wbi_keys_ts = asyncio.get_running_loop().time()
+            utils.logger.info(f"[BilibiliClient._refresh_wbi_signer] wbi keys refreshed, img_key: {img_key}")
+            return self._wbi_signer
+
+    async def get_wbi_keys(self, from_nav: bool = False) -> Tuple[str, str]:
         """
         获取最新的 img_key 和 sub_key
+        :param from_nav: 是否直接请求 nav 接口，页面 localStorage 中的密钥可能已经过期
         :return:
         """
-        local_storage = await self.playwright_page.evaluate("() => window.localStorage")
-        wbi_img_urls = local_storage.get("wbi_img_urls", "") or local_storage.get(
-            "wbi_img_url") + "-" + local_storage.get("wbi_sub_url")
+        wbi_img_urls = ""
+        if not from_nav:
+            local_storage = await self.playwright_page.evaluate("() => window.localStorage")
+            wbi_img_urls = local_storage.get("wbi_img_urls", "") or "-".join(
+                filter(None, [local_storage.get("wbi_img_url"), local_storage.get("wbi_sub_url")]))
         if wbi_img_urls and "-" in wbi_img_urls:
             img_url, sub_url = wbi_img_urls.split("-")
         else:
@@ -96,16 +137,32 @@ class BilibiliClient(AbstractApiClient):
         return img_key, sub_key
 
     async def get(self, uri: str, params=None, enable_params_sign: bool = True) -> Dict:
+        if not enable_params_sign:
+            return await self._get(uri, params)
+        try:
+            # 签名会修改参数，保留原始参数用于重新签名
+            return await self._get(uri, await self.pre_request_data(dict(params) if params else params))
+        except WbiSignError as e:
+            utils.logger.warning(f"[BilibiliClient.get] wbi sign rejected: {e}, refresh wbi keys and retry")
+            await self.get_wbi_signer(force_refresh=True)
+            return await self._get(uri, await self.pre_request_data(dict(params) if params else params))
+
+    async def _get(self, uri: str, params=None) -> Dict:
         final_uri = uri
-        if enable_params_sign:
-            params = await self.pre_request_data(params)
         if isinstance(params, dict):
             final_uri = (f"{uri}?"
                          f"{urlencode(params)}")
         return await self.request(method="GET", url=f"{self._host}{final_uri}", headers=self.headers)
 
     async def post(self, uri: str, data: dict) -> Dict:
-        data = await self.pre_request_data(data)
+        try:
+            return await self._post(uri, await self.pre_request_data(dict(data) if data else data))
+        except WbiSignError as e:
+            utils.logger.warning(f"[BilibiliClient.post] wbi sign rejected: {e}, refresh wbi keys and retry")
+            await self.get_wbi_signer(force_refresh=True)
+            return await self._post(uri, await self.pre_request_data(dict(data) if data else data))
+
+    async def _post(self, uri: str, data: dict) -> Dict:
         json_str = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
         return await self.request(method="POST", url=f"{self._host}{uri}",
                                   data=json_str, headers=self.headers)
@@ -198,18 +255,20 @@ class BilibiliClient(AbstractApiClient):
         return await self.get(uri, params, enable_params_sign=True)
 
     async def get_video_media(self, url: str) -> Union[bytes, None]:
-        # 修复 httpx 新版本中 proxies 参数的使用方式
-        client_kwargs = {}
-        if self.proxies:
-            client_kwargs["proxies"] = self.proxies
-            
-        async with httpx.AsyncClient(**client_kwargs) as client:
-            response = await client.request("GET", url, timeout=self.timeout, headers=self.headers)
-            if not response.reason_phrase == "OK":
-                utils.logger.error(f"[BilibiliClient.get_video_media] request {url} err, res:{response.text}")
-                return None
-            else:
-                return response.content
+        # 通过共享的下载队列复用连接，并发数受全局和域名上限约束
+        return await get_media_download_queue().fetch(url, headers=self.headers, proxies=self.proxies,
+                                                      timeout=self.timeout)
+
+    async def download_video_media(self, url: str, file_path: str, expected_size: Optional[int] = None) -> bool:
+        """
+        流式下载视频到本地文件，内存占用只与块大小有关，中断后再次调用会从已下载的位置续传
+        :param url: 视频地址
+        :param file_path: 本地文件路径
+        :param expected_size: 期望的文件大小（durl.size），下载完成后校验
+        :return: 是否下载成功
+        """
+        return await get_media_download_queue().download(url, file_path, headers=self.headers, proxies=self.proxies,
+                                                         timeout=self.timeout, expected_size=expected_size)
 
     async def get_video_comments(self,
                                  video_id: str,
@@ -246,10 +305,11 @@ class BilibiliClient(AbstractApiClient):
         :return:
         """
 
+        # 从翻页断点继续，已获取的评论数计入数量限制
+        entity = f"bili:comments:{video_id}"
+        next_page, fetched_count, is_end = self.get_checkpoint(entity, 0)
         result = []
-        is_end = False
-        next_page = 0
-        while not is_end and len(result) < max_count:
+        while not is_end and fetched_count + len(result) < max_count:
             comments_res = await self.get_video_comments(video_id, CommentOrderType.DEFAULT, next_page)
             cursor_info: Dict = comments_res.get("cursor")
             comment_list: List[Dict] = comments_res.get("replies", [])
@@ -263,14 +323,14 @@ class BilibiliClient(AbstractApiClient):
                             await self.get_video_all_level_two_comments(
                                 video_id, comment_id, CommentOrderType.DEFAULT, 10, crawl_interval,  callback)
                         }
-            if len(result) + len(comment_list) > max_count:
-                comment_list = comment_list[:max_count - len(result)]
+            if fetched_count + len(result) + len(comment_list) > max_count:
+                comment_list = comment_list[:max_count - fetched_count - len(result)]
             if callback:  # 如果有回调函数，就执行回调函数
                 await callback(video_id, comment_list)
-            await asyncio.sleep(crawl_interval)
             if not is_fetch_sub_comments:
                 result.extend(comment_list)
-                continue
+            await self.save_checkpoint(entity, next_page, fetched_count + len(result), done=bool(is_end))
+            await asyncio.sleep(crawl_interval)
         return result
 
     async def get_video_all_level_two_comments(self,
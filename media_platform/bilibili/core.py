@@ -30,6 +30,7 @@ from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import bilibili as bilibili_store
 from tools import utils
 from tools.cdp_browser import CDPBrowserManager
+from tools.media_download_queue import get_media_download_queue
 from var import crawler_type_var, source_keyword_var
 
 from .client import BilibiliClient
@@ -156,7 +157,12 @@ class BilibiliCrawler(AbstractCrawler):
             utils.logger.info(f"[BilibiliCrawler.search] Current search keyword: {keyword}")
             # 每个关键词最多返回 1000 条数据
             if not config.ALL_DAY:
-                page = 1
+                # 从翻页断点继续，已完成的关键词直接跳过
+                entity = f"bili:search:{keyword}"
+                page, video_count, done = self.bili_client.get_checkpoint(entity, 1)
+                if done:
+                    utils.logger.info(f"[BilibiliCrawler.search] Skip finished keyword: {keyword}")
+                    continue
                 while (page - start_page + 1) * bili_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
                     if page < start_page:
                         utils.logger.info(f"[BilibiliCrawler.search] Skip page: {page}")
@@ -190,12 +196,20 @@ class BilibiliCrawler(AbstractCrawler):
                             await self.get_bilibili_video(video_item, semaphore)
                     page += 1
                     await self.batch_get_video_comments(video_id_list)
+                    video_count += len(video_list or [])
+                    await self.bili_client.save_checkpoint(entity, page, video_count)
+                await self.bili_client.save_checkpoint(entity, page, video_count, done=True)
             # 按照 START_DAY 至 END_DAY 按照每一天进行筛选，这样能够突破 1000 条视频的限制，最大程度爬取该关键词下每一天的所有视频
             else:
                 for day in pd.date_range(start=config.START_DAY, end=config.END_DAY, freq='D'):
                     # 按照每一天进行爬取的时间戳参数
                     pubtime_begin_s, pubtime_end_s = await self.get_pubtime_datetime(start=day.strftime('%Y-%m-%d'), end=day.strftime('%Y-%m-%d'))
-                    page = 1
+                    # 每一天单独记录翻页断点，已完成的日期直接跳过
+                    entity = f"bili:search:{keyword}:{day.strftime('%Y-%m-%d')}"
+                    page, video_count, done = self.bili_client.get_checkpoint(entity, 1)
+                    if done:
+                        utils.logger.info(f"[BilibiliCrawler.search] Skip finished date: {day.ctime()}")
+                        continue
                     #!该段 while 语句在发生异常时（通常情况下为当天数据为空时）会自动跳转到下一天，以实现最大程度爬取该关键词下当天的所有视频
                     #!除了仅保留现在原有的 try, except Exception 语句外，不要再添加其他的异常处理！！！否则将使该段代码失效，使其仅能爬取当天一天数据而无法跳转到下一天
                     #!除非将该段代码的逻辑进行重构以实现相同的功能，否则不要进行修改！！！
@@ -231,10 +245,14 @@ class BilibiliCrawler(AbstractCrawler):
                                     await self.get_bilibili_video(video_item, semaphore)
                             page += 1
                             await self.batch_get_video_comments(video_id_list)
+                            video_count += len(video_list or [])
+                            await self.bili_client.save_checkpoint(entity, page, video_count)
                         # go to next day
                         except Exception as e:
                             print(e)
                             break
+                    # 出错时通常是当天已没有数据，同样视为当天已完成
+                    await self.bili_client.save_checkpoint(entity, page, video_count, done=True)
 
     async def batch_get_video_comments(self, video_id_list: List[str]):
         """
@@ -493,10 +511,32 @@ class BilibiliCrawler(AbstractCrawler):
         video_item_view: Dict = video_item.get("View")
         aid = video_item_view.get("aid")
         cid = video_item_view.get("cid")
+        extension_file_name = f"video.mp4"
+        # 已保存过的视频直接链接，不再请求播放地址和下载
+        media_key = bilibili_store.BilibiliVideo.make_media_key(aid, cid)
+        if await bilibili_store.link_video(aid, media_key, extension_file_name):
+            return
+        # 同一视频同时只下载一次，其他任务等待下载完成后直接链接
+        stored, shared = await get_media_download_queue().single_flight(
+            media_key, lambda: self.download_bilibili_video(aid, cid, media_key, extension_file_name, semaphore))
+        if stored and shared:
+            await bilibili_store.link_video(aid, media_key, extension_file_name)
+
+    async def download_bilibili_video(self, aid, cid, media_key: str, extension_file_name: str,
+                                      semaphore: asyncio.Semaphore) -> bool:
+        """
+        download bilibili video to the media store
+        :param aid:
+        :param cid:
+        :param media_key:
+        :param extension_file_name:
+        :param semaphore:
+        :return: whether the video is stored
+        """
         result = await self.get_video_play_url_task(aid, cid, semaphore)
         if result is None:
             utils.logger.info("[BilibiliCrawler.get_bilibili_video] get video play url failed")
-            return
+            return False
         durl_list = result.get("durl")
         max_size = -1
         video_url = ""
@@ -507,13 +547,14 @@ class BilibiliCrawler(AbstractCrawler):
                 video_url = durl.get("url")
         if video_url == "":
             utils.logger.info("[BilibiliCrawler.get_bilibili_video] get video url failed")
-            return
-
-        content = await self.bili_client.get_video_media(video_url)
-        if content is None:
-            return
-        extension_file_name = f"video.mp4"
-        await bilibili_store.store_video(aid, content, extension_file_name)
+            return False
+
+        # 视频按块流式写入本地文件，中断后下次从已下载的位置续传，完成后校验大小再移动到媒体存储
+        file_path = bilibili_store.get_video_download_path(media_key)
+        if not await self.bili_client.download_video_media(video_url, file_path, expected_size=max_size or None):
+            return False
+        await bilibili_store.store_video_file(aid, file_path, extension_file_name, media_key)
+        return True
 
     async def get_all_creator_details(self, creator_id_list: List[int]):
         """
@@ -23,3 +23,7 @@ class DataFetchError(RequestError):
 
 class IPBlockError(RequestError):
     """fetch so fast that the server block us ip"""
+
+
+class WbiSignError(DataFetchError):
+    """wbi signature rejected, the img_key / sub_key may have rotated"""
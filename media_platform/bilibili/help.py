@@ -16,7 +16,7 @@
 # 逆向实现参考：https://socialsisteryi.github.io/bilibili-API-collect/docs/misc/sign/wbi.html#wbi%E7%AD%BE%E5%90%8D%E7%AE%97%E6%B3%95
 import urllib.parse
 from hashlib import md5
-from typing import Dict
+from typing import Dict, Optional
 
 from tools import utils
 
@@ -31,17 +31,21 @@ class BilibiliSign:
             61, 26, 17, 0, 1, 60, 51, 30, 4, 22, 25, 54, 21, 56, 59, 6, 63, 57, 62, 11,
             36, 20, 34, 44, 52
         ]
+        self._salt: Optional[str] = None
 
     def get_salt(self) -> str:
         """
-        获取加盐的 key
+        获取加盐的 key，同一组 img_key / sub_key 只计算一次
         :return:
         """
+        if self._salt is not None:
+            return self._salt
         salt = ""
         mixin_key = self.img_key + self.sub_key
         for mt in self.map_table:
             salt += mixin_key[mt]
-        return salt[:32]
+        self._salt = salt[:32]
+        return self._salt
 
     def sign(self, req_data: Dict) -> Dict:
         """
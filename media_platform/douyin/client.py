@@ -15,7 +15,6 @@ import json
 import urllib.parse
 from typing import Any, Callable, Dict, Optional
 
-import requests
 from playwright.async_api import BrowserContext
 
 from base.base_crawler import AbstractApiClient
@@ -92,11 +91,9 @@ class DOUYINClient(AbstractApiClient):
         params["a_bogus"] = a_bogus
 
     async def request(self, method, url, **kwargs):
-        response = None
-        if method == "GET":
-            response = requests.request(method, url, **kwargs)
-        elif method == "POST":
-            response = requests.request(method, url, **kwargs)
+        # 复用长期持有的连接池，代理变化时重建，请求不再阻塞事件循环
+        client = self.http_pool.get(self.proxies)
+        response = await client.request(method, url, timeout=self.timeout, **kwargs)
         try:
             if response.text == "" or response.text == "blocked":
                 utils.logger.error(f"request params incrr, response.text: {response.text}")
@@ -242,24 +239,30 @@ class DOUYINClient(AbstractApiClient):
         :param max_count: 一次帖子爬取的最大评论数量
         :return: 评论列表
         """
+        # 从翻页断点继续，已获取的评论数计入数量限制
+        entity = f"dy:comments:{aweme_id}"
+        comments_cursor, fetched_count, done = self.get_checkpoint(entity, 0)
+        if done:
+            return []
         result = []
         comments_has_more = 1
-        comments_cursor = 0
-        while comments_has_more and len(result) < max_count:
+        while comments_has_more and fetched_count + len(result) < max_count:
             comments_res = await self.get_aweme_comments(aweme_id, comments_cursor)
             comments_has_more = comments_res.get("has_more", 0)
             comments_cursor = comments_res.get("cursor", 0)
             comments = comments_res.get("comments", [])
             if not comments:
                 continue
-            if len(result) + len(comments) > max_count:
-                comments = comments[:max_count - len(result)]
+            if fetched_count + len(result) + len(comments) > max_count:
+                comments = comments[:max_count - fetched_count - len(result)]
             result.extend(comments)
             if callback:  # 如果有回调函数，就执行回调函数
                 await callback(aweme_id, comments)
 
             await asyncio.sleep(crawl_interval)
             if not is_fetch_sub_comments:
+                await self.save_checkpoint(entity, comments_cursor, fetched_count + len(result),
+                                           done=not comments_has_more)
                 continue
             # 获取二级评论
             for comment in comments:
@@ -282,6 +285,7 @@ class DOUYINClient(AbstractApiClient):
                         if callback:  # 如果有回调函数，就执行回调函数
                             await callback(aweme_id, sub_comments)
                         await asyncio.sleep(crawl_interval)
+            await self.save_checkpoint(entity, comments_cursor, fetched_count + len(result), done=not comments_has_more)
         return result
 
     async def get_user_info(self, sec_user_id: str):
@@ -307,9 +311,14 @@ class DOUYINClient(AbstractApiClient):
         return await self.get(uri, params)
 
     async def get_all_user_aweme_posts(self, sec_user_id: str, callback: Optional[Callable] = None):
+        # 从翻页断点继续，断点中保留已获取作品的ID，供续爬后获取这些作品的评论
+        entity = f"dy:creator_awemes:{sec_user_id}"
+        checkpoint, _, done = self.get_checkpoint(entity, {"cursor": "", "awemes": []})
+        result = checkpoint["awemes"]
+        if done:
+            return result
         posts_has_more = 1
-        max_cursor = ""
-        result = []
+        max_cursor = checkpoint["cursor"]
         while posts_has_more == 1:
             aweme_post_res = await self.get_user_aweme_posts(sec_user_id, max_cursor)
             posts_has_more = aweme_post_res.get("has_more", 0)
@@ -320,4 +329,10 @@ class DOUYINClient(AbstractApiClient):
             if callback:
                 await callback(aweme_list)
             result.extend(aweme_list)
+            await self.save_checkpoint(
+                entity,
+                {"cursor": max_cursor, "awemes": [{"aweme_id": aweme.get("aweme_id")} for aweme in result]},
+                len(result),
+                done=posts_has_more != 1,
+            )
         return result
@@ -20,11 +20,12 @@ from playwright.async_api import (BrowserContext, BrowserType, Page, Playwright,
 
 import config
 from base.base_crawler import AbstractCrawler
+from dp_op.seen_index import FETCH_FULL, FETCH_SHALLOW, FETCH_SKIP, build_fingerprint
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import douyin as douyin_store
 from tools import utils
 from tools.cdp_browser import CDPBrowserManager
-from var import crawler_type_var, source_keyword_var
+from var import crawler_type_var, seen_index_var, source_keyword_var
 
 from .client import DOUYINClient
 from .exception import DataFetchError
@@ -105,9 +106,20 @@ class DouYinCrawler(AbstractCrawler):
         for keyword in config.KEYWORDS.split(","):
             source_keyword_var.set(keyword)
             utils.logger.info(f"[DouYinCrawler.search] Current keyword: {keyword}")
-            aweme_list: List[str] = []
-            page = 0
-            dy_search_id = ""
+            # 从翻页断点继续，断点中保留已获取作品的ID，翻页结束后统一获取评论
+            entity = f"dy:search:{keyword}"
+            checkpoint, _, done = self.dy_client.get_checkpoint(entity, {"page": 0, "search_id": "", "awemes": []})
+            if done:
+                utils.logger.info(f"[DouYinCrawler.search] Skip finished keyword: {keyword}")
+                continue
+            aweme_list: List[str] = checkpoint["awemes"]
+            finished = True
+            # 已爬取索引：搜索结果已包含作品详情，新鲜期内抓取过的作品跳过，互动数据有变化的只更新详情、不重新抓取评论
+            seen_index = seen_index_var.get()
+            fetched, refreshed = {}, {}
+            skip_count = 0
+            page = checkpoint["page"]
+            dy_search_id = checkpoint["search_id"]
             while (page - start_page + 1) * dy_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
                 if page < start_page:
                     utils.logger.info(f"[DouYinCrawler.search] Skip {page}")
@@ -125,24 +137,64 @@ class DouYinCrawler(AbstractCrawler):
                         break
                 except DataFetchError:
                     utils.logger.error(f"[DouYinCrawler.search] search douyin keyword: {keyword} failed")
+                    finished = False
                     break
 
                 page += 1
                 if "data" not in posts_res:
                     utils.logger.error(
                         f"[DouYinCrawler.search] search douyin keyword: {keyword} failed，账号也许被风控了。")
+                    finished = False
                     break
                 dy_search_id = posts_res.get("extra", {}).get("logid", "")
+                aweme_infos: List[Dict] = []
                 for post_item in posts_res.get("data"):
                     try:
                         aweme_info: Dict = post_item.get("aweme_info") or \
                                            post_item.get("aweme_mix_info", {}).get("mix_items")[0]
                     except TypeError:
                         continue
-                    aweme_list.append(aweme_info.get("aweme_id", ""))
+                    aweme_infos.append(aweme_info)
+                fingerprints = {
+                    aweme_info.get("aweme_id", ""): self.get_aweme_fingerprint(aweme_info) for aweme_info in aweme_infos
+                }
+                fetch_modes = await seen_index.classify(fingerprints) if seen_index else {}
+                for aweme_info in aweme_infos:
+                    aweme_id = aweme_info.get("aweme_id", "")
+                    fetch_mode = fetch_modes.get(aweme_id, FETCH_FULL)
+                    if fetch_mode == FETCH_SKIP:
+                        skip_count += 1
+                        continue
                     await douyin_store.update_douyin_aweme(aweme_item=aweme_info)
+                    if fetch_mode == FETCH_SHALLOW:
+                        refreshed[aweme_id] = fingerprints[aweme_id]
+                        continue
+                    fetched[aweme_id] = fingerprints[aweme_id]
+                    aweme_list.append(aweme_id)
+                await self.dy_client.save_checkpoint(
+                    entity, {"page": page, "search_id": dy_search_id, "awemes": aweme_list}, len(aweme_list))
             utils.logger.info(f"[DouYinCrawler.search] keyword:{keyword}, aweme_list:{aweme_list}")
             await self.batch_get_note_comments(aweme_list)
+            if finished:
+                await self.dy_client.save_checkpoint(
+                    entity, {"page": page, "search_id": dy_search_id, "awemes": aweme_list}, len(aweme_list), done=True)
+            if seen_index:
+                utils.logger.info(
+                    f"[DouYinCrawler.search] keyword:{keyword}, seen index skip {skip_count} awemes, "
+                    f"refresh {len(refreshed)} awemes")
+                await seen_index.mark_fetched(fetched)
+                await seen_index.mark_refreshed(refreshed)
+
+    @staticmethod
+    def get_aweme_fingerprint(aweme_info: Dict) -> str:
+        """由搜索结果中的互动数据生成指纹，不需要额外请求"""
+        statistics = aweme_info.get("statistics", {})
+        return build_fingerprint(
+            statistics.get("digg_count"),
+            statistics.get("collect_count"),
+            statistics.get("comment_count"),
+            statistics.get("share_count"),
+        )
 
     async def get_specified_awemes(self):
         """Get the information and comments of the specified post"""
@@ -15,7 +15,6 @@ import json
 from typing import Any, Callable, Dict, List, Optional
 from urllib.parse import urlencode
 
-import httpx
 from playwright.async_api import BrowserContext, Page
 
 import config
@@ -45,13 +44,9 @@ class KuaiShouClient(AbstractApiClient):
         self.graphql = KuaiShouGraphQL()
 
     async def request(self, method, url, **kwargs) -> Any:
-        # 修复 httpx 新版本中 proxies 参数的使用方式
-        client_kwargs = {}
-        if self.proxies:
-            client_kwargs["proxies"] = self.proxies
-            
-        async with httpx.AsyncClient(**client_kwargs) as client:
-            response = await client.request(method, url, timeout=self.timeout, **kwargs)
+        # 复用长期持有的连接池，代理变化时重建
+        client = self.http_pool.get(self.proxies)
+        response = await client.request(method, url, timeout=self.timeout, **kwargs)
         data: Dict = response.json()
         if data.get("errors"):
             raise DataFetchError(data.get("errors", "unkonw error"))
@@ -198,16 +193,20 @@ class KuaiShouClient(AbstractApiClient):
         :return:
         """
 
+        # 从翻页断点继续，已获取的评论数计入数量限制
+        entity = f"ks:comments:{photo_id}"
+        pcursor, fetched_count, done = self.get_checkpoint(entity, "")
+        if done:
+            return []
         result = []
-        pcursor = ""
 
-        while pcursor != "no_more" and len(result) < max_count:
+        while pcursor != "no_more" and fetched_count + len(result) < max_count:
             comments_res = await self.get_video_comments(photo_id, pcursor)
             vision_commen_list = comments_res.get("visionCommentList", {})
             pcursor = vision_commen_list.get("pcursor", "")
             comments = vision_commen_list.get("rootComments", [])
-            if len(result) + len(comments) > max_count:
-                comments = comments[: max_count - len(result)]
+            if fetched_count + len(result) + len(comments) > max_count:
+                comments = comments[: max_count - fetched_count - len(result)]
             if callback:  # 如果有回调函数，就执行回调函数
                 await callback(photo_id, comments)
             result.extend(comments)
@@ -216,6 +215,7 @@ class KuaiShouClient(AbstractApiClient):
                 comments, photo_id, crawl_interval, callback
             )
             result.extend(sub_comments)
+            await self.save_checkpoint(entity, pcursor, fetched_count + len(result), done=pcursor == "no_more")
         return result
 
     async def get_comments_all_sub_comments(
@@ -292,8 +292,13 @@ class KuaiShouClient(AbstractApiClient):
         Returns:
 
         """
-        result = []
-        pcursor = ""
+        # 从翻页断点继续，断点中保留已获取视频的ID，供续爬后获取这些视频的评论
+        entity = f"ks:creator_videos:{user_id}"
+        checkpoint, _, done = self.get_checkpoint(entity, {"pcursor": "", "videos": []})
+        result = checkpoint["videos"]
+        if done:
+            return result
+        pcursor = checkpoint["pcursor"]
 
         while pcursor != "no_more":
             videos_res = await self.get_video_by_creater(user_id, pcursor)
@@ -315,4 +320,13 @@ class KuaiShouClient(AbstractApiClient):
                 await callback(videos)
             await asyncio.sleep(crawl_interval)
             result.extend(videos)
+            await self.save_checkpoint(
+                entity,
+                {
+                    "pcursor": pcursor,
+                    "videos": [{"photo": {"id": video.get("photo", {}).get("id")}} for video in result],
+                },
+                len(result),
+                done=pcursor == "no_more",
+            )
         return result
@@ -110,12 +110,20 @@ class KuaishouCrawler(AbstractCrawler):
             config.CRAWLER_MAX_NOTES_COUNT = ks_limit_count
         start_page = config.START_PAGE
         for keyword in config.KEYWORDS.split(","):
-            search_session_id = ""
             source_keyword_var.set(keyword)
             utils.logger.info(
                 f"[KuaishouCrawler.search] Current search keyword: {keyword}"
             )
-            page = 1
+            # 从翻页断点继续，已完成的关键词直接跳过
+            entity = f"ks:search:{keyword}"
+            checkpoint, video_count, done = self.ks_client.get_checkpoint(
+                entity, {"page": 1, "search_session_id": ""}
+            )
+            if done:
+                utils.logger.info(f"[KuaishouCrawler.search] Skip finished keyword: {keyword}")
+                continue
+            page = checkpoint["page"]
+            search_session_id = checkpoint["search_session_id"]
             while (
                 page - start_page + 1
             ) * ks_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
@@ -152,6 +160,13 @@ class KuaishouCrawler(AbstractCrawler):
                 # batch fetch video comments
                 page += 1
                 await self.batch_get_video_comments(video_id_list)
+                video_count += len(video_id_list)
+                await self.ks_client.save_checkpoint(
+                    entity, {"page": page, "search_session_id": search_session_id}, video_count
+                )
+            await self.ks_client.save_checkpoint(
+                entity, {"page": page, "search_session_id": search_session_id}, video_count, done=True
+            )
 
     async def get_specified_videos(self):
         """Get the information and comments of the specified post"""
@@ -14,7 +14,6 @@ import json
 from typing import Any, Callable, Dict, List, Optional, Union
 from urllib.parse import urlencode
 
-import httpx
 from playwright.async_api import BrowserContext
 from tenacity import RetryError, retry, stop_after_attempt, wait_fixed
 
@@ -60,16 +59,12 @@ class BaiduTieBaClient(AbstractApiClient):
 
         """
         actual_proxies = proxies if proxies else self.default_ip_proxy
-        # 修复 httpx 新版本中 proxies 参数的使用方式
-        client_kwargs = {}
-        if actual_proxies:
-            client_kwargs["proxies"] = actual_proxies
-            
-        async with httpx.AsyncClient(**client_kwargs) as client:
-            response = await client.request(
-                method, url, timeout=self.timeout,
-                headers=self.headers, **kwargs
-            )
+        # 复用长期持有的连接池，代理变化时重建
+        client = self.http_pool.get(actual_proxies)
+        response = await client.request(
+            method, url, timeout=self.timeout,
+            headers=self.headers, **kwargs
+        )
 
         if response.status_code != 200:
             utils.logger.error(f"Request failed, method: {method}, url: {url}, status code: {response.status_code}")
@@ -223,9 +218,13 @@ class BaiduTieBaClient(AbstractApiClient):
 
         """
         uri = f"/p/{note_detail.note_id}"
+        # 从翻页断点继续，已获取的评论数计入数量限制
+        entity = f"tieba:comments:{note_detail.note_id}"
+        current_page, fetched_count, done = self.get_checkpoint(entity, 1)
+        if done:
+            return []
         result: List[TiebaComment] = []
-        current_page = 1
-        while note_detail.total_replay_page >= current_page and len(result) < max_count:
+        while note_detail.total_replay_page >= current_page and fetched_count + len(result) < max_count:
             params = {
                 "pn": current_page
             }
@@ -234,8 +233,8 @@ class BaiduTieBaClient(AbstractApiClient):
                                                                                 note_id=note_detail.note_id)
             if not comments:
                 break
-            if len(result) + len(comments) > max_count:
-                comments = comments[:max_count - len(result)]
+            if fetched_count + len(result) + len(comments) > max_count:
+                comments = comments[:max_count - fetched_count - len(result)]
             if callback:
                 await callback(note_detail.note_id, comments)
             result.extend(comments)
@@ -243,6 +242,8 @@ class BaiduTieBaClient(AbstractApiClient):
             await self.get_comments_all_sub_comments(comments, crawl_interval=crawl_interval, callback=callback)
             await asyncio.sleep(crawl_interval)
             current_page += 1
+            await self.save_checkpoint(entity, current_page, fetched_count + len(result),
+                                       done=current_page > note_detail.total_replay_page)
         return result
 
     async def get_comments_all_sub_comments(self, comments: List[TiebaComment], crawl_interval: float = 1.0,
@@ -356,9 +357,16 @@ class BaiduTieBaClient(AbstractApiClient):
         Returns:
 
         """
+        # 从翻页断点继续，断点中保留已获取的帖子，供续爬后获取这些帖子的评论
+        entity = f"tieba:creator_notes:{user_name}"
+        checkpoint, _, done = self.get_checkpoint(
+            entity, {"page_number": 1, "total_get_count": 0, "home_done": False, "notes": []})
+        result: List[TiebaNote] = [TiebaNote(**note) for note in checkpoint["notes"]]
+        if done:
+            return result
+
         # 百度贴吧比较特殊一些，前10个帖子是直接展示在主页上的，要单独处理，通过API获取不到
-        result: List[TiebaNote] = []
-        if creator_page_html_content:
+        if creator_page_html_content and not checkpoint["home_done"]:
             thread_id_list = (
                 self._page_extractor.extract_tieba_thread_id_list_from_creator_page(
                     creator_page_html_content
@@ -376,9 +384,15 @@ class BaiduTieBaClient(AbstractApiClient):
             result.extend(notes)
 
         notes_has_more = 1
-        page_number = 1
+        page_number = checkpoint["page_number"]
         page_per_count = 20
-        total_get_count = 0
+        total_get_count = checkpoint["total_get_count"]
+        await self.save_checkpoint(
+            entity,
+            {"page_number": page_number, "total_get_count": total_get_count, "home_done": True,
+             "notes": [note.model_dump() for note in result]},
+            len(result),
+        )
         while notes_has_more == 1 and (max_note_count == 0 or total_get_count < max_note_count):
             notes_res = await self.get_notes_by_creator(user_name, page_number)
             if not notes_res or notes_res.get("no") != 0:
@@ -399,4 +413,11 @@ class BaiduTieBaClient(AbstractApiClient):
             result.extend(notes)
             page_number += 1
             total_get_count += page_per_count
+            await self.save_checkpoint(
+                entity,
+                {"page_number": page_number, "total_get_count": total_get_count, "home_done": True,
+                 "notes": [note.model_dump() for note in result]},
+                len(result),
+                done=notes_has_more != 1 or (max_note_count != 0 and total_get_count >= max_note_count),
+            )
         return result
@@ -95,7 +95,13 @@ class TieBaCrawler(AbstractCrawler):
         for keyword in config.KEYWORDS.split(","):
             source_keyword_var.set(keyword)
             utils.logger.info(f"[BaiduTieBaCrawler.search] Current search keyword: {keyword}")
-            page = 1
+            # 从翻页断点继续，已完成的关键词直接跳过
+            entity = f"tieba:search:{keyword}"
+            page, note_count, done = self.tieba_client.get_checkpoint(entity, 1)
+            if done:
+                utils.logger.info(f"[BaiduTieBaCrawler.search] Skip finished keyword: {keyword}")
+                continue
+            finished = True
             while (page - start_page + 1) * tieba_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
                 if page < start_page:
                     utils.logger.info(f"[BaiduTieBaCrawler.search] Skip page {page}")
@@ -116,10 +122,15 @@ class TieBaCrawler(AbstractCrawler):
                     utils.logger.info(f"[BaiduTieBaCrawler.search] Note list len: {len(notes_list)}")
                     await self.get_specified_notes(note_id_list=[note_detail.note_id for note_detail in notes_list])
                     page += 1
+                    note_count += len(notes_list)
+                    await self.tieba_client.save_checkpoint(entity, page, note_count)
                 except Exception as ex:
                     utils.logger.error(
                         f"[BaiduTieBaCrawler.search] Search keywords error, current page: {page}, current keyword: {keyword}, err: {ex}")
+                    finished = False
                     break
+            if finished:
+                await self.tieba_client.save_checkpoint(entity, page, note_count, done=True)
 
     async def get_specified_tieba_notes(self):
         """
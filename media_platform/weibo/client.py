@@ -21,18 +21,19 @@ import re
 from typing import Callable, Dict, List, Optional, Union
 from urllib.parse import parse_qs, unquote, urlencode
 
-import httpx
 from httpx import Response
 from playwright.async_api import BrowserContext, Page
 
 import config
+from base.base_crawler import AbstractApiClient
 from tools import utils
+from tools.media_download_queue import get_media_download_queue
 
 from .exception import DataFetchError
 from .field import SearchType
 
 
-class WeiboClient:
+class WeiboClient(AbstractApiClient):
     def __init__(
             self,
             timeout=10,
@@ -52,16 +53,12 @@ class WeiboClient:
 
     async def request(self, method, url, **kwargs) -> Union[Response, Dict]:
         enable_return_response = kwargs.pop("return_response", False)
-        # 修复 httpx 新版本中 proxies 参数的使用方式
-        client_kwargs = {}
-        if self.proxies:
-            client_kwargs["proxies"] = self.proxies
-            
-        async with httpx.AsyncClient(**client_kwargs) as client:
-            response = await client.request(
-                method, url, timeout=self.timeout,
-                **kwargs
-            )
+        # 复用长期持有的连接池，代理变化时重建
+        client = self.http_pool.get(self.proxies)
+        response = await client.request(
+            method, url, timeout=self.timeout,
+            **kwargs
+        )
 
         if enable_return_response:
             return response
@@ -171,24 +168,28 @@ class WeiboClient:
         :param max_count:
         :return:
         """
+        # 从翻页断点继续，已获取的评论数计入数量限制
+        entity = f"wb:comments:{note_id}"
+        (max_id, max_id_type), fetched_count, done = self.get_checkpoint(entity, [-1, 0])
+        if done:
+            return []
         result = []
         is_end = False
-        max_id = -1
-        max_id_type = 0
-        while not is_end and len(result) < max_count:
+        while not is_end and fetched_count + len(result) < max_count:
             comments_res = await self.get_note_comments(note_id, max_id, max_id_type)
             max_id: int = comments_res.get("max_id")
             max_id_type: int = comments_res.get("max_id_type")
             comment_list: List[Dict] = comments_res.get("data", [])
             is_end = max_id == 0
-            if len(result) + len(comment_list) > max_count:
-                comment_list = comment_list[:max_count - len(result)]
+            if fetched_count + len(result) + len(comment_list) > max_count:
+                comment_list = comment_list[:max_count - fetched_count - len(result)]
             if callback:  # 如果有回调函数，就执行回调函数
                 await callback(note_id, comment_list)
             await asyncio.sleep(crawl_interval)
             result.extend(comment_list)
             sub_comment_result = await self.get_comments_all_sub_comments(note_id, comment_list, callback)
             result.extend(sub_comment_result)
+            await self.save_checkpoint(entity, [max_id, max_id_type], fetched_count + len(result), done=is_end)
         return result
 
     @staticmethod
@@ -224,29 +225,25 @@ class WeiboClient:
         :return:
         """
         url = f"{self._host}/detail/{note_id}"
-        # 修复 httpx 新版本中 proxies 参数的使用方式
-        client_kwargs = {}
-        if self.proxies:
-            client_kwargs["proxies"] = self.proxies
-            
-        async with httpx.AsyncClient(**client_kwargs) as client:
-            response = await client.request(
-                "GET", url, timeout=self.timeout, headers=self.headers
-            )
-            if response.status_code != 200:
-                raise DataFetchError(f"get weibo detail err: {response.text}")
-            match = re.search(r'var \$render_data = (\[.*?\])\[0\]', response.text, re.DOTALL)
-            if match:
-                render_data_json = match.group(1)
-                render_data_dict = json.loads(render_data_json)
-                note_detail = render_data_dict[0].get("status")
-                note_item = {
-                    "mblog": note_detail
-                }
-                return note_item
-            else:
-                utils.logger.info(f"[WeiboClient.get_note_info_by_id] 未找到$render_data的值")
-                return dict()
+        # 复用长期持有的连接池，代理变化时重建
+        client = self.http_pool.get(self.proxies)
+        response = await client.request(
+            "GET", url, timeout=self.timeout, headers=self.headers
+        )
+        if response.status_code != 200:
+            raise DataFetchError(f"get weibo detail err: {response.text}")
+        match = re.search(r'var \$render_data = (\[.*?\])\[0\]', response.text, re.DOTALL)
+        if match:
+            render_data_json = match.group(1)
+            render_data_dict = json.loads(render_data_json)
+            note_detail = render_data_dict[0].get("status")
+            note_item = {
+                "mblog": note_detail
+            }
+            return note_item
+        else:
+            utils.logger.info(f"[WeiboClient.get_note_info_by_id] 未找到$render_data的值")
+            return dict()
 
     async def get_note_image(self, image_url: str) -> bytes:
         image_url = image_url[8:]  # 去掉 https://
@@ -262,18 +259,8 @@ class WeiboClient:
         # 微博图床对外存在防盗链，所以需要代理访问
         # 由于微博图片是通过 i1.wp.com 来访问的，所以需要拼接一下
         final_uri = (f"{self._image_agent_host}" f"{image_url}")
-        # 修复 httpx 新版本中 proxies 参数的使用方式
-        client_kwargs = {}
-        if self.proxies:
-            client_kwargs["proxies"] = self.proxies
-            
-        async with httpx.AsyncClient(**client_kwargs) as client:
-            response = await client.request("GET", final_uri, timeout=self.timeout)
-            if not response.reason_phrase == "OK":
-                utils.logger.error(f"[WeiboClient.get_note_image] request {final_uri} err, res:{response.text}")
-                return None
-            else:
-                return response.content
+        # 通过共享的下载队列复用连接，不再每张图片新建客户端
+        return await get_media_download_queue().fetch(final_uri, proxies=self.proxies, timeout=self.timeout)
 
 
 
@@ -365,10 +352,15 @@ class WeiboClient:
         Returns:
 
         """
-        result = []
+        # 从翻页断点继续，断点中保留已获取微博的ID，供续爬后获取这些微博的评论
+        entity = f"wb:creator_notes:{creator_id}"
+        checkpoint, _, done = self.get_checkpoint(entity, {"since_id": "", "total_count": 0, "notes": []})
+        result = checkpoint["notes"]
+        if done:
+            return result
         notes_has_more = True
-        since_id = ""
-        crawler_total_count = 0
+        since_id = checkpoint["since_id"]
+        crawler_total_count = checkpoint["total_count"]
         while notes_has_more:
             notes_res = await self.get_notes_by_creator(creator_id, container_id, since_id)
             if not notes_res:
@@ -391,5 +383,15 @@ class WeiboClient:
             result.extend(notes)
             crawler_total_count += 10
             notes_has_more = notes_res.get("cardlistInfo", {}).get("total", 0) > crawler_total_count
+            await self.save_checkpoint(
+                entity,
+                {
+                    "since_id": since_id,
+                    "total_count": crawler_total_count,
+                    "notes": [{"mblog": {"id": note.get("mblog", {}).get("id")}} for note in result],
+                },
+                len(result),
+                done=not notes_has_more,
+            )
         return result
 
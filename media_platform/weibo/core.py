@@ -30,6 +30,7 @@ from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import weibo as weibo_store
 from tools import utils
 from tools.cdp_browser import CDPBrowserManager
+from tools.media_download_queue import get_media_download_queue
 from var import crawler_type_var, source_keyword_var
 
 from .client import WeiboClient
@@ -141,7 +142,12 @@ class WeiboCrawler(AbstractCrawler):
         for keyword in config.KEYWORDS.split(","):
             source_keyword_var.set(keyword)
             utils.logger.info(f"[WeiboCrawler.search] Current search keyword: {keyword}")
-            page = 1
+            # 从翻页断点继续，已完成的关键词直接跳过
+            entity = f"wb:search:{keyword}"
+            page, note_count, done = self.wb_client.get_checkpoint(entity, 1)
+            if done:
+                utils.logger.info(f"[WeiboCrawler.search] Skip finished keyword: {keyword}")
+                continue
             while (page - start_page + 1) * weibo_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
                 if page < start_page:
                     utils.logger.info(f"[WeiboCrawler.search] Skip page: {page}")
@@ -165,6 +171,9 @@ class WeiboCrawler(AbstractCrawler):
 
                 page += 1
                 await self.batch_get_notes_comments(note_id_list)
+                note_count += len(note_id_list)
+                await self.wb_client.save_checkpoint(entity, page, note_count)
+            await self.wb_client.save_checkpoint(entity, page, note_count, done=True)
 
     async def get_specified_notes(self):
         """
@@ -253,14 +262,28 @@ class WeiboCrawler(AbstractCrawler):
         pics: Dict = mblog.get("pics")
         if not pics:
             return
+        # 图片在下载队列中并发下载，不阻塞后续微博的爬取
+        queue = get_media_download_queue()
         for pic in pics:
             url = pic.get("url")
             if not url:
                 continue
-            content = await self.wb_client.get_note_image(url)
-            if content != None:
-                extension_file_name = url.split(".")[-1]
-                await weibo_store.update_weibo_note_image(pic["pid"], content, extension_file_name)
+            queue.submit(self.save_note_image(pic["pid"], url, url.split(".")[-1]))
+
+    async def save_note_image(self, pid: str, url: str, extension_file_name: str):
+        """
+        download and save one weibo image, run in the media download queue
+        :param pid:
+        :param url:
+        :param extension_file_name:
+        :return:
+        """
+        # 已保存过的图片（如转发的同一张图）直接链接，不再重复下载
+        if await weibo_store.link_weibo_note_image(pid, extension_file_name):
+            return
+        content = await self.wb_client.get_note_image(url)
+        if content != None:
+            await weibo_store.update_weibo_note_image(pid, content, extension_file_name)
 
 
     async def get_creators_and_notes(self) -> None:
@@ -22,11 +22,13 @@ from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_result
 import config
 from base.base_crawler import AbstractApiClient
 from tools import utils
+from tools.media_download_queue import get_media_download_queue
 from html import unescape
 
 from .exception import DataFetchError, IPBlockError
 from .field import SearchNoteType, SearchSortType
 from .help import get_search_id, sign
+from .signer import XhsPageSigner
 
 
 class XiaoHongShuClient(AbstractApiClient):
@@ -38,6 +40,7 @@ class XiaoHongShuClient(AbstractApiClient):
         headers: Dict[str, str],
         playwright_page: Page,
         cookie_dict: Dict[str, str],
+        sign_pages: Optional[List[Page]] = None,
     ):
         self.proxies = proxies
         self.timeout = timeout
@@ -50,6 +53,7 @@ class XiaoHongShuClient(AbstractApiClient):
         self.NOTE_ABNORMAL_CODE = -510001
         self.playwright_page = playwright_page
         self.cookie_dict = cookie_dict
+        self._signer = XhsPageSigner(sign_pages or [playwright_page])
 
     async def _pre_headers(self, url: str, data=None) -> Dict:
         """
@@ -61,10 +65,8 @@ class XiaoHongShuClient(AbstractApiClient):
         Returns:
 
         """
-        encrypt_params = await self.playwright_page.evaluate(
-            "([url, data]) => window._webmsxyw(url,data)", [url, data]
-        )
-        local_storage = await self.playwright_page.evaluate("() => window.localStorage")
+        # 同时发起的签名合并为一次页面调用，localStorage 使用缓存
+        encrypt_params, local_storage = await self._signer.sign(url, data)
         signs = sign(
             a1=self.cookie_dict.get("a1", ""),
             b1=local_storage.get("b1", ""),
@@ -72,14 +74,15 @@ class XiaoHongShuClient(AbstractApiClient):
             x_t=str(encrypt_params.get("X-t", "")),
         )
 
-        headers = {
+        # 并发请求各自使用签名后的请求头副本，不互相覆盖
+        headers = self.headers.copy()
+        headers.update({
             "X-S": signs["x-s"],
             "X-T": signs["x-t"],
             "x-S-Common": signs["x-s-common"],
             "X-B3-Traceid": signs["x-b3-traceid"],
-        }
-        self.headers.update(headers)
-        return self.headers
+        })
+        return headers
 
     @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
     async def request(self, method, url, **kwargs) -> Union[str, Any]:
@@ -96,15 +99,13 @@ class XiaoHongShuClient(AbstractApiClient):
         # return response.text
         return_response = kwargs.pop("return_response", False)
 
-        # 修复 httpx 新版本中 proxies 参数的使用方式
-        client_kwargs = {}
-        if self.proxies:
-            client_kwargs["proxies"] = self.proxies
-            
-        async with httpx.AsyncClient(**client_kwargs) as client:
-            response = await client.request(method, url, timeout=self.timeout, **kwargs)
+        # 复用长期持有的连接池，代理变化时重建
+        client = self.http_pool.get(self.proxies)
+        response = await client.request(method, url, timeout=self.timeout, **kwargs)
 
         if response.status_code == 471 or response.status_code == 461:
+            # 签名用到的 localStorage 可能已变化，下次签名时重新读取
+            self._signer.invalidate()
             # someday someone maybe will bypass captcha
             verify_type = response.headers["Verifytype"]
             verify_uuid = response.headers["Verifyuuid"]
@@ -161,20 +162,20 @@ class XiaoHongShuClient(AbstractApiClient):
         )
 
     async def get_note_media(self, url: str) -> Union[bytes, None]:
-        # 修复 httpx 新版本中 proxies 参数的使用方式
-        client_kwargs = {}
-        if self.proxies:
-            client_kwargs["proxies"] = self.proxies
-            
-        async with httpx.AsyncClient(**client_kwargs) as client:
-            response = await client.request("GET", url, timeout=self.timeout)
-            if not response.reason_phrase == "OK":
-                utils.logger.error(
-                    f"[XiaoHongShuClient.get_note_media] request {url} err, res:{response.text}"
-                )
-                return None
-            else:
-                return response.content
+        # 通过共享的下载队列复用连接，并发数受全局和域名上限约束
+        return await get_media_download_queue().fetch(url, proxies=self.proxies, timeout=self.timeout)
+
+    async def download_note_media(self, url: str, file_path: str) -> bool:
+        """
+        流式下载视频等大文件到本地，内存占用只与块大小有关，中断后再次调用会从已下载的位置续传
+        Args:
+            url: 媒体地址
+            file_path: 本地文件路径
+
+        Returns:
+            是否下载成功
+        """
+        return await get_media_download_queue().download(url, file_path, proxies=self.proxies, timeout=self.timeout)
 
     async def pong(self) -> bool:
         """
@@ -207,6 +208,7 @@ class XiaoHongShuClient(AbstractApiClient):
         """
         cookie_str, cookie_dict = utils.convert_cookies(await browser_context.cookies())
         self.headers["Cookie"] = cookie_str
+        self._signer.invalidate()
         self.cookie_dict = cookie_dict
 
     async def get_note_by_keyword(
@@ -349,10 +351,14 @@ class XiaoHongShuClient(AbstractApiClient):
         Returns:
 
         """
+        # 从翻页断点继续，已获取的评论数计入数量限制
+        entity = f"xhs:comments:{note_id}"
+        comments_cursor, fetched_count, done = self.get_checkpoint(entity, "")
+        if done:
+            return []
         result = []
         comments_has_more = True
-        comments_cursor = ""
-        while comments_has_more and len(result) < max_count:
+        while comments_has_more and fetched_count + len(result) < max_count:
             comments_res = await self.get_note_comments(
                 note_id=note_id, xsec_token=xsec_token, cursor=comments_cursor
             )
@@ -364,8 +370,8 @@ class XiaoHongShuClient(AbstractApiClient):
                 )
                 break
             comments = comments_res["comments"]
-            if len(result) + len(comments) > max_count:
-                comments = comments[: max_count - len(result)]
+            if fetched_count + len(result) + len(comments) > max_count:
+                comments = comments[: max_count - fetched_count - len(result)]
             if callback:
                 await callback(note_id, comments)
             await asyncio.sleep(crawl_interval)
@@ -377,6 +383,7 @@ class XiaoHongShuClient(AbstractApiClient):
                 callback=callback,
             )
             result.extend(sub_comments)
+            await self.save_checkpoint(entity, comments_cursor, fetched_count + len(result), done=not comments_has_more)
         return result
 
     async def get_comments_all_sub_comments(
@@ -505,9 +512,14 @@ class XiaoHongShuClient(AbstractApiClient):
         Returns:
 
         """
-        result = []
+        # 从翻页断点继续，断点中保留已获取笔记的ID和xsec_token，供续爬后获取这些笔记的评论
+        entity = f"xhs:creator_notes:{user_id}"
+        checkpoint, _, done = self.get_checkpoint(entity, {"cursor": "", "notes": []})
+        result = checkpoint["notes"]
+        if done:
+            return result
         notes_has_more = True
-        notes_cursor = ""
+        notes_cursor = checkpoint["cursor"]
         while notes_has_more and len(result) < config.CRAWLER_MAX_NOTES_COUNT:
             notes_res = await self.get_notes_by_creator(user_id, notes_cursor)
             if not notes_res:
@@ -538,6 +550,18 @@ class XiaoHongShuClient(AbstractApiClient):
                 await callback(notes_to_add)
 
             result.extend(notes_to_add)
+            await self.save_checkpoint(
+                entity,
+                {
+                    "cursor": notes_cursor,
+                    "notes": [
+                        {"note_id": note.get("note_id"), "xsec_token": note.get("xsec_token")}
+                        for note in result
+                    ],
+                },
+                len(result),
+                done=not notes_has_more,
+            )
             await asyncio.sleep(crawl_interval)
 
         utils.logger.info(
@@ -22,12 +22,14 @@ from tenacity import RetryError
 import config
 from base.base_crawler import AbstractCrawler
 from config import CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES
+from dp_op.seen_index import FETCH_FULL, FETCH_SHALLOW, FETCH_SKIP, build_fingerprint
 from model.m_xiaohongshu import NoteUrlInfo
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import xhs as xhs_store
 from tools import utils
 from tools.cdp_browser import CDPBrowserManager
-from var import crawler_type_var, source_keyword_var
+from tools.media_download_queue import get_media_download_queue
+from var import crawler_type_var, seen_index_var, source_keyword_var
 
 from .client import XiaoHongShuClient
 from .exception import DataFetchError
@@ -38,6 +40,7 @@ from .login import XiaoHongShuLogin
 
 class XiaoHongShuCrawler(AbstractCrawler):
     context_page: Page
+    sign_pages: List[Page]
     xhs_client: XiaoHongShuClient
     browser_context: BrowserContext
     cdp_manager: Optional[CDPBrowserManager]
@@ -47,6 +50,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
         # self.user_agent = utils.get_user_agent()
         self.user_agent = config.UA if config.UA else "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36"
         self.cdp_manager = None
+        self.sign_pages = []
 
     async def start(self) -> None:
         playwright_proxy_format, httpx_proxy_format = None, None
@@ -89,6 +93,12 @@ class XiaoHongShuCrawler(AbstractCrawler):
             )
             self.context_page = await self.browser_context.new_page()
             await self.context_page.goto(self.index_url)
+            # 额外的签名页面，请求头签名分摊到多个页面上执行
+            self.sign_pages = [self.context_page]
+            for _ in range(config.XHS_SIGN_PAGE_COUNT - 1):
+                sign_page = await self.browser_context.new_page()
+                await sign_page.goto(self.index_url)
+                self.sign_pages.append(sign_page)
 
             # Create a client to interact with the xiaohongshu website.
             self.xhs_client = await self.create_xhs_client(httpx_proxy_format)
@@ -134,8 +144,14 @@ class XiaoHongShuCrawler(AbstractCrawler):
             utils.logger.info(
                 f"[XiaoHongShuCrawler.search] Current search keyword: {keyword}"
             )
-            page = 1
+            # 从翻页断点继续，已完成的关键词直接跳过
+            entity = f"xhs:search:{keyword}"
+            page, note_count, done = self.xhs_client.get_checkpoint(entity, 1)
+            if done:
+                utils.logger.info(f"[XiaoHongShuCrawler.search] Skip finished keyword: {keyword}")
+                continue
             search_id = get_search_id()
+            finished = True
             while (
                 page - start_page + 1
             ) * xhs_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
@@ -166,6 +182,18 @@ class XiaoHongShuCrawler(AbstractCrawler):
                     if not notes_res or not notes_res.get("has_more", False):
                         utils.logger.info("No more content!")
                         break
+                    post_items = [
+                        post_item
+                        for post_item in notes_res.get("items", {})
+                        if post_item.get("model_type") not in ("rec_query", "hot_query")
+                    ]
+                    # 已爬取索引：新鲜期内抓取过的笔记跳过，互动数据有变化的只刷新详情
+                    fingerprints = {
+                        post_item.get("id"): self.get_note_fingerprint(post_item)
+                        for post_item in post_items
+                    }
+                    seen_index = seen_index_var.get()
+                    fetch_modes = await seen_index.classify(fingerprints) if seen_index else {}
                     semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
                     task_list = [
                         self.get_note_detail_async_task(
@@ -174,26 +202,55 @@ class XiaoHongShuCrawler(AbstractCrawler):
                             xsec_token=post_item.get("xsec_token"),
                             semaphore=semaphore,
                         )
-                        for post_item in notes_res.get("items", {})
-                        if post_item.get("model_type") not in ("rec_query", "hot_query")
+                        for post_item in post_items
+                        if fetch_modes.get(post_item.get("id"), FETCH_FULL) != FETCH_SKIP
                     ]
                     note_details = await asyncio.gather(*task_list)
+                    fetched, refreshed = {}, {}
                     for note_detail in note_details:
                         if note_detail:
                             await xhs_store.update_xhs_note(note_detail)
                             await self.get_notice_media(note_detail)
-                            note_ids.append(note_detail.get("note_id"))
+                            note_id = note_detail.get("note_id")
+                            if fetch_modes.get(note_id, FETCH_FULL) == FETCH_SHALLOW:
+                                refreshed[note_id] = fingerprints.get(note_id)
+                                continue
+                            fetched[note_id] = fingerprints.get(note_id)
+                            note_ids.append(note_id)
                             xsec_tokens.append(note_detail.get("xsec_token"))
                     page += 1
                     utils.logger.info(
                         f"[XiaoHongShuCrawler.search] Note details: {note_details}"
                     )
                     await self.batch_get_note_comments(note_ids, xsec_tokens)
+                    if seen_index:
+                        utils.logger.info(
+                            f"[XiaoHongShuCrawler.search] seen index skip {len(post_items) - len(task_list)} notes, "
+                            f"refresh {len(refreshed)} notes"
+                        )
+                        await seen_index.mark_fetched(fetched)
+                        await seen_index.mark_refreshed(refreshed)
+                    note_count += len(post_items)
+                    await self.xhs_client.save_checkpoint(entity, page, note_count)
                 except DataFetchError:
                     utils.logger.error(
                         "[XiaoHongShuCrawler.search] Get note detail error"
                     )
+                    finished = False
                     break
+            if finished:
+                await self.xhs_client.save_checkpoint(entity, page, note_count, done=True)
+
+    @staticmethod
+    def get_note_fingerprint(post_item: Dict) -> str:
+        """由搜索结果中的互动数据生成指纹，不需要额外请求"""
+        interact_info = post_item.get("note_card", {}).get("interact_info", {})
+        return build_fingerprint(
+            interact_info.get("liked_count"),
+            interact_info.get("collected_count"),
+            interact_info.get("comment_count"),
+            interact_info.get("shared_count"),
+        )
 
     async def get_creators_and_notes(self) -> None:
         """Get creator's notes and retrieve their comment information."""
@@ -426,6 +483,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
             },
             playwright_page=self.context_page,
             cookie_dict=cookie_dict,
+            sign_pages=self.sign_pages,
         )
         return xhs_client_obj
 
@@ -524,17 +582,32 @@ class XiaoHongShuCrawler(AbstractCrawler):
 
         if not image_list:
             return
+        # 文件名在提交时确定，图片在下载队列中并发下载，不阻塞后续笔记的爬取
+        queue = get_media_download_queue()
         picNum = 0
         for pic in image_list:
             url = pic.get("url")
             if not url:
                 continue
-            content = await self.xhs_client.get_note_media(url)
-            if content is None:
-                continue
-            extension_file_name = f"{picNum}.jpg"
+            queue.submit(self.save_note_image(note_id, url, f"{picNum}.jpg"))
             picNum += 1
-            await xhs_store.update_xhs_note_image(note_id, content, extension_file_name)
+
+    async def save_note_image(self, note_id: str, url: str, extension_file_name: str):
+        """
+        download and save one note image, run in the media download queue
+        :param note_id:
+        :param url:
+        :param extension_file_name:
+        :return:
+        """
+        # 已保存过的图片直接链接，不再重复下载
+        media_key = xhs_store.XiaoHongShuImage.make_media_key(url)
+        if await xhs_store.link_xhs_note_image(note_id, media_key, extension_file_name):
+            return
+        content = await self.xhs_client.get_note_media(url)
+        if content is None:
+            return
+        await xhs_store.update_xhs_note_image(note_id, content, extension_file_name, media_key)
 
     async def get_notice_video(self, note_item: Dict):
         """
@@ -550,11 +623,39 @@ class XiaoHongShuCrawler(AbstractCrawler):
 
         if not videos:
             return
-        videoNum = 0
-        for url in videos:
-            content = await self.xhs_client.get_note_media(url)
-            if content is None:
-                continue
-            extension_file_name = f"{videoNum}.mp4"
-            videoNum += 1
-            await xhs_store.update_xhs_note_image(note_id, content, extension_file_name)
+        queue = get_media_download_queue()
+        for videoNum, url in enumerate(videos):
+            queue.submit(self.save_note_video(note_id, url, f"{videoNum}.mp4"))
+
+    async def save_note_video(self, note_id: str, url: str, extension_file_name: str):
+        """
+        download and save one note video, run in the media download queue
+        :param note_id:
+        :param url:
+        :param extension_file_name:
+        :return:
+        """
+        media_key = xhs_store.XiaoHongShuImage.make_media_key(url)
+        if await xhs_store.link_xhs_note_image(note_id, media_key, extension_file_name):
+            return
+        # 同一视频同时只下载一次，其他笔记等待下载完成后直接链接
+        stored, shared = await get_media_download_queue().single_flight(
+            media_key, lambda: self.download_note_video(note_id, url, extension_file_name, media_key))
+        if stored and shared:
+            await xhs_store.link_xhs_note_image(note_id, media_key, extension_file_name)
+
+    async def download_note_video(self, note_id: str, url: str, extension_file_name: str, media_key: str) -> bool:
+        """
+        download one note video to the media store
+        :param note_id:
+        :param url:
+        :param extension_file_name:
+        :param media_key:
+        :return: whether the video is stored
+        """
+        # 视频按块流式写入本地文件，不整体读入内存，中断后下次从已下载的位置续传
+        file_path = xhs_store.get_xhs_note_media_download_path(media_key, "mp4")
+        if not await self.xhs_client.download_note_media(url, file_path):
+            return False
+        await xhs_store.update_xhs_note_media_file(note_id, file_path, extension_file_name, media_key)
+        return True
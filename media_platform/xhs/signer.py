@@ -0,0 +1,126 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 小红书请求头签名：同一轮事件循环中的签名请求合并为一次 page.evaluate，分摊到多个签名页面；
+#            localStorage 中很少变化的值（如 b1）缓存一段时间，过期或登录态变化后随下一批签名一起重新读取
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from playwright.async_api import Page
+
+import config
+from tools import utils
+
+# 签名需要的 localStorage 字段
+LOCAL_STORAGE_KEYS = ("b1", "b1b1")
+
+_SIGN_BATCH_JS = """
+([items, keys]) => {
+    const signs = items.map(([url, data]) => {
+        try {
+            return {result: window._webmsxyw(url, data)};
+        } catch (e) {
+            return {error: String(e)};
+        }
+    });
+    const storage = keys ? Object.fromEntries(keys.map((key) => [key, window.localStorage.getItem(key)])) : null;
+    return {signs, storage};
+}
+"""
+
+
+class XhsSignError(Exception):
+    """页面签名失败"""
+
+
+class XhsPageSigner:
+    def __init__(self, pages: Sequence[Page], local_storage_ttl: Optional[float] = None,
+                 batch_size: Optional[int] = None):
+        """
+        :param pages: 已打开小红书页面的签名页面
+        :param local_storage_ttl: localStorage 缓存时间（秒），默认读取配置 XHS_LOCAL_STORAGE_TTL
+        :param batch_size: 一次 page.evaluate 中最多的签名数，默认读取配置 XHS_SIGN_BATCH_SIZE
+        """
+        self._pages = list(pages)
+        self._busy = [0] * len(self._pages)
+        self._local_storage_ttl = config.XHS_LOCAL_STORAGE_TTL if local_storage_ttl is None else local_storage_ttl
+        self._batch_size = max(1, batch_size or config.XHS_SIGN_BATCH_SIZE)
+        self._local_storage: Optional[Dict[str, str]] = None
+        self._local_storage_ts = 0.0
+        self._pending: List[Tuple[str, Any, asyncio.Future]] = []
+        self._tasks = set()
+
+    def invalidate(self):
+        """清空缓存的 localStorage，下一批签名时重新读取，登录态变化后调用"""
+        self._local_storage = None
+
+    def _local_storage_expired(self) -> bool:
+        return self._local_storage is None or time.monotonic() - self._local_storage_ts > self._local_storage_ttl
+
+    async def sign(self, url: str, data=None) -> Tuple[Dict, Dict[str, str]]:
+        """
+        对请求签名，同时发起的签名请求合并执行
+        Args:
+            url: 请求的URL，GET请求需要包含请求参数
+            data: POST请求体
+
+        Returns:
+            (页面签名结果 X-s/X-t, localStorage 字段)
+        """
+        future = asyncio.get_running_loop().create_future()
+        if not self._pending:
+            asyncio.get_running_loop().call_soon(self._flush)
+        self._pending.append((url, data, future))
+        result = await future
+        return result, self._local_storage or {}
+
+    def _flush(self):
+        pending, self._pending = self._pending, []
+        for start in range(0, len(pending), self._batch_size):
+            batch = pending[start:start + self._batch_size]
+            # 按进行中的批次数选择最空闲的页面
+            index = self._busy.index(min(self._busy))
+            self._busy[index] += 1
+            task = asyncio.create_task(self._run_batch(index, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, index: int, batch: List[Tuple[str, Any, asyncio.Future]]):
+        try:
+            signs = await self._evaluate(index, [[url, data] for url, data, _ in batch])
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(XhsSignError(f"sign on page failed: {e}"))
+            return
+        finally:
+            self._busy[index] -= 1
+        for (url, _, future), item in zip(batch, signs):
+            if future.done():
+                continue
+            if "error" in item:
+                future.set_exception(XhsSignError(f"sign {url} failed: {item['error']}"))
+            else:
+                future.set_result(item["result"])
+
+    async def _evaluate(self, index: int, items: List) -> List[Dict]:
+        # localStorage 过期时随本批签名一起读取，不额外增加一次页面往返
+        refresh = self._local_storage_expired()
+        result = await self._pages[index].evaluate(
+            _SIGN_BATCH_JS, [items, list(LOCAL_STORAGE_KEYS) if refresh else None])
+        if result.get("storage") is not None:
+            self._local_storage = {key: value or "" for key, value in result["storage"].items()}
+            self._local_storage_ts = time.monotonic()
+        if len(items) > 1:
+            utils.logger.debug(f"[XhsPageSigner] signed {len(items)} requests on page {index}")
+        return result["signs"]
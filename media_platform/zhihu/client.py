@@ -15,7 +15,6 @@ import json
 from typing import Any, Callable, Dict, List, Optional, Union
 from urllib.parse import urlencode
 
-import httpx
 from httpx import Response
 from playwright.async_api import BrowserContext, Page
 from tenacity import retry, stop_after_attempt, wait_fixed
@@ -58,7 +57,7 @@ class ZhiHuClient(AbstractApiClient):
         d_c0 = self.cookie_dict.get("d_c0")
         if not d_c0:
             raise Exception("d_c0 not found in cookies")
-        sign_res = sign(url, self.default_headers["cookie"])
+        sign_res = await sign(url, self.default_headers["cookie"])
         headers = self.default_headers.copy()
         headers['x-zst-81'] = sign_res["x-zst-81"]
         headers['x-zse-96'] = sign_res["x-zse-96"]
@@ -79,16 +78,12 @@ class ZhiHuClient(AbstractApiClient):
         # return response.text
         return_response = kwargs.pop('return_response', False)
 
-        # 修复 httpx 新版本中 proxies 参数的使用方式
-        client_kwargs = {}
-        if self.proxies:
-            client_kwargs["proxies"] = self.proxies
-            
-        async with httpx.AsyncClient(**client_kwargs) as client:
-            response = await client.request(
-                method, url, timeout=self.timeout,
-                **kwargs
-            )
+        # 复用长期持有的连接池，代理变化时重建
+        client = self.http_pool.get(self.proxies)
+        response = await client.request(
+            method, url, timeout=self.timeout,
+            **kwargs
+        )
 
         if response.status_code != 200:
             utils.logger.error(f"[ZhiHuClient.request] Requset Url: {url}, Request error: {response.text}")
@@ -276,9 +271,10 @@ class ZhiHuClient(AbstractApiClient):
         Returns:
 
         """
+        # 从翻页断点继续
+        entity = f"zhihu:comments:{content.content_id}"
+        offset, fetched_count, is_end = self.get_checkpoint(entity, "")
         result: List[ZhihuComment] = []
-        is_end: bool = False
-        offset: str = ""
         limit: int = 10
         while not is_end:
             root_comment_res = await self.get_root_comments(content.content_id, content.content_type, offset, limit)
@@ -297,6 +293,7 @@ class ZhiHuClient(AbstractApiClient):
 
             result.extend(comments)
             await self.get_comments_all_sub_comments(content, comments, crawl_interval=crawl_interval, callback=callback)
+            await self.save_checkpoint(entity, offset, fetched_count + len(result), done=bool(is_end))
             await asyncio.sleep(crawl_interval)
         return result
 
@@ -429,9 +426,11 @@ class ZhiHuClient(AbstractApiClient):
         Returns:
 
         """
-        all_contents: List[ZhihuContent] = []
-        is_end: bool = False
-        offset: int = 0
+        # 从翻页断点继续，断点中保留已获取的内容，供续爬后获取这些内容的评论
+        entity = f"zhihu:creator_answers:{creator.url_token}"
+        checkpoint, _, is_end = self.get_checkpoint(entity, {"offset": 0, "contents": []})
+        all_contents: List[ZhihuContent] = [ZhihuContent(**item) for item in checkpoint["contents"]]
+        offset: int = checkpoint["offset"]
         limit: int = 20
         while not is_end:
             res = await self.get_creator_answers(creator.url_token, offset, limit)
@@ -445,6 +444,9 @@ class ZhiHuClient(AbstractApiClient):
                 await callback(contents)
             all_contents.extend(contents)
             offset += limit
+            await self.save_checkpoint(
+                entity, {"offset": offset, "contents": [item.model_dump() for item in all_contents]},
+                len(all_contents), done=bool(is_end))
             await asyncio.sleep(crawl_interval)
         return all_contents
 
@@ -461,9 +463,11 @@ class ZhiHuClient(AbstractApiClient):
         Returns:
 
         """
-        all_contents: List[ZhihuContent] = []
-        is_end: bool = False
-        offset: int = 0
+        # 从翻页断点继续，断点中保留已获取的内容，供续爬后获取这些内容的评论
+        entity = f"zhihu:creator_articles:{creator.url_token}"
+        checkpoint, _, is_end = self.get_checkpoint(entity, {"offset": 0, "contents": []})
+        all_contents: List[ZhihuContent] = [ZhihuContent(**item) for item in checkpoint["contents"]]
+        offset: int = checkpoint["offset"]
         limit: int = 20
         while not is_end:
             res = await self.get_creator_articles(creator.url_token, offset, limit)
@@ -476,6 +480,9 @@ class ZhiHuClient(AbstractApiClient):
                 await callback(contents)
             all_contents.extend(contents)
             offset += limit
+            await self.save_checkpoint(
+                entity, {"offset": offset, "contents": [item.model_dump() for item in all_contents]},
+                len(all_contents), done=bool(is_end))
             await asyncio.sleep(crawl_interval)
         return all_contents
 
@@ -492,9 +499,11 @@ class ZhiHuClient(AbstractApiClient):
         Returns:
 
         """
-        all_contents: List[ZhihuContent] = []
-        is_end: bool = False
-        offset: int = 0
+        # 从翻页断点继续，断点中保留已获取的内容，供续爬后获取这些内容的评论
+        entity = f"zhihu:creator_videos:{creator.url_token}"
+        checkpoint, _, is_end = self.get_checkpoint(entity, {"offset": 0, "contents": []})
+        all_contents: List[ZhihuContent] = [ZhihuContent(**item) for item in checkpoint["contents"]]
+        offset: int = checkpoint["offset"]
         limit: int = 20
         while not is_end:
             res = await self.get_creator_videos(creator.url_token, offset, limit)
@@ -507,6 +516,9 @@ class ZhiHuClient(AbstractApiClient):
                 await callback(contents)
             all_contents.extend(contents)
             offset += limit
+            await self.save_checkpoint(
+                entity, {"offset": offset, "contents": [item.model_dump() for item in all_contents]},
+                len(all_contents), done=bool(is_end))
             await asyncio.sleep(crawl_interval)
         return all_contents
 
@@ -128,7 +128,12 @@ class ZhihuCrawler(AbstractCrawler):
         for keyword in config.KEYWORDS.split(","):
             source_keyword_var.set(keyword)
             utils.logger.info(f"[ZhihuCrawler.search] Current search keyword: {keyword}")
-            page = 1
+            # 从翻页断点继续，已完成的关键词直接跳过
+            entity = f"zhihu:search:{keyword}"
+            page, content_count, done = self.zhihu_client.get_checkpoint(entity, 1)
+            if done:
+                utils.logger.info(f"[ZhihuCrawler.search] Skip finished keyword: {keyword}")
+                continue
             while (page - start_page + 1) * zhihu_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
                 if page < start_page:
                     utils.logger.info(f"[ZhihuCrawler.search] Skip page {page}")
@@ -151,9 +156,12 @@ class ZhihuCrawler(AbstractCrawler):
                         await zhihu_store.update_zhihu_content(content)
 
                     await self.batch_get_content_comments(content_list)
+                    content_count += len(content_list)
+                    await self.zhihu_client.save_checkpoint(entity, page, content_count)
                 except DataFetchError:
                     utils.logger.error("[ZhihuCrawler.search] Search content error")
                     return
+            await self.zhihu_client.save_checkpoint(entity, page, content_count, done=True)
 
     async def batch_get_content_comments(self, content_list: List[ZhihuContent]):
         """
@@ -28,9 +28,11 @@ CREATE TABLE `bilibili_video`
     `source_keyword`   varchar(255) DEFAULT '' COMMENT '搜索来源关键字',
     `task_times_id`    varchar(64)  DEFAULT NULL COMMENT '任务时间ID',
     PRIMARY KEY (`id`),
-    KEY                `idx_bilibili_vi_video_i_31c36e` (`video_id`),
+    UNIQUE KEY         `idx_bilibili_vi_video_i_31c36e` (`video_id`),
     KEY                `idx_bilibili_vi_create__73e0ec` (`create_time`),
-    KEY                `idx_bilibili_vi_task_times_id` (`task_times_id`)
+    KEY                `idx_bilibili_vi_task_times_id` (`task_times_id`),
+    KEY                `idx_bilibili_video_task_times_id_create_time` (`task_times_id`, `create_time`),
+    FULLTEXT KEY `ft_bilibili_video_search` (`title`, `desc`) WITH PARSER ngram
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='B站视频';
 
 -- ----------------------------
@@ -56,9 +58,12 @@ CREATE TABLE `bilibili_video_comment`
     `like_count`        varchar(255) NOT NULL DEFAULT '0' COMMENT '点赞数',
     `task_times_id`     varchar(64)  DEFAULT NULL COMMENT '任务时间ID',
     PRIMARY KEY (`id`),
-    KEY                 `idx_bilibili_vi_comment_41c34e` (`comment_id`),
+    UNIQUE KEY          `idx_bilibili_vi_comment_41c34e` (`comment_id`),
     KEY                 `idx_bilibili_vi_video_i_f22873` (`video_id`),
-    KEY                 `idx_bilibili_vi_task_times_id` (`task_times_id`)
+    KEY                 `idx_bilibili_vi_task_times_id` (`task_times_id`),
+    KEY                 `idx_bilibili_video_comment_task_times_id_create_time` (`task_times_id`, `create_time`),
+    KEY                 `idx_bilibili_video_comment_create_time` (`create_time`),
+    FULLTEXT KEY `ft_bilibili_video_comment_search` (`content`) WITH PARSER ngram
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='B 站视频评论';
 
 -- ----------------------------
@@ -81,8 +86,10 @@ CREATE TABLE `bilibili_up_info`
     `is_official`    int          DEFAULT NULL COMMENT '是否官号',
     `task_times_id`  varchar(64)  DEFAULT NULL COMMENT '任务时间ID',
     PRIMARY KEY (`id`),
-    KEY              `idx_bilibili_vi_user_123456` (`user_id`),
-    KEY              `idx_bilibili_up_task_times_id` (`task_times_id`)
+    UNIQUE KEY       `idx_bilibili_vi_user_123456` (`user_id`),
+    KEY              `idx_bilibili_up_task_times_id` (`task_times_id`),
+    KEY              `idx_bilibili_up_info_task_times_id_add_ts` (`task_times_id`, `add_ts`),
+    KEY              `idx_bilibili_up_info_add_ts` (`add_ts`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='B 站UP主信息';
 
 -- ----------------------------
@@ -106,7 +113,10 @@ CREATE TABLE `bilibili_contact_info`
     PRIMARY KEY (`id`),
     KEY              `idx_bilibili_contact_info_up_id` (`up_id`),
     KEY              `idx_bilibili_contact_info_fan_id` (`fan_id`),
-    KEY              `idx_bilibili_contact_task_times_id` (`task_times_id`)
+    UNIQUE KEY       `idx_bilibili_contact_info_up_id_fan_id` (`up_id`, `fan_id`),
+    KEY              `idx_bilibili_contact_task_times_id` (`task_times_id`),
+    KEY              `idx_bilibili_contact_info_task_times_id_add_ts` (`task_times_id`, `add_ts`),
+    KEY              `idx_bilibili_contact_info_add_ts` (`add_ts`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='B 站联系人信息';
 
 -- ----------------------------
@@ -129,8 +139,10 @@ CREATE TABLE `bilibili_up_dynamic`
     `last_modify_ts` bigint NOT NULL COMMENT '记录最后修改时间戳',
     `task_times_id`  varchar(64) DEFAULT NULL COMMENT '任务时间ID',
     PRIMARY KEY (`id`),
-    KEY              `idx_bilibili_up_dynamic_dynamic_id` (`dynamic_id`),
-    KEY              `idx_bilibili_dynamic_task_times_id` (`task_times_id`)
+    UNIQUE KEY       `idx_bilibili_up_dynamic_dynamic_id` (`dynamic_id`),
+    KEY              `idx_bilibili_dynamic_task_times_id` (`task_times_id`),
+    KEY              `idx_bilibili_up_dynamic_task_times_id_pub_ts` (`task_times_id`, `pub_ts`),
+    KEY              `idx_bilibili_up_dynamic_pub_ts` (`pub_ts`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='B 站up主动态信息';
 
 -- ----------------------------
@@ -165,9 +177,11 @@ CREATE TABLE `douyin_aweme`
     `source_keyword`  varchar(255) DEFAULT '' COMMENT '搜索来源关键字',
     `task_times_id`   varchar(64)  DEFAULT NULL COMMENT '任务时间ID',
     PRIMARY KEY (`id`),
-    KEY               `idx_douyin_awem_aweme_i_6f7bc6` (`aweme_id`),
+    UNIQUE KEY        `idx_douyin_awem_aweme_i_6f7bc6` (`aweme_id`),
     KEY               `idx_douyin_awem_create__299dfe` (`create_time`),
-    KEY               `idx_douyin_aweme_task_times_id` (`task_times_id`)
+    KEY               `idx_douyin_aweme_task_times_id` (`task_times_id`),
+    KEY               `idx_douyin_aweme_task_times_id_create_time` (`task_times_id`, `create_time`),
+    FULLTEXT KEY `ft_douyin_aweme_search` (`title`, `desc`) WITH PARSER ngram
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='抖音视频';
 
 -- ----------------------------
@@ -197,9 +211,12 @@ CREATE TABLE `douyin_aweme_comment`
     `pictures`          varchar(500) NOT NULL DEFAULT '' COMMENT '评论图片列表',
     `task_times_id`     varchar(64)  DEFAULT NULL COMMENT '任务时间ID',
     PRIMARY KEY (`id`),
-    KEY                 `idx_douyin_awem_comment_fcd7e4` (`comment_id`),
+    UNIQUE KEY          `idx_douyin_awem_comment_fcd7e4` (`comment_id`),
     KEY                 `idx_douyin_awem_aweme_i_c50049` (`aweme_id`),
-    KEY                 `idx_douyin_comment_task_times_id` (`task_times_id`)
+    KEY                 `idx_douyin_comment_task_times_id` (`task_times_id`),
+    KEY                 `idx_douyin_aweme_comment_task_times_id_create_time` (`task_times_id`, `create_time`),
+    KEY                 `idx_douyin_aweme_comment_create_time` (`create_time`),
+    FULLTEXT KEY `ft_douyin_aweme_comment_search` (`content`) WITH PARSER ngram
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='抖音视频评论';
 
 -- ----------------------------
@@ -223,7 +240,10 @@ CREATE TABLE `dy_creator`
     `videos_count`   varchar(16)  DEFAULT NULL COMMENT '作品数',
     `task_times_id`  varchar(64)  DEFAULT NULL COMMENT '任务时间ID',
     PRIMARY KEY (`id`),
-    KEY              `idx_dy_creator_task_times_id` (`task_times_id`)
+    UNIQUE KEY       `idx_dy_creator_user_id` (`user_id`),
+    KEY              `idx_dy_creator_task_times_id` (`task_times_id`),
+    KEY              `idx_dy_creator_task_times_id_add_ts` (`task_times_id`, `add_ts`),
+    KEY              `idx_dy_creator_add_ts` (`add_ts`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='抖音博主信息';
 
 -- ----------------------------
@@ -251,9 +271,11 @@ CREATE TABLE `kuaishou_video`
     `source_keyword`  varchar(255) DEFAULT '' COMMENT '搜索来源关键字',
     `task_times_id`   varchar(64)  DEFAULT NULL COMMENT '任务时间ID',
     PRIMARY KEY (`id`),
-    KEY               `idx_kuaishou_vi_video_i_c5c6a6` (`video_id`),
+    UNIQUE KEY        `idx_kuaishou_vi_video_i_c5c6a6` (`video_id`),
     KEY               `idx_kuaishou_vi_create__a10dee` (`create_time`),
-    KEY               `idx_kuaishou_video_task_times_id` (`task_times_id`)
+    KEY               `idx_kuaishou_video_task_times_id` (`task_times_id`),
+    KEY               `idx_kuaishou_video_task_times_id_create_time` (`task_times_id`, `create_time`),
+    FULLTEXT KEY `ft_kuaishou_video_search` (`title`, `desc`) WITH PARSER ngram
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='快手视频';
 
 -- ----------------------------
@@ -275,9 +297,12 @@ CREATE TABLE `kuaishou_video_comment`
     `sub_comment_count` varchar(16) NOT NULL COMMENT '评论回复数',
     `task_times_id`     varchar(64)  DEFAULT NULL COMMENT '任务时间ID',
     PRIMARY KEY (`id`),
-    KEY                 `idx_kuaishou_vi_comment_ed48fa` (`comment_id`),
+    UNIQUE KEY          `idx_kuaishou_vi_comment_ed48fa` (`comment_id`),
     KEY                 `idx_kuaishou_vi_video_i_e50914` (`video_id`),
-    KEY                 `idx_kuaishou_comment_task_times_id` (`task_times_id`)
+    KEY                 `idx_kuaishou_comment_task_times_id` (`task_times_id`),
+    KEY                 `idx_kuaishou_video_comment_task_times_id_create_time` (`task_times_id`, `create_time`),
+    KEY                 `idx_kuaishou_video_comment_create_time` (`create_time`),
+    FULLTEXT KEY `ft_kuaishou_video_comment_search` (`content`) WITH PARSER ngram
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='快手视频评论';
 
 -- ----------------------------
@@ -306,10 +331,12 @@ CREATE TABLE `weibo_note`
     `source_keyword`   varchar(255) DEFAULT '' COMMENT '搜索来源关键字',
     `task_times_id`    varchar(64)  DEFAULT NULL COMMENT '任务时间ID',
     PRIMARY KEY (`id`),
-    KEY                `idx_weibo_note_note_id_f95b1a` (`note_id`),
+    UNIQUE KEY         `idx_weibo_note_note_id_f95b1a` (`note_id`),
     KEY                `idx_weibo_note_create__692709` (`create_time`),
     KEY                `idx_weibo_note_create__d05ed2` (`create_date_time`),
-    KEY                `idx_weibo_note_task_times_id` (`task_times_id`)
+    KEY                `idx_weibo_note_task_times_id` (`task_times_id`),
+    KEY                `idx_weibo_note_task_times_id_create_time` (`task_times_id`, `create_time`),
+    FULLTEXT KEY `ft_weibo_note_search` (`content`) WITH PARSER ngram
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='微博帖子';
 
 -- ----------------------------
@@ -337,10 +364,13 @@ CREATE TABLE `weibo_note_comment`
     `parent_comment_id`  VARCHAR(64) DEFAULT NULL COMMENT '父评论ID',
     `task_times_id`      varchar(64)  DEFAULT NULL COMMENT '任务时间ID',
     PRIMARY KEY (`id`),
-    KEY                  `idx_weibo_note__comment_c7611c` (`comment_id`),
+    UNIQUE KEY           `idx_weibo_note__comment_c7611c` (`comment_id`),
     KEY                  `idx_weibo_note__note_id_24f108` (`note_id`),
     KEY                  `idx_weibo_note__create__667fe3` (`create_date_time`),
-    KEY                  `idx_weibo_comment_task_times_id` (`task_times_id`)
+    KEY                  `idx_weibo_comment_task_times_id` (`task_times_id`),
+    KEY                  `idx_weibo_note_comment_task_times_id_create_time` (`task_times_id`, `create_time`),
+    KEY                  `idx_weibo_note_comment_create_time` (`create_time`),
+    FULLTEXT KEY `ft_weibo_note_comment_search` (`content`) WITH PARSER ngram
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='微博帖子评论';
 
 -- ----------------------------
@@ -364,7 +394,10 @@ CREATE TABLE `xhs_creator`
     `tag_list`       longtext COMMENT '标签列表',
     `task_times_id`  varchar(64)  DEFAULT NULL COMMENT '任务时间ID',
     PRIMARY KEY (`id`),
-    KEY              `idx_xhs_creator_task_times_id` (`task_times_id`)
+    UNIQUE KEY       `idx_xhs_creator_user_id` (`user_id`),
+    KEY              `idx_xhs_creator_task_times_id` (`task_times_id`),
+    KEY              `idx_xhs_creator_task_times_id_add_ts` (`task_times_id`, `add_ts`),
+    KEY              `idx_xhs_creator_add_ts` (`add_ts`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='小红书博主';
 
 -- ----------------------------
@@ -398,9 +431,11 @@ CREATE TABLE `xhs_note`
     `xsec_token`       varchar(50) DEFAULT NULL COMMENT '签名算法',
     `task_times_id`    varchar(64)  DEFAULT NULL COMMENT '任务时间ID',
     PRIMARY KEY (`id`),
-    KEY                `idx_xhs_note_note_id_209457` (`note_id`),
+    UNIQUE KEY         `idx_xhs_note_note_id_209457` (`note_id`),
     KEY                `idx_xhs_note_time_eaa910` (`time`),
-    KEY                `idx_xhs_note_task_times_id` (`task_times_id`)
+    KEY                `idx_xhs_note_task_times_id` (`task_times_id`),
+    KEY                `idx_xhs_note_task_times_id_time` (`task_times_id`, `time`),
+    FULLTEXT KEY `ft_xhs_note_search` (`title`, `desc`) WITH PARSER ngram
 ) ENGINE=InnoDB AUTO_INCREMENT=1 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='小红书笔记';
 
 -- ----------------------------
@@ -426,9 +461,11 @@ CREATE TABLE `xhs_note_comment`
     `like_count`        VARCHAR(64) DEFAULT NULL COMMENT '评论点赞数量',
     `task_times_id`     varchar(64)  DEFAULT NULL COMMENT '任务时间ID',
     PRIMARY KEY (`id`),
-    KEY                 `idx_xhs_note_co_comment_8e8349` (`comment_id`),
+    UNIQUE KEY          `idx_xhs_note_co_comment_8e8349` (`comment_id`),
     KEY                 `idx_xhs_note_co_create__204f8d` (`create_time`),
-    KEY                 `idx_xhs_comment_task_times_id` (`task_times_id`)
+    KEY                 `idx_xhs_comment_task_times_id` (`task_times_id`),
+    KEY                 `idx_xhs_note_comment_task_times_id_create_time` (`task_times_id`, `create_time`),
+    FULLTEXT KEY `ft_xhs_note_comment_search` (`content`) WITH PARSER ngram
 ) ENGINE=InnoDB AUTO_INCREMENT=1 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='小红书笔记评论';
 
 -- ----------------------------
@@ -456,9 +493,11 @@ CREATE TABLE tieba_note
     last_modify_ts    BIGINT       NOT NULL COMMENT '最后修改时间戳',
     source_keyword    varchar(255) DEFAULT '' COMMENT '搜索来源关键字',
     task_times_id     varchar(64)  DEFAULT NULL COMMENT '任务时间ID',
-    KEY               `idx_tieba_note_note_id` (`note_id`),
+    UNIQUE KEY        `idx_tieba_note_note_id` (`note_id`),
     KEY               `idx_tieba_note_publish_time` (`publish_time`),
-    KEY               `idx_tieba_note_task_times_id` (`task_times_id`)
+    KEY               `idx_tieba_note_task_times_id` (`task_times_id`),
+    KEY               `idx_tieba_note_task_times_id_publish_time` (`task_times_id`, `publish_time`),
+    FULLTEXT KEY `ft_tieba_note_search` (`title`, `desc`) WITH PARSER ngram
 ) ENGINE=InnoDB AUTO_INCREMENT=1 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='贴吧帖子表';
 
 -- ----------------------------
@@ -485,10 +524,12 @@ CREATE TABLE tieba_comment
     add_ts            BIGINT       NOT NULL COMMENT '添加时间戳',
     last_modify_ts    BIGINT       NOT NULL COMMENT '最后修改时间戳',
     task_times_id     varchar(64)  DEFAULT NULL COMMENT '任务时间ID',
-    KEY               `idx_tieba_comment_comment_id` (`note_id`),
+    UNIQUE KEY        `idx_tieba_comment_comment_id` (`comment_id`),
     KEY               `idx_tieba_comment_note_id` (`note_id`),
     KEY               `idx_tieba_comment_publish_time` (`publish_time`),
-    KEY               `idx_tieba_comment_task_times_id` (`task_times_id`)
+    KEY               `idx_tieba_comment_task_times_id` (`task_times_id`),
+    KEY               `idx_tieba_comment_task_times_id_publish_time` (`task_times_id`, `publish_time`),
+    FULLTEXT KEY `ft_tieba_comment_search` (`content`) WITH PARSER ngram
 ) ENGINE=InnoDB AUTO_INCREMENT=1 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='贴吧评论表';
 
 -- ----------------------------
@@ -511,7 +552,10 @@ CREATE TABLE `weibo_creator`
     `tag_list`       longtext COMMENT '标签列表',
     `task_times_id`  varchar(64)  DEFAULT NULL COMMENT '任务时间ID',
     PRIMARY KEY (`id`),
-    KEY              `idx_weibo_creator_task_times_id` (`task_times_id`)
+    UNIQUE KEY       `idx_weibo_creator_user_id` (`user_id`),
+    KEY              `idx_weibo_creator_task_times_id` (`task_times_id`),
+    KEY              `idx_weibo_creator_task_times_id_add_ts` (`task_times_id`, `add_ts`),
+    KEY              `idx_weibo_creator_add_ts` (`add_ts`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='微博博主';
 
 -- ----------------------------
@@ -534,7 +578,10 @@ CREATE TABLE `tieba_creator`
     `registration_duration` varchar(16)  DEFAULT NULL COMMENT '吧龄',
     `task_times_id`         varchar(64)  DEFAULT NULL COMMENT '任务时间ID',
     PRIMARY KEY (`id`),
-    KEY                     `idx_tieba_creator_task_times_id` (`task_times_id`)
+    UNIQUE KEY              `idx_tieba_creator_user_id` (`user_id`),
+    KEY                     `idx_tieba_creator_task_times_id` (`task_times_id`),
+    KEY                     `idx_tieba_creator_task_times_id_add_ts` (`task_times_id`, `add_ts`),
+    KEY                     `idx_tieba_creator_add_ts` (`add_ts`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='贴吧创作者';
 
 -- ----------------------------
@@ -564,9 +611,11 @@ CREATE TABLE `zhihu_content` (
     `last_modify_ts` bigint NOT NULL COMMENT '记录最后修改时间戳',
     `task_times_id` varchar(64) DEFAULT NULL COMMENT '任务时间ID',
     PRIMARY KEY (`id`),
-    KEY `idx_zhihu_content_content_id` (`content_id`),
+    UNIQUE KEY `idx_zhihu_content_content_id` (`content_id`),
     KEY `idx_zhihu_content_created_time` (`created_time`),
-    KEY `idx_zhihu_content_task_times_id` (`task_times_id`)
+    KEY `idx_zhihu_content_task_times_id` (`task_times_id`),
+    KEY `idx_zhihu_content_task_times_id_created_time` (`task_times_id`, `created_time`),
+    FULLTEXT KEY `ft_zhihu_content_search` (`title`, `desc`, `content_text`) WITH PARSER ngram
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='知乎内容（回答、文章、视频）';
 
 -- ----------------------------
@@ -593,10 +642,12 @@ CREATE TABLE `zhihu_comment` (
     `last_modify_ts` bigint NOT NULL COMMENT '记录最后修改时间戳',
     `task_times_id` varchar(64) DEFAULT NULL COMMENT '任务时间ID',
     PRIMARY KEY (`id`),
-    KEY `idx_zhihu_comment_comment_id` (`comment_id`),
+    UNIQUE KEY `idx_zhihu_comment_comment_id` (`comment_id`),
     KEY `idx_zhihu_comment_content_id` (`content_id`),
     KEY `idx_zhihu_comment_publish_time` (`publish_time`),
-    KEY `idx_zhihu_comment_task_times_id` (`task_times_id`)
+    KEY `idx_zhihu_comment_task_times_id` (`task_times_id`),
+    KEY `idx_zhihu_comment_task_times_id_publish_time` (`task_times_id`, `publish_time`),
+    FULLTEXT KEY `ft_zhihu_comment_search` (`content`) WITH PARSER ngram
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='知乎评论';
 
 -- ----------------------------
@@ -625,7 +676,9 @@ CREATE TABLE `zhihu_creator` (
     `task_times_id` varchar(64) DEFAULT NULL COMMENT '任务时间ID',
     PRIMARY KEY (`id`),
     UNIQUE KEY `idx_zhihu_creator_user_id` (`user_id`),
-    KEY `idx_zhihu_creator_task_times_id` (`task_times_id`)
+    KEY `idx_zhihu_creator_task_times_id` (`task_times_id`),
+    KEY `idx_zhihu_creator_task_times_id_add_ts` (`task_times_id`, `add_ts`),
+    KEY `idx_zhihu_creator_add_ts` (`add_ts`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='知乎创作者';
 
 -- ----------------------------
@@ -660,4 +713,52 @@ CREATE TABLE `crawler_tasks`
     KEY              `idx_crawler_tasks_platform` (`platform`),
     KEY              `idx_crawler_tasks_status` (`status`),
     KEY              `idx_crawler_tasks_created_at` (`created_at`)
-) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='爬虫任务表';
\ No newline at end of file
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='爬虫任务表';
+
+-- ----------------------------
+-- Table structure for table_stats
+-- ----------------------------
+DROP TABLE IF EXISTS `table_stats`;
+CREATE TABLE `table_stats`
+(
+    `id`            int          NOT NULL AUTO_INCREMENT COMMENT '自增ID',
+    `table_name`    varchar(64)  NOT NULL COMMENT '数据表名',
+    `stat_date`     date         NOT NULL COMMENT '统计日期（按记录添加时间）',
+    `task_times_id` varchar(64)  NOT NULL DEFAULT '' COMMENT '任务时间ID',
+    `row_count`     bigint       NOT NULL DEFAULT 0 COMMENT '记录数',
+    `last_add_ts`   bigint       DEFAULT NULL COMMENT '最近一条记录的添加时间戳',
+    PRIMARY KEY (`id`),
+    UNIQUE KEY `idx_table_stats_table_date_task` (`table_name`, `stat_date`, `task_times_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='数据表行数汇总，由触发器增量维护';
+
+-- ----------------------------
+-- Table structure for crawl_seen_index
+-- ----------------------------
+DROP TABLE IF EXISTS `crawl_seen_index`;
+CREATE TABLE `crawl_seen_index`
+(
+    `id`            int          NOT NULL AUTO_INCREMENT COMMENT '自增ID',
+    `platform`      varchar(16)  NOT NULL COMMENT '平台名称',
+    `content_id`    varchar(64)  NOT NULL COMMENT '内容ID',
+    `last_fetch_ts` bigint       NOT NULL COMMENT '最近一次完整抓取的时间戳',
+    `fingerprint`   varchar(255) DEFAULT NULL COMMENT '互动数据指纹',
+    PRIMARY KEY (`id`),
+    UNIQUE KEY `idx_crawl_seen_index_platform_content` (`platform`, `content_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='已爬取内容索引';
+
+-- ----------------------------
+-- Table structure for crawl_checkpoints
+-- ----------------------------
+DROP TABLE IF EXISTS `crawl_checkpoints`;
+CREATE TABLE `crawl_checkpoints`
+(
+    `id`             int          NOT NULL AUTO_INCREMENT COMMENT '自增ID',
+    `task_times_id`  varchar(64)  NOT NULL COMMENT '任务时间ID',
+    `entity`         varchar(255) NOT NULL COMMENT '翻页实体，如 xhs:comments:笔记ID',
+    `cursor`         text         DEFAULT NULL COMMENT '下一页的游标（JSON）',
+    `item_count`     int          NOT NULL DEFAULT 0 COMMENT '已获取的数量',
+    `done`           tinyint      NOT NULL DEFAULT 0 COMMENT '是否已翻页完成',
+    `last_modify_ts` bigint       NOT NULL COMMENT '最后更新时间戳',
+    PRIMARY KEY (`id`),
+    UNIQUE KEY `idx_crawl_checkpoints_task_entity` (`task_times_id`, `entity`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='分页断点';
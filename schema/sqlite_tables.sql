@@ -1,6 +1,9 @@
 -- SQLite版本的数据库表结构
 -- 注意：SQLite不支持某些MySQL特性，需要进行适配
 
+-- 增量回收空闲页，需要在建表之前设置；已有数据库可通过 debug_tools/db_maintenance.py --enable-incremental 切换
+PRAGMA auto_vacuum = INCREMENTAL;
+
 -- ----------------------------
 -- Table structure for bilibili_video
 -- ----------------------------
@@ -32,9 +35,10 @@ CREATE TABLE `bilibili_video`
     `task_times_id`    TEXT DEFAULT NULL
 );
 
-CREATE INDEX `idx_bilibili_vi_video_i_31c36e` ON `bilibili_video` (`video_id`);
+CREATE UNIQUE INDEX `idx_bilibili_vi_video_i_31c36e` ON `bilibili_video` (`video_id`);
 CREATE INDEX `idx_bilibili_vi_create__73e0ec` ON `bilibili_video` (`create_time`);
 CREATE INDEX `idx_bilibili_vi_task_times_id` ON `bilibili_video` (`task_times_id`);
+CREATE INDEX `idx_bilibili_video_task_times_id_create_time` ON `bilibili_video` (`task_times_id`, `create_time`);
 
 -- ----------------------------
 -- Table structure for bilibili_video_comment
@@ -60,9 +64,11 @@ CREATE TABLE `bilibili_video_comment`
     `task_times_id`     TEXT DEFAULT NULL
 );
 
-CREATE INDEX `idx_bilibili_vi_comment_41c34e` ON `bilibili_video_comment` (`comment_id`);
+CREATE UNIQUE INDEX `idx_bilibili_vi_comment_41c34e` ON `bilibili_video_comment` (`comment_id`);
 CREATE INDEX `idx_bilibili_vi_video_i_f22873` ON `bilibili_video_comment` (`video_id`);
 CREATE INDEX `idx_bilibili_vi_comment_task_times_id` ON `bilibili_video_comment` (`task_times_id`);
+CREATE INDEX `idx_bilibili_video_comment_task_times_id_create_time` ON `bilibili_video_comment` (`task_times_id`, `create_time`);
+CREATE INDEX `idx_bilibili_video_comment_create_time` ON `bilibili_video_comment` (`create_time`);
 
 -- ----------------------------
 -- Table structure for bilibili_up_info
@@ -85,8 +91,10 @@ CREATE TABLE `bilibili_up_info`
     `task_times_id`  TEXT DEFAULT NULL
 );
 
-CREATE INDEX `idx_bilibili_vi_user_123456` ON `bilibili_up_info` (`user_id`);
+CREATE UNIQUE INDEX `idx_bilibili_vi_user_123456` ON `bilibili_up_info` (`user_id`);
 CREATE INDEX `idx_bilibili_up_info_task_times_id` ON `bilibili_up_info` (`task_times_id`);
+CREATE INDEX `idx_bilibili_up_info_task_times_id_add_ts` ON `bilibili_up_info` (`task_times_id`, `add_ts`);
+CREATE INDEX `idx_bilibili_up_info_add_ts` ON `bilibili_up_info` (`add_ts`);
 
 -- ----------------------------
 -- Table structure for bilibili_contact_info
@@ -110,7 +118,10 @@ CREATE TABLE `bilibili_contact_info`
 
 CREATE INDEX `idx_bilibili_contact_info_up_id` ON `bilibili_contact_info` (`up_id`);
 CREATE INDEX `idx_bilibili_contact_info_fan_id` ON `bilibili_contact_info` (`fan_id`);
+CREATE UNIQUE INDEX `idx_bilibili_contact_info_up_id_fan_id` ON `bilibili_contact_info` (`up_id`, `fan_id`);
 CREATE INDEX `idx_bilibili_contact_info_task_times_id` ON `bilibili_contact_info` (`task_times_id`);
+CREATE INDEX `idx_bilibili_contact_info_task_times_id_add_ts` ON `bilibili_contact_info` (`task_times_id`, `add_ts`);
+CREATE INDEX `idx_bilibili_contact_info_add_ts` ON `bilibili_contact_info` (`add_ts`);
 
 -- ----------------------------
 -- Table structure for bilibili_up_dynamic
@@ -133,8 +144,10 @@ CREATE TABLE `bilibili_up_dynamic`
     `task_times_id`  TEXT DEFAULT NULL
 );
 
-CREATE INDEX `idx_bilibili_up_dynamic_dynamic_id` ON `bilibili_up_dynamic` (`dynamic_id`);
+CREATE UNIQUE INDEX `idx_bilibili_up_dynamic_dynamic_id` ON `bilibili_up_dynamic` (`dynamic_id`);
 CREATE INDEX `idx_bilibili_up_dynamic_task_times_id` ON `bilibili_up_dynamic` (`task_times_id`);
+CREATE INDEX `idx_bilibili_up_dynamic_task_times_id_pub_ts` ON `bilibili_up_dynamic` (`task_times_id`, `pub_ts`);
+CREATE INDEX `idx_bilibili_up_dynamic_pub_ts` ON `bilibili_up_dynamic` (`pub_ts`);
 
 -- ----------------------------
 -- Table structure for douyin_aweme
@@ -169,9 +182,10 @@ CREATE TABLE `douyin_aweme`
     `task_times_id`   TEXT DEFAULT NULL
 );
 
-CREATE INDEX `idx_douyin_awem_aweme_i_6f7bc6` ON `douyin_aweme` (`aweme_id`);
+CREATE UNIQUE INDEX `idx_douyin_awem_aweme_i_6f7bc6` ON `douyin_aweme` (`aweme_id`);
 CREATE INDEX `idx_douyin_awem_create__299dfe` ON `douyin_aweme` (`create_time`);
 CREATE INDEX `idx_douyin_aweme_task_times_id` ON `douyin_aweme` (`task_times_id`);
+CREATE INDEX `idx_douyin_aweme_task_times_id_create_time` ON `douyin_aweme` (`task_times_id`, `create_time`);
 
 -- ----------------------------
 -- Table structure for douyin_aweme_comment
@@ -201,9 +215,11 @@ CREATE TABLE `douyin_aweme_comment`
     `task_times_id`     TEXT DEFAULT NULL
 );
 
-CREATE INDEX `idx_douyin_awem_comment_fcd7e4` ON `douyin_aweme_comment` (`comment_id`);
+CREATE UNIQUE INDEX `idx_douyin_awem_comment_fcd7e4` ON `douyin_aweme_comment` (`comment_id`);
 CREATE INDEX `idx_douyin_awem_aweme_i_c50049` ON `douyin_aweme_comment` (`aweme_id`);
 CREATE INDEX `idx_douyin_aweme_comment_task_times_id` ON `douyin_aweme_comment` (`task_times_id`);
+CREATE INDEX `idx_douyin_aweme_comment_task_times_id_create_time` ON `douyin_aweme_comment` (`task_times_id`, `create_time`);
+CREATE INDEX `idx_douyin_aweme_comment_create_time` ON `douyin_aweme_comment` (`create_time`);
 
 -- ----------------------------
 -- Table structure for dy_creator
@@ -227,7 +243,10 @@ CREATE TABLE `dy_creator`
     `task_times_id`  TEXT DEFAULT NULL
 );
 
+CREATE UNIQUE INDEX `idx_dy_creator_user_id` ON `dy_creator` (`user_id`);
 CREATE INDEX `idx_dy_creator_task_times_id` ON `dy_creator` (`task_times_id`);
+CREATE INDEX `idx_dy_creator_task_times_id_add_ts` ON `dy_creator` (`task_times_id`, `add_ts`);
+CREATE INDEX `idx_dy_creator_add_ts` ON `dy_creator` (`add_ts`);
 
 -- ----------------------------
 -- Table structure for kuaishou_video
@@ -255,9 +274,10 @@ CREATE TABLE `kuaishou_video`
     `task_times_id`   TEXT DEFAULT NULL
 );
 
-CREATE INDEX `idx_kuaishou_vi_video_i_c5c6a6` ON `kuaishou_video` (`video_id`);
+CREATE UNIQUE INDEX `idx_kuaishou_vi_video_i_c5c6a6` ON `kuaishou_video` (`video_id`);
 CREATE INDEX `idx_kuaishou_vi_create__a10dee` ON `kuaishou_video` (`create_time`);
 CREATE INDEX `idx_kuaishou_video_task_times_id` ON `kuaishou_video` (`task_times_id`);
+CREATE INDEX `idx_kuaishou_video_task_times_id_create_time` ON `kuaishou_video` (`task_times_id`, `create_time`);
 
 -- ----------------------------
 -- Table structure for kuaishou_video_comment
@@ -281,9 +301,11 @@ CREATE TABLE `kuaishou_video_comment`
     `task_times_id`     TEXT DEFAULT NULL
 );
 
-CREATE INDEX `idx_kuaishou_vi_comment_ed48fa` ON `kuaishou_video_comment` (`comment_id`);
+CREATE UNIQUE INDEX `idx_kuaishou_vi_comment_ed48fa` ON `kuaishou_video_comment` (`comment_id`);
 CREATE INDEX `idx_kuaishou_vi_video_i_e50914` ON `kuaishou_video_comment` (`video_id`);
 CREATE INDEX `idx_kuaishou_video_comment_task_times_id` ON `kuaishou_video_comment` (`task_times_id`);
+CREATE INDEX `idx_kuaishou_video_comment_task_times_id_create_time` ON `kuaishou_video_comment` (`task_times_id`, `create_time`);
+CREATE INDEX `idx_kuaishou_video_comment_create_time` ON `kuaishou_video_comment` (`create_time`);
 
 -- ----------------------------
 -- Table structure for weibo_note
@@ -312,10 +334,11 @@ CREATE TABLE `weibo_note`
     `task_times_id`    TEXT DEFAULT NULL
 );
 
-CREATE INDEX `idx_weibo_note_note_id_f95b1a` ON `weibo_note` (`note_id`);
+CREATE UNIQUE INDEX `idx_weibo_note_note_id_f95b1a` ON `weibo_note` (`note_id`);
 CREATE INDEX `idx_weibo_note_create__692709` ON `weibo_note` (`create_time`);
 CREATE INDEX `idx_weibo_note_create__d05ed2` ON `weibo_note` (`create_date_time`);
 CREATE INDEX `idx_weibo_note_task_times_id` ON `weibo_note` (`task_times_id`);
+CREATE INDEX `idx_weibo_note_task_times_id_create_time` ON `weibo_note` (`task_times_id`, `create_time`);
 
 -- ----------------------------
 -- Table structure for weibo_note_comment
@@ -343,10 +366,12 @@ CREATE TABLE `weibo_note_comment`
     `task_times_id`      TEXT DEFAULT NULL
 );
 
-CREATE INDEX `idx_weibo_note__comment_c7611c` ON `weibo_note_comment` (`comment_id`);
+CREATE UNIQUE INDEX `idx_weibo_note__comment_c7611c` ON `weibo_note_comment` (`comment_id`);
 CREATE INDEX `idx_weibo_note__note_id_24f108` ON `weibo_note_comment` (`note_id`);
 CREATE INDEX `idx_weibo_note__create__667fe3` ON `weibo_note_comment` (`create_date_time`);
 CREATE INDEX `idx_weibo_note_comment_task_times_id` ON `weibo_note_comment` (`task_times_id`);
+CREATE INDEX `idx_weibo_note_comment_task_times_id_create_time` ON `weibo_note_comment` (`task_times_id`, `create_time`);
+CREATE INDEX `idx_weibo_note_comment_create_time` ON `weibo_note_comment` (`create_time`);
 
 -- ----------------------------
 -- Table structure for xhs_creator
@@ -370,7 +395,10 @@ CREATE TABLE `xhs_creator`
     `task_times_id`  TEXT DEFAULT NULL
 );
 
+CREATE UNIQUE INDEX `idx_xhs_creator_user_id` ON `xhs_creator` (`user_id`);
 CREATE INDEX `idx_xhs_creator_task_times_id` ON `xhs_creator` (`task_times_id`);
+CREATE INDEX `idx_xhs_creator_task_times_id_add_ts` ON `xhs_creator` (`task_times_id`, `add_ts`);
+CREATE INDEX `idx_xhs_creator_add_ts` ON `xhs_creator` (`add_ts`);
 
 -- ----------------------------
 -- Table structure for xhs_note
@@ -404,9 +432,10 @@ CREATE TABLE `xhs_note`
     `task_times_id`    TEXT DEFAULT NULL
 );
 
-CREATE INDEX `idx_xhs_note_note_id_209457` ON `xhs_note` (`note_id`);
+CREATE UNIQUE INDEX `idx_xhs_note_note_id_209457` ON `xhs_note` (`note_id`);
 CREATE INDEX `idx_xhs_note_time_eaa910` ON `xhs_note` (`time`);
 CREATE INDEX `idx_xhs_note_task_times_id` ON `xhs_note` (`task_times_id`);
+CREATE INDEX `idx_xhs_note_task_times_id_time` ON `xhs_note` (`task_times_id`, `time`);
 
 -- ----------------------------
 -- Table structure for xhs_note_comment
@@ -432,9 +461,10 @@ CREATE TABLE `xhs_note_comment`
     `task_times_id`     TEXT DEFAULT NULL
 );
 
-CREATE INDEX `idx_xhs_note_co_comment_8e8349` ON `xhs_note_comment` (`comment_id`);
+CREATE UNIQUE INDEX `idx_xhs_note_co_comment_8e8349` ON `xhs_note_comment` (`comment_id`);
 CREATE INDEX `idx_xhs_note_co_create__204f8d` ON `xhs_note_comment` (`create_time`);
 CREATE INDEX `idx_xhs_note_comment_task_times_id` ON `xhs_note_comment` (`task_times_id`);
+CREATE INDEX `idx_xhs_note_comment_task_times_id_create_time` ON `xhs_note_comment` (`task_times_id`, `create_time`);
 
 -- ----------------------------
 -- Table structure for tieba_note
@@ -463,9 +493,10 @@ CREATE TABLE `tieba_note`
     `task_times_id`     TEXT DEFAULT NULL
 );
 
-CREATE INDEX `idx_tieba_note_note_id` ON `tieba_note` (`note_id`);
+CREATE UNIQUE INDEX `idx_tieba_note_note_id` ON `tieba_note` (`note_id`);
 CREATE INDEX `idx_tieba_note_publish_time` ON `tieba_note` (`publish_time`);
 CREATE INDEX `idx_tieba_note_task_times_id` ON `tieba_note` (`task_times_id`);
+CREATE INDEX `idx_tieba_note_task_times_id_publish_time` ON `tieba_note` (`task_times_id`, `publish_time`);
 
 -- ----------------------------
 -- Table structure for tieba_comment
@@ -493,10 +524,11 @@ CREATE TABLE `tieba_comment`
     `task_times_id`     TEXT DEFAULT NULL
 );
 
-CREATE INDEX `idx_tieba_comment_comment_id` ON `tieba_comment` (`note_id`);
+CREATE UNIQUE INDEX `idx_tieba_comment_comment_id` ON `tieba_comment` (`comment_id`);
 CREATE INDEX `idx_tieba_comment_note_id` ON `tieba_comment` (`note_id`);
 CREATE INDEX `idx_tieba_comment_publish_time` ON `tieba_comment` (`publish_time`);
 CREATE INDEX `idx_tieba_comment_task_times_id` ON `tieba_comment` (`task_times_id`);
+CREATE INDEX `idx_tieba_comment_task_times_id_publish_time` ON `tieba_comment` (`task_times_id`, `publish_time`);
 
 -- ----------------------------
 -- Table structure for weibo_creator
@@ -519,7 +551,10 @@ CREATE TABLE `weibo_creator`
     `task_times_id`  TEXT DEFAULT NULL
 );
 
+CREATE UNIQUE INDEX `idx_weibo_creator_user_id` ON `weibo_creator` (`user_id`);
 CREATE INDEX `idx_weibo_creator_task_times_id` ON `weibo_creator` (`task_times_id`);
+CREATE INDEX `idx_weibo_creator_task_times_id_add_ts` ON `weibo_creator` (`task_times_id`, `add_ts`);
+CREATE INDEX `idx_weibo_creator_add_ts` ON `weibo_creator` (`add_ts`);
 
 -- ----------------------------
 -- Table structure for tieba_creator
@@ -542,7 +577,10 @@ CREATE TABLE `tieba_creator`
     `task_times_id`         TEXT DEFAULT NULL
 );
 
+CREATE UNIQUE INDEX `idx_tieba_creator_user_id` ON `tieba_creator` (`user_id`);
 CREATE INDEX `idx_tieba_creator_task_times_id` ON `tieba_creator` (`task_times_id`);
+CREATE INDEX `idx_tieba_creator_task_times_id_add_ts` ON `tieba_creator` (`task_times_id`, `add_ts`);
+CREATE INDEX `idx_tieba_creator_add_ts` ON `tieba_creator` (`add_ts`);
 
 -- ----------------------------
 -- Table structure for zhihu_content
@@ -572,9 +610,10 @@ CREATE TABLE `zhihu_content` (
     `task_times_id` TEXT DEFAULT NULL
 );
 
-CREATE INDEX `idx_zhihu_content_content_id` ON `zhihu_content` (`content_id`);
+CREATE UNIQUE INDEX `idx_zhihu_content_content_id` ON `zhihu_content` (`content_id`);
 CREATE INDEX `idx_zhihu_content_created_time` ON `zhihu_content` (`created_time`);
 CREATE INDEX `idx_zhihu_content_task_times_id` ON `zhihu_content` (`task_times_id`);
+CREATE INDEX `idx_zhihu_content_task_times_id_created_time` ON `zhihu_content` (`task_times_id`, `created_time`);
 
 -- ----------------------------
 -- Table structure for zhihu_comment
@@ -601,10 +640,11 @@ CREATE TABLE `zhihu_comment` (
     `task_times_id` TEXT DEFAULT NULL
 );
 
-CREATE INDEX `idx_zhihu_comment_comment_id` ON `zhihu_comment` (`comment_id`);
+CREATE UNIQUE INDEX `idx_zhihu_comment_comment_id` ON `zhihu_comment` (`comment_id`);
 CREATE INDEX `idx_zhihu_comment_content_id` ON `zhihu_comment` (`content_id`);
 CREATE INDEX `idx_zhihu_comment_publish_time` ON `zhihu_comment` (`publish_time`);
 CREATE INDEX `idx_zhihu_comment_task_times_id` ON `zhihu_comment` (`task_times_id`);
+CREATE INDEX `idx_zhihu_comment_task_times_id_publish_time` ON `zhihu_comment` (`task_times_id`, `publish_time`);
 
 -- ----------------------------
 -- Table structure for zhihu_creator
@@ -634,6 +674,8 @@ CREATE TABLE `zhihu_creator` (
 );
 
 CREATE INDEX `idx_zhihu_creator_task_times_id` ON `zhihu_creator` (`task_times_id`);
+CREATE INDEX `idx_zhihu_creator_task_times_id_add_ts` ON `zhihu_creator` (`task_times_id`, `add_ts`);
+CREATE INDEX `idx_zhihu_creator_add_ts` ON `zhihu_creator` (`add_ts`);
 
 -- ----------------------------
 -- Table structure for crawler_tasks
@@ -666,4 +708,52 @@ CREATE TABLE `crawler_tasks` (
 CREATE INDEX `idx_crawler_tasks_task_times_id` ON `crawler_tasks` (`task_times_id`);
 CREATE INDEX `idx_crawler_tasks_status` ON `crawler_tasks` (`status`);
 CREATE INDEX `idx_crawler_tasks_created_at` ON `crawler_tasks` (`created_at`);
-CREATE INDEX `idx_crawler_tasks_platform` ON `crawler_tasks` (`platform`);
\ No newline at end of file
+CREATE INDEX `idx_crawler_tasks_platform` ON `crawler_tasks` (`platform`);
+
+-- ----------------------------
+-- Table structure for table_stats
+-- 各数据表按天、按任务汇总的行数，由数据表上的触发器增量维护
+-- ----------------------------
+DROP TABLE IF EXISTS `table_stats`;
+CREATE TABLE `table_stats` (
+    `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `table_name` TEXT NOT NULL,
+    `stat_date` TEXT NOT NULL,
+    `task_times_id` TEXT NOT NULL DEFAULT '',
+    `row_count` INTEGER NOT NULL DEFAULT 0,
+    `last_add_ts` INTEGER DEFAULT NULL
+);
+
+CREATE UNIQUE INDEX `idx_table_stats_table_date_task` ON `table_stats` (`table_name`, `stat_date`, `task_times_id`);
+
+-- ----------------------------
+-- Table structure for crawl_seen_index
+-- 跨任务的已爬取内容索引，重复任务据此跳过新鲜期内已抓取的内容
+-- ----------------------------
+DROP TABLE IF EXISTS `crawl_seen_index`;
+CREATE TABLE `crawl_seen_index` (
+    `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `platform` TEXT NOT NULL,
+    `content_id` TEXT NOT NULL,
+    `last_fetch_ts` INTEGER NOT NULL,
+    `fingerprint` TEXT DEFAULT NULL
+);
+
+CREATE UNIQUE INDEX `idx_crawl_seen_index_platform_content` ON `crawl_seen_index` (`platform`, `content_id`);
+
+-- ----------------------------
+-- Table structure for crawl_checkpoints
+-- 分页断点，--resume 续爬时从最后提交的游标继续
+-- ----------------------------
+DROP TABLE IF EXISTS `crawl_checkpoints`;
+CREATE TABLE `crawl_checkpoints` (
+    `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `task_times_id` TEXT NOT NULL,
+    `entity` TEXT NOT NULL,
+    `cursor` TEXT DEFAULT NULL,
+    `item_count` INTEGER NOT NULL DEFAULT 0,
+    `done` INTEGER NOT NULL DEFAULT 0,
+    `last_modify_ts` INTEGER NOT NULL
+);
+
+CREATE UNIQUE INDEX `idx_crawl_checkpoints_task_entity` ON `crawl_checkpoints` (`task_times_id`, `entity`);
@@ -128,23 +128,58 @@ async def update_bilibili_video_comment(video_id: str, comment_item: Dict):
     await BiliStoreFactory.create_store().store_comment(comment_item=save_comment_item)
 
 
-async def store_video(aid, video_content, extension_file_name):
+async def store_video(aid, video_content, extension_file_name, media_key=None):
     """
     video video storage implementation
     Args:
         aid:
         video_content:
         extension_file_name:
+        media_key: 媒体标识，记录后下次下载前即可命中
     """
     await BilibiliVideo().store_video(
         {
             "aid": aid,
             "video_content": video_content,
             "extension_file_name": extension_file_name,
+            "media_key": media_key,
         }
     )
 
 
+async def link_video(aid, media_key, extension_file_name) -> bool:
+    """
+    视频已保存过时直接链接到视频目录，返回是否已链接，已链接时不需要再下载
+    Args:
+        aid:
+        media_key: 媒体标识
+        extension_file_name:
+    """
+    return await BilibiliVideo().link_video(aid, media_key, extension_file_name)
+
+
+def get_video_download_path(media_key, extension_file_name="mp4") -> str:
+    """
+    视频流式下载的本地文件路径，中断后再次下载同一视频时从该文件续传
+    Args:
+        media_key: 媒体标识
+        extension_file_name:
+    """
+    return BilibiliVideo().get_download_path(media_key, extension_file_name)
+
+
+async def store_video_file(aid, file_path, extension_file_name, media_key=None):
+    """
+    保存已下载到本地的视频文件，文件移动到媒体存储中，不读入内存
+    Args:
+        aid:
+        file_path: 已下载的文件路径
+        extension_file_name:
+        media_key: 媒体标识，记录后下次下载前即可命中
+    """
+    await BilibiliVideo().save_video_file(aid, file_path, extension_file_name, media_key)
+
+
 async def batch_update_bilibili_creator_fans(creator_info: Dict, fans_list: List[Dict]):
     if not fans_list:
         return
@@ -14,239 +14,138 @@
 # @Time    : 2024/4/6 15:30
 # @Desc    : sql接口集合
 
-from typing import Dict, List, Union
+from typing import Dict
 
-from config.db_config import AsyncMysqlDB, AsyncSqliteDB
-from var import media_crawler_db_var
+from config.db_config import AsyncMysqlDB
+from dp_op.batch_writer import AsyncBatchWriter
+from var import db_batch_writer_var, media_crawler_db_var
 
 
-async def query_content_by_content_id(content_id: str) -> Dict:
+async def batch_store_content(content_item: Dict):
     """
-    查询一条内容记录（xhs的帖子 ｜ 抖音的视频 ｜ 微博 ｜ 快手视频 ...）
-    Args:
-        content_id:
-
-    Returns:
-
-    """
-    async_db_conn: Union[AsyncMysqlDB, AsyncSqliteDB] = media_crawler_db_var.get()
-    sql: str = f"select * from bilibili_video where video_id = '{content_id}'"
-    rows: List[Dict] = await async_db_conn.query(sql)
-    if len(rows) > 0:
-        return rows[0]
-    return dict()
-
-
-async def add_new_content(content_item: Dict) -> int:
-    """
-    新增一条内容记录（xhs的帖子 ｜ 抖音的视频 ｜ 微博 ｜ 快手视频 ...）
+    将一条内容记录写入批量缓冲区，由缓冲区按video_id统一新增或更新
     Args:
         content_item:
 
     Returns:
 
     """
-    async_db_conn: Union[AsyncMysqlDB, AsyncSqliteDB] = media_crawler_db_var.get()
-    last_row_id: int = await async_db_conn.item_to_table("bilibili_video", content_item)
-    return last_row_id
+    batch_writer: AsyncBatchWriter = db_batch_writer_var.get()
+    await batch_writer.add("bilibili_video", content_item, key_fields=("video_id",))
 
 
-async def update_content_by_content_id(content_id: str, content_item: Dict) -> int:
+async def batch_store_comment(comment_item: Dict):
     """
-    更新一条记录（xhs的帖子 ｜ 抖音的视频 ｜ 微博 ｜ 快手视频 ...）
-    Args:
-        content_id:
-        content_item:
-
-    Returns:
-
-    """
-    async_db_conn: Union[AsyncMysqlDB, AsyncSqliteDB] = media_crawler_db_var.get()
-    effect_row: int = await async_db_conn.update_table("bilibili_video", content_item, "video_id", content_id)
-    return effect_row
-
-
-
-async def query_comment_by_comment_id(comment_id: str) -> Dict:
-    """
-    查询一条评论内容
-    Args:
-        comment_id:
-
-    Returns:
-
-    """
-    async_db_conn: Union[AsyncMysqlDB, AsyncSqliteDB] = media_crawler_db_var.get()
-    sql: str = f"select * from bilibili_video_comment where comment_id = '{comment_id}'"
-    rows: List[Dict] = await async_db_conn.query(sql)
-    if len(rows) > 0:
-        return rows[0]
-    return dict()
-
-
-async def add_new_comment(comment_item: Dict) -> int:
-    """
-    新增一条评论记录
+    将一条评论记录写入批量缓冲区，由缓冲区按comment_id统一新增或更新
     Args:
         comment_item:
 
     Returns:
 
     """
-    async_db_conn: Union[AsyncMysqlDB, AsyncSqliteDB] = media_crawler_db_var.get()
-    last_row_id: int = await async_db_conn.item_to_table("bilibili_video_comment", comment_item)
-    return last_row_id
+    batch_writer: AsyncBatchWriter = db_batch_writer_var.get()
+    await batch_writer.add("bilibili_video_comment", comment_item, key_fields=("comment_id",))
 
 
-async def update_comment_by_comment_id(comment_id: str, comment_item: Dict) -> int:
+async def batch_store_creator(creator_item: Dict):
     """
-    更新增一条评论记录
-    Args:
-        comment_id:
-        comment_item:
-
-    Returns:
-
-    """
-    async_db_conn: Union[AsyncMysqlDB, AsyncSqliteDB] = media_crawler_db_var.get()
-    effect_row: int = await async_db_conn.update_table("bilibili_video_comment", comment_item, "comment_id", comment_id)
-    return effect_row
-
-
-async def query_creator_by_creator_id(creator_id: str) -> Dict:
-    """
-    查询up主信息
-    Args:
-        creator_id:
-
-    Returns:
-
-    """
-    async_db_conn: Union[AsyncMysqlDB, AsyncSqliteDB] = media_crawler_db_var.get()
-    sql: str = f"select * from bilibili_up_info where user_id = '{creator_id}'"
-    rows: List[Dict] = await async_db_conn.query(sql)
-    if len(rows) > 0:
-        return rows[0]
-    return dict()
-
-
-async def add_new_creator(creator_item: Dict) -> int:
-    """
-    新增up主信息
+    将一条创作者信息写入批量缓冲区，由缓冲区按user_id统一新增或更新
     Args:
         creator_item:
 
     Returns:
 
     """
-    async_db_conn: Union[AsyncMysqlDB, AsyncSqliteDB] = media_crawler_db_var.get()
-    last_row_id: int = await async_db_conn.item_to_table("bilibili_up_info", creator_item)
-    return last_row_id
+    batch_writer: AsyncBatchWriter = db_batch_writer_var.get()
+    await batch_writer.add("bilibili_up_info", creator_item, key_fields=("user_id",))
 
 
-async def update_creator_by_creator_id(creator_id: str, creator_item: Dict) -> int:
+async def batch_store_contact(contact_item: Dict):
     """
-    更新up主信息
+    将一条粉丝/关注记录写入批量缓冲区，由缓冲区按up_id+fan_id统一新增或更新
     Args:
-        creator_id:
-        creator_item:
+        contact_item:
 
     Returns:
 
     """
-    async_db_conn: Union[AsyncMysqlDB, AsyncSqliteDB] = media_crawler_db_var.get()
-    effect_row: int = await async_db_conn.update_table("bilibili_up_info", creator_item, "user_id", creator_id)
-    return effect_row
+    batch_writer: AsyncBatchWriter = db_batch_writer_var.get()
+    await batch_writer.add("bilibili_contact_info", contact_item, key_fields=("up_id", "fan_id"))
 
 
-async def query_contact_by_up_and_fan(up_id: str, fan_id: str) -> Dict:
+async def batch_store_dynamic(dynamic_item: Dict):
     """
-    查询一条关联关系
+    将一条动态记录写入批量缓冲区，由缓冲区按dynamic_id统一新增或更新
     Args:
-        up_id:
-        fan_id:
+        dynamic_item:
 
     Returns:
 
     """
-    async_db_conn: Union[AsyncMysqlDB, AsyncSqliteDB] = media_crawler_db_var.get()
-    sql: str = f"select * from bilibili_contact_info where up_id = '{up_id}' and fan_id = '{fan_id}'"
-    rows: List[Dict] = await async_db_conn.query(sql)
-    if len(rows) > 0:
-        return rows[0]
-    return dict()
+    batch_writer: AsyncBatchWriter = db_batch_writer_var.get()
+    await batch_writer.add("bilibili_up_dynamic", dynamic_item, key_fields=("dynamic_id",))
 
 
-async def add_new_contact(contact_item: Dict) -> int:
+async def upsert_content(content_item: Dict) -> int:
     """
-    新增关联关系
+    新增或更新一条内容记录，依赖video_id唯一索引单条SQL完成
     Args:
-        contact_item:
+        content_item:
 
     Returns:
 
     """
-    async_db_conn: Union[AsyncMysqlDB, AsyncSqliteDB] = media_crawler_db_var.get()
-    last_row_id: int = await async_db_conn.item_to_table("bilibili_contact_info", contact_item)
-    return last_row_id
+    async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
+    return await async_db_conn.upsert_item("bilibili_video", content_item, key_fields=("video_id",))
 
 
-async def update_contact_by_id(id: str, contact_item: Dict) -> int:
+async def upsert_comment(comment_item: Dict) -> int:
     """
-    更新关联关系
+    新增或更新一条评论记录，依赖comment_id唯一索引单条SQL完成
     Args:
-        id:
-        contact_item:
+        comment_item:
 
     Returns:
 
     """
-    async_db_conn: Union[AsyncMysqlDB, AsyncSqliteDB] = media_crawler_db_var.get()
-    effect_row: int = await async_db_conn.update_table("bilibili_contact_info", contact_item, "id", id)
-    return effect_row
+    async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
+    return await async_db_conn.upsert_item("bilibili_video_comment", comment_item, key_fields=("comment_id",))
 
 
-async def query_dynamic_by_dynamic_id(dynamic_id: str) -> Dict:
+async def upsert_creator(creator_item: Dict) -> int:
     """
-    查询一条动态信息
+    新增或更新一条创作者信息，依赖user_id唯一索引单条SQL完成
     Args:
-        dynamic_id:
+        creator_item:
 
     Returns:
 
     """
-    async_db_conn: Union[AsyncMysqlDB, AsyncSqliteDB] = media_crawler_db_var.get()
-    sql: str = f"select * from bilibili_up_dynamic where dynamic_id = '{dynamic_id}'"
-    rows: List[Dict] = await async_db_conn.query(sql)
-    if len(rows) > 0:
-        return rows[0]
-    return dict()
+    async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
+    return await async_db_conn.upsert_item("bilibili_up_info", creator_item, key_fields=("user_id",))
 
 
-async def add_new_dynamic(dynamic_item: Dict) -> int:
+async def upsert_contact(contact_item: Dict) -> int:
     """
-    新增动态信息
+    新增或更新一条联系人记录，依赖up_id+fan_id唯一索引单条SQL完成
     Args:
-        dynamic_item:
+        contact_item:
 
     Returns:
 
     """
-    async_db_conn: Union[AsyncMysqlDB, AsyncSqliteDB] = media_crawler_db_var.get()
-    last_row_id: int = await async_db_conn.item_to_table("bilibili_up_dynamic", dynamic_item)
-    return last_row_id
+    async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
+    return await async_db_conn.upsert_item("bilibili_contact_info", contact_item, key_fields=("up_id", "fan_id"))
 
 
-async def update_dynamic_by_dynamic_id(dynamic_id: str, dynamic_item: Dict) -> int:
+async def upsert_dynamic(dynamic_item: Dict) -> int:
     """
-    更新动态信息
+    新增或更新一条动态记录，依赖dynamic_id唯一索引单条SQL完成
     Args:
-        dynamic_id:
         dynamic_item:
 
     Returns:
 
     """
-    async_db_conn: Union[AsyncMysqlDB, AsyncSqliteDB] = media_crawler_db_var.get()
-    effect_row: int = await async_db_conn.update_table("bilibili_up_dynamic", dynamic_item, "dynamic_id", dynamic_id)
-    return effect_row
+    async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
+    return await async_db_conn.upsert_item("bilibili_up_dynamic", dynamic_item, key_fields=("dynamic_id",))
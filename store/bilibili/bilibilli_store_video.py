@@ -13,12 +13,10 @@
 # @Author  : helloteemo
 # @Time    : 2024/7/12 20:01
 # @Desc    : bilibili图片保存
-import pathlib
-from typing import Dict
-
-import aiofiles
+from typing import Dict, Optional
 
 from base.base_crawler import AbstractStoreImage
+from store.media_store import get_media_store
 from tools import utils
 
 
@@ -35,7 +33,33 @@ class BilibiliVideo(AbstractStoreImage):
 
         """
         await self.save_video(video_content_item.get("aid"), video_content_item.get("video_content"),
-                              video_content_item.get("extension_file_name"))
+                              video_content_item.get("extension_file_name"), video_content_item.get("media_key"))
+
+    @staticmethod
+    def make_media_key(aid: int, cid: int) -> str:
+        """
+        生成媒体标识，视频的下载地址带有过期签名，使用 aid 和 cid 标识
+        Args:
+            aid: aid
+            cid: cid
+
+        Returns:
+
+        """
+        return f"bili:{aid}:{cid}"
+
+    async def link_video(self, aid: int, media_key: str, extension_file_name: str) -> bool:
+        """
+        视频已保存过时直接链接到视频目录，调用方据此跳过下载
+        Args:
+            aid: aid
+            media_key: 媒体标识
+            extension_file_name: 文件名
+
+        Returns:
+            是否已链接
+        """
+        return await get_media_store().link(media_key, self.make_save_file_name(str(aid), extension_file_name))
 
     def make_save_file_name(self, aid: str, extension_file_name: str) -> str:
         """
@@ -47,18 +71,46 @@ class BilibiliVideo(AbstractStoreImage):
         """
         return f"{self.video_store_path}/{aid}/{extension_file_name}"
 
-    async def save_video(self, aid: int, video_content: str, extension_file_name="mp4"):
+    async def save_video(self, aid: int, video_content: bytes, extension_file_name="mp4",
+                         media_key: Optional[str] = None):
         """
-        save video to local
+        save video to local, the content is stored once in the media store and hard linked into the video folder
         Args:
             aid: aid
             video_content: video content
+            media_key: media key, checked before the next download
+
+        Returns:
+
+        """
+        save_file_name = self.make_save_file_name(str(aid), extension_file_name)
+        await get_media_store().put(video_content, save_file_name, media_key)
+        utils.logger.info(f"[BilibiliVideoImplement.save_video] save save_video {save_file_name} success ...")
+
+    def get_download_path(self, media_key: str, extension_file_name: str = "mp4") -> str:
+        """
+        获取视频流式下载的本地文件路径，同一视频的路径固定，中断后再次下载时可以续传
+        Args:
+            media_key: 媒体标识
+            extension_file_name: 文件扩展名
+
+        Returns:
+
+        """
+        return get_media_store().get_download_path(media_key, extension_file_name)
+
+    async def save_video_file(self, aid: int, file_path: str, extension_file_name="mp4",
+                              media_key: Optional[str] = None):
+        """
+        save a video already downloaded to disk, the file is moved into the media store without reading it into memory
+        Args:
+            aid: aid
+            file_path: downloaded file path
+            media_key: media key, checked before the next download
 
         Returns:
 
         """
-        pathlib.Path(self.video_store_path + "/" + str(aid)).mkdir(parents=True, exist_ok=True)
         save_file_name = self.make_save_file_name(str(aid), extension_file_name)
-        async with aiofiles.open(save_file_name, 'wb') as f:
-            await f.write(video_content)
-            utils.logger.info(f"[BilibiliVideoImplement.save_video] save save_video {save_file_name} success ...")
+        await get_media_store().put_file(file_path, save_file_name, media_key)
+        utils.logger.info(f"[BilibiliVideoImplement.save_video_file] save video {save_file_name} success ...")
@@ -0,0 +1,130 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : CSV存储的缓冲写入实现，每个文件在运行期间只打开一次，表头只写一次
+import asyncio
+import csv
+import io
+import os
+import time
+from typing import Dict, List, Optional
+
+from tools import utils
+
+# 缓冲的行数达到该值时写入文件
+FLUSH_SIZE = 100
+
+# 距离上次写入超过该时间（秒）时写入文件
+FLUSH_INTERVAL = 2.0
+
+# 文件写入缓冲区大小
+FILE_BUFFER_SIZE = 1024 * 1024
+
+
+class CsvFileWriter:
+    def __init__(self, file_path: str, flush_size: int = FLUSH_SIZE, flush_interval: float = FLUSH_INTERVAL):
+        """
+        :param file_path: CSV文件路径
+        :param flush_size: 缓冲行数达到该值时写入文件
+        :param flush_interval: 距离上次写入超过该时间（秒）时写入文件
+        """
+        self.file_path = file_path
+        self._flush_size = max(1, flush_size)
+        self._flush_interval = flush_interval
+        self._header: Optional[List[str]] = None
+        self._buffer = io.StringIO()
+        self._csv_writer = csv.writer(self._buffer)
+        self._buffered_rows = 0
+        self._last_flush = time.monotonic()
+        self._lock = asyncio.Lock()
+        self._file = None
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.file_path) or ".", exist_ok=True)
+        self._file = open(self.file_path, 'a', encoding="utf-8-sig", newline="", buffering=FILE_BUFFER_SIZE)
+
+    def _write_text(self, text: str, header: List[str]):
+        if self._file is None:
+            self._open()
+            if self._file.tell() == 0:
+                header_buffer = io.StringIO()
+                csv.writer(header_buffer).writerow(header)
+                self._file.write(header_buffer.getvalue())
+        self._file.write(text)
+        self._file.flush()
+
+    async def write(self, item: Dict):
+        """
+        写入一行记录，表头取第一条记录的字段
+        Args:
+            item: 记录字典
+
+        Returns:
+
+        """
+        if self._header is None:
+            self._header = list(item.keys())
+        self._csv_writer.writerow(item.values())
+        self._buffered_rows += 1
+        if self._buffered_rows >= self._flush_size or time.monotonic() - self._last_flush >= self._flush_interval:
+            await self.flush()
+
+    async def flush(self):
+        async with self._lock:
+            if not self._buffered_rows:
+                return
+            text = self._buffer.getvalue()
+            self._buffer.seek(0)
+            self._buffer.truncate()
+            self._buffered_rows = 0
+            self._last_flush = time.monotonic()
+            await asyncio.to_thread(self._write_text, text, self._header)
+
+    async def close(self):
+        """
+        写入剩余记录并关闭文件
+        """
+        await self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+_writers: Dict[str, CsvFileWriter] = {}
+
+
+def get_csv_writer(file_path: str) -> CsvFileWriter:
+    """
+    获取CSV文件对应的长期持有的写入对象
+    Args:
+        file_path: CSV文件路径
+
+    Returns:
+
+    """
+    writer = _writers.get(file_path)
+    if writer is None:
+        writer = CsvFileWriter(file_path)
+        _writers[file_path] = writer
+    return writer
+
+
+async def close_all_csv_writers():
+    """
+    关闭全部CSV写入对象，程序结束时调用
+    """
+    while _writers:
+        _, writer = _writers.popitem()
+        try:
+            await writer.close()
+        except Exception as e:
+            utils.logger.error(f"[close_all_csv_writers] close {writer.file_path} error: {e}")
@@ -14,7 +14,6 @@
 # @Time    : 2024/1/14 18:46
 # @Desc    : 抖音存储实现类
 import asyncio
-import csv
 import json
 import os
 import pathlib
@@ -24,8 +23,11 @@ import aiofiles
 
 import config
 from base.base_crawler import AbstractStore
+from dp_op.batch_writer import BatchWriteError
+from store.csv_writer import get_csv_writer
+from store.ndjson_writer import get_ndjson_writer
 from tools import utils, words
-from var import crawler_type_var
+from var import crawler_type_var, db_batch_writer_var
 
 
 def calculate_number_of_files(file_store_path: str) -> int:
@@ -68,13 +70,9 @@ class DouyinCsvStoreImplement(AbstractStore):
         Returns: no returns
 
         """
-        pathlib.Path(self.csv_store_path).mkdir(parents=True, exist_ok=True)
         save_file_name = self.make_save_file_name(store_type=store_type)
-        async with aiofiles.open(save_file_name, mode='a+', encoding="utf-8-sig", newline="") as f:
-            writer = csv.writer(f)
-            if await f.tell() == 0:
-                await writer.writerow(save_item.keys())
-            await writer.writerow(save_item.values())
+        # 每个文件在运行期间只打开一次，缓冲写入，表头只写一次
+        await get_csv_writer(save_file_name).write(save_item)
 
     async def store_content(self, content_item: Dict):
         """
@@ -121,22 +119,30 @@ class DouyinDbStoreImplement(AbstractStore):
 
         """
 
-        from .douyin_store_sql import (add_new_content,
-                                       query_content_by_content_id,
-                                       update_content_by_content_id)
+        from .douyin_store_sql import (batch_store_content,
+                                       update_content_by_content_id,
+                                       upsert_content)
         import config
-        
-        aweme_id = content_item.get("aweme_id")
-        aweme_detail: Dict = await query_content_by_content_id(content_id=aweme_id)
-        if not aweme_detail:
-            content_item["add_ts"] = utils.get_current_timestamp()
-            # 添加task_times_id字段
-            if hasattr(config, 'TASK_ID') and config.TASK_ID:
-                content_item["task_times_id"] = config.TASK_ID
-            if content_item.get("title"):
-                await add_new_content(content_item)
+
+        if not content_item.get("title"):
+            # 没有标题的记录只更新已有数据，不新增；先写入缓冲区中的视频，避免要更新的记录还未写入数据库
+            batch_writer = db_batch_writer_var.get()
+            if batch_writer is not None:
+                try:
+                    await batch_writer.flush("douyin_aweme")
+                except BatchWriteError as e:
+                    utils.logger.error(f"[DouyinDbStoreImplement.store_content] flush douyin_aweme error: {e}")
+            await update_content_by_content_id(content_item.get("aweme_id"), content_item=content_item)
+            return
+
+        content_item["add_ts"] = utils.get_current_timestamp()
+        # 添加task_times_id字段
+        if hasattr(config, 'TASK_ID') and config.TASK_ID:
+            content_item["task_times_id"] = config.TASK_ID
+        if db_batch_writer_var.get() is not None:
+            await batch_store_content(content_item)
         else:
-            await update_content_by_content_id(aweme_id, content_item=content_item)
+            await upsert_content(content_item)
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -147,21 +153,17 @@ class DouyinDbStoreImplement(AbstractStore):
         Returns:
 
         """
-        from .douyin_store_sql import (add_new_comment,
-                                       query_comment_by_comment_id,
-                                       update_comment_by_comment_id)
+        from .douyin_store_sql import batch_store_comment, upsert_comment
         import config
-        
-        comment_id = comment_item.get("comment_id")
-        comment_detail: Dict = await query_comment_by_comment_id(comment_id=comment_id)
-        if not comment_detail:
-            comment_item["add_ts"] = utils.get_current_timestamp()
-            # 添加task_times_id字段
-            if hasattr(config, 'TASK_ID') and config.TASK_ID:
-                comment_item["task_times_id"] = config.TASK_ID
-            await add_new_comment(comment_item)
+
+        comment_item["add_ts"] = utils.get_current_timestamp()
+        # 添加task_times_id字段
+        if hasattr(config, 'TASK_ID') and config.TASK_ID:
+            comment_item["task_times_id"] = config.TASK_ID
+        if db_batch_writer_var.get() is not None:
+            await batch_store_comment(comment_item)
         else:
-            await update_comment_by_comment_id(comment_id, comment_item=comment_item)
+            await upsert_comment(comment_item)
 
     async def store_creator(self, creator: Dict):
         """
@@ -172,24 +174,17 @@ class DouyinDbStoreImplement(AbstractStore):
         Returns:
 
         """
-        from .douyin_store_sql import (add_new_creator,
-                                       query_creator_by_user_id,
-                                       update_creator_by_user_id)
+        from .douyin_store_sql import batch_store_creator, upsert_creator
         import config
-        
-        user_id = creator.get("user_id")
-        user_detail: Dict = await query_creator_by_user_id(user_id)
-        if not user_detail:
-            creator["add_ts"] = utils.get_current_timestamp()
-            # 添加task_times_id字段
-            if hasattr(config, 'TASK_ID') and config.TASK_ID:
-                creator["task_times_id"] = config.TASK_ID
-            await add_new_creator(creator)
-        else:
-            await update_creator_by_user_id(user_id, creator)
 
-# DouyinHybridDbStoreImplement类已废弃，因为sync_to_mysql机制已被storage_type参数替代
-# 现在通过DB_TYPE配置直接选择使用SQLite或MySQL，不再需要混合存储
+        creator["add_ts"] = utils.get_current_timestamp()
+        # 添加task_times_id字段
+        if hasattr(config, 'TASK_ID') and config.TASK_ID:
+            creator["task_times_id"] = config.TASK_ID
+        if db_batch_writer_var.get() is not None:
+            await batch_store_creator(creator)
+        else:
+            await upsert_creator(creator)
 
 
 class DouyinJsonStoreImplement(AbstractStore):
@@ -227,6 +222,19 @@ class DouyinJsonStoreImplement(AbstractStore):
         pathlib.Path(self.json_store_path).mkdir(parents=True, exist_ok=True)
         pathlib.Path(self.words_store_path).mkdir(parents=True, exist_ok=True)
         save_file_name,words_file_name_prefix = self.make_save_file_name(store_type=store_type)
+
+        if config.ENABLE_GET_COMMENTS and config.ENABLE_GET_WORDCLOUD:
+            # 增量统计词频，词云图在程序结束时统一生成
+            try:
+                await self.WordCloud.add_items([save_item], words_file_name_prefix)
+            except Exception as e:
+                utils.logger.error(f"[DouyinJsonStoreImplement.save_data_to_json] word frequency error: {e}")
+
+        if config.JSON_APPEND_MODE:
+            # 追加写入NDJSON文件
+            await get_ndjson_writer(save_file_name).write(save_item)
+            return
+
         save_data = []
 
         async with self.lock:
@@ -238,12 +246,6 @@ class DouyinJsonStoreImplement(AbstractStore):
             async with aiofiles.open(save_file_name, 'w', encoding='utf-8') as file:
                 await file.write(json.dumps(save_data, ensure_ascii=False))
 
-            if config.ENABLE_GET_COMMENTS and config.ENABLE_GET_WORDCLOUD:
-                try:
-                    await self.WordCloud.generate_word_frequency_and_cloud(save_data, words_file_name_prefix)
-                except:
-                    pass
-
     async def store_content(self, content_item: Dict):
         """
         content JSON storage implementation
@@ -14,41 +14,11 @@
 # @Time    : 2024/4/6 15:30
 # @Desc    : sql接口集合
 
-from typing import Dict, List, Union
+from typing import Dict, Union
 
 from config.db_config import AsyncMysqlDB, AsyncSqliteDB
-from var import media_crawler_db_var
-
-
-async def query_content_by_content_id(content_id: str) -> Dict:
-    """
-    查询一条内容记录（xhs的帖子 ｜ 抖音的视频 ｜ 微博 ｜ 快手视频 ...）
-    Args:
-        content_id:
-
-    Returns:
-
-    """
-    async_db_conn: Union[AsyncMysqlDB, AsyncSqliteDB] = media_crawler_db_var.get()
-    sql: str = f"select * from douyin_aweme where aweme_id = '{content_id}'"
-    rows: List[Dict] = await async_db_conn.query(sql)
-    if len(rows) > 0:
-        return rows[0]
-    return dict()
-
-
-async def add_new_content(content_item: Dict) -> int:
-    """
-    新增一条内容记录（xhs的帖子 ｜ 抖音的视频 ｜ 微博 ｜ 快手视频 ...）
-    Args:
-        content_item:
-
-    Returns:
-
-    """
-    async_db_conn: Union[AsyncMysqlDB, AsyncSqliteDB] = media_crawler_db_var.get()
-    last_row_id: int = await async_db_conn.item_to_table("douyin_aweme", content_item)
-    return last_row_id
+from dp_op.batch_writer import AsyncBatchWriter
+from var import db_batch_writer_var, media_crawler_db_var
 
 
 async def update_content_by_content_id(content_id: str, content_item: Dict) -> int:
@@ -66,94 +36,79 @@ async def update_content_by_content_id(content_id: str, content_item: Dict) -> i
     return effect_row
 
 
-
-async def query_comment_by_comment_id(comment_id: str) -> Dict:
+async def batch_store_content(content_item: Dict):
     """
-    查询一条评论内容
+    将一条内容记录写入批量缓冲区，由缓冲区按aweme_id统一新增或更新
     Args:
-        comment_id:
+        content_item:
 
     Returns:
 
     """
-    async_db_conn: Union[AsyncMysqlDB, AsyncSqliteDB] = media_crawler_db_var.get()
-    sql: str = f"select * from douyin_aweme_comment where comment_id = '{comment_id}'"
-    rows: List[Dict] = await async_db_conn.query(sql)
-    if len(rows) > 0:
-        return rows[0]
-    return dict()
+    batch_writer: AsyncBatchWriter = db_batch_writer_var.get()
+    await batch_writer.add("douyin_aweme", content_item, key_fields=("aweme_id",))
 
 
-async def add_new_comment(comment_item: Dict) -> int:
+async def batch_store_comment(comment_item: Dict):
     """
-    新增一条评论记录
+    将一条评论记录写入批量缓冲区，由缓冲区按comment_id统一新增或更新
     Args:
         comment_item:
 
     Returns:
 
     """
-    async_db_conn: Union[AsyncMysqlDB, AsyncSqliteDB] = media_crawler_db_var.get()
-    last_row_id: int = await async_db_conn.item_to_table("douyin_aweme_comment", comment_item)
-    return last_row_id
+    batch_writer: AsyncBatchWriter = db_batch_writer_var.get()
+    await batch_writer.add("douyin_aweme_comment", comment_item, key_fields=("comment_id",))
 
 
-async def update_comment_by_comment_id(comment_id: str, comment_item: Dict) -> int:
+async def batch_store_creator(creator_item: Dict):
     """
-    更新增一条评论记录
+    将一条创作者信息写入批量缓冲区，由缓冲区按user_id统一新增或更新
     Args:
-        comment_id:
-        comment_item:
+        creator_item:
 
     Returns:
 
     """
-    async_db_conn: Union[AsyncMysqlDB, AsyncSqliteDB] = media_crawler_db_var.get()
-    effect_row: int = await async_db_conn.update_table("douyin_aweme_comment", comment_item, "comment_id", comment_id)
-    return effect_row
+    batch_writer: AsyncBatchWriter = db_batch_writer_var.get()
+    await batch_writer.add("dy_creator", creator_item, key_fields=("user_id",))
 
 
-async def query_creator_by_user_id(user_id: str) -> Dict:
+async def upsert_content(content_item: Dict) -> int:
     """
-    查询一条创作者记录
+    新增或更新一条内容记录，依赖aweme_id唯一索引单条SQL完成
     Args:
-        user_id:
+        content_item:
 
     Returns:
 
     """
-    async_db_conn: Union[AsyncMysqlDB, AsyncSqliteDB] = media_crawler_db_var.get()
-    sql: str = f"select * from dy_creator where user_id = '{user_id}'"
-    rows: List[Dict] = await async_db_conn.query(sql)
-    if len(rows) > 0:
-        return rows[0]
-    return dict()
+    async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
+    return await async_db_conn.upsert_item("douyin_aweme", content_item, key_fields=("aweme_id",))
 
 
-async def add_new_creator(creator_item: Dict) -> int:
+async def upsert_comment(comment_item: Dict) -> int:
     """
-    新增一条创作者信息
+    新增或更新一条评论记录，依赖comment_id唯一索引单条SQL完成
     Args:
-        creator_item:
+        comment_item:
 
     Returns:
 
     """
-    async_db_conn: Union[AsyncMysqlDB, AsyncSqliteDB] = media_crawler_db_var.get()
-    last_row_id: int = await async_db_conn.item_to_table("dy_creator", creator_item)
-    return last_row_id
+    async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
+    return await async_db_conn.upsert_item("douyin_aweme_comment", comment_item, key_fields=("comment_id",))
 
 
-async def update_creator_by_user_id(user_id: str, creator_item: Dict) -> int:
+async def upsert_creator(creator_item: Dict) -> int:
     """
-    更新一条创作者信息
+    新增或更新一条创作者信息，依赖user_id唯一索引单条SQL完成
     Args:
-        user_id:
         creator_item:
 
     Returns:
 
     """
-    async_db_conn: Union[AsyncMysqlDB, AsyncSqliteDB] = media_crawler_db_var.get()
-    effect_row: int = await async_db_conn.update_table("dy_creator", creator_item, "user_id", user_id)
-    return effect_row
\ No newline at end of file
+    async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
+    return await async_db_conn.upsert_item("dy_creator", creator_item, key_fields=("user_id",))
@@ -14,100 +14,60 @@
 # @Time    : 2024/4/6 15:30
 # @Desc    : sql接口集合
 
-from typing import Dict, List
+from typing import Dict
 
 from config.db_config import AsyncMysqlDB
-from var import media_crawler_db_var
+from dp_op.batch_writer import AsyncBatchWriter
+from var import db_batch_writer_var, media_crawler_db_var
 
 
-async def query_content_by_content_id(content_id: str) -> Dict:
+async def batch_store_content(content_item: Dict):
     """
-    查询一条内容记录（xhs的帖子 ｜ 抖音的视频 ｜ 微博 ｜ 快手视频 ...）
-    Args:
-        content_id:
-
-    Returns:
-
-    """
-    async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    sql: str = f"select * from kuaishou_video where video_id = '{content_id}'"
-    rows: List[Dict] = await async_db_conn.query(sql)
-    if len(rows) > 0:
-        return rows[0]
-    return dict()
-
-
-async def add_new_content(content_item: Dict) -> int:
-    """
-    新增一条内容记录（xhs的帖子 ｜ 抖音的视频 ｜ 微博 ｜ 快手视频 ...）
+    将一条内容记录写入批量缓冲区，由缓冲区按video_id统一新增或更新
     Args:
         content_item:
 
     Returns:
 
     """
-    async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    last_row_id: int = await async_db_conn.item_to_table("kuaishou_video", content_item)
-    return last_row_id
+    batch_writer: AsyncBatchWriter = db_batch_writer_var.get()
+    await batch_writer.add("kuaishou_video", content_item, key_fields=("video_id",))
 
 
-async def update_content_by_content_id(content_id: str, content_item: Dict) -> int:
+async def batch_store_comment(comment_item: Dict):
     """
-    更新一条记录（xhs的帖子 ｜ 抖音的视频 ｜ 微博 ｜ 快手视频 ...）
+    将一条评论记录写入批量缓冲区，由缓冲区按comment_id统一新增或更新
     Args:
-        content_id:
-        content_item:
-
-    Returns:
-
-    """
-    async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    effect_row: int = await async_db_conn.update_table("kuaishou_video", content_item, "video_id", content_id)
-    return effect_row
-
-
-
-async def query_comment_by_comment_id(comment_id: str) -> Dict:
-    """
-    查询一条评论内容
-    Args:
-        comment_id:
+        comment_item:
 
     Returns:
 
     """
-    async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    sql: str = f"select * from kuaishou_video_comment where comment_id = '{comment_id}'"
-    rows: List[Dict] = await async_db_conn.query(sql)
-    if len(rows) > 0:
-        return rows[0]
-    return dict()
+    batch_writer: AsyncBatchWriter = db_batch_writer_var.get()
+    await batch_writer.add("kuaishou_video_comment", comment_item, key_fields=("comment_id",))
 
 
-async def add_new_comment(comment_item: Dict) -> int:
+async def upsert_content(content_item: Dict) -> int:
     """
-    新增一条评论记录
+    新增或更新一条内容记录，依赖video_id唯一索引单条SQL完成
     Args:
-        comment_item:
+        content_item:
 
     Returns:
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    last_row_id: int = await async_db_conn.item_to_table("kuaishou_video_comment", comment_item)
-    return last_row_id
+    return await async_db_conn.upsert_item("kuaishou_video", content_item, key_fields=("video_id",))
 
 
-async def update_comment_by_comment_id(comment_id: str, comment_item: Dict) -> int:
+async def upsert_comment(comment_item: Dict) -> int:
     """
-    更新增一条评论记录
+    新增或更新一条评论记录，依赖comment_id唯一索引单条SQL完成
     Args:
-        comment_id:
         comment_item:
 
     Returns:
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    effect_row: int = await async_db_conn.update_table("kuaishou_video_comment", comment_item, "comment_id", comment_id)
-    return effect_row
+    return await async_db_conn.upsert_item("kuaishou_video_comment", comment_item, key_fields=("comment_id",))
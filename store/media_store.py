@@ -0,0 +1,252 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 按内容哈希去重的媒体文件存储：文件以 sha256 为名只保存一份，笔记目录下的文件是指向它的硬链接
+#            （不支持硬链接时复制），并记录 媒体标识 -> 文件哈希 的索引，已保存过的媒体下载前即可命中，不再重复请求
+import asyncio
+import hashlib
+import os
+import shutil
+import time
+import uuid
+from typing import Dict, Optional
+
+import aiofiles
+
+import config
+from dp_op.async_sqlite_db import AsyncSqliteDB
+from tools import utils
+
+MEDIA_INDEX_FILE = "media_index.db"
+
+# 计算文件哈希时每次读取的大小
+HASH_CHUNK_SIZE = 1024 * 1024
+
+def _hash_file(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+_CREATE_TABLES = """
+CREATE TABLE IF NOT EXISTS `media_blobs` (
+    `hash` TEXT PRIMARY KEY,
+    `path` TEXT NOT NULL,
+    `size` INTEGER NOT NULL,
+    `add_ts` INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS `media_keys` (
+    `media_key` TEXT PRIMARY KEY,
+    `hash` TEXT NOT NULL,
+    `add_ts` INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS `media_links` (
+    `path` TEXT PRIMARY KEY,
+    `hash` TEXT NOT NULL,
+    `add_ts` INTEGER NOT NULL
+)
+"""
+
+
+class MediaBlobStore:
+    def __init__(self, root_path: str):
+        """
+        :param root_path: 存储目录，文件保存在 blobs 子目录下，索引保存在 media_index.db 中
+        """
+        self.root_path = root_path
+        self._db: Optional[AsyncSqliteDB] = None
+        self._db_lock = asyncio.Lock()
+
+    async def _get_db(self) -> AsyncSqliteDB:
+        if self._db is not None:
+            return self._db
+        # 并发的下载任务同时首次访问时只创建一个长连接
+        async with self._db_lock:
+            if self._db is None:
+                os.makedirs(self.root_path, exist_ok=True)
+                db = AsyncSqliteDB(os.path.join(self.root_path, MEDIA_INDEX_FILE), persistent=True)
+                await db.execute(_CREATE_TABLES)
+                self._db = db
+        return self._db
+
+    async def close(self):
+        """
+        关闭索引数据库的长连接，之后再次访问时重新打开
+        """
+        async with self._db_lock:
+            if self._db is not None:
+                db, self._db = self._db, None
+                await db.close()
+
+    def _blob_path(self, content_hash: str, extension: str) -> str:
+        file_name = f"{content_hash}.{extension}" if extension else content_hash
+        return os.path.join(self.root_path, "blobs", content_hash[:2], file_name)
+
+    async def _get_blob(self, content_hash: str) -> Optional[str]:
+        db = await self._get_db()
+        row = await db.get_first("SELECT `path` FROM `media_blobs` WHERE `hash` = ?", content_hash)
+        if row and os.path.exists(row["path"]):
+            return row["path"]
+        return None
+
+    async def _lookup_hash(self, media_key: str) -> Optional[str]:
+        db = await self._get_db()
+        row = await db.get_first("SELECT `hash` FROM `media_keys` WHERE `media_key` = ?", media_key)
+        return row["hash"] if row else None
+
+    async def lookup(self, media_key: str) -> Optional[str]:
+        """
+        查找媒体标识对应的已保存文件
+        Args:
+            media_key: 媒体标识，如图片ID或去掉签名参数的URL
+
+        Returns:
+            文件路径，未保存过或文件已被删除时返回 None
+        """
+        content_hash = await self._lookup_hash(media_key)
+        return await self._get_blob(content_hash) if content_hash else None
+
+    async def link(self, media_key: str, target_path: str) -> bool:
+        """
+        媒体已保存过时直接在目标路径创建链接，调用方据此跳过下载
+        Args:
+            media_key: 媒体标识
+            target_path: 笔记目录下的文件路径
+
+        Returns:
+            是否已链接
+        """
+        content_hash = await self._lookup_hash(media_key)
+        blob_path = await self._get_blob(content_hash) if content_hash else None
+        if blob_path is None:
+            return False
+        await self._place(blob_path, target_path, content_hash)
+        utils.logger.info(f"[MediaBlobStore.link] {media_key} already stored, link {target_path} -> {blob_path}")
+        return True
+
+    async def put(self, content: bytes, target_path: str, media_key: Optional[str] = None) -> str:
+        """
+        保存媒体内容：相同内容只保存一份，并在目标路径创建链接
+        Args:
+            content: 文件内容
+            target_path: 笔记目录下的文件路径
+            media_key: 媒体标识，记录后下次下载前即可命中
+
+        Returns:
+            去重存储的文件路径
+        """
+        content_hash = hashlib.sha256(content).hexdigest()
+        blob_path = await self._get_blob(content_hash)
+        if blob_path is None:
+            blob_path = self._blob_path(content_hash, os.path.splitext(target_path)[1].lstrip("."))
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            # 先写临时文件再重命名，中断时不会留下不完整的文件
+            tmp_path = f"{blob_path}.{uuid.uuid4().hex}.tmp"
+            async with aiofiles.open(tmp_path, "wb") as f:
+                await f.write(content)
+            os.replace(tmp_path, blob_path)
+            await self._record("media_blobs", ("hash", "path", "size"), (content_hash, blob_path, len(content)))
+        if media_key:
+            await self._record("media_keys", ("media_key", "hash"), (media_key, content_hash))
+        await self._place(blob_path, target_path, content_hash)
+        return blob_path
+
+    def get_download_path(self, media_key: str, extension: str) -> str:
+        """
+        获取媒体下载的临时文件路径，与存储目录在同一文件系统上以便原子移动；
+        同一媒体标识的路径固定，中断后再次下载时可以续传
+        Args:
+            media_key: 媒体标识
+            extension: 文件扩展名
+
+        Returns:
+
+        """
+        name = hashlib.sha1(media_key.encode("utf-8")).hexdigest()
+        return os.path.join(self.root_path, "downloads", f"{name}.{extension}")
+
+    async def put_file(self, file_path: str, target_path: str, media_key: Optional[str] = None) -> str:
+        """
+        保存已下载到本地的媒体文件：文件被移动到去重存储中（内容已存在时删除），并在目标路径创建链接，
+        不会把文件内容读入内存
+        Args:
+            file_path: 已下载的文件路径，需要与存储目录在同一文件系统上
+            target_path: 笔记目录下的文件路径
+            media_key: 媒体标识，记录后下次下载前即可命中
+
+        Returns:
+            去重存储的文件路径
+        """
+        content_hash = await asyncio.to_thread(_hash_file, file_path)
+        blob_path = await self._get_blob(content_hash)
+        if blob_path is None:
+            blob_path = self._blob_path(content_hash, os.path.splitext(target_path)[1].lstrip("."))
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            size = os.path.getsize(file_path)
+            os.replace(file_path, blob_path)
+            await self._record("media_blobs", ("hash", "path", "size"), (content_hash, blob_path, size))
+        else:
+            os.remove(file_path)
+        if media_key:
+            await self._record("media_keys", ("media_key", "hash"), (media_key, content_hash))
+        await self._place(blob_path, target_path, content_hash)
+        return blob_path
+
+    async def _place(self, blob_path: str, target_path: str, content_hash: str):
+        os.makedirs(os.path.dirname(target_path) or ".", exist_ok=True)
+        if os.path.exists(target_path):
+            if os.path.samefile(blob_path, target_path):
+                return
+            os.remove(target_path)
+        try:
+            os.link(blob_path, target_path)
+        except OSError:
+            shutil.copyfile(blob_path, target_path)
+        await self._record("media_links", ("path", "hash"), (target_path, content_hash))
+
+    async def _record(self, table: str, fields, values):
+        db = await self._get_db()
+        columns = ", ".join(f"`{field}`" for field in fields)
+        placeholders = ", ".join(["?"] * (len(fields) + 1))
+        await db.execute(f"INSERT OR REPLACE INTO `{table}` ({columns}, `add_ts`) VALUES ({placeholders})",
+                         *values, int(time.time() * 1000))
+
+
+_stores: Dict[str, MediaBlobStore] = {}
+
+
+def get_media_store(root_path: Optional[str] = None) -> MediaBlobStore:
+    """
+    获取存储目录对应的长期持有的媒体存储对象
+    Args:
+        root_path: 存储目录，默认读取配置 MEDIA_STORE_PATH
+
+    Returns:
+
+    """
+    root_path = root_path or config.MEDIA_STORE_PATH
+    store = _stores.get(root_path)
+    if store is None:
+        store = MediaBlobStore(root_path)
+        _stores[root_path] = store
+    return store
+
+
+async def close_media_stores():
+    """
+    关闭全部媒体存储对象的索引数据库连接，在后台下载任务完成后调用
+    """
+    for store in list(_stores.values()):
+        await store.close()
+    _stores.clear()
@@ -0,0 +1,174 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : JSON存储的追加写入实现，每条记录一行（NDJSON），程序结束时可转换为JSON数组文件
+import asyncio
+import json
+import os
+import time
+from typing import Dict, List
+
+from tools import utils
+
+# 缓冲的记录数达到该值时写入文件
+FLUSH_SIZE = 100
+
+# 距离上次写入超过该时间（秒）时写入文件
+FLUSH_INTERVAL = 2.0
+
+# 文件写入缓冲区大小
+FILE_BUFFER_SIZE = 1024 * 1024
+
+
+def get_ndjson_path(json_file_path: str) -> str:
+    return os.path.splitext(json_file_path)[0] + ".jsonl"
+
+
+def ndjson_to_json_array(ndjson_file_path: str, json_file_path: str):
+    """
+    将NDJSON文件逐行转换为JSON数组文件，不会一次性加载全部记录
+    Args:
+        ndjson_file_path: NDJSON文件路径
+        json_file_path: 输出的JSON文件路径
+
+    Returns:
+
+    """
+    tmp_file_path = json_file_path + ".tmp"
+    with open(ndjson_file_path, 'r', encoding='utf-8') as src, \
+            open(tmp_file_path, 'w', encoding='utf-8', buffering=FILE_BUFFER_SIZE) as dst:
+        dst.write("[")
+        first = True
+        for line in src:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                json.loads(line)
+            except json.JSONDecodeError:
+                utils.logger.warning(f"[ndjson_to_json_array] skip broken line in {ndjson_file_path}")
+                continue
+            dst.write(line if first else ",\n" + line)
+            first = False
+        dst.write("]")
+    os.replace(tmp_file_path, json_file_path)
+
+
+class NdjsonWriter:
+    def __init__(self, json_file_path: str, flush_size: int = FLUSH_SIZE, flush_interval: float = FLUSH_INTERVAL):
+        """
+        :param json_file_path: 对应的JSON数组文件路径，NDJSON文件与其同名，扩展名为.jsonl
+        :param flush_size: 缓冲记录数达到该值时写入文件
+        :param flush_interval: 距离上次写入超过该时间（秒）时写入文件
+        """
+        self.json_file_path = json_file_path
+        self.file_path = get_ndjson_path(json_file_path)
+        self._flush_size = max(1, flush_size)
+        self._flush_interval = flush_interval
+        self._buffer: List[str] = []
+        self._last_flush = time.monotonic()
+        self._lock = asyncio.Lock()
+        self._file = None
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.file_path) or ".", exist_ok=True)
+        if not os.path.exists(self.file_path) and os.path.exists(self.json_file_path):
+            # 首次切换到追加模式时，把已有的JSON数组文件内容迁移到NDJSON文件中，避免结束时被覆盖
+            with open(self.json_file_path, 'r', encoding='utf-8') as f:
+                try:
+                    legacy_items = json.load(f)
+                except json.JSONDecodeError:
+                    legacy_items = []
+            with open(self.file_path, 'w', encoding='utf-8') as f:
+                for item in legacy_items:
+                    f.write(json.dumps(item, ensure_ascii=False) + "\n")
+        self._file = open(self.file_path, 'a', encoding='utf-8', buffering=FILE_BUFFER_SIZE)
+
+    def _write_lines(self, lines: List[str]):
+        if self._file is None:
+            self._open()
+        self._file.write("".join(lines))
+        self._file.flush()
+
+    async def write(self, item: Dict):
+        """
+        追加一条记录
+        Args:
+            item: 记录字典
+
+        Returns:
+
+        """
+        self._buffer.append(json.dumps(item, ensure_ascii=False) + "\n")
+        if len(self._buffer) >= self._flush_size or time.monotonic() - self._last_flush >= self._flush_interval:
+            await self.flush()
+
+    async def flush(self):
+        async with self._lock:
+            if not self._buffer:
+                return
+            lines, self._buffer = self._buffer, []
+            self._last_flush = time.monotonic()
+            await asyncio.to_thread(self._write_lines, lines)
+
+    async def close(self, finalize: bool = False):
+        """
+        写入剩余记录并关闭文件
+        Args:
+            finalize: 是否将NDJSON文件转换为JSON数组文件
+
+        Returns:
+
+        """
+        await self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if finalize and os.path.exists(self.file_path):
+            await asyncio.to_thread(ndjson_to_json_array, self.file_path, self.json_file_path)
+            utils.logger.info(f"[NdjsonWriter.close] finalize {self.file_path} to {self.json_file_path}")
+
+
+_writers: Dict[str, NdjsonWriter] = {}
+
+
+def get_ndjson_writer(json_file_path: str) -> NdjsonWriter:
+    """
+    获取JSON文件对应的长期持有的追加写入对象
+    Args:
+        json_file_path: JSON数组文件路径
+
+    Returns:
+
+    """
+    writer = _writers.get(json_file_path)
+    if writer is None:
+        writer = NdjsonWriter(json_file_path)
+        _writers[json_file_path] = writer
+    return writer
+
+
+async def close_all_ndjson_writers(finalize: bool = False):
+    """
+    关闭全部追加写入对象，程序结束时调用
+    Args:
+        finalize: 是否将NDJSON文件转换为JSON数组文件
+
+    Returns:
+
+    """
+    while _writers:
+        _, writer = _writers.popitem()
+        try:
+            await writer.close(finalize=finalize)
+        except Exception as e:
+            utils.logger.error(f"[close_all_ndjson_writers] close {writer.file_path} error: {e}")
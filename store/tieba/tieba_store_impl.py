@@ -11,7 +11,6 @@
 
 # -*- coding: utf-8 -*-
 import asyncio
-import csv
 import json
 import os
 import pathlib
@@ -21,8 +20,10 @@ import aiofiles
 
 import config
 from base.base_crawler import AbstractStore
+from store.csv_writer import get_csv_writer
+from store.ndjson_writer import get_ndjson_writer
 from tools import utils, words
-from var import crawler_type_var
+from var import crawler_type_var, db_batch_writer_var
 
 
 def calculate_number_of_files(file_store_path: str) -> int:
@@ -65,14 +66,9 @@ class TieBaCsvStoreImplement(AbstractStore):
         Returns: no returns
 
         """
-        pathlib.Path(self.csv_store_path).mkdir(parents=True, exist_ok=True)
         save_file_name = self.make_save_file_name(store_type=store_type)
-        async with aiofiles.open(save_file_name, mode='a+', encoding="utf-8-sig", newline="") as f:
-            f.fileno()
-            writer = csv.writer(f)
-            if await f.tell() == 0:
-                await writer.writerow(save_item.keys())
-            await writer.writerow(save_item.values())
+        # 每个文件在运行期间只打开一次，缓冲写入，表头只写一次
+        await get_csv_writer(save_file_name).write(save_item)
 
     async def store_content(self, content_item: Dict):
         """
@@ -118,21 +114,17 @@ class TieBaDbStoreImplement(AbstractStore):
         Returns:
 
         """
-        from .tieba_store_sql import (add_new_content,
-                                      query_content_by_content_id,
-                                      update_content_by_content_id)
+        from .tieba_store_sql import batch_store_content, upsert_content
         import config
-        
-        note_id = content_item.get("note_id")
-        note_detail: Dict = await query_content_by_content_id(content_id=note_id)
-        if not note_detail:
-            content_item["add_ts"] = utils.get_current_timestamp()
-            # 添加task_times_id字段
-            if hasattr(config, 'TASK_ID') and config.TASK_ID:
-                content_item["task_times_id"] = config.TASK_ID
-            await add_new_content(content_item)
+
+        content_item["add_ts"] = utils.get_current_timestamp()
+        # 添加task_times_id字段
+        if hasattr(config, 'TASK_ID') and config.TASK_ID:
+            content_item["task_times_id"] = config.TASK_ID
+        if db_batch_writer_var.get() is not None:
+            await batch_store_content(content_item)
         else:
-            await update_content_by_content_id(note_id, content_item=content_item)
+            await upsert_content(content_item)
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -143,21 +135,17 @@ class TieBaDbStoreImplement(AbstractStore):
         Returns:
 
         """
-        from .tieba_store_sql import (add_new_comment,
-                                      query_comment_by_comment_id,
-                                      update_comment_by_comment_id)
+        from .tieba_store_sql import batch_store_comment, upsert_comment
         import config
-        
-        comment_id = comment_item.get("comment_id")
-        comment_detail: Dict = await query_comment_by_comment_id(comment_id=comment_id)
-        if not comment_detail:
-            comment_item["add_ts"] = utils.get_current_timestamp()
-            # 添加task_times_id字段
-            if hasattr(config, 'TASK_ID') and config.TASK_ID:
-                comment_item["task_times_id"] = config.TASK_ID
-            await add_new_comment(comment_item)
+
+        comment_item["add_ts"] = utils.get_current_timestamp()
+        # 添加task_times_id字段
+        if hasattr(config, 'TASK_ID') and config.TASK_ID:
+            comment_item["task_times_id"] = config.TASK_ID
+        if db_batch_writer_var.get() is not None:
+            await batch_store_comment(comment_item)
         else:
-            await update_comment_by_comment_id(comment_id, comment_item=comment_item)
+            await upsert_comment(comment_item)
 
     async def store_creator(self, creator: Dict):
         """
@@ -168,25 +156,17 @@ class TieBaDbStoreImplement(AbstractStore):
         Returns:
 
         """
-        from .tieba_store_sql import (add_new_creator,
-                                      query_creator_by_user_id,
-                                      update_creator_by_user_id)
+        from .tieba_store_sql import batch_store_creator, upsert_creator
         import config
-        
-        user_id = creator.get("user_id")
-        user_detail: Dict = await query_creator_by_user_id(user_id)
-        if not user_detail:
-            creator["add_ts"] = utils.get_current_timestamp()
-            # 添加task_times_id字段
-            if hasattr(config, 'TASK_ID') and config.TASK_ID:
-                creator["task_times_id"] = config.TASK_ID
-            await add_new_creator(creator)
-        else:
-            await update_creator_by_user_id(user_id, creator)
 
-
-# TieBaHybridDbStoreImplement类已废弃，因为sync_to_mysql机制已被storage_type参数替代
-# 现在通过DB_TYPE配置直接选择使用SQLite或MySQL，不再需要混合存储
+        creator["add_ts"] = utils.get_current_timestamp()
+        # 添加task_times_id字段
+        if hasattr(config, 'TASK_ID') and config.TASK_ID:
+            creator["task_times_id"] = config.TASK_ID
+        if db_batch_writer_var.get() is not None:
+            await batch_store_creator(creator)
+        else:
+            await upsert_creator(creator)
 
 
 class TieBaJsonStoreImplement(AbstractStore):
@@ -224,6 +204,19 @@ class TieBaJsonStoreImplement(AbstractStore):
         pathlib.Path(self.json_store_path).mkdir(parents=True, exist_ok=True)
         pathlib.Path(self.words_store_path).mkdir(parents=True, exist_ok=True)
         save_file_name, words_file_name_prefix = self.make_save_file_name(store_type=store_type)
+
+        if config.ENABLE_GET_COMMENTS and config.ENABLE_GET_WORDCLOUD:
+            # 增量统计词频，词云图在程序结束时统一生成
+            try:
+                await self.WordCloud.add_items([save_item], words_file_name_prefix)
+            except Exception as e:
+                utils.logger.error(f"[TieBaJsonStoreImplement.save_data_to_json] word frequency error: {e}")
+
+        if config.JSON_APPEND_MODE:
+            # 追加写入NDJSON文件
+            await get_ndjson_writer(save_file_name).write(save_item)
+            return
+
         save_data = []
 
         async with self.lock:
@@ -235,12 +228,6 @@ class TieBaJsonStoreImplement(AbstractStore):
             async with aiofiles.open(save_file_name, 'w', encoding='utf-8') as file:
                 await file.write(json.dumps(save_data, ensure_ascii=False))
 
-            if config.ENABLE_GET_COMMENTS and config.ENABLE_GET_WORDCLOUD:
-                try:
-                    await self.WordCloud.generate_word_frequency_and_cloud(save_data, words_file_name_prefix)
-                except:
-                    pass
-
     async def store_content(self, content_item: Dict):
         """
         content JSON storage implementation
@@ -169,6 +169,19 @@ async def update_weibo_note_image(picid: str, pic_content, extension_file_name):
         {"pic_id": picid, "pic_content": pic_content, "extension_file_name": extension_file_name})
 
 
+async def link_weibo_note_image(picid: str, extension_file_name) -> bool:
+    """
+    图片已保存过时直接链接，返回是否已链接，已链接时不需要再下载
+    Args:
+        picid:
+        extension_file_name:
+
+    Returns:
+
+    """
+    return await WeiboStoreImage().link_image(picid, extension_file_name)
+
+
 async def save_creator(user_id: str, user_info: Dict):
     """
     Save creator information to local
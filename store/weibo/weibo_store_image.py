@@ -13,12 +13,10 @@
 # @Author  : Erm
 # @Time    : 2024/4/9 17:35
 # @Desc    : 微博保存图片类
-import pathlib
 from typing import Dict
 
-import aiofiles
-
 from base.base_crawler import AbstractStoreImage
+from store.media_store import get_media_store
 from tools import utils
 
 
@@ -36,6 +34,31 @@ class WeiboStoreImage(AbstractStoreImage):
         """
         await self.save_image(image_content_item.get("pic_id"), image_content_item.get("pic_content"), image_content_item.get("extension_file_name"))
 
+    @staticmethod
+    def make_media_key(picid: str) -> str:
+        """
+        生成媒体标识，微博图片ID在不同微博之间保持不变
+        Args:
+            picid: image id
+
+        Returns:
+
+        """
+        return f"wb:{picid}"
+
+    async def link_image(self, picid: str, extension_file_name: str) -> bool:
+        """
+        图片已保存过时直接链接，调用方据此跳过下载
+        Args:
+            picid: image id
+            extension_file_name: 文件扩展名
+
+        Returns:
+            是否已链接
+        """
+        return await get_media_store().link(self.make_media_key(picid),
+                                            self.make_save_file_name(picid, extension_file_name))
+
     def make_save_file_name(self, picid: str, extension_file_name: str) -> str:
         """
         make save file name by store type
@@ -47,9 +70,9 @@ class WeiboStoreImage(AbstractStoreImage):
         """
         return f"{self.image_store_path}/{picid}.{extension_file_name}"
 
-    async def save_image(self, picid: str, pic_content: str, extension_file_name="jpg"):
+    async def save_image(self, picid: str, pic_content: bytes, extension_file_name="jpg"):
         """
-        save image to local
+        save image to local, the content is stored once in the media store and hard linked here
         Args:
             picid: image id
             pic_content: image content
@@ -57,8 +80,6 @@ class WeiboStoreImage(AbstractStoreImage):
         Returns:
 
         """
-        pathlib.Path(self.image_store_path).mkdir(parents=True, exist_ok=True)
         save_file_name = self.make_save_file_name(picid, extension_file_name)
-        async with aiofiles.open(save_file_name, 'wb') as f:
-            await f.write(pic_content)
-            utils.logger.info(f"[WeiboImageStoreImplement.save_image] save image {save_file_name} success ...")
\ No newline at end of file
+        await get_media_store().put(pic_content, save_file_name, self.make_media_key(picid))
+        utils.logger.info(f"[WeiboImageStoreImplement.save_image] save image {save_file_name} success ...")
\ No newline at end of file
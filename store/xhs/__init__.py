@@ -211,17 +211,61 @@ async def save_creator(user_id: str, creator: Dict):
     await XhsStoreFactory.create_store().store_creator(local_db_item)
 
 
-async def update_xhs_note_image(note_id, pic_content, extension_file_name):
+async def update_xhs_note_image(note_id, pic_content, extension_file_name, media_key=None):
     """
     更新小红书笔
     Args:
         note_id:
         pic_content:
         extension_file_name:
+        media_key: 媒体标识，记录后下次下载前即可命中
 
     Returns:
 
     """
 
     await XiaoHongShuImage().store_image(
-        {"notice_id": note_id, "pic_content": pic_content, "extension_file_name": extension_file_name})
+        {"notice_id": note_id, "pic_content": pic_content, "extension_file_name": extension_file_name,
+         "media_key": media_key})
+
+
+async def link_xhs_note_image(note_id, media_key, extension_file_name) -> bool:
+    """
+    图片/视频已保存过时直接链接到笔记目录，返回是否已链接，已链接时不需要再下载
+    Args:
+        note_id:
+        media_key: 媒体标识
+        extension_file_name:
+
+    Returns:
+
+    """
+    return await XiaoHongShuImage().link_image(note_id, media_key, extension_file_name)
+
+
+def get_xhs_note_media_download_path(media_key, extension_file_name) -> str:
+    """
+    视频流式下载的本地文件路径，中断后再次下载同一视频时从该文件续传
+    Args:
+        media_key: 媒体标识
+        extension_file_name:
+
+    Returns:
+
+    """
+    return XiaoHongShuImage().get_download_path(media_key, extension_file_name)
+
+
+async def update_xhs_note_media_file(note_id, file_path, extension_file_name, media_key=None):
+    """
+    保存已下载到本地的视频文件，文件移动到媒体存储中，不读入内存
+    Args:
+        note_id:
+        file_path: 已下载的文件路径
+        extension_file_name:
+        media_key: 媒体标识，记录后下次下载前即可命中
+
+    Returns:
+
+    """
+    await XiaoHongShuImage().save_image_file(note_id, file_path, extension_file_name, media_key)
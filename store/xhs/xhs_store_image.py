@@ -13,12 +13,11 @@
 # @Author  : helloteemo
 # @Time    : 2024/7/11 22:35
 # @Desc    : 小红书图片保存
-import pathlib
-from typing import Dict
-
-import aiofiles
+from typing import Dict, Optional
+from urllib.parse import urlparse
 
 from base.base_crawler import AbstractStoreImage
+from store.media_store import get_media_store
 from tools import utils
 
 
@@ -35,7 +34,33 @@ class XiaoHongShuImage(AbstractStoreImage):
 
         """
         await self.save_image(image_content_item.get("notice_id"), image_content_item.get("pic_content"),
-                              image_content_item.get("extension_file_name"))
+                              image_content_item.get("extension_file_name"), image_content_item.get("media_key"))
+
+    @staticmethod
+    def make_media_key(url: str) -> str:
+        """
+        生成媒体标识：小红书CDN地址的前几段路径是带时间的签名，同一文件每次获取的地址都不同，
+        只取最后一段文件ID（去掉 ! 之后的图片处理参数）
+        Args:
+            url: 图片/视频地址
+
+        Returns:
+
+        """
+        return "xhs:" + urlparse(url).path.rsplit("/", 1)[-1].split("!")[0]
+
+    async def link_image(self, notice_id: str, media_key: str, extension_file_name: str) -> bool:
+        """
+        媒体已保存过时直接链接到笔记目录，调用方据此跳过下载
+        Args:
+            notice_id: notice id
+            media_key: 媒体标识
+            extension_file_name: 文件名
+
+        Returns:
+            是否已链接
+        """
+        return await get_media_store().link(media_key, self.make_save_file_name(notice_id, extension_file_name))
 
     def make_save_file_name(self, notice_id: str, extension_file_name: str) -> str:
         """
@@ -49,18 +74,46 @@ class XiaoHongShuImage(AbstractStoreImage):
         """
         return f"{self.image_store_path}/{notice_id}/{extension_file_name}"
 
-    async def save_image(self, notice_id: str, pic_content: str, extension_file_name="jpg"):
+    async def save_image(self, notice_id: str, pic_content: bytes, extension_file_name="jpg",
+                         media_key: Optional[str] = None):
         """
-        save image to local
+        save image to local, the content is stored once in the media store and hard linked into the note folder
         Args:
             notice_id: notice id
             pic_content: image content
+            media_key: media key, checked before the next download
+
+        Returns:
+
+        """
+        save_file_name = self.make_save_file_name(notice_id, extension_file_name)
+        await get_media_store().put(pic_content, save_file_name, media_key)
+        utils.logger.info(f"[XiaoHongShuImageStoreImplement.save_image] save image {save_file_name} success ...")
+
+    def get_download_path(self, media_key: str, extension_file_name: str) -> str:
+        """
+        获取视频流式下载的本地文件路径，同一媒体的路径固定，中断后再次下载时可以续传
+        Args:
+            media_key: 媒体标识
+            extension_file_name: 文件扩展名
+
+        Returns:
+
+        """
+        return get_media_store().get_download_path(media_key, extension_file_name)
+
+    async def save_image_file(self, notice_id: str, file_path: str, extension_file_name: str,
+                              media_key: Optional[str] = None):
+        """
+        save a file already downloaded to disk, the file is moved into the media store without reading it into memory
+        Args:
+            notice_id: notice id
+            file_path: downloaded file path
+            media_key: media key, checked before the next download
 
         Returns:
 
         """
-        pathlib.Path(self.image_store_path + "/" + notice_id).mkdir(parents=True, exist_ok=True)
         save_file_name = self.make_save_file_name(notice_id, extension_file_name)
-        async with aiofiles.open(save_file_name, 'wb') as f:
-            await f.write(pic_content)
-            utils.logger.info(f"[XiaoHongShuImageStoreImplement.save_image] save image {save_file_name} success ...")
+        await get_media_store().put_file(file_path, save_file_name, media_key)
+        utils.logger.info(f"[XiaoHongShuImageStoreImplement.save_image_file] save file {save_file_name} success ...")
@@ -0,0 +1,39 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+from unittest import TestCase
+
+from aiomysql.cursors import RE_INSERT_VALUES
+
+from dp_op.async_mysql_db import AsyncMysqlDB
+
+
+class TestAsyncMysqlDBStatements(TestCase):
+
+    def setUp(self):
+        self.db = AsyncMysqlDB(None, insert_chunk_size=2)
+
+    def test_insert_statements_are_chunked(self):
+        items = [{"a": 1, "b": 2}, {"a": 3, "b": 4}, {"a": 5, "b": 6}, {"a": 7, "b": 8}, {"a": 9, "b": 10}, {"a": 11}]
+        self.assertEqual(self.db.build_insert_statements("t", items), [
+            ("INSERT INTO `t` (`a`,`b`) VALUES (%s,%s),(%s,%s)", [(1, 2, 3, 4), (5, 6, 7, 8)]),
+            ("INSERT INTO `t` (`a`,`b`) VALUES (%s,%s)", [(9, 10)]),
+            ("INSERT INTO `t` (`a`) VALUES (%s)", [(11,)]),
+        ])
+
+    def test_update_sql_is_parameterized(self):
+        self.assertEqual(self.db.build_update_sql("t", ["a", "b"], "id"), "UPDATE `t` SET `a`=%s,`b`=%s WHERE `id`=%s")
+
+    def test_upsert_sql_is_batched_by_executemany(self):
+        # aiomysql 只有匹配该正则时才会把 executemany 改写为多行 INSERT
+        sql = self.db.build_upsert_sql("t", ["note_id", "title"], ("note_id",))
+        self.assertIsNotNone(RE_INSERT_VALUES.match(sql))
@@ -0,0 +1,74 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+
+from dp_op.async_sqlite_db import AsyncSqliteDB
+
+
+class TestAsyncSqliteDBPersistent(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, "test.db")
+        self.db = AsyncSqliteDB(self.db_path, persistent=True, reader_pool_size=2)
+        await self.db.execute("CREATE TABLE t (id INTEGER PRIMARY KEY AUTOINCREMENT, a TEXT)")
+
+    async def test_concurrent_writes_and_reads(self):
+        ids = await asyncio.gather(*[self.db.item_to_table("t", {"a": str(i)}) for i in range(50)])
+        self.assertEqual(len(set(ids)), 50)
+        row = await self.db.get_first("SELECT COUNT(*) AS c FROM t")
+        self.assertEqual(row["c"], 50)
+
+    async def test_wal_mode_enabled(self):
+        row = await self.db.get_first("PRAGMA journal_mode")
+        self.assertEqual(row["journal_mode"], "wal")
+
+    async def test_failed_write_does_not_stop_writer(self):
+        with self.assertRaises(Exception):
+            await self.db.execute("INSERT INTO not_exists VALUES (1)")
+        await self.db.item_to_table("t", {"a": "x"})
+        rows = await self.db.query("SELECT a FROM t")
+        self.assertEqual(rows, [{"a": "x"}])
+
+    async def test_failed_rollback_does_not_stop_writer(self):
+        async def fail_rollback():
+            raise RuntimeError("cannot rollback - no transaction is active")
+
+        async def bad_write(conn):
+            conn.rollback = fail_rollback
+            raise ValueError("bad write")
+
+        with self.assertRaises(ValueError):
+            await self.db._write(bad_write)
+        self.assertFalse(self.db._writer_task.done())
+        await self.db.item_to_table("t", {"a": "x"})
+        rows = await self.db.query("SELECT a FROM t")
+        self.assertEqual(rows, [{"a": "x"}])
+
+    async def test_stopped_writer_fails_writes(self):
+        self.db._writer_task.cancel()
+        with self.assertRaises(RuntimeError):
+            await asyncio.wait_for(self.db.item_to_table("t", {"a": "x"}), 5)
+
+    async def test_items_to_table_and_update_items(self):
+        self.assertEqual(await self.db.items_to_table("t", [{"a": str(i)} for i in range(5)] + [{"id": 10, "a": "x"}]), 6)
+        self.assertEqual(await self.db.update_items("t", [{"id": 1, "a": "u1"}, {"id": 10, "a": "u10"}], "id"), 2)
+        rows = await self.db.query("SELECT id, a FROM t WHERE id IN (1, 2, 10) ORDER BY id")
+        self.assertEqual(rows, [{"id": 1, "a": "u1"}, {"id": 2, "a": "1"}, {"id": 10, "a": "u10"}])
+
+    async def asyncTearDown(self):
+        await self.db.close()
+        self.tmp_dir.cleanup()
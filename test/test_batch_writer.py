@@ -0,0 +1,89 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+
+from dp_op.async_sqlite_db import AsyncSqliteDB
+from dp_op.batch_writer import AsyncBatchWriter, BatchWriteError
+from store.douyin.douyin_store_impl import DouyinDbStoreImplement
+from var import db_batch_writer_var, media_crawler_db_var
+
+
+class TestAsyncBatchWriter(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db = AsyncSqliteDB(os.path.join(self.tmp_dir.name, "test.db"))
+        await self.db.execute(
+            "CREATE TABLE note (id INTEGER PRIMARY KEY AUTOINCREMENT, note_id TEXT, title TEXT, add_ts INTEGER)")
+        await self.db.execute("CREATE UNIQUE INDEX idx_note_note_id ON note (note_id)")
+        self.writer = AsyncBatchWriter(self.db, batch_size=10, flush_interval=0)
+
+    async def test_flush_on_batch_size(self):
+        for i in range(10):
+            await self.writer.add("note", {"note_id": str(i), "title": "t", "add_ts": 1}, key_fields=("note_id",))
+        self.assertEqual(self.writer.pending_count(), 0)
+        row = await self.db.get_first("SELECT COUNT(*) AS c FROM note")
+        self.assertEqual(row["c"], 10)
+
+    async def test_update_existing_keeps_insert_only_fields(self):
+        await self.writer.add("note", {"note_id": "1", "title": "old", "add_ts": 1}, key_fields=("note_id",))
+        await self.writer.flush()
+        await self.writer.add("note", {"note_id": "1", "title": "new", "add_ts": 2}, key_fields=("note_id",))
+        await self.writer.close()
+        rows = await self.db.query("SELECT note_id, title, add_ts FROM note")
+        self.assertEqual(rows, [{"note_id": "1", "title": "new", "add_ts": 1}])
+        self.assertEqual(self.writer.stats["flush_count"], 2)
+
+    async def test_failed_rows_kept_for_retry(self):
+        writer = AsyncBatchWriter(self.db, batch_size=10, flush_interval=0, max_retries=1)
+        await writer.add("missing", {"note_id": "1", "title": "t", "add_ts": 1}, key_fields=("note_id",))
+        with self.assertRaises(BatchWriteError):
+            await writer.flush()
+        # 写入失败的记录放回缓冲区，表可用后再次写入
+        self.assertEqual(writer.pending_count(), 1)
+        await self.db.execute("CREATE TABLE missing (note_id TEXT PRIMARY KEY, title TEXT, add_ts INTEGER)")
+        await writer.flush()
+        self.assertEqual(writer.pending_count(), 0)
+        row = await self.db.get_first("SELECT COUNT(*) AS c FROM missing")
+        self.assertEqual(row["c"], 1)
+
+    async def test_drop_after_max_retries(self):
+        writer = AsyncBatchWriter(self.db, batch_size=10, flush_interval=0, max_retries=1)
+        await writer.add("missing", {"note_id": "1", "title": "t", "add_ts": 1}, key_fields=("note_id",))
+        for _ in range(2):
+            with self.assertRaises(BatchWriteError):
+                await writer.flush()
+        self.assertEqual(writer.pending_count(), 0)
+
+    async def test_douyin_update_after_buffered_insert(self):
+        await self.db.execute(
+            "CREATE TABLE douyin_aweme (id INTEGER PRIMARY KEY AUTOINCREMENT, aweme_id TEXT UNIQUE, title TEXT, "
+            "liked_count TEXT, add_ts INTEGER, task_times_id TEXT)")
+        db_token = media_crawler_db_var.set(self.db)
+        writer_token = db_batch_writer_var.set(self.writer)
+        try:
+            store = DouyinDbStoreImplement()
+            await store.store_content({"aweme_id": "a1", "title": "视频", "liked_count": "1"})
+            # 没有标题的记录只更新已有数据，缓冲区中的视频需要先写入
+            await store.store_content({"aweme_id": "a1", "title": "", "liked_count": "2"})
+            await store.store_content({"aweme_id": "a2", "title": "", "liked_count": "2"})
+            rows = await self.db.query("SELECT aweme_id, liked_count FROM douyin_aweme")
+            self.assertEqual(rows, [{"aweme_id": "a1", "liked_count": "2"}])
+        finally:
+            db_batch_writer_var.reset(writer_token)
+            media_crawler_db_var.reset(db_token)
+
+    async def asyncTearDown(self):
+        self.tmp_dir.cleanup()
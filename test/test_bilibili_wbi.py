@@ -0,0 +1,76 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+from unittest import IsolatedAsyncioTestCase, mock
+
+import config
+from media_platform.bilibili.client import BilibiliClient
+from media_platform.bilibili.exception import WbiSignError
+
+_OLD_KEYS = ("https://i0.hdslb.com/bfs/wbi/7cd084941338484aae1ad9425b84077c.png-"
+             "https://i0.hdslb.com/bfs/wbi/4932caff0ff746eab6f01bf08b70ac45.png")
+_NAV = {"wbi_img": {"img_url": "https://i0.hdslb.com/bfs/wbi/" + "a" * 32 + ".png",
+                    "sub_url": "https://i0.hdslb.com/bfs/wbi/" + "b" * 32 + ".png"}}
+
+
+class _FakePage:
+    def __init__(self):
+        self.evaluate_count = 0
+
+    async def evaluate(self, expression):
+        self.evaluate_count += 1
+        return {"wbi_img_urls": _OLD_KEYS}
+
+
+class TestBilibiliWbiKeys(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.page = _FakePage()
+        self.client = BilibiliClient(headers={}, playwright_page=self.page, cookie_dict={})
+        self.requests = []
+
+    async def _fake_request(self, method, url, **kwargs):
+        self.requests.append(url)
+        if url.endswith("/x/web-interface/nav"):
+            return _NAV
+        # 旧密钥的签名被拒绝
+        if self.client._wbi_signer.img_key.startswith("7cd") and "reject_old" in url:
+            raise WbiSignError("-403")
+        return {"ok": True}
+
+    async def test_keys_cached(self):
+        with mock.patch.object(self.client, "request", self._fake_request):
+            for i in range(5):
+                await self.client.get("/x/test", {"page": i})
+        self.assertEqual(self.page.evaluate_count, 1)
+        self.assertEqual(len(self.requests), 5)
+        self.assertIn("w_rid=", self.requests[0])
+
+    async def test_refresh_on_sign_error(self):
+        with mock.patch.object(self.client, "request", self._fake_request):
+            result = await self.client.get("/x/reject_old", {"page": 1})
+        self.assertEqual(result, {"ok": True})
+        self.assertEqual(self.client._wbi_signer.img_key, "a" * 32)
+        self.assertEqual(sum(url.endswith("/nav") for url in self.requests), 1)
+        # 重新签名时使用原始参数，不包含上次的签名
+        self.assertEqual(self.requests[-1].count("w_rid="), 1)
+
+    async def test_background_refresh_after_ttl(self):
+        with mock.patch.object(self.client, "request", self._fake_request), \
+                mock.patch.object(config, "BILI_WBI_KEY_TTL", 0):
+            await self.client.get("/x/test", {"page": 1})
+            await self.client.get("/x/test", {"page": 2})
+            # 过期后仍使用旧密钥签名，刷新在后台完成
+            self.assertEqual(self.client._wbi_signer.img_key[:3], "7cd")
+            await self.client._wbi_refresh_task
+        self.assertEqual(self.client._wbi_signer.img_key, "a" * 32)
+        self.assertEqual(self.page.evaluate_count, 1)
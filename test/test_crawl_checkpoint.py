@@ -0,0 +1,115 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+
+from base.base_crawler import AbstractApiClient
+from dp_op.async_sqlite_db import AsyncSqliteDB
+from dp_op.batch_writer import AsyncBatchWriter, BatchWriteError
+from dp_op.crawl_checkpoint import CrawlCheckpoint
+from var import crawl_checkpoint_var, db_batch_writer_var
+
+
+class TestCrawlCheckpoint(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db = AsyncSqliteDB(os.path.join(self.tmp_dir.name, "test.db"))
+
+    async def test_resume_from_saved_cursor(self):
+        checkpoint = CrawlCheckpoint(self.db, "task-1")
+        await checkpoint.load()
+        await checkpoint.save("xhs:comments:n1", "cursor-2", 20)
+        await checkpoint.save("xhs:comments:n1", "cursor-3", 40)
+        await checkpoint.save("xhs:creator_notes:u1", {"cursor": "", "notes": [{"note_id": "n1"}]}, 1, done=True)
+
+        resumed = CrawlCheckpoint(self.db, "task-1", resume=True)
+        self.assertEqual(await resumed.load(), 2)
+        self.assertEqual(resumed.get("xhs:comments:n1"), ("cursor-3", 40, False))
+        self.assertEqual(resumed.get("xhs:creator_notes:u1"), ({"cursor": "", "notes": [{"note_id": "n1"}]}, 1, True))
+        self.assertIsNone(resumed.get("xhs:comments:n2"))
+
+        # 其他任务以及未开启续爬时不加载断点
+        other = CrawlCheckpoint(self.db, "task-2", resume=True)
+        self.assertEqual(await other.load(), 0)
+        fresh = CrawlCheckpoint(self.db, "task-1")
+        self.assertEqual(await fresh.load(), 0)
+        self.assertIsNone(fresh.get("xhs:comments:n1"))
+
+    async def test_api_client_helpers(self):
+        self.assertEqual(AbstractApiClient.get_checkpoint("dy:comments:a1", 0), (0, 0, False))
+        # 没有任务ID时不记录断点
+        await AbstractApiClient.save_checkpoint("dy:comments:a1", 20, 20)
+
+        checkpoint = CrawlCheckpoint(self.db, "task-1", resume=True)
+        await checkpoint.load()
+        token = crawl_checkpoint_var.set(checkpoint)
+        try:
+            await AbstractApiClient.save_checkpoint("dy:comments:a1", 20, 20)
+            # 本次运行中记录的断点只持久化，同一实体再次出现时仍从头获取
+            self.assertEqual(AbstractApiClient.get_checkpoint("dy:comments:a1", 0), (0, 0, False))
+            self.assertEqual(AbstractApiClient.get_checkpoint("dy:comments:a2", 0), (0, 0, False))
+        finally:
+            crawl_checkpoint_var.reset(token)
+
+    async def test_save_with_page_data(self):
+        await self.db.execute("CREATE TABLE note (note_id TEXT PRIMARY KEY, add_ts INTEGER)")
+        writer = AsyncBatchWriter(self.db, batch_size=100, flush_interval=0)
+        token = db_batch_writer_var.set(writer)
+        try:
+            checkpoint = CrawlCheckpoint(self.db, "task-1")
+            await checkpoint.load()
+            await writer.add("note", {"note_id": "n1", "add_ts": 1}, key_fields=("note_id",))
+            await checkpoint.save("xhs:search:k1", 2, 1)
+            # 断点随该页数据一起写入，不单独触发写入
+            row = await self.db.get_first("SELECT COUNT(*) AS c FROM note")
+            self.assertEqual(row["c"], 0)
+            self.assertEqual(writer.pending_count(), 2)
+            await writer.flush()
+            resumed = CrawlCheckpoint(self.db, "task-1", resume=True)
+            await resumed.load()
+            self.assertEqual(resumed.get("xhs:search:k1"), (2, 1, False))
+
+            # 该页数据写入失败时不写入断点，断点留在缓冲区
+            await writer.add("missing", {"note_id": "n2", "add_ts": 1}, key_fields=("note_id",))
+            await checkpoint.save("xhs:search:k1", 3, 2)
+            with self.assertRaises(BatchWriteError):
+                await writer.flush()
+            resumed = CrawlCheckpoint(self.db, "task-1", resume=True)
+            await resumed.load()
+            self.assertEqual(resumed.get("xhs:search:k1"), (2, 1, False))
+            self.assertEqual(writer.pending_count(), 2)
+        finally:
+            db_batch_writer_var.reset(token)
+
+    async def test_checkpoint_written_after_data_tables(self):
+        writer = AsyncBatchWriter(self.db, batch_size=100, flush_interval=0)
+        token = db_batch_writer_var.set(writer)
+        try:
+            checkpoint = CrawlCheckpoint(self.db, "task-1")
+            await checkpoint.load()
+            # 断点表先出现在缓冲区中，写入时仍在数据表之后，数据表写入失败时不写入
+            await checkpoint.save("xhs:search:k1", 1, 0)
+            await writer.add("missing", {"note_id": "n1", "add_ts": 1}, key_fields=("note_id",))
+            await checkpoint.save("xhs:search:k1", 2, 1)
+            with self.assertRaises(BatchWriteError):
+                await writer.flush()
+            row = await self.db.get_first("SELECT COUNT(*) AS c FROM crawl_checkpoints")
+            self.assertEqual(row["c"], 0)
+        finally:
+            db_batch_writer_var.reset(token)
+
+    async def asyncTearDown(self):
+        await self.db.close()
+        self.tmp_dir.cleanup()
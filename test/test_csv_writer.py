@@ -0,0 +1,47 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import csv
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+
+from store.csv_writer import CsvFileWriter
+
+
+class TestCsvFileWriter(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.tmp_dir.name, "xhs", "1_search_comments_2024-01-01.csv")
+
+    def read_rows(self):
+        with open(self.file_path, encoding="utf-8-sig", newline="") as f:
+            return list(csv.reader(f))
+
+    async def test_header_written_once_across_writers(self):
+        writer = CsvFileWriter(self.file_path, flush_size=3)
+        for i in range(5):
+            await writer.write({"comment_id": str(i), "content": "评论,含逗号"})
+        self.assertEqual(len(self.read_rows()), 4)
+        await writer.close()
+
+        writer = CsvFileWriter(self.file_path)
+        await writer.write({"comment_id": "5", "content": "x"})
+        await writer.close()
+        rows = self.read_rows()
+        self.assertEqual(rows[0], ["comment_id", "content"])
+        self.assertEqual([row[0] for row in rows[1:]], [str(i) for i in range(6)])
+        self.assertEqual(rows[1][1], "评论,含逗号")
+
+    async def asyncTearDown(self):
+        self.tmp_dir.cleanup()
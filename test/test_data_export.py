@@ -0,0 +1,55 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+
+# -*- coding: utf-8 -*-
+import csv
+import io
+import json
+from unittest import IsolatedAsyncioTestCase
+
+from api.data_export import iter_csv_export, iter_json_export
+
+
+async def fake_chunks(columns, rows, chunk_size=2):
+    yield columns, []
+    for i in range(0, len(rows), chunk_size):
+        yield columns, rows[i:i + chunk_size]
+
+
+async def collect(iterator) -> bytes:
+    return b"".join([chunk async for chunk in iterator])
+
+
+class TestDataExport(IsolatedAsyncioTestCase):
+
+    async def test_csv_export(self):
+        rows = [(1, "标题1", None), (2, "a,b", "x"), (3, "c", "y")]
+        body = await collect(iter_csv_export(fake_chunks(["id", "title", "desc"], rows), with_bom=True,
+                                             format_value=lambda v: "" if v is None else str(v)))
+        self.assertTrue(body.startswith("\ufeff".encode("utf-8")))
+        result = list(csv.reader(io.StringIO(body.decode("utf-8-sig"))))
+        self.assertEqual(result[0], ["id", "title", "desc"])
+        self.assertEqual(result[1:], [["1", "标题1", ""], ["2", "a,b", "x"], ["3", "c", "y"]])
+
+    async def test_json_export(self):
+        rows = [(i, f"t{i}") for i in range(5)]
+        body = await collect(iter_json_export(fake_chunks(["id", "title"], rows), {"table_name": "t"},
+                                              records_key="records", wrapper={"success": True}))
+        result = json.loads(body)
+        self.assertTrue(result["success"])
+        self.assertEqual(result["data"]["table_name"], "t")
+        self.assertEqual(result["data"]["total_count"], 5)
+        self.assertEqual(result["data"]["records"][4], {"id": 4, "title": "t4"})
+
+    async def test_json_export_empty(self):
+        body = await collect(iter_json_export(fake_chunks(["id"], []), {"table_name": "t"}, records_key="data"))
+        self.assertEqual(json.loads(body), {"table_name": "t", "data": [], "total_count": 0})
@@ -0,0 +1,85 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+
+# -*- coding: utf-8 -*-
+import os
+import sqlite3
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+
+from api.data_paging import CountCache, decode_cursor, decode_search_cursor, encode_cursor, merge_search_results
+from api.extra_sqlite_api import SQLiteDataManager
+
+
+class TestDataPaging(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, "paging.db")
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.execute("CREATE TABLE xhs_note_comment (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                          "comment_id TEXT, create_time INTEGER, task_times_id TEXT)")
+        self.conn.executemany(
+            "INSERT INTO xhs_note_comment (comment_id, create_time, task_times_id) VALUES (?, ?, ?)",
+            [(str(i), i // 3 if i % 20 else None, "T1" if i % 2 else "T2") for i in range(200)])
+        self.conn.commit()
+        self.manager = SQLiteDataManager(self.db_path)
+
+    async def asyncTearDown(self):
+        self.conn.close()
+        self.tmp_dir.cleanup()
+
+    def test_cursor_round_trip(self):
+        self.assertEqual(decode_cursor(encode_cursor(1700000000, 42)), (1700000000, 42, None))
+        self.assertEqual(decode_cursor(encode_cursor(None, 7)), (None, 7, None))
+        self.assertEqual(decode_cursor(encode_cursor(5, 7, "task_T1.db")), (5, 7, "task_T1.db"))
+
+    def test_search_cursor_keeps_shard(self):
+        rows = [{"id": 1, "_score": 0, "_shard": shard} for shard in ("b.db", "a.db", "main")]
+        data, cursor = merge_search_results({"xhs_note_comment": rows}, 2, "_shard")
+        self.assertEqual([row["_shard"] for row in data], ["a.db", "b.db"])
+        self.assertEqual(decode_search_cursor(cursor), (0.0, "xhs_note_comment", 1, "b.db"))
+
+    def test_count_cache_version(self):
+        cache = CountCache()
+        cache.set("t", None, 10, 100)
+        self.assertEqual(cache.get("t", None, 10), 100)
+        self.assertIsNone(cache.get("t", None, 11))
+        cache.invalidate("t")
+        self.assertIsNone(cache.get("t", None, 10))
+
+    async def test_keyset_matches_offset(self):
+        keyset_ids, cursor = [], None
+        while True:
+            result = await self.manager.get_table_data("xhs_note_comment", page_size=15, task_times_id="T1",
+                                                       cursor=cursor, keyset=True)
+            keyset_ids += [row["id"] for row in result["data"]]
+            cursor = result["next_cursor"]
+            if not cursor:
+                break
+
+        offset_ids = []
+        for page in range(1, 8):
+            result = await self.manager.get_table_data("xhs_note_comment", page=page, page_size=15,
+                                                       task_times_id="T1")
+            offset_ids += [row["id"] for row in result["data"]]
+
+        self.assertEqual(len(keyset_ids), 100)
+        self.assertEqual(keyset_ids, offset_ids)
+
+    async def test_count_refreshes_after_insert(self):
+        result = await self.manager.get_table_data("xhs_note_comment", task_times_id="T1")
+        self.assertEqual(result["total"], 100)
+        self.conn.execute("INSERT INTO xhs_note_comment (comment_id, create_time, task_times_id) VALUES ('x', 1, 'T1')")
+        self.conn.commit()
+        result = await self.manager.get_table_data("xhs_note_comment", task_times_id="T1")
+        self.assertEqual(result["total"], 101)
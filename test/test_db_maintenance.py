@@ -0,0 +1,129 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+
+# -*- coding: utf-8 -*-
+import gzip
+import json
+import os
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta
+from unittest import IsolatedAsyncioTestCase
+
+from dp_op.async_sqlite_db import AsyncSqliteDB
+from dp_op.db_maintenance import AUTO_VACUUM_INCREMENTAL, DatabaseMaintainer
+from dp_op.sqlite_shards import SHARD_MODE_PLATFORM, SHARD_MODE_TASK, get_shard_path
+
+
+class TestDatabaseMaintainer(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, "data.db")
+        self.archive_dir = os.path.join(self.tmp_dir.name, "archive")
+        old = (datetime.now() - timedelta(days=60)).isoformat()
+        new = datetime.now().isoformat()
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("CREATE TABLE crawler_tasks (id INTEGER PRIMARY KEY AUTOINCREMENT, task_times_id TEXT, "
+                     "status TEXT, created_at TEXT)")
+        conn.execute("CREATE TABLE xhs_note_comment (id INTEGER PRIMARY KEY AUTOINCREMENT, comment_id TEXT, "
+                     "content TEXT, task_times_id TEXT)")
+        conn.executemany("INSERT INTO crawler_tasks (task_times_id, status, created_at) VALUES (?, ?, ?)",
+                         [("OLD", "completed", old), ("RUNNING", "running", old), ("NEW", "completed", new)])
+        conn.executemany("INSERT INTO xhs_note_comment (comment_id, content, task_times_id) VALUES (?, ?, ?)",
+                         [(str(i), "x" * 2000, "OLD" if i < 1500 else "NEW") for i in range(2000)])
+        conn.commit()
+        conn.close()
+        self.maintainer = DatabaseMaintainer(AsyncSqliteDB(self.db_path), self.archive_dir)
+
+    async def test_archive_and_reclaim(self):
+        self.assertEqual(await self.maintainer.find_archivable_tasks(30), ["OLD"])
+        report = await self.maintainer.run(archive_days=30)
+        self.assertEqual(report["archived_tasks"], {"OLD": {"xhs_note_comment": 1500, "crawler_tasks": 1}})
+        self.assertGreater(report["vacuumed_pages"], 0)
+        self.assertGreater(report["reclaimed_bytes"], 0)
+        self.assertEqual(report["after"]["freelist_count"], 0)
+
+        with gzip.open(self.maintainer.get_archive_path("OLD"), "rt", encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual(len(lines), 1501)
+        self.assertEqual(lines[-1]["row"]["task_times_id"], "OLD")
+
+        conn = sqlite3.connect(self.db_path)
+        remaining = conn.execute("SELECT DISTINCT task_times_id FROM xhs_note_comment").fetchall()
+        tasks = conn.execute("SELECT task_times_id FROM crawler_tasks ORDER BY id").fetchall()
+        conn.close()
+        self.assertEqual(remaining, [("NEW",)])
+        self.assertEqual(tasks, [("RUNNING",), ("NEW",)])
+
+    def create_shard(self, path: str, task_ids):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("CREATE TABLE xhs_note (id INTEGER PRIMARY KEY AUTOINCREMENT, note_id TEXT, "
+                     "desc TEXT, task_times_id TEXT)")
+        conn.executemany("INSERT INTO xhs_note (note_id, desc, task_times_id) VALUES (?, ?, ?)",
+                         [(str(i), "x" * 2000, task_id) for task_id in task_ids for i in range(500)])
+        conn.commit()
+        conn.close()
+
+    async def test_archive_task_shard(self):
+        shard_dir = os.path.join(self.tmp_dir.name, "shards")
+        old_shard = get_shard_path(SHARD_MODE_TASK, shard_dir, task_id="OLD")
+        new_shard = get_shard_path(SHARD_MODE_TASK, shard_dir, task_id="NEW")
+        self.create_shard(old_shard, ["OLD"])
+        self.create_shard(new_shard, ["NEW"])
+        maintainer = DatabaseMaintainer(AsyncSqliteDB(self.db_path), self.archive_dir,
+                                        shard_mode=SHARD_MODE_TASK, shard_dir=shard_dir)
+        report = await maintainer.run(archive_days=30)
+        self.assertEqual(report["archived_tasks"]["OLD"],
+                         {"xhs_note": 500, "xhs_note_comment": 1500, "crawler_tasks": 1})
+        self.assertFalse(os.path.exists(old_shard))
+        self.assertTrue(os.path.exists(new_shard))
+
+        with gzip.open(maintainer.get_archive_path("OLD"), "rt", encoding="utf-8") as f:
+            tables = [json.loads(line)["table"] for line in f]
+        self.assertEqual(tables.count("xhs_note"), 500)
+        self.assertEqual(tables[-1], "crawler_tasks")
+
+    async def test_archive_platform_shard(self):
+        shard_dir = os.path.join(self.tmp_dir.name, "shards")
+        shard_path = get_shard_path(SHARD_MODE_PLATFORM, shard_dir, platform="xhs")
+        self.create_shard(shard_path, ["OLD", "NEW"])
+        maintainer = DatabaseMaintainer(AsyncSqliteDB(self.db_path), self.archive_dir,
+                                        shard_mode=SHARD_MODE_PLATFORM, shard_dir=shard_dir)
+        report = await maintainer.run(archive_days=30)
+        self.assertEqual(report["archived_tasks"]["OLD"]["xhs_note"], 500)
+        # 主库和平台分库中删除的空闲页都被回收
+        self.assertGreater(report["vacuumed_pages"], report["before"]["page_count"] - report["after"]["page_count"])
+
+        conn = sqlite3.connect(shard_path)
+        remaining = conn.execute("SELECT DISTINCT task_times_id FROM xhs_note").fetchall()
+        freelist = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        conn.close()
+        self.assertEqual(remaining, [("NEW",)])
+        self.assertEqual(freelist, 0)
+
+    async def test_enable_incremental_vacuum(self):
+        db_path = os.path.join(self.tmp_dir.name, "legacy.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, v TEXT)")
+        conn.close()
+        maintainer = DatabaseMaintainer(AsyncSqliteDB(db_path), self.archive_dir)
+        self.assertEqual(await maintainer.incremental_vacuum(), 0)
+        self.assertTrue(await maintainer.enable_incremental_vacuum())
+        self.assertEqual((await maintainer.get_space_info())["auto_vacuum"], AUTO_VACUUM_INCREMENTAL)
+        self.assertFalse(await maintainer.enable_incremental_vacuum())
+
+    async def asyncTearDown(self):
+        self.tmp_dir.cleanup()
@@ -0,0 +1,84 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+
+from dp_op.async_sqlite_db import AsyncSqliteDB
+from debug_tools.db_analyzer import QueryPlanAdvisor
+from dp_op.db_migrations import ensure_query_indexes, find_missing_query_indexes, migrate_unique_keys
+
+
+class TestUniqueKeyMigration(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db = AsyncSqliteDB(os.path.join(self.tmp_dir.name, "test.db"))
+        await self.db.execute(
+            "CREATE TABLE xhs_note (id INTEGER PRIMARY KEY AUTOINCREMENT, note_id TEXT, title TEXT, "
+            "add_ts INTEGER, task_times_id TEXT)")
+        await self.db.execute("CREATE INDEX idx_xhs_note_note_id_209457 ON xhs_note (note_id)")
+        for title in ("a", "b", "c"):
+            await self.db.item_to_table("xhs_note", {"note_id": "1", "title": title, "add_ts": 1})
+
+    async def test_migrate_dedupes_and_enables_upsert(self):
+        result = await migrate_unique_keys(self.db)
+        self.assertEqual(result, {"xhs_note": 2})
+        # 重复执行不会再做任何修改
+        self.assertEqual(await migrate_unique_keys(self.db), {"xhs_note": 0})
+
+        await self.db.upsert_item("xhs_note", {"note_id": "1", "title": "new", "add_ts": 2, "task_times_id": "t2"},
+                                  key_fields=("note_id",))
+        await self.db.upsert_item("xhs_note", {"note_id": "2", "title": "x", "add_ts": 3, "task_times_id": "t2"},
+                                  key_fields=("note_id",))
+        rows = await self.db.query("SELECT note_id, title, add_ts, task_times_id FROM xhs_note ORDER BY note_id")
+        self.assertEqual(rows, [
+            {"note_id": "1", "title": "new", "add_ts": 1, "task_times_id": None},
+            {"note_id": "2", "title": "x", "add_ts": 3, "task_times_id": "t2"},
+        ])
+
+    async def asyncTearDown(self):
+        self.tmp_dir.cleanup()
+
+
+class TestQueryIndexMigration(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db = AsyncSqliteDB(os.path.join(self.tmp_dir.name, "test.db"))
+        await self.db.execute(
+            "CREATE TABLE xhs_note (id INTEGER PRIMARY KEY AUTOINCREMENT, note_id TEXT, title TEXT, `desc` TEXT, `time` INTEGER, "
+            "add_ts INTEGER, task_times_id TEXT)")
+        await self.db.execute("CREATE INDEX idx_xhs_note_time_eaa910 ON xhs_note (`time`)")
+        await self.db.execute("CREATE INDEX idx_xhs_note_task_times_id ON xhs_note (task_times_id)")
+        # 缺少时间字段的表跳过
+        await self.db.execute("CREATE TABLE xhs_creator (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT)")
+
+    async def test_ensure_query_indexes(self):
+        self.assertEqual(await find_missing_query_indexes(self.db), {"xhs_note": [("task_times_id", "time")]})
+        advice = await QueryPlanAdvisor(self.db).advise()
+        self.assertIn(("xhs_note", "按任务浏览（首页）"),
+                      {(finding["table"], finding["name"]) for finding in advice["findings"]})
+        self.assertEqual(advice["suggestions"],
+                         ["CREATE INDEX `idx_xhs_note_task_times_id_time` ON `xhs_note` (`task_times_id`, `time`);"])
+
+        self.assertEqual(await ensure_query_indexes(self.db), ["idx_xhs_note_task_times_id_time"])
+        # 重复执行不会再做任何修改
+        self.assertEqual(await ensure_query_indexes(self.db), [])
+        advice = await QueryPlanAdvisor(self.db).advise()
+        self.assertEqual([finding for finding in advice["findings"] if finding["table"] == "xhs_note"], [])
+        self.assertEqual(advice["suggestions"], [])
+
+    async def asyncTearDown(self):
+        await self.db.close()
+        self.tmp_dir.cleanup()
@@ -0,0 +1,81 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import IsolatedAsyncioTestCase, mock
+
+import httpx
+
+from tools import http_client_pool
+from tools.http_client_pool import HttpClientPool, close_all_http_clients
+
+
+class _PortHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        # 返回客户端端口，复用连接时端口不变
+        body = str(self.client_address[1]).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _AsyncClient(httpx.AsyncClient):
+    """忽略代理参数，只用于验证代理变化时重建客户端"""
+
+    def __init__(self, proxies=None, **kwargs):
+        super().__init__(**kwargs)
+
+
+class TestHttpClientPool(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _PortHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/"
+        self.pool = HttpClientPool(max_connections=4, max_keepalive_connections=2, http2=False)
+
+    async def asyncTearDown(self):
+        await self.pool.aclose()
+        self.server.shutdown()
+        self.server.server_close()
+
+    async def test_reuse_connection(self):
+        ports = set()
+        for _ in range(3):
+            response = await self.pool.get().get(self.url)
+            ports.add(response.text)
+        self.assertIs(self.pool.get(), self.pool.get())
+        self.assertEqual(len(ports), 1)
+
+    async def test_rebuild_on_proxies_change(self):
+        with mock.patch.object(http_client_pool.httpx, "AsyncClient", _AsyncClient):
+            first = self.pool.get()
+            second = self.pool.get({"http://": "http://127.0.0.1:1"})
+            self.assertIsNot(first, second)
+            self.assertIs(second, self.pool.get({"http://": "http://127.0.0.1:1"}))
+            self.assertFalse(first.is_closed)
+            await self.pool.aclose()
+            self.assertTrue(first.is_closed)
+            self.assertTrue(second.is_closed)
+
+    async def test_close_all(self):
+        client = self.pool.get()
+        await close_all_http_clients()
+        self.assertTrue(client.is_closed)
+        self.assertIsNot(self.pool.get(), client)
@@ -0,0 +1,81 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+from tools.js_sign_pool import JsSignError, JsSignPool
+
+_SCRIPT = """
+const crypto = require('crypto');
+function add(a, b) { return a + b; }
+function md5(s) { console.log('debug output'); return crypto.createHash('md5').update(s).digest('hex'); }
+function pid() { return process.pid; }
+function crash() { process.exit(1); }
+function hang() { while (true) {} }
+"""
+
+
+@unittest.skipIf(shutil.which("node") is None, "node not installed")
+class TestJsSignPool(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.script_path = os.path.join(self.tmp_dir, "sign.js")
+        with open(self.script_path, "w", encoding="utf-8") as f:
+            f.write(_SCRIPT)
+        self.pool = JsSignPool(self.script_path, size=2, timeout=2)
+
+    async def asyncTearDown(self):
+        await self.pool.close()
+        shutil.rmtree(self.tmp_dir)
+
+    async def test_call(self):
+        self.assertEqual(await self.pool.call("add", 1, 2), 3)
+        self.assertEqual(await self.pool.call("md5", "abc"), "900150983cd24fb0d6963f7d28e17f72")
+        with self.assertRaises(JsSignError):
+            await self.pool.call("missing")
+
+    async def test_call_many_reuses_workers(self):
+        results = await self.pool.call_many([("add", [i, i]) for i in range(200)])
+        self.assertEqual(results, [i * 2 for i in range(200)])
+        pids = set(await self.pool.call_many([("pid", [])] * 20))
+        self.assertLessEqual(len(pids), 2)
+        start = time.perf_counter()
+        await self.pool.call_many([("add", [i, i]) for i in range(1000)])
+        self.assertLess(time.perf_counter() - start, 5)
+
+    async def test_restart_after_crash(self):
+        self.assertEqual(await self.pool.health_check(), 2)
+        with self.assertRaises(JsSignError):
+            await self.pool.call("crash")
+        self.assertEqual(await self.pool.call("add", 2, 3), 5)
+        self.assertEqual(await self.pool.health_check(), 2)
+
+    async def test_restart_after_timeout(self):
+        with self.assertRaises(JsSignError):
+            await self.pool.call("hang")
+        results = await asyncio.gather(*[self.pool.call("add", i, 1) for i in range(4)])
+        self.assertEqual(results, [1, 2, 3, 4])
+
+    async def test_douyin_sign(self):
+        pool = JsSignPool("libs/douyin.js", size=1)
+        try:
+            a_bogus = await pool.call("sign_datail", "aweme_id=1", "Mozilla/5.0")
+            self.assertTrue(a_bogus)
+        finally:
+            await pool.close()
@@ -0,0 +1,130 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import IsolatedAsyncioTestCase
+
+from store.media_store import MediaBlobStore
+from tools.media_download_queue import MediaDownloadQueue
+
+
+class _SlowHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    lock = threading.Lock()
+    active = 0
+    max_active = 0
+
+    def do_GET(self):
+        with self.lock:
+            _SlowHandler.active += 1
+            _SlowHandler.max_active = max(_SlowHandler.max_active, _SlowHandler.active)
+        time.sleep(0.3 if self.path.startswith("/slow") else 0.05)
+        with self.lock:
+            _SlowHandler.active -= 1
+        body = self.path.encode("utf-8")
+        self.send_response(404 if self.path == "/missing" else 200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestMediaDownloadQueue(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        _SlowHandler.active = 0
+        _SlowHandler.max_active = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _SlowHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.queue = MediaDownloadQueue(max_concurrency=4, per_host_concurrency=2)
+
+    async def test_fetch_respects_host_limit(self):
+        contents = await asyncio.gather(*[self.queue.fetch(f"{self.base_url}/{i}.jpg") for i in range(6)])
+        self.assertEqual(contents, [f"/{i}.jpg".encode("utf-8") for i in range(6)])
+        self.assertLessEqual(_SlowHandler.max_active, 2)
+        self.assertIsNone(await self.queue.fetch(f"{self.base_url}/missing"))
+
+    async def test_slow_host_does_not_block_other_hosts(self):
+        queue = MediaDownloadQueue(max_concurrency=2, per_host_concurrency=1)
+        try:
+            slow = [asyncio.create_task(queue.fetch(f"{self.base_url}/slow{i}.jpg")) for i in range(4)]
+            await asyncio.sleep(0)
+            start = time.perf_counter()
+            other_url = self.base_url.replace("127.0.0.1", "localhost")
+            self.assertEqual(await queue.fetch(f"{other_url}/fast.jpg"), b"/fast.jpg")
+            # 慢域名排队的任务只占用一个全局名额，其他域名不需要等它们全部完成
+            self.assertLess(time.perf_counter() - start, 0.6)
+            await asyncio.gather(*slow)
+        finally:
+            await queue.close()
+
+    async def test_submitted_tasks_run_in_background(self):
+        results = []
+
+        async def job(i):
+            results.append(await self.queue.fetch(f"{self.base_url}/{i}.jpg"))
+
+        for i in range(3):
+            self.queue.submit(job(i))
+        self.assertEqual(self.queue.pending, 3)
+        await self.queue.join()
+        self.assertEqual(self.queue.pending, 0)
+        self.assertEqual(len(results), 3)
+
+    async def test_download_uses_pooled_client(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_path = os.path.join(tmp_dir, "video.mp4")
+            self.assertTrue(await self.queue.download(f"{self.base_url}/video.mp4", file_path))
+            with open(file_path, "rb") as f:
+                self.assertEqual(f.read(), b"/video.mp4")
+
+    async def test_single_flight_same_media(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store = MediaBlobStore(os.path.join(tmp_dir, "media"))
+            media_key = "video-1"
+            url = f"{self.base_url}/video-1.mp4"
+            downloads = []
+
+            async def download(target_path):
+                downloads.append(target_path)
+                file_path = store.get_download_path(media_key, "mp4")
+                if not await self.queue.download(url, file_path):
+                    return False
+                await store.put_file(file_path, target_path, media_key)
+                return True
+
+            async def job(note_id):
+                target_path = os.path.join(tmp_dir, note_id, "0.mp4")
+                stored, shared = await self.queue.single_flight(media_key, lambda: download(target_path))
+                if stored and shared:
+                    await store.link(media_key, target_path)
+                return stored
+
+            self.assertEqual(await asyncio.gather(job("n1"), job("n2")), [True, True])
+            self.assertEqual(len(downloads), 1)
+            for note_id in ("n1", "n2"):
+                with open(os.path.join(tmp_dir, note_id, "0.mp4"), "rb") as f:
+                    self.assertEqual(f.read(), b"/video-1.mp4")
+            await store.close()
+
+    async def asyncTearDown(self):
+        await self.queue.close()
+        self.server.shutdown()
+        self.server.server_close()
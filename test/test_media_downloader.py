@@ -0,0 +1,96 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import os
+import re
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import IsolatedAsyncioTestCase
+
+from tools.media_downloader import download_to_file, get_part_path
+
+CONTENT = bytes(range(256)) * 64
+
+
+class _RangeHandler(BaseHTTPRequestHandler):
+    support_range = True
+    requests = []
+
+    def do_GET(self):
+        range_header = self.headers.get("Range")
+        self.requests.append(range_header)
+        match = re.match(r"bytes=(\d+)-", range_header or "")
+        if match and self.support_range:
+            start = int(match.group(1))
+            if start >= len(CONTENT):
+                self.send_response(416)
+                self.end_headers()
+                return
+            body = CONTENT[start:]
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(CONTENT) - 1}/{len(CONTENT)}")
+        else:
+            body = CONTENT
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestMediaDownloader(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        _RangeHandler.support_range = True
+        _RangeHandler.requests = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _RangeHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/video.mp4"
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.tmp_dir.name, "video.mp4")
+
+    def _write_part(self, content: bytes):
+        with open(get_part_path(self.file_path), "wb") as f:
+            f.write(content)
+
+    def _read_file(self) -> bytes:
+        with open(self.file_path, "rb") as f:
+            return f.read()
+
+    async def test_download_in_chunks(self):
+        self.assertTrue(await download_to_file(self.url, self.file_path, expected_size=len(CONTENT), chunk_size=1000))
+        self.assertEqual(self._read_file(), CONTENT)
+        self.assertFalse(os.path.exists(get_part_path(self.file_path)))
+
+    async def test_resume_from_part_file(self):
+        self._write_part(CONTENT[:5000])
+        self.assertTrue(await download_to_file(self.url, self.file_path))
+        self.assertEqual(_RangeHandler.requests, ["bytes=5000-"])
+        self.assertEqual(self._read_file(), CONTENT)
+
+    async def test_restart_when_range_not_supported(self):
+        _RangeHandler.support_range = False
+        self._write_part(b"stale")
+        self.assertTrue(await download_to_file(self.url, self.file_path))
+        self.assertEqual(self._read_file(), CONTENT)
+
+    async def test_size_mismatch_keeps_target_absent(self):
+        self.assertFalse(await download_to_file(self.url, self.file_path, expected_size=len(CONTENT) + 1))
+        self.assertFalse(os.path.exists(self.file_path))
+
+    async def asyncTearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp_dir.cleanup()
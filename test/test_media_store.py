@@ -0,0 +1,95 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+
+from store import media_store
+from store.media_store import MediaBlobStore, close_media_stores, get_media_store
+from store.xhs.xhs_store_image import XiaoHongShuImage
+
+
+class TestMediaBlobStore(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = MediaBlobStore(os.path.join(self.tmp_dir.name, "media"))
+        self.note_dir = os.path.join(self.tmp_dir.name, "notes")
+
+    async def test_same_content_stored_once(self):
+        first = os.path.join(self.note_dir, "n1", "0.jpg")
+        second = os.path.join(self.note_dir, "n2", "0.jpg")
+        blob_path = await self.store.put(b"image", first, "xhs:a")
+        self.assertEqual(await self.store.put(b"image", second, "xhs:b"), blob_path)
+        self.assertEqual(len(os.listdir(os.path.dirname(blob_path))), 1)
+        for path in (first, second):
+            with open(path, "rb") as f:
+                self.assertEqual(f.read(), b"image")
+
+    async def test_link_known_media_without_download(self):
+        self.assertFalse(await self.store.link("wb:p1", os.path.join(self.note_dir, "p1.jpg")))
+        blob_path = await self.store.put(b"pic", os.path.join(self.note_dir, "p1.jpg"), "wb:p1")
+        self.assertEqual(await self.store.lookup("wb:p1"), blob_path)
+
+        # 新的存储对象从索引中读取，已保存的媒体直接链接
+        store = MediaBlobStore(self.store.root_path)
+        target = os.path.join(self.note_dir, "n3", "p1.jpg")
+        self.assertTrue(await store.link("wb:p1", target))
+        self.assertTrue(os.path.samefile(target, blob_path))
+
+        # 文件被删除后需要重新下载
+        os.remove(blob_path)
+        self.assertFalse(await store.link("wb:p1", os.path.join(self.note_dir, "n4", "p1.jpg")))
+        await store.close()
+
+    async def test_put_file_moves_download_into_store(self):
+        target = os.path.join(self.note_dir, "v1", "video.mp4")
+        download_path = self.store.get_download_path("bili:1:2", "mp4")
+        self.assertEqual(download_path, self.store.get_download_path("bili:1:2", "mp4"))
+        os.makedirs(os.path.dirname(download_path), exist_ok=True)
+        with open(download_path, "wb") as f:
+            f.write(b"video")
+        blob_path = await self.store.put_file(download_path, target, "bili:1:2")
+        self.assertFalse(os.path.exists(download_path))
+        self.assertTrue(os.path.samefile(target, blob_path))
+        self.assertEqual(await self.store.lookup("bili:1:2"), blob_path)
+
+        # 内容已存在时删除下载的文件，只创建链接
+        with open(download_path, "wb") as f:
+            f.write(b"video")
+        self.assertEqual(await self.store.put_file(download_path, os.path.join(self.note_dir, "v2", "video.mp4")),
+                         blob_path)
+        self.assertFalse(os.path.exists(download_path))
+
+    async def test_shared_connection_and_close(self):
+        # 并发的首次访问共用一个长连接
+        dbs = await asyncio.gather(*(self.store._get_db() for _ in range(5)))
+        self.assertEqual(len({id(db) for db in dbs}), 1)
+        await self.store.put(b"pic", os.path.join(self.note_dir, "p1.jpg"), "wb:p1")
+
+        store = get_media_store(self.store.root_path)
+        self.assertIs(get_media_store(self.store.root_path), store)
+        self.assertTrue(await store.link("wb:p1", os.path.join(self.note_dir, "n1", "p1.jpg")))
+        await close_media_stores()
+        self.assertIsNone(store._db)
+        self.assertEqual(media_store._stores, {})
+
+    def test_xhs_media_key_ignores_signed_path(self):
+        self.assertEqual(
+            XiaoHongShuImage.make_media_key("http://sns-webpic-qc.xhscdn.com/202410181025/7b2e/1040g2sg31!nd_dft_wlteh_webp_3"),
+            XiaoHongShuImage.make_media_key("http://sns-webpic-qc.xhscdn.com/202410190000/aa00/1040g2sg31!nd_dft_wgth_webp_3"))
+
+    async def asyncTearDown(self):
+        await self.store.close()
+        self.tmp_dir.cleanup()
@@ -0,0 +1,49 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import json
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+
+from store.ndjson_writer import NdjsonWriter
+
+
+class TestNdjsonWriter(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.json_path = os.path.join(self.tmp_dir.name, "search_comments_2024-01-01.json")
+
+    async def test_append_and_finalize(self):
+        writer = NdjsonWriter(self.json_path, flush_size=10)
+        for i in range(25):
+            await writer.write({"comment_id": str(i), "content": "评论"})
+        # 只写入了满批的记录，剩余的记录仍在缓冲区中
+        with open(writer.file_path, encoding="utf-8") as f:
+            self.assertEqual(len(f.read().splitlines()), 20)
+        await writer.close(finalize=True)
+        with open(self.json_path, encoding="utf-8") as f:
+            data = json.load(f)
+        self.assertEqual([item["comment_id"] for item in data], [str(i) for i in range(25)])
+
+    async def test_existing_json_array_is_kept(self):
+        with open(self.json_path, "w", encoding="utf-8") as f:
+            json.dump([{"comment_id": "old"}], f)
+        writer = NdjsonWriter(self.json_path)
+        await writer.write({"comment_id": "new"})
+        await writer.close(finalize=True)
+        with open(self.json_path, encoding="utf-8") as f:
+            self.assertEqual(json.load(f), [{"comment_id": "old"}, {"comment_id": "new"}])
+
+    async def asyncTearDown(self):
+        self.tmp_dir.cleanup()
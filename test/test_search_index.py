@@ -0,0 +1,122 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from api.extra_sqlite_api import SQLiteDataManager
+from dp_op.async_sqlite_db import AsyncSqliteDB
+from dp_op.search_index import ensure_search_index, rebuild_search_index
+from dp_op.sqlite_shards import SHARD_MODE_TASK, get_shard_path
+
+SCHEMA = ("CREATE TABLE xhs_note_comment (id INTEGER PRIMARY KEY AUTOINCREMENT, comment_id TEXT UNIQUE, "
+          "content TEXT, add_ts INTEGER, task_times_id TEXT)")
+
+
+class TestSearchIndex(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, "test.db")
+        self.db = AsyncSqliteDB(self.db_path)
+        await self.db.execute(SCHEMA)
+        for i in range(10):
+            await self.add_comment(str(i), f"我喜欢吃火锅{i}" if i % 2 else f"今天天气很好{i}")
+        self.manager = SQLiteDataManager(self.db_path)
+
+    async def add_comment(self, comment_id: str, content: str, task_times_id: str = "t1"):
+        await self.db.upsert_item("xhs_note_comment", {"comment_id": comment_id, "content": content, "add_ts": 1,
+                                                       "task_times_id": task_times_id}, key_fields=("comment_id",))
+
+    async def search_all(self, keyword: str, manager: SQLiteDataManager = None, **kwargs):
+        rows, cursor = [], None
+        while True:
+            result = await (manager or self.manager).search_data(keyword, cursor=cursor, page_size=2, **kwargs)
+            rows += result["data"]
+            self.last_result = result
+            cursor = result["next_cursor"]
+            if not cursor:
+                return rows
+
+    async def test_index_existing_rows_and_page(self):
+        self.assertEqual(await ensure_search_index(self.db), ["xhs_note_comment"])
+        self.assertEqual(await ensure_search_index(self.db), [])
+        rows = await self.search_all("吃火锅")
+        self.assertEqual(sorted(row["comment_id"] for row in rows), ["1", "3", "5", "7", "9"])
+        self.assertEqual(self.last_result["fallback_tables"], [])
+        # 短关键词走短关键词索引，包括位于字段末尾的关键词
+        self.assertEqual(len(await self.search_all("天气")), 5)
+        self.assertEqual(self.last_result["fallback_tables"], [])
+        await self.add_comment("10", "好吃的火锅")
+        rows = await self.search_all("火锅")
+        self.assertEqual(sorted(row["comment_id"] for row in rows), ["1", "10", "3", "5", "7", "9"])
+        self.assertEqual(await self.search_all("没有"), [])
+
+    async def test_short_keyword_fallback(self):
+        await ensure_search_index(self.db)
+        # 展开的trigram超过上限时退化为 LIKE 匹配，并在结果中标明
+        with patch("api.extra_sqlite_api.SQLITE_SHORT_TERMS_LIMIT", 1):
+            rows = await self.search_all("锅")
+            self.assertEqual(len(rows), 5)
+            self.assertEqual(self.last_result["fallback_tables"], ["xhs_note_comment"])
+            # LIKE 匹配只扫描最近写入的行
+            with patch("api.extra_sqlite_api.SEARCH_LIKE_SCAN_ROWS", 4):
+                rows = await self.search_all("锅")
+                self.assertEqual(sorted(row["comment_id"] for row in rows), ["7", "9"])
+                self.assertEqual(self.last_result["like_scan_rows"], 4)
+
+    async def test_index_follows_writes(self):
+        await ensure_search_index(self.db)
+        await self.add_comment("1", "更新后的评论")
+        await self.add_comment("20", "新的火锅评论", task_times_id="t2")
+        await self.db.execute("DELETE FROM xhs_note_comment WHERE comment_id = ?", "3")
+        rows = await self.search_all("火锅评论")
+        self.assertEqual([row["comment_id"] for row in rows], ["20"])
+        rows = await self.search_all("吃火锅", task_times_id="t1")
+        self.assertEqual(sorted(row["comment_id"] for row in rows), ["5", "7", "9"])
+        rows = await self.search_all("评论")
+        self.assertEqual(sorted(row["comment_id"] for row in rows), ["1", "20"])
+        self.assertEqual(await rebuild_search_index(self.db), ["xhs_note_comment"])
+        rows = await self.search_all("评论")
+        self.assertEqual(sorted(row["comment_id"] for row in rows), ["1", "20"])
+
+    async def test_search_across_shards(self):
+        shard_dir = os.path.join(self.tmp_dir.name, "shards")
+        os.makedirs(shard_dir)
+        for task_id in ("T1", "T2"):
+            db = AsyncSqliteDB(get_shard_path(SHARD_MODE_TASK, shard_dir, task_id=task_id))
+            await db.execute(SCHEMA)
+            await ensure_search_index(db)
+            # 各分库的id相同
+            for i in range(3):
+                await db.upsert_item("xhs_note_comment", {"comment_id": f"{task_id}-{i}", "content": f"火锅评论{i}",
+                                                          "add_ts": 1, "task_times_id": task_id},
+                                     key_fields=("comment_id",))
+            await db.close()
+        manager = SQLiteDataManager(self.db_path, shard_mode=SHARD_MODE_TASK, shard_dir=shard_dir)
+        for keyword in ("火锅评论", "火锅"):
+            rows = await self.search_all(keyword, manager)
+            self.assertEqual(sorted(row["comment_id"] for row in rows),
+                             ["1", "3", "5", "7", "9", "T1-0", "T1-1", "T1-2", "T2-0", "T2-1", "T2-2"]
+                             if keyword == "火锅" else ["T1-0", "T1-1", "T1-2", "T2-0", "T2-1", "T2-2"])
+            # 主库没有建索引，只有主库退化为 LIKE 匹配
+            self.assertEqual(self.last_result["fallback_tables"], ["xhs_note_comment"])
+        await ensure_search_index(self.db)
+        rows = await self.search_all("评论", manager, task_times_id="T2")
+        self.assertEqual(sorted(row["comment_id"] for row in rows), ["T2-0", "T2-1", "T2-2"])
+        self.assertEqual(self.last_result["fallback_tables"], [])
+
+    async def asyncTearDown(self):
+        await self.db.close()
+        self.tmp_dir.cleanup()
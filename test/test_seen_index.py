@@ -0,0 +1,118 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+
+from dp_op.async_sqlite_db import AsyncSqliteDB
+from dp_op.batch_writer import AsyncBatchWriter, BatchWriteError
+from dp_op.seen_index import FETCH_FULL, FETCH_SHALLOW, FETCH_SKIP, BloomFilter, SeenIndex
+from var import db_batch_writer_var
+
+
+class TestSeenIndex(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db = AsyncSqliteDB(os.path.join(self.tmp_dir.name, "test.db"))
+        self.index = SeenIndex(self.db, "xhs", freshness_seconds=3600)
+        await self.index.load()
+
+    def test_bloom_filter(self):
+        bloom = BloomFilter(1000)
+        for i in range(1000):
+            bloom.add(f"note-{i}")
+        self.assertTrue(all(f"note-{i}" in bloom for i in range(1000)))
+        false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+    async def test_classify(self):
+        await self.index.mark_fetched({"a": "1|2", "b": "1|2"})
+        modes = await self.index.classify({"a": "1|2", "b": "5|2", "c": "1|2"})
+        self.assertEqual(modes, {"a": FETCH_SKIP, "b": FETCH_SHALLOW, "c": FETCH_FULL})
+
+        # 浅刷新只更新指纹
+        await self.index.mark_refreshed({"b": "5|2"})
+        self.assertEqual(await self.index.classify({"b": "5|2"}), {"b": FETCH_SKIP})
+
+    async def test_index_survives_restart_and_expires(self):
+        await self.index.mark_fetched({"a": "1"})
+        await self.db.execute("UPDATE crawl_seen_index SET last_fetch_ts = last_fetch_ts - 7200 * 1000 "
+                              "WHERE content_id = 'a'")
+        await self.index.mark_fetched({"b": "1"})
+
+        index = SeenIndex(self.db, "xhs", freshness_seconds=3600)
+        self.assertEqual(await index.load(), 2)
+        self.assertEqual(await index.classify({"a": "1", "b": "1"}), {"a": FETCH_FULL, "b": FETCH_SKIP})
+        # 不同平台的索引互不影响
+        other = SeenIndex(self.db, "dy", freshness_seconds=3600)
+        self.assertEqual(await other.load(), 0)
+        self.assertEqual(await other.classify({"b": "1"}), {"b": FETCH_FULL})
+
+    async def count_seen(self, db: AsyncSqliteDB = None) -> int:
+        rows = await (db or self.db).query("SELECT COUNT(*) AS total FROM crawl_seen_index")
+        return rows[0]["total"]
+
+    async def test_mark_through_batch_writer(self):
+        await self.db.execute("CREATE TABLE xhs_note (id INTEGER PRIMARY KEY, note_id TEXT UNIQUE)")
+        writer = AsyncBatchWriter(self.db, flush_interval=0, max_retries=1)
+        token = db_batch_writer_var.set(writer)
+        try:
+            # 索引记录与该页数据一起写入，该页数据写入失败时不记录为已抓取
+            await writer.add("xhs_note", {"note_id": "a"}, key_fields=("note_id",))
+            await writer.add("missing_table", {"note_id": "a"}, key_fields=("note_id",))
+            await self.index.mark_fetched({"a": "1"})
+            self.assertEqual(await self.count_seen(), 0)
+            with self.assertRaises(BatchWriteError):
+                await writer.flush()
+            self.assertEqual(await self.count_seen(), 0)
+            with self.assertRaises(BatchWriteError):
+                await writer.flush()
+            await writer.flush()
+            self.assertEqual(await self.count_seen(), 1)
+
+            # 浅刷新沿用已有的抓取时间
+            await self.db.execute("UPDATE crawl_seen_index SET last_fetch_ts = 1")
+            await self.index.mark_refreshed({"a": "2", "b": "2"})
+            await writer.flush()
+            rows = await self.db.query("SELECT content_id, last_fetch_ts, fingerprint FROM crawl_seen_index")
+            self.assertEqual(rows, [{"content_id": "a", "last_fetch_ts": 1, "fingerprint": "2"}])
+        finally:
+            db_batch_writer_var.reset(token)
+            await writer.close()
+
+    async def test_mark_with_writer_on_other_db(self):
+        # 分库模式下数据写入分库，索引保存在主库中，记录索引前先写入缓冲区中的数据
+        shard_db = AsyncSqliteDB(os.path.join(self.tmp_dir.name, "shard.db"))
+        await shard_db.execute("CREATE TABLE xhs_note (id INTEGER PRIMARY KEY, note_id TEXT UNIQUE)")
+        writer = AsyncBatchWriter(shard_db, flush_interval=0, max_retries=1)
+        token = db_batch_writer_var.set(writer)
+        try:
+            await writer.add("xhs_note", {"note_id": "a"}, key_fields=("note_id",))
+            await self.index.mark_fetched({"a": "1"})
+            self.assertEqual(writer.pending_count(), 0)
+            self.assertEqual(len(await shard_db.query("SELECT * FROM xhs_note")), 1)
+            self.assertEqual(await self.count_seen(), 1)
+
+            await writer.add("missing_table", {"note_id": "b"}, key_fields=("note_id",))
+            await self.index.mark_fetched({"b": "1"})
+            self.assertEqual(await self.count_seen(), 1)
+            self.assertEqual(await self.index.classify({"b": "1"}), {"b": FETCH_FULL})
+        finally:
+            db_batch_writer_var.reset(token)
+            await writer.close()
+            await shard_db.close()
+
+    async def asyncTearDown(self):
+        await self.db.close()
+        self.tmp_dir.cleanup()
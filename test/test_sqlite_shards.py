@@ -0,0 +1,100 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+
+# -*- coding: utf-8 -*-
+import os
+import sqlite3
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from api.extra_sqlite_api import SQLiteDataManager
+from dp_op.async_sqlite_db import AsyncSqliteDB
+from dp_op.sqlite_shards import SHARD_MODE_TASK, ensure_shard_schema, get_shard_path
+
+SCHEMA = ("CREATE TABLE xhs_note_comment (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+          "comment_id TEXT, create_time INTEGER, task_times_id TEXT);")
+
+
+class TestSqliteShards(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.shard_dir = os.path.join(self.tmp_dir.name, "shards")
+        self.schema_file = os.path.join(self.tmp_dir.name, "schema.sql")
+        with open(self.schema_file, "w", encoding="utf-8") as f:
+            f.write(SCHEMA)
+        # 开启分库之前写入主库的数据
+        self.db_path = os.path.join(self.tmp_dir.name, "main.db")
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(SCHEMA)
+        conn.execute("INSERT INTO xhs_note_comment (comment_id, create_time, task_times_id) VALUES ('m', 1, 'T0')")
+        conn.commit()
+        conn.close()
+        for task_id, count in (("T1", 2), ("T2", 1)):
+            os.makedirs(self.shard_dir, exist_ok=True)
+            db = AsyncSqliteDB(get_shard_path(SHARD_MODE_TASK, self.shard_dir, task_id=task_id))
+            self.assertTrue(await ensure_shard_schema(db, self.schema_file))
+            self.assertFalse(await ensure_shard_schema(db, self.schema_file))
+            for i in range(count):
+                await db.execute("INSERT INTO xhs_note_comment (comment_id, create_time, task_times_id) VALUES (?, ?, ?)",
+                                 f"{task_id}-{i}", 10 + i, task_id)
+        self.manager = SQLiteDataManager(self.db_path, shard_mode=SHARD_MODE_TASK, shard_dir=self.shard_dir)
+
+    def test_shard_path(self):
+        self.assertEqual(get_shard_path(SHARD_MODE_TASK, "d", task_id="a/b c"), os.path.join("d", "task_a_b_c.db"))
+        self.assertIsNone(get_shard_path(SHARD_MODE_TASK, "d", platform="xhs"))
+        self.assertIsNone(get_shard_path("none", "d", platform="xhs", task_id="T1"))
+
+    async def test_read_across_shards(self):
+        self.assertIn("xhs_note_comment", await self.manager.get_available_tables())
+        result = await self.manager.get_table_data("xhs_note_comment")
+        self.assertEqual(result["total"], 4)
+        self.assertEqual([row["comment_id"] for row in result["data"]][0], "T1-1")
+        self.assertEqual({row["comment_id"] for row in result["data"]}, {"m", "T1-0", "T1-1", "T2-0"})
+
+        result = await self.manager.get_table_data("xhs_note_comment", task_times_id="T1", keyset=True)
+        self.assertEqual(result["total"], 2)
+        self.assertEqual({row["task_times_id"] for row in result["data"]}, {"T1"})
+
+    async def test_keyset_with_duplicate_ids_across_shards(self):
+        # T1-0 和 T2-0 的时间和id都相同，只能按数据来源区分
+        comment_ids, cursor = [], None
+        while True:
+            result = await self.manager.get_table_data("xhs_note_comment", page_size=1, cursor=cursor, keyset=True)
+            comment_ids += [row["comment_id"] for row in result["data"]]
+            cursor = result["next_cursor"]
+            if not cursor:
+                break
+        self.assertEqual(comment_ids, ["T1-1", "T2-0", "T1-0", "m"])
+
+    async def test_delete_task_removes_shard_file(self):
+        shard_path = get_shard_path(SHARD_MODE_TASK, self.shard_dir, task_id="T1")
+        stats = await self.manager.delete_tasks(["T1"])
+        self.assertEqual(stats.get("shard_files"), 1)
+        self.assertFalse(os.path.exists(shard_path))
+        result = await self.manager.get_table_data("xhs_note_comment")
+        self.assertEqual(result["total"], 2)
+
+    async def test_attach_limit(self):
+        with patch("api.extra_sqlite_api.SQLITE_SHARD_ATTACH_LIMIT", 1):
+            result = await self.manager.get_table_data("xhs_note_comment")
+            self.assertEqual(result["shards_omitted"], 1)
+            self.assertLess(result["total"], 4)
+            # 统计接口分批合并全部分库，主库只统计一次
+            stats = await self.manager.get_data_statistics()
+            self.assertEqual(stats["total"], 4)
+            result = await self.manager.get_table_data("xhs_note_comment", task_times_id="T1")
+            self.assertEqual(result["shards_omitted"], 0)
+
+    async def asyncTearDown(self):
+        self.tmp_dir.cleanup()
@@ -0,0 +1,68 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+
+from api.extra_sqlite_api import SQLiteDataManager
+from dp_op.async_sqlite_db import AsyncSqliteDB
+from dp_op.table_stats import build_stats_summary_sql, ensure_table_stats, rebuild_table_stats
+
+
+class TestTableStats(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db = AsyncSqliteDB(os.path.join(self.tmp_dir.name, "test.db"))
+        await self.db.execute(
+            "CREATE TABLE xhs_note (id INTEGER PRIMARY KEY AUTOINCREMENT, note_id TEXT UNIQUE, title TEXT, "
+            "add_ts INTEGER, task_times_id TEXT)")
+        # 2024-01-01 与 2024-01-02 中午（避免时区影响日期）
+        self.day1, self.day2 = 1704110400000, 1704196800000
+        for i in range(3):
+            await self.db.item_to_table("xhs_note", {"note_id": str(i), "title": "a", "add_ts": self.day1,
+                                                     "task_times_id": "t1"})
+
+    async def summary(self, date: str):
+        rows = await self.db.query(build_stats_summary_sql(), date)
+        return {row["table_name"]: (row["total"], row["today"], row["last_add_ts"]) for row in rows}
+
+    async def test_existing_rows_are_summarized(self):
+        self.assertTrue(await ensure_table_stats(self.db))
+        self.assertFalse(await ensure_table_stats(self.db))
+        self.assertEqual(await self.summary("2024-01-01"), {"xhs_note": (3, 3, self.day1)})
+
+    async def test_triggers_track_inserts_and_deletes(self):
+        await ensure_table_stats(self.db)
+        # 更新已有记录不计入新增
+        for note_id, add_ts in (("0", self.day2), ("9", self.day2)):
+            await self.db.upsert_item("xhs_note", {"note_id": note_id, "title": "b", "add_ts": add_ts,
+                                                   "task_times_id": "t2"}, key_fields=("note_id",))
+        await self.db.execute("DELETE FROM xhs_note WHERE note_id = ?", "1")
+        self.assertEqual(await self.summary("2024-01-02"), {"xhs_note": (3, 1, self.day2)})
+
+        self.assertEqual(await rebuild_table_stats(self.db), {"xhs_note": 3})
+        self.assertEqual(await self.summary("2024-01-02"), {"xhs_note": (3, 1, self.day2)})
+
+    async def test_statistics_count_tables_without_summary(self):
+        await ensure_table_stats(self.db)
+        await self.db.execute("CREATE TABLE crawler_tasks (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                              "task_times_id TEXT, created_at TEXT)")
+        await self.db.item_to_table("crawler_tasks", {"task_times_id": "t1", "created_at": "2024-01-01"})
+        stats = await SQLiteDataManager(os.path.join(self.tmp_dir.name, "test.db")).get_data_statistics()
+        self.assertEqual(stats["total"], 4)
+        self.assertEqual(stats["tables"], 2)
+
+    async def asyncTearDown(self):
+        await self.db.close()
+        self.tmp_dir.cleanup()
@@ -0,0 +1,66 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+
+from dp_op.async_sqlite_db import AsyncSqliteDB
+from dp_op.table_stats import build_stats_summary_sql, ensure_table_stats
+from dp_op.task_purger import TaskDataPurger
+
+
+class TestTaskDataPurger(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db = AsyncSqliteDB(os.path.join(self.tmp_dir.name, "test.db"))
+        for table in ("xhs_note", "xhs_note_comment"):
+            await self.db.execute(
+                f"CREATE TABLE {table} (id INTEGER PRIMARY KEY AUTOINCREMENT, note_id TEXT, add_ts INTEGER, "
+                f"task_times_id TEXT)")
+        await self.db.execute("CREATE TABLE crawler_tasks (id INTEGER PRIMARY KEY AUTOINCREMENT, task_times_id TEXT)")
+        for task_id in ("t1", "t2", "t3"):
+            await self.db.item_to_table("crawler_tasks", {"task_times_id": task_id})
+            for i in range(3):
+                await self.db.item_to_table("xhs_note", {"note_id": f"{task_id}-{i}", "add_ts": 1704110400000,
+                                                         "task_times_id": task_id})
+            await self.db.item_to_table("xhs_note_comment", {"note_id": f"{task_id}-0", "add_ts": 1704110400000,
+                                                             "task_times_id": task_id})
+
+    async def test_task_tables(self):
+        # 没有 task_times_id 字段的表不参与删除
+        await self.db.execute("CREATE TABLE douyin_aweme (id INTEGER PRIMARY KEY AUTOINCREMENT, aweme_id TEXT)")
+        purger = TaskDataPurger(self.db)
+        self.assertEqual(await purger.get_task_tables(), ["xhs_note", "xhs_note_comment", "crawler_tasks"])
+
+    async def test_count_and_purge(self):
+        purger = TaskDataPurger(self.db, chunk_size=1)
+        expected = {"xhs_note": 6, "xhs_note_comment": 2, "crawler_tasks": 2}
+        self.assertEqual(await purger.count(["t1", "t2", "t1"]), expected)
+        self.assertEqual(await purger.purge(["t1", "t2"]), expected)
+
+        rows = await self.db.query("SELECT DISTINCT task_times_id FROM xhs_note")
+        self.assertEqual([row["task_times_id"] for row in rows], ["t3"])
+        self.assertEqual(await purger.purge(["t1"]), {})
+
+    async def test_purge_cleans_table_stats(self):
+        await ensure_table_stats(self.db)
+        await TaskDataPurger(self.db).purge(["t1", "t2"])
+        rows = await self.db.query("SELECT DISTINCT task_times_id FROM table_stats")
+        self.assertEqual([row["task_times_id"] for row in rows], ["t3"])
+        rows = await self.db.query(build_stats_summary_sql(), "2024-01-01")
+        self.assertEqual({row["table_name"]: row["total"] for row in rows}, {"xhs_note": 3, "xhs_note_comment": 1})
+
+    async def asyncTearDown(self):
+        await self.db.close()
+        self.tmp_dir.cleanup()
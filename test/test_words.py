@@ -0,0 +1,107 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import json
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, patch
+
+import config
+from tools import words
+from tools.words import AsyncWordCloudGenerator, close_all_word_clouds
+
+STOP_WORDS_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "config", "hit_stopwords.txt")
+
+
+class WordCloudTestMixin:
+    # 分词进程数，0表示在线程中分词
+    process_workers = 0
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.prefix = os.path.join(self.tmp_dir.name, "search_comments_2024-01-01")
+        self.patches = [
+            patch.object(config, "STOP_WORDS_FILE", STOP_WORDS_FILE),
+            patch.object(config, "WORDCLOUD_PROCESS_WORKERS", self.process_workers),
+            patch.object(config, "WORDCLOUD_SEGMENT_BATCH_SIZE", 3),
+            patch.object(config, "WORDCLOUD_FREQ_FLUSH_INTERVAL", 3600),
+            patch.object(AsyncWordCloudGenerator, "instances", []),
+            patch.object(AsyncWordCloudGenerator, "generate_word_cloud", AsyncMock()),
+        ]
+        for p in self.patches:
+            p.start()
+        self.generator = AsyncWordCloudGenerator()
+
+    def read_freq_file(self):
+        with open(f"{self.prefix}_word_freq.json", encoding="utf-8") as f:
+            return json.load(f)
+
+    async def test_counts_accumulate_from_existing_file(self):
+        with open(f"{self.prefix}_word_freq.json", "w", encoding="utf-8") as f:
+            json.dump({"火锅": 3}, f)
+        await self.generator.add_items([{"content": "火锅"}, {"content": "火锅"}, {"content": "火锅"}], self.prefix)
+        await self.generator.add_items([{"content": "火锅"}, {"content": ""}, {"content": "火锅"}, {"content": "火锅"}],
+                                       self.prefix)
+        self.assertEqual(self.generator._counters[self.prefix]["火锅"], 9)
+
+    async def test_segment_at_batch_size(self):
+        await self.generator.add_items([{"content": "火锅"}, {"content": "火锅"}], self.prefix)
+        self.assertEqual(self.generator._counters[self.prefix]["火锅"], 0)
+        self.assertEqual(len(self.generator._pending[self.prefix]), 2)
+        await self.generator.add_items([{"content": "火锅"}], self.prefix)
+        self.assertEqual(self.generator._counters[self.prefix]["火锅"], 3)
+        self.assertNotIn(self.prefix, self.generator._pending)
+
+    async def test_write_freq_file_on_interval(self):
+        await self.generator.add_items([{"content": "火锅"}], self.prefix)
+        self.assertFalse(os.path.exists(f"{self.prefix}_word_freq.json"))
+        # 到达写入间隔时，未满一批的记录也先分词再写入词频文件
+        with patch.object(config, "WORDCLOUD_FREQ_FLUSH_INTERVAL", 0):
+            await self.generator.add_items([{"content": "火锅"}], self.prefix)
+        self.assertEqual(self.read_freq_file(), {"火锅": 2})
+        self.assertNotIn(self.prefix, self.generator._pending)
+        AsyncWordCloudGenerator.generate_word_cloud.assert_not_called()
+
+    async def test_close_all_renders_once(self):
+        await self.generator.add_items([{"content": "火锅"}, {"content": "火锅"}, {"content": "火锅"}], self.prefix)
+        await self.generator.add_items([{"content": "火锅"}], self.prefix)
+        executor = words._segment_executor
+        self.assertEqual(executor is not None, self.process_workers > 0)
+
+        await close_all_word_clouds()
+        AsyncWordCloudGenerator.generate_word_cloud.assert_awaited_once()
+        word_freq, prefix = AsyncWordCloudGenerator.generate_word_cloud.await_args.args
+        self.assertEqual((dict(word_freq), prefix), ({"火锅": 4}, self.prefix))
+        self.assertEqual(self.read_freq_file(), {"火锅": 4})
+        self.assertIsNone(words._segment_executor)
+        if executor is not None:
+            with self.assertRaises(RuntimeError):
+                executor.submit(len, [])
+
+        # 已生成过的文件不会重复生成
+        await close_all_word_clouds()
+        AsyncWordCloudGenerator.generate_word_cloud.assert_awaited_once()
+
+    async def asyncTearDown(self):
+        await close_all_word_clouds()
+        for p in reversed(self.patches):
+            p.stop()
+        self.tmp_dir.cleanup()
+
+
+class TestWordCloudInThread(WordCloudTestMixin, IsolatedAsyncioTestCase):
+    process_workers = 0
+
+
+class TestWordCloudInProcess(WordCloudTestMixin, IsolatedAsyncioTestCase):
+    process_workers = 1
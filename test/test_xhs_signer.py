@@ -0,0 +1,70 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+from media_platform.xhs.signer import XhsPageSigner, XhsSignError
+
+
+class _FakePage:
+    """模拟页面中的 window._webmsxyw 和 localStorage，记录 evaluate 的调用"""
+
+    def __init__(self, b1: str = "b1-value"):
+        self.b1 = b1
+        self.calls = []
+
+    async def evaluate(self, expression, arg):
+        items, keys = arg
+        self.calls.append((len(items), keys is not None))
+        await asyncio.sleep(0.01)
+        signs = []
+        for url, data in items:
+            if url == "/bad":
+                signs.append({"error": "sign error"})
+            else:
+                signs.append({"result": {"X-s": f"xs:{url}", "X-t": 1}})
+        storage = {key: self.b1 if key == "b1" else None for key in keys} if keys else None
+        return {"signs": signs, "storage": storage}
+
+
+class TestXhsPageSigner(IsolatedAsyncioTestCase):
+
+    async def test_batch_and_cache_local_storage(self):
+        page = _FakePage()
+        signer = XhsPageSigner([page], local_storage_ttl=300, batch_size=16)
+        results = await asyncio.gather(*[signer.sign(f"/api/{i}") for i in range(10)])
+        self.assertEqual([params["X-s"] for params, _ in results], [f"xs:/api/{i}" for i in range(10)])
+        self.assertEqual(results[0][1], {"b1": "b1-value", "b1b1": ""})
+        # 10个签名一次页面调用，并顺带读取 localStorage
+        self.assertEqual(page.calls, [(10, True)])
+
+        await signer.sign("/api/next")
+        self.assertEqual(page.calls[-1], (1, False))
+
+        page.b1 = "new-b1"
+        signer.invalidate()
+        _, local_storage = await signer.sign("/api/after")
+        self.assertEqual(local_storage["b1"], "new-b1")
+        self.assertEqual(page.calls[-1], (1, True))
+
+    async def test_spread_across_pages(self):
+        pages = [_FakePage(), _FakePage()]
+        signer = XhsPageSigner(pages, batch_size=4)
+        await asyncio.gather(*[signer.sign(f"/api/{i}") for i in range(8)])
+        self.assertEqual([sum(n for n, _ in page.calls) for page in pages], [4, 4])
+
+    async def test_sign_error(self):
+        signer = XhsPageSigner([_FakePage()])
+        good, bad = await asyncio.gather(signer.sign("/api/ok"), signer.sign("/bad"), return_exceptions=True)
+        self.assertEqual(good[0]["X-s"], "xs:/api/ok")
+        self.assertIsInstance(bad, XhsSignError)
@@ -0,0 +1,121 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 长期持有的 httpx 连接池客户端：请求复用 keep-alive 连接，不再每次请求都重新进行 DNS、TCP、TLS 握手；
+#            可选 HTTP/2（需要安装 h2），代理变化时重建客户端，旧客户端等待进行中的请求结束后关闭
+import asyncio
+import json
+import weakref
+from typing import Optional, Set
+
+import httpx
+
+import config
+from tools import utils
+
+try:
+    import h2
+except ImportError:
+    h2 = None
+
+# 代理变化后旧客户端延迟关闭的时间（秒），给进行中的请求留出完成时间
+RETIRED_CLIENT_GRACE_SECONDS = 60
+
+# 进程内所有未关闭的连接池，爬取结束时统一关闭
+_open_pools: "weakref.WeakSet[HttpClientPool]" = weakref.WeakSet()
+
+
+class HttpClientPool:
+    def __init__(self, max_connections: Optional[int] = None, max_keepalive_connections: Optional[int] = None,
+                 keepalive_expiry: Optional[float] = None, http2: Optional[bool] = None):
+        """
+        :param max_connections: 连接数上限，默认读取配置 HTTP_POOL_MAX_CONNECTIONS
+        :param max_keepalive_connections: 保持的空闲连接数上限，默认读取配置 HTTP_POOL_MAX_KEEPALIVE
+        :param keepalive_expiry: 空闲连接的保持时间（秒），默认读取配置 HTTP_KEEPALIVE_EXPIRY
+        :param http2: 是否启用HTTP/2，默认读取配置 HTTP_ENABLE_HTTP2
+        """
+        self._limits = httpx.Limits(
+            max_connections=max_connections or config.HTTP_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=max_keepalive_connections or config.HTTP_POOL_MAX_KEEPALIVE,
+            keepalive_expiry=keepalive_expiry if keepalive_expiry is not None else config.HTTP_KEEPALIVE_EXPIRY,
+        )
+        self._http2 = config.HTTP_ENABLE_HTTP2 if http2 is None else http2
+        if self._http2 and h2 is None:
+            utils.logger.warning("[HttpClientPool] HTTP/2 requires the h2 package (pip install httpx[http2]), "
+                                 "fall back to HTTP/1.1")
+            self._http2 = False
+        self._client: Optional[httpx.AsyncClient] = None
+        self._proxies_key: Optional[str] = None
+        self._retired: Set[httpx.AsyncClient] = set()
+        self._closing: Set[asyncio.Task] = set()
+        _open_pools.add(self)
+
+    @staticmethod
+    def _make_key(proxies) -> str:
+        return json.dumps(proxies, sort_keys=True) if proxies else ""
+
+    def get(self, proxies=None) -> httpx.AsyncClient:
+        """
+        获取当前代理对应的客户端，代理变化时新建客户端
+        Args:
+            proxies: 代理
+
+        Returns:
+
+        """
+        key = self._make_key(proxies)
+        if self._client is not None and key == self._proxies_key:
+            return self._client
+        if self._client is not None:
+            utils.logger.info("[HttpClientPool.get] proxies changed, rebuild the connection pool")
+            self._retire(self._client)
+        client_kwargs = {"limits": self._limits, "http2": self._http2}
+        if proxies:
+            client_kwargs["proxies"] = proxies
+        self._client = httpx.AsyncClient(**client_kwargs)
+        self._proxies_key = key
+        return self._client
+
+    def _retire(self, client: httpx.AsyncClient):
+        self._retired.add(client)
+        task = asyncio.create_task(self._close_later(client))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def _close_later(self, client: httpx.AsyncClient):
+        await asyncio.sleep(RETIRED_CLIENT_GRACE_SECONDS)
+        self._retired.discard(client)
+        await client.aclose()
+
+    async def aclose(self):
+        """关闭当前客户端，以及因代理变化等待关闭的旧客户端"""
+        for task in list(self._closing):
+            task.cancel()
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+        for client in list(self._retired):
+            await client.aclose()
+        self._retired.clear()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._proxies_key = None
+        _open_pools.discard(self)
+
+
+async def close_all_http_clients():
+    """关闭进程内所有的连接池，在爬取结束时调用"""
+    for pool in list(_open_pools):
+        try:
+            await pool.aclose()
+        except Exception as e:
+            utils.logger.error(f"[close_all_http_clients] close http client pool failed: {e}")
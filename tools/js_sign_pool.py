@@ -0,0 +1,248 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : JS签名进程池：每个 node 进程常驻并只编译一次签名脚本，请求和结果通过管道按行传输JSON，
+#            同一轮事件循环中的签名请求合并为一次写入；进程崩溃或超时后自动重启。
+#            未安装 node 时回退到 execjs，并在线程中执行以免阻塞事件循环
+import asyncio
+import itertools
+import json
+import os
+import shutil
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import config
+from tools import utils
+
+SIGN_WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "libs",
+                                  "js_sign_worker.js")
+
+# 签名结果按行读取，单行长度上限
+_STREAM_LIMIT = 16 * 1024 * 1024
+
+
+class JsSignError(Exception):
+    """签名失败"""
+
+
+class _JsWorker:
+    def __init__(self, node_path: str, script_path: str):
+        self._node_path = node_path
+        self._script_path = script_path
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._reader: Optional[asyncio.Task] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._buffer: List[bytes] = []
+        self._ids = itertools.count(1)
+
+    @property
+    def alive(self) -> bool:
+        # 进程退出后 returncode 不一定立即更新，读取结束即视为已退出
+        return (self._process is not None and self._process.returncode is None
+                and self._reader is not None and not self._reader.done())
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def start(self):
+        self._process = await asyncio.create_subprocess_exec(
+            self._node_path, SIGN_WORKER_SCRIPT, self._script_path,
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, limit=_STREAM_LIMIT)
+        self._reader = asyncio.create_task(self._read_loop())
+
+    async def _read_loop(self):
+        try:
+            while True:
+                line = await self._process.stdout.readline()
+                if not line:
+                    break
+                response = json.loads(line)
+                future = self._pending.pop(response.get("id"), None)
+                if future is None or future.done():
+                    continue
+                if "error" in response:
+                    future.set_exception(JsSignError(response["error"]))
+                else:
+                    future.set_result(response.get("result"))
+        except Exception as e:
+            utils.logger.error(f"[JsSignPool] read from sign worker failed: {e}")
+        finally:
+            self._fail_pending(JsSignError(f"sign worker for {self._script_path} exited"))
+
+    def _fail_pending(self, error: Exception):
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(error)
+
+    def send(self, message: Dict) -> asyncio.Future:
+        """
+        发送一个请求，同一轮事件循环中的请求合并为一次写入
+        Args:
+            message: 请求内容，不包含 id
+
+        Returns:
+            请求结果的 future
+        """
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        if not self._buffer:
+            asyncio.get_running_loop().call_soon(self._flush)
+        self._buffer.append(json.dumps(dict(message, id=request_id), ensure_ascii=False).encode("utf-8") + b"\n")
+        return future
+
+    def _flush(self):
+        data, self._buffer = b"".join(self._buffer), []
+        if not self.alive:
+            self._fail_pending(JsSignError(f"sign worker for {self._script_path} is not running"))
+            return
+        try:
+            self._process.stdin.write(data)
+        except (BrokenPipeError, ConnectionResetError) as e:
+            self._fail_pending(JsSignError(f"write to sign worker failed: {e}"))
+
+    async def close(self):
+        if self._process is not None and self._process.returncode is None:
+            self._process.kill()
+            await self._process.wait()
+        if self._reader is not None:
+            await asyncio.gather(self._reader, return_exceptions=True)
+            self._reader = None
+
+
+class JsSignPool:
+    def __init__(self, script_path: str, size: Optional[int] = None, timeout: Optional[float] = None):
+        """
+        :param script_path: 签名脚本路径，脚本中的顶层函数可以被调用
+        :param size: 常驻进程数，默认读取配置 JS_SIGN_WORKERS
+        :param timeout: 单次签名的超时时间（秒），默认读取配置 JS_SIGN_TIMEOUT，超时的进程会被重启
+        """
+        self.script_path = script_path
+        self._size = max(1, size or config.JS_SIGN_WORKERS)
+        self._timeout = timeout or config.JS_SIGN_TIMEOUT
+        self._node_path = shutil.which("node")
+        self._workers: List[Optional[_JsWorker]] = [None] * self._size
+        self._lock = asyncio.Lock()
+        self._execjs_ctx = None
+        if self._node_path is None:
+            utils.logger.warning(f"[JsSignPool] node not found, sign {script_path} with execjs in threads")
+
+    async def _get_worker(self) -> _JsWorker:
+        alive = [worker for worker in self._workers if worker is not None and worker.alive]
+        if len(alive) == self._size:
+            return min(alive, key=lambda worker: worker.pending)
+        async with self._lock:
+            for index, worker in enumerate(self._workers):
+                if worker is not None and worker.alive:
+                    continue
+                if worker is not None:
+                    utils.logger.warning(f"[JsSignPool] sign worker {index} for {self.script_path} exited, restart")
+                    await worker.close()
+                worker = _JsWorker(self._node_path, self.script_path)
+                await worker.start()
+                self._workers[index] = worker
+        return min(self._workers, key=lambda worker: worker.pending)
+
+    async def _wait(self, worker: _JsWorker, future: asyncio.Future) -> Any:
+        try:
+            return await asyncio.wait_for(future, self._timeout)
+        except asyncio.TimeoutError:
+            # 进程可能卡在脚本中，重启后不影响后续请求
+            utils.logger.error(f"[JsSignPool] sign timeout after {self._timeout}s, restart worker")
+            await worker.close()
+            raise JsSignError(f"sign {self.script_path} timeout")
+
+    def _call_execjs(self, fn: str, args: Sequence) -> Any:
+        if self._execjs_ctx is None:
+            import execjs
+            with open(self.script_path, encoding="utf-8-sig") as f:
+                self._execjs_ctx = execjs.compile(f.read())
+        return self._execjs_ctx.call(fn, *args)
+
+    async def call(self, fn: str, *args) -> Any:
+        """
+        调用签名脚本中的函数
+        Args:
+            fn: 函数名
+            *args: 参数，需要可以JSON序列化
+
+        Returns:
+            函数返回值
+        """
+        if self._node_path is None:
+            return await asyncio.to_thread(self._call_execjs, fn, args)
+        worker = await self._get_worker()
+        return await self._wait(worker, worker.send({"fn": fn, "args": list(args)}))
+
+    async def call_many(self, calls: Sequence[Tuple[str, Sequence]]) -> List[Any]:
+        """
+        批量签名，请求分摊到各个进程，每个进程一次写入
+        Args:
+            calls: (函数名, 参数列表) 的列表
+
+        Returns:
+            与 calls 顺序一致的返回值列表
+        """
+        return await asyncio.gather(*[self.call(fn, *args) for fn, args in calls])
+
+    async def health_check(self) -> int:
+        """
+        检查各个进程是否可以响应，无响应的进程被重启
+        Returns:
+            健康的进程数
+        """
+        if self._node_path is None:
+            return 0
+        await self._get_worker()
+        healthy = 0
+        for worker in list(self._workers):
+            try:
+                await self._wait(worker, worker.send({"ping": True}))
+                healthy += 1
+            except JsSignError:
+                await worker.close()
+        return healthy
+
+    async def close(self):
+        """关闭全部进程"""
+        for worker in self._workers:
+            if worker is not None:
+                await worker.close()
+        self._workers = [None] * self._size
+
+
+_pools: Dict[str, JsSignPool] = {}
+
+
+def get_js_sign_pool(script_path: str) -> JsSignPool:
+    """
+    获取签名脚本对应的长期持有的签名进程池
+    Args:
+        script_path: 签名脚本路径
+
+    Returns:
+
+    """
+    pool = _pools.get(script_path)
+    if pool is None:
+        pool = JsSignPool(script_path)
+        _pools[script_path] = pool
+    return pool
+
+
+async def close_all_js_sign_pools():
+    """关闭全部签名进程，在爬取结束时调用"""
+    for pool in list(_pools.values()):
+        await pool.close()
+    _pools.clear()
@@ -0,0 +1,190 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 共享的媒体下载队列：全局并发数和单个域名的并发数都有上限，按代理复用长连接的 httpx 客户端；
+#            下载任务在后台执行，与翻页、评论等请求并行，爬取结束时等待队列中的任务全部完成
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, Coroutine, Dict, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+import httpx
+
+import config
+from tools import utils
+from tools.media_downloader import download_to_file
+
+
+class MediaDownloadQueue:
+    def __init__(self, max_concurrency: int, per_host_concurrency: int):
+        """
+        :param max_concurrency: 同时进行的下载数上限，也是连接池的连接数上限
+        :param per_host_concurrency: 同一个域名同时进行的下载数上限
+        """
+        self._max_concurrency = max(1, max_concurrency)
+        self._per_host_concurrency = max(1, per_host_concurrency)
+        self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        # 媒体标识 -> 正在进行的下载任务的结果
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    @property
+    def pending(self) -> int:
+        return len(self._tasks)
+
+    def _get_client(self, proxies=None) -> httpx.AsyncClient:
+        # 不同代理的连接不能复用，每个代理一个客户端
+        key = json.dumps(proxies, sort_keys=True) if proxies else ""
+        client = self._clients.get(key)
+        if client is None:
+            client_kwargs = {
+                "limits": httpx.Limits(max_connections=self._max_concurrency,
+                                       max_keepalive_connections=self._max_concurrency),
+            }
+            if proxies:
+                client_kwargs["proxies"] = proxies
+            client = httpx.AsyncClient(**client_kwargs)
+            self._clients[key] = client
+        return client
+
+    def _get_host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self._per_host_concurrency)
+            self._host_semaphores[host] = semaphore
+        return semaphore
+
+    async def fetch(self, url: str, headers: Optional[Dict] = None, proxies=None, timeout: float = 60) -> Optional[bytes]:
+        """
+        下载媒体内容，并发数受全局和域名上限约束
+        Args:
+            url: 媒体地址
+            headers: 请求头
+            proxies: 代理
+            timeout: 超时时间（秒）
+
+        Returns:
+            媒体内容，请求失败时返回 None
+        """
+        # 先等待域名的名额再占用全局名额，慢域名排队的任务不会占满全局名额而阻塞其他域名
+        async with self._get_host_semaphore(url), self._semaphore:
+            try:
+                response = await self._get_client(proxies).get(url, headers=headers, timeout=timeout)
+            except httpx.HTTPError as e:
+                utils.logger.error(f"[MediaDownloadQueue.fetch] request {url} err: {e}")
+                return None
+            if response.status_code != 200:
+                utils.logger.error(f"[MediaDownloadQueue.fetch] request {url} err, status: {response.status_code}")
+                return None
+            return response.content
+
+    async def download(self, url: str, file_path: str, headers: Optional[Dict] = None, proxies=None,
+                       timeout: float = 60, expected_size: Optional[int] = None) -> bool:
+        """
+        流式下载大文件到本地，并发数受全局和域名上限约束，详见 download_to_file
+        Args:
+            url: 媒体地址
+            file_path: 本地文件路径
+            headers: 请求头
+            proxies: 代理
+            timeout: 超时时间（秒）
+            expected_size: 期望的文件大小（字节）
+
+        Returns:
+            是否下载成功
+        """
+        async with self._get_host_semaphore(url), self._semaphore:
+            return await download_to_file(url, file_path, headers=headers, timeout=timeout,
+                                          expected_size=expected_size, client=self._get_client(proxies))
+
+    async def single_flight(self, key: str, job: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        同一媒体标识同时只执行一次下载任务，其他任务等待其结果，避免多个任务写入同一个临时文件
+        Args:
+            key: 媒体标识
+            job: 下载并保存的任务
+
+        Returns:
+            (任务结果, 是否为其他任务执行的结果)，执行任务出错时其他任务得到 None
+        """
+        future = self._inflight.get(key)
+        if future is not None:
+            return await asyncio.shield(future), True
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        result = None
+        try:
+            result = await job()
+            return result, False
+        finally:
+            self._inflight.pop(key, None)
+            future.set_result(result)
+
+    def submit(self, coro: Coroutine) -> asyncio.Task:
+        """
+        在后台执行下载任务（下载并保存），调用方不等待其完成，继续爬取
+        Args:
+            coro: 下载任务
+
+        Returns:
+
+        """
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._on_task_done)
+        return task
+
+    def _on_task_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            utils.logger.error(f"[MediaDownloadQueue] download task failed: {task.exception()}")
+
+    async def join(self):
+        """等待已提交的下载任务全部完成"""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    async def close(self):
+        """等待下载任务完成后关闭连接池"""
+        await self.join()
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+
+_queue: Optional[MediaDownloadQueue] = None
+
+
+def get_media_download_queue() -> MediaDownloadQueue:
+    """
+    获取进程内共享的媒体下载队列，并发上限读取配置 MEDIA_DOWNLOAD_CONCURRENCY 和 MEDIA_DOWNLOAD_PER_HOST_CONCURRENCY
+    Returns:
+
+    """
+    global _queue
+    if _queue is None:
+        _queue = MediaDownloadQueue(config.MEDIA_DOWNLOAD_CONCURRENCY, config.MEDIA_DOWNLOAD_PER_HOST_CONCURRENCY)
+    return _queue
+
+
+async def close_media_download_queue():
+    """等待后台下载任务完成并关闭连接池，在爬取结束时调用"""
+    global _queue
+    if _queue is None:
+        return
+    queue, _queue = _queue, None
+    if queue.pending:
+        utils.logger.info(f"[close_media_download_queue] waiting for {queue.pending} media downloads ...")
+    await queue.close()
@@ -0,0 +1,137 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 大文件流式下载：按块写入 .part 临时文件，内存占用只与块大小有关；
+#            中断后通过 HTTP Range 从已下载的位置继续，校验文件大小后原子重命名到目标路径
+import asyncio
+import os
+import re
+from typing import Dict, Optional
+
+import aiofiles
+import httpx
+
+from tools import utils
+
+# 每次读取并写入文件的块大小
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# 网络错误时的重试次数，每次重试都从已下载的位置继续
+DOWNLOAD_MAX_RETRIES = 3
+
+_CONTENT_RANGE_TOTAL = re.compile(r"/(\d+)\s*$")
+
+
+def get_part_path(file_path: str) -> str:
+    return f"{file_path}.part"
+
+
+def _total_size(response: httpx.Response, offset: int) -> Optional[int]:
+    """根据响应头计算文件总大小，206响应读取 Content-Range，200响应读取 Content-Length"""
+    if response.status_code == 206:
+        match = _CONTENT_RANGE_TOTAL.search(response.headers.get("Content-Range", ""))
+        if match:
+            return int(match.group(1))
+    content_length = response.headers.get("Content-Length")
+    if content_length and content_length.isdigit():
+        return int(content_length) + (offset if response.status_code == 206 else 0)
+    return None
+
+
+async def _stream_to_part(client: httpx.AsyncClient, url: str, headers: Dict, timeout: float, part_path: str,
+                          offset: int, chunk_size: int) -> Optional[int]:
+    """
+    发送一次请求并把响应按块写入 .part 文件
+    Returns:
+        响应头中的文件总大小（未知时为0），请求失败时返回 None
+    """
+    async with client.stream("GET", url, headers=headers, timeout=timeout) as response:
+        if response.status_code == 416 and offset:
+            # 请求的起始位置超出文件大小，说明上次已经下载完整
+            return 0
+        if response.status_code not in (200, 206):
+            utils.logger.error(f"[download_to_file] request {url} err, status: {response.status_code}")
+            return None
+        if response.status_code == 200:
+            # 服务端不支持Range时返回完整内容，从头开始写入
+            offset = 0
+        total_size = _total_size(response, offset) or 0
+        async with aiofiles.open(part_path, "ab" if offset else "wb") as f:
+            async for chunk in response.aiter_bytes(chunk_size):
+                await f.write(chunk)
+        return total_size
+
+
+async def download_to_file(url: str, file_path: str, headers: Optional[Dict] = None, proxies=None,
+                           timeout: float = 60, expected_size: Optional[int] = None,
+                           chunk_size: int = DOWNLOAD_CHUNK_SIZE, max_retries: int = DOWNLOAD_MAX_RETRIES,
+                           client: Optional[httpx.AsyncClient] = None) -> bool:
+    """
+    流式下载文件，已存在的 .part 文件会通过 Range 请求续传
+    Args:
+        url: 下载地址
+        file_path: 目标文件路径，下载完成并校验大小后才会出现
+        headers: 请求头
+        proxies: 代理
+        timeout: 超时时间（秒）
+        expected_size: 期望的文件大小（字节），为空时使用响应头中的大小
+        chunk_size: 块大小（字节）
+        max_retries: 网络错误时的重试次数
+        client: 复用的客户端，为空时每次请求新建客户端（此时使用 proxies）
+
+    Returns:
+        是否下载成功
+    """
+    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+    part_path = get_part_path(file_path)
+    client_kwargs = {}
+    if proxies:
+        client_kwargs["proxies"] = proxies
+
+    total_size = expected_size
+    for attempt in range(max_retries + 1):
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        if expected_size is not None and offset > expected_size:
+            os.remove(part_path)
+            offset = 0
+        if expected_size is not None and offset == expected_size:
+            break
+        request_headers = dict(headers or {})
+        if offset:
+            request_headers["Range"] = f"bytes={offset}-"
+        try:
+            if client is not None:
+                header_size = await _stream_to_part(client, url, request_headers, timeout, part_path, offset, chunk_size)
+            else:
+                async with httpx.AsyncClient(**client_kwargs) as new_client:
+                    header_size = await _stream_to_part(new_client, url, request_headers, timeout, part_path, offset,
+                                                      chunk_size)
+            if header_size is None:
+                return False
+            total_size = total_size or header_size or None
+            break
+        except httpx.HTTPError as e:
+            if attempt >= max_retries:
+                utils.logger.error(f"[download_to_file] download {url} failed after {max_retries} retries: {e}")
+                return False
+            utils.logger.warning(f"[download_to_file] download {url} interrupted, resume later: {e}")
+            await asyncio.sleep(2 ** attempt)
+
+    size = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    if total_size is not None and size != total_size:
+        utils.logger.error(f"[download_to_file] size mismatch for {url}: expected {total_size}, got {size}")
+        if size > total_size:
+            os.remove(part_path)
+        return False
+    os.replace(part_path, file_path)
+    utils.logger.info(f"[download_to_file] download {url} to {file_path} success, size: {size}")
+    return True
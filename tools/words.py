@@ -12,7 +12,11 @@
 import asyncio
 import json
 import logging
+import os
+import time
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set
 
 import aiofiles
 import jieba
@@ -24,7 +28,46 @@ from tools import utils
 
 plot_lock = asyncio.Lock()
 
+# 分词进程池，所有词云生成器共用
+_segment_executor: Optional[ProcessPoolExecutor] = None
+
+# 分词子进程中的停用词
+_worker_stop_words: Set[str] = set()
+
+
+def _init_segment_worker(stop_words: Set[str], custom_words: Iterable[str]):
+    global _worker_stop_words
+    logging.getLogger('jieba').setLevel(logging.WARNING)
+    _worker_stop_words = stop_words
+    for word in custom_words:
+        jieba.add_word(word)
+
+
+def _segment_texts(texts: List[str]) -> Counter:
+    """
+    在分词子进程中执行，返回这批文本的词频
+    """
+    text = ' '.join(texts)
+    return Counter(word for word in jieba.lcut(text) if word not in _worker_stop_words and len(word.strip()) > 0)
+
+
+def _get_segment_executor(stop_words: Set[str], custom_words: Iterable[str]) -> Optional[ProcessPoolExecutor]:
+    global _segment_executor
+    if config.WORDCLOUD_PROCESS_WORKERS <= 0:
+        return None
+    if _segment_executor is None:
+        _segment_executor = ProcessPoolExecutor(
+            max_workers=config.WORDCLOUD_PROCESS_WORKERS,
+            initializer=_init_segment_worker,
+            initargs=(stop_words, list(custom_words)),
+        )
+    return _segment_executor
+
+
 class AsyncWordCloudGenerator:
+    # 已创建的生成器，用于程序结束时统一生成词云
+    instances: List["AsyncWordCloudGenerator"] = []
+
     def __init__(self):
         logging.getLogger('jieba').setLevel(logging.WARNING)
         self.stop_words_file = config.STOP_WORDS_FILE
@@ -34,6 +77,12 @@ class AsyncWordCloudGenerator:
         for word, group in self.custom_words.items():
             jieba.add_word(word)
 
+        # 增量模式：save_words_prefix -> 累计词频 / 待分词文本 / 上次写入词频文件的时间
+        self._counters: Dict[str, Counter] = {}
+        self._pending: Dict[str, List[str]] = {}
+        self._last_write: Dict[str, float] = {}
+        AsyncWordCloudGenerator.instances.append(self)
+
     def load_stop_words(self):
         with open(self.stop_words_file, 'r', encoding='utf-8') as f:
             return set(f.read().strip().split('\n'))
@@ -57,27 +106,129 @@ class AsyncWordCloudGenerator:
 
     async def generate_word_cloud(self, word_freq, save_words_prefix):
         await plot_lock.acquire()
-        top_20_word_freq = {word: freq for word, freq in
-                            sorted(word_freq.items(), key=lambda item: item[1], reverse=True)[:20]}
-        wordcloud = WordCloud(
-            font_path=config.FONT_PATH,
-            width=800,
-            height=400,
-            background_color='white',
-            max_words=200,
-            stopwords=self.stop_words,
-            colormap='viridis',
-            contour_color='steelblue',
-            contour_width=1
-        ).generate_from_frequencies(top_20_word_freq)
-
-        # Save word cloud image
-        plt.figure(figsize=(10, 5), facecolor='white')
-        plt.imshow(wordcloud, interpolation='bilinear')
-
-        plt.axis('off')
-        plt.tight_layout(pad=0)
-        plt.savefig(f"{save_words_prefix}_word_cloud.png", format='png', dpi=300)
-        plt.close()
-
-        plot_lock.release()
\ No newline at end of file
+        try:
+            top_20_word_freq = {word: freq for word, freq in
+                                sorted(word_freq.items(), key=lambda item: item[1], reverse=True)[:20]}
+            wordcloud = WordCloud(
+                font_path=config.FONT_PATH,
+                width=800,
+                height=400,
+                background_color='white',
+                max_words=200,
+                stopwords=self.stop_words,
+                colormap='viridis',
+                contour_color='steelblue',
+                contour_width=1
+            ).generate_from_frequencies(top_20_word_freq)
+
+            # Save word cloud image
+            plt.figure(figsize=(10, 5), facecolor='white')
+            plt.imshow(wordcloud, interpolation='bilinear')
+
+            plt.axis('off')
+            plt.tight_layout(pad=0)
+            plt.savefig(f"{save_words_prefix}_word_cloud.png", format='png', dpi=300)
+            plt.close()
+        finally:
+            plot_lock.release()
+
+    def _get_counter(self, save_words_prefix: str) -> Counter:
+        counter = self._counters.get(save_words_prefix)
+        if counter is None:
+            # 同一天之前运行保存的词频作为初始值，后续只对新增记录分词
+            counter = Counter()
+            freq_file = f"{save_words_prefix}_word_freq.json"
+            if os.path.exists(freq_file):
+                try:
+                    with open(freq_file, 'r', encoding='utf-8') as f:
+                        counter.update(json.load(f))
+                except (OSError, ValueError) as e:
+                    utils.logger.warning(f"[AsyncWordCloudGenerator._get_counter] load {freq_file} error: {e}")
+            self._counters[save_words_prefix] = counter
+            self._last_write[save_words_prefix] = time.monotonic()
+        return counter
+
+    async def _segment_pending(self, save_words_prefix: str):
+        texts = self._pending.pop(save_words_prefix, [])
+        if not texts:
+            return
+        executor = _get_segment_executor(self.stop_words, self.custom_words.keys())
+        if executor is None:
+            word_freq = await asyncio.to_thread(
+                lambda: Counter(word for word in jieba.lcut(' '.join(texts))
+                                if word not in self.stop_words and len(word.strip()) > 0))
+        else:
+            word_freq = await asyncio.get_running_loop().run_in_executor(executor, _segment_texts, texts)
+        self._get_counter(save_words_prefix).update(word_freq)
+
+    async def _write_word_frequency(self, save_words_prefix: str):
+        freq_file = f"{save_words_prefix}_word_freq.json"
+        async with aiofiles.open(freq_file, 'w', encoding='utf-8') as file:
+            await file.write(json.dumps(self._get_counter(save_words_prefix), ensure_ascii=False, indent=4))
+        self._last_write[save_words_prefix] = time.monotonic()
+
+    async def add_items(self, data: List[Dict], save_words_prefix: str):
+        """
+        增量统计词频：只对新增记录分词，累计到该文件的词频中，按时间间隔写入词频文件，不生成词云图
+        Args:
+            data: 新增的记录列表
+            save_words_prefix: 词频/词云文件前缀
+
+        Returns:
+
+        """
+        texts = [item['content'] for item in data if item.get('content')]
+        if not texts:
+            return
+        async with self.lock:
+            self._get_counter(save_words_prefix)
+            pending = self._pending.setdefault(save_words_prefix, [])
+            pending.extend(texts)
+            if len(pending) >= config.WORDCLOUD_SEGMENT_BATCH_SIZE:
+                await self._segment_pending(save_words_prefix)
+            if time.monotonic() - self._last_write[save_words_prefix] >= config.WORDCLOUD_FREQ_FLUSH_INTERVAL:
+                await self._segment_pending(save_words_prefix)
+                await self._write_word_frequency(save_words_prefix)
+
+    async def render(self, save_words_prefix: str):
+        """
+        按需生成词云：先处理待分词的记录并写入词频文件，再生成词云图
+        Args:
+            save_words_prefix: 词频/词云文件前缀
+
+        Returns:
+
+        """
+        async with self.lock:
+            if save_words_prefix not in self._counters:
+                return
+            await self._segment_pending(save_words_prefix)
+            await self._write_word_frequency(save_words_prefix)
+            word_freq = Counter(self._counters[save_words_prefix])
+        if word_freq:
+            await self.generate_word_cloud(word_freq, save_words_prefix)
+
+    async def close(self):
+        """
+        为本次运行统计过的全部文件生成最终的词云，程序结束时调用
+        """
+        for save_words_prefix in list(self._counters.keys()):
+            try:
+                await self.render(save_words_prefix)
+            except Exception as e:
+                utils.logger.error(f"[AsyncWordCloudGenerator.close] render {save_words_prefix} error: {e}")
+        self._counters.clear()
+        self._pending.clear()
+        self._last_write.clear()
+
+
+async def close_all_word_clouds():
+    """
+    为所有词云生成器生成最终词云并关闭分词进程池
+    """
+    global _segment_executor
+    for generator in AsyncWordCloudGenerator.instances:
+        await generator.close()
+    if _segment_executor is not None:
+        _segment_executor.shutdown(wait=False)
+        _segment_executor = None
@@ -11,15 +11,23 @@
 
 from asyncio.tasks import Task
 from contextvars import ContextVar
-from typing import List, Union
+from typing import TYPE_CHECKING, List, Optional, Union
 
 import aiomysql
 
 from config.db_config import AsyncMysqlDB, AsyncSqliteDB
 
+if TYPE_CHECKING:
+    from dp_op.batch_writer import AsyncBatchWriter
+    from dp_op.crawl_checkpoint import CrawlCheckpoint
+    from dp_op.seen_index import SeenIndex
+
 request_keyword_var: ContextVar[str] = ContextVar("request_keyword", default="")
 crawler_type_var: ContextVar[str] = ContextVar("crawler_type", default="")
 comment_tasks_var: ContextVar[List[Task]] = ContextVar("comment_tasks", default=[])
 media_crawler_db_var: ContextVar[Union[AsyncMysqlDB, 'AsyncSqliteDB']] = ContextVar("media_crawler_db_var")
 db_conn_pool_var: ContextVar[aiomysql.Pool] = ContextVar("db_conn_pool_var")
+db_batch_writer_var: ContextVar[Optional['AsyncBatchWriter']] = ContextVar("db_batch_writer_var", default=None)
+seen_index_var: ContextVar[Optional['SeenIndex']] = ContextVar("seen_index_var", default=None)
+crawl_checkpoint_var: ContextVar[Optional['CrawlCheckpoint']] = ContextVar("crawl_checkpoint_var", default=None)
 source_keyword_var: ContextVar[str] = ContextVar("source_keyword", default="")
\ No newline at end of file